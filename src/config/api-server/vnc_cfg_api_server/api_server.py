@@ -92,6 +92,7 @@ from .context import get_request, get_context, set_context, use_context
 from .context import ApiContext
 from .context import is_internal_request
 from .event_dispatcher import EventDispatcher
+from .event_dispatcher import WatcherQueue
 from .resources import initialize_all_server_resource_classes
 from .vnc_db import VncDbClient
 
@@ -155,6 +156,8 @@ _ACTION_RESOURCES = [
      'method': 'POST', 'method_name': 'ref_relax_for_delete_http_post'},
     {'uri': '/fqname-to-id', 'link_name': 'name-to-id',
      'method': 'POST', 'method_name': 'fq_name_to_id_http_post'},
+    {'uri': '/fqnames-to-ids', 'link_name': 'names-to-ids',
+     'method': 'POST', 'method_name': 'fq_names_to_ids_http_post'},
     {'uri': '/id-to-fqname', 'link_name': 'id-to-name',
      'method': 'POST', 'method_name': 'id_to_fq_name_http_post'},
     {'uri': '/useragent-kv', 'link_name': 'useragent-keyvalue',
@@ -181,6 +184,12 @@ _ACTION_RESOURCES = [
      'method': 'GET', 'method_name': 'dump_cache'},
     {'uri': '/obj-cache', 'link_name': 'obj-cache',
      'method': 'POST', 'method_name': 'dump_cache'},
+    {'uri': '/obj-cache-stats', 'link_name': 'obj-cache-stats',
+     'method': 'GET', 'method_name': 'dump_cache_stats'},
+    {'uri': '/uuid-cache-stats', 'link_name': 'uuid-cache-stats',
+     'method': 'GET', 'method_name': 'dump_uuid_cache_stats'},
+    {'uri': '/fqname-cache-stats', 'link_name': 'fqname-cache-stats',
+     'method': 'GET', 'method_name': 'dump_fq_name_cache_stats'},
     {'uri': '/execute-job', 'link_name': 'execute-job',
      'method': 'POST', 'method_name': 'execute_job_http_post'},
     {'uri': '/abort-job', 'link_name': 'abort-job',
@@ -193,6 +202,8 @@ _ACTION_RESOURCES = [
      'method': 'POST', 'method_name': 'hbs_get'},
     {'uri': '/watch', 'link_name': 'watch',
      'method': 'GET', 'method_name': 'watch'},
+    {'uri': '/watch-stats', 'link_name': 'watch-stats',
+     'method': 'GET', 'method_name': 'dump_watch_stats'},
 ]
 
 _MANDATORY_PROPS = [
@@ -429,11 +440,8 @@ class VncApiServer(object):
         bottle.response.set_header("Content-Type", "text/event-stream")
         bottle.response.set_header("Cache-Control", "no-cache")
 
-        class WatcherQueue(gevent.queue.Queue):
-            def __init__(self, query):
-                self.query = query
-                super(WatcherQueue, self).__init__()
-        client_queue = WatcherQueue(resources_query)
+        client_queue = WatcherQueue(
+            resources_query, client=bottle.request.remote_addr)
         dispatcher = EventDispatcher()
         try:
             dispatcher.subscribe_client(client_queue, resources)
@@ -2843,6 +2851,26 @@ class VncApiServer(object):
         return self._db_conn._object_db._obj_cache_mgr.dump_cache(
             obj_uuids=obj_uuids, count=count)
 
+    def dump_cache_stats(self):
+        self._post_common(None, {})
+
+        return self._db_conn._object_db._obj_cache_mgr.get_stats()
+
+    def dump_uuid_cache_stats(self):
+        self._post_common(None, {})
+
+        return self._db_conn._object_db.get_uuid_cache_stats()
+
+    def dump_fq_name_cache_stats(self):
+        self._post_common(None, {})
+
+        return self._db_conn._object_db.get_fq_name_cache_stats()
+
+    def dump_watch_stats(self):
+        self._post_common(None, {})
+
+        return EventDispatcher().get_watcher_stats()
+
     # chmod for an object
     def obj_chmod_http_post(self):
         try:
@@ -3276,6 +3304,52 @@ class VncApiServer(object):
         return {'uuid': id}
     # end fq_name_to_id_http_post
 
+    def fq_names_to_ids_http_post(self):
+        self._post_common(None, {})
+        type = get_request().json.get('type')
+        res_type, r_class = self._validate_resource_type(type)
+        obj_type = r_class.object_type
+        fq_names = get_request().json.get('fq_names')
+        if (not isinstance(fq_names, list) or
+                not all(isinstance(fq_name, list) for fq_name in fq_names)):
+            raise cfgm_common.exceptions.HttpError(
+                400, 'fq_names must be a list of fq_names')
+
+        ids = self._db_conn.fq_names_to_uuids(obj_type, fq_names)
+        for i, fq_name in enumerate(fq_names):
+            if ids[i] is None and obj_type in ['domain', 'project']:
+                try:
+                    self._extension_mgrs['resourceApi'].map_method(
+                        'pre_%s_read_fqname' %(obj_type), fq_name)
+                    ids[i] = self._db_conn.fq_name_to_uuid(obj_type, fq_name)
+                except Exception as e:
+                    self.config_log(
+                        "fq_names_to_ids_http_post error: " + str(e),
+                        level=SandeshLevel.SYS_DEBUG)
+
+        # fetch the perms of the ids found in one DB call, names of ids the
+        # user has no access to are not found
+        found_ids = [obj_uuid for obj_uuid in ids if obj_uuid is not None]
+        id_perms = {}
+        if found_ids and (self.is_rbac_enabled() or self.is_auth_needed()):
+            if self.is_rbac_enabled():
+                fields = ['perms2']
+            else:
+                fields = ['id_perms']
+            id_perms = {obj_dict['uuid']: obj_dict for obj_dict in
+                        self._db_conn._object_db.object_raw_read(
+                            obj_type, found_ids, fields)}
+        for i, obj_uuid in enumerate(ids):
+            if obj_uuid is None:
+                continue
+            ok, result = self._permissions.check_perms_read(
+                get_request(), obj_uuid, id_perms.get(obj_uuid))
+            if not ok:
+                ids[i] = None
+
+        return {'uuids': ids}
+    # end fq_names_to_ids_http_post
+
     def id_to_fq_name_http_post(self):
         self._post_common(None, {})
         obj_uuid = get_request().json['uuid']
@@ -3487,6 +3561,9 @@ class VncApiServer(object):
     def sigterm_handler(self, exit_arg=None):
         if exit_arg:
             self.config_log(exit_arg, level=SandeshLevel.SYS_ERR)
+        if self._db_conn:
+            # give back the unused ID blocks to the other workers
+            self._db_conn.release_id_leases()
         exit(exit_arg)
 
     # sighup handler for applying new configs
@@ -3561,6 +3638,9 @@ class VncApiServer(object):
         debug_obj_cache_types = \
             [t.replace('-', '_').strip() for t in
              self._args.debug_object_cache_types.split(',')]
+        prop_index_fields = \
+            [f.replace('-', '_').strip() for f in
+             self._args.prop_index_fields.split(',') if f.strip()]
 
         db_engine = self._args.db_engine
         self._db_engine = db_engine
@@ -3584,6 +3664,19 @@ class VncApiServer(object):
             obj_cache_entries=obj_cache_entries,
             obj_cache_exclude_types=obj_cache_exclude_types,
             debug_obj_cache_types=debug_obj_cache_types,
+            obj_cache_coherency=self._args.object_cache_coherency,
+            obj_cache_max_staleness=float(
+                self._args.object_cache_max_staleness),
+            prop_index_fields=prop_index_fields,
+            db_walk_chunk_size=int(self._args.db_walk_chunk_size),
+            db_walk_concurrency=int(self._args.db_walk_concurrency),
+            uuid_cache_entries=int(self._args.uuid_cache_entries),
+            fq_name_cache_entries=int(self._args.fq_name_cache_entries),
+            fq_name_cache_ttl=float(self._args.fq_name_cache_ttl),
+            fq_name_negative_cache_ttl=float(
+                self._args.fq_name_negative_cache_ttl),
+            db_resync_high_water_mark=self._args.db_resync_high_water_mark,
+            zk_id_lease_size=int(self._args.zk_id_lease_size),
             cassandra_use_ssl=self._args.cassandra_use_ssl,
             cassandra_ca_certs=self._args.cassandra_ca_certs,
             cassandra_driver=self._args.cassandra_driver,
@@ -3915,6 +4008,11 @@ class VncApiServer(object):
                 'rule_field': '',
                 'rule_perms': [{'role_name':'*', 'role_crud':'CRUD'}]
             },
+            {
+                'rule_object':'fqnames-to-ids',
+                'rule_field': '',
+                'rule_perms': [{'role_name':'*', 'role_crud':'CRUD'}]
+            },
             {
                 'rule_object':'id-to-fqname',
                 'rule_field': '',
@@ -4287,8 +4385,11 @@ class VncApiServer(object):
                 ):
             try:
                 type = field_info[0]
-                for link in obj_dict[field]:
-                    link['href'] = self.generate_url(type, link['uuid'])
+                # links can be shared read-only dicts of the object cache,
+                # build new ones instead of updating them in place
+                obj_dict[field] = [
+                    dict(link, href=self.generate_url(type, link['uuid']))
+                    for link in obj_dict[field]]
             except KeyError:
                 pass
 
@@ -7,7 +7,9 @@ to specific client queues
 """
 from __future__ import absolute_import
 
+from collections import deque
 import json
+import time
 
 from cfgm_common import vnc_greenlets
 from cfgm_common.utils import detailed_traceback
@@ -21,15 +23,74 @@ monkey.patch_all()
 OP_DELETE = "DELETE"
 
 
+class WatcherQueue(Queue):
+    """Queue of the events to send to a /watch client, it measures how
+    far behind the client is"""
+    def __init__(self, query, client=None):
+        self.query = query
+        self.client = client
+        self.events_queued = 0
+        self.events_sent = 0
+        self.events_dropped = 0
+        # time spent queued by the last event sent and the worst one
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self._queued_at = deque()
+        super(WatcherQueue, self).__init__()
+
+    def _put(self, item):
+        self._queued_at.append(time.time())
+        self.events_queued += 1
+        super(WatcherQueue, self)._put(item)
+
+    def _get(self):
+        item = super(WatcherQueue, self)._get()
+        self.lag = time.time() - self._queued_at.popleft()
+        self.max_lag = max(self.max_lag, self.lag)
+        self.events_sent += 1
+        return item
+
+    def drop_pending(self):
+        # the pending events are discarded, they are not counted as sent
+        # nor do they account for the lag
+        dropped = self.qsize()
+        self.queue.clear()
+        self._queued_at.clear()
+        self.events_dropped += dropped
+        return dropped
+
+    def get_stats(self):
+        oldest_pending = 0.0
+        if self._queued_at:
+            oldest_pending = time.time() - self._queued_at[0]
+        return {
+            'client': self.client,
+            'events_queued': self.events_queued,
+            'events_sent': self.events_sent,
+            'events_dropped': self.events_dropped,
+            'lag': self.lag,
+            'max_lag': self.max_lag,
+            'oldest_pending_event_age': oldest_pending,
+        }
+# end class WatcherQueue
+
+
 class ResourceWatcher(object):
     def __init__(self):
-        self.obj_fields = []
+        # number of subscribers requesting each field, a field is read
+        # as long as one subscriber requests it
+        self._field_refs = {}
         self.queues = []
 
+    @property
+    def obj_fields(self):
+        return list(self._field_refs)
+
     def add(self, client_queue, resource_type):
         requested_fields = client_queue.query.get(
             resource_type, {"fields": ["all"]})["fields"]
-        self.obj_fields += requested_fields
+        for field in set(requested_fields):
+            self._field_refs[field] = self._field_refs.get(field, 0) + 1
         self.queues.append(client_queue)
 
     def remove(self, client_queue, resource_type):
@@ -37,16 +98,22 @@ class ResourceWatcher(object):
             resource_type, {"fields": ["all"]})["fields"]
         try:
             self.queues.remove(client_queue)
-            for field in requested_fields:
-                self.obj_fields.remove(field)
         except ValueError:
-            pass
+            return
+        for field in set(requested_fields):
+            refs = self._field_refs.pop(field, 0) - 1
+            if refs > 0:
+                self._field_refs[field] = refs
 
 
 class EventDispatcher(object):
     _notification_queue = Queue()
     _watchers = {}
     _db_conn = None
+    # events pending in a client queue before the client is dropped,
+    # 0 for no limit
+    _max_pending_events = 0
+    _dropped_watchers = 0
 
     @classmethod
     def _set_notification_queue(cls, notify_queue):
@@ -78,6 +145,11 @@ class EventDispatcher(object):
         return cls._db_conn
     # end _get_db_conn
 
+    @classmethod
+    def _set_max_pending_events(cls, max_pending_events):
+        cls._max_pending_events = max_pending_events
+    # end _set_max_pending_events
+
     @classmethod
     def _subscribe_client_queue(cls, client_queue, resource_type):
         cls._watchers.update({
@@ -91,9 +163,12 @@ class EventDispatcher(object):
         cls._watchers.get(resource_type).remove(client_queue, resource_type)
     # end _unsubscribe_client_queue
 
-    def __init__(self, db_client_mgr=None, spawn_dispatch_greenlet=False):
+    def __init__(self, db_client_mgr=None, spawn_dispatch_greenlet=False,
+                 max_pending_events=None):
         if db_client_mgr:
             self._set_db_conn(db_client_mgr)
+        if max_pending_events is not None:
+            self._set_max_pending_events(max_pending_events)
         if spawn_dispatch_greenlet:
             self._dispatch_greenlet = vnc_greenlets.VncGreenlet(
                 "Event Dispatcher", self.dispatch)
@@ -156,16 +231,66 @@ class EventDispatcher(object):
         return resource_oper, obj_dict
     # end dbe_obj_read
 
+    def put_event(self, client_queue, resource_type, event):
+        if (self._max_pending_events and
+                client_queue.qsize() >= self._max_pending_events):
+            self.drop_client_queue(client_queue, resource_type)
+            return
+        client_queue.put_nowait(event)
+    # end put_event
+
+    def drop_client_queue(self, client_queue, resource_type):
+        # the client does not keep up, stop sending events and replace the
+        # pending ones by a stop event so that the watch ends right away
+        for watched_type, watcher in list(self._watchers.items()):
+            if client_queue in watcher.queues:
+                self._unsubscribe_client_queue(client_queue, watched_type)
+        pending = client_queue.drop_pending()
+        EventDispatcher._dropped_watchers += 1
+        err_msg = "Watcher dropped with %d events pending" % pending
+        self.config_log("%s: %s" % (err_msg, getattr(
+            client_queue, 'client', None)), level=SandeshLevel.SYS_NOTICE)
+        client_queue.put_nowait(self.pack(
+            event="stop",
+            data={resource_type.replace("_", "-"): {"error": err_msg}}
+        ))
+    # end drop_client_queue
+
     def process_delete(self, resource_type, resource_id):
         object_type = resource_type.replace("_", "-")
         obj_dict = {"uuid": resource_id}
-        for client_queue in self._watchers.get(resource_type).queues:
-            event = self.pack(
-                event=OP_DELETE,
+        event = self.pack(
+            event=OP_DELETE,
+            data={object_type: obj_dict}
+        )
+        for client_queue in self._watchers.get(resource_type).queues[:]:
+            self.put_event(client_queue, resource_type, event)
+    # process_delete
+
+    def pack_fields(self, resource_oper, object_type, obj_dict, fields):
+        if "all" in fields:
+            return self.pack(
+                event=str(resource_oper),
                 data={object_type: obj_dict}
             )
-            client_queue.put_nowait(event)
-    # process_delete
+
+        obj_with_fields = {
+            'uuid': obj_dict.get("uuid"),
+            'fq_name': obj_dict.get("fq_name"),
+            'parent_type': obj_dict.get("parent_type"),
+            'parent_uuid': obj_dict.get("parent_uuid")
+        }
+        for field in fields:
+            try:
+                obj_with_fields[field] = obj_dict[field]
+            except KeyError:
+                # Property/field not set for this object
+                pass
+        return self.pack(
+            event=str(resource_oper),
+            data={object_type: obj_with_fields}
+        )
+    # end pack_fields
 
     def process_notification(self, notification, obj_fields, client_queues):
         if len(client_queues) == 0:
@@ -192,35 +317,21 @@ class EventDispatcher(object):
         # [2]-Existing watchers might have unsubscribed their
         # queues, so send event only to the remaining queues
         # original list of queues.
+        #
+        # The event is packed once per distinct set of requested fields
+        # and shared by the queues requesting it.
+        events = {}
         for client_queue in list(set(client_queues).intersection(set(
                 self._watchers.get(resource_type).queues))):
             fields = client_queue.query.get(
                 resource_type, {"fields": ["all"]})["fields"]
-            if "all" in fields:
-                event = self.pack(
-                    event=str(resource_oper),
-                    data={object_type: obj_dict}
-                )
-                client_queue.put_nowait(event)
-                continue
-
-            obj_with_fields = {
-                'uuid': obj_dict.get("uuid"),
-                'fq_name': obj_dict.get("fq_name"),
-                'parent_type': obj_dict.get("parent_type"),
-                'parent_uuid': obj_dict.get("parent_uuid")
-            }
-            for field in fields:
-                try:
-                    obj_with_fields[field] = obj_dict[field]
-                except KeyError:
-                    # Property/field not set for this object
-                    pass
-            event = self.pack(
-                event=str(resource_oper),
-                data={object_type: obj_with_fields}
-            )
-            client_queue.put_nowait(event)
+            fields_key = "all" if "all" in fields else frozenset(fields)
+            try:
+                event = events[fields_key]
+            except KeyError:
+                event = events[fields_key] = self.pack_fields(
+                    resource_oper, object_type, obj_dict, fields)
+            self.put_event(client_queue, resource_type, event)
     # end process_notification
 
     def dispatch(self):
@@ -298,4 +409,26 @@ class EventDispatcher(object):
         self._notification_queue.put_nowait(notification)
     # end notify_event_dispatcher
 
+    def get_watcher_stats(self):
+        watchers = {}
+        for resource_type, watcher in self._watchers.items():
+            for client_queue in watcher.queues:
+                try:
+                    stats = watchers[id(client_queue)]
+                except KeyError:
+                    stats = watchers[id(client_queue)] = {
+                        'resource_types': [],
+                        'pending_events': client_queue.qsize(),
+                    }
+                    if isinstance(client_queue, WatcherQueue):
+                        stats.update(client_queue.get_stats())
+                stats['resource_types'].append(resource_type)
+        return {
+            'max_pending_events': self._max_pending_events,
+            'dropped_watchers': self._dropped_watchers,
+            'pending_notifications': self._notification_queue.qsize(),
+            'watchers': list(watchers.values()),
+        }
+    # end get_watcher_stats
+
 # end class EventDispatcher
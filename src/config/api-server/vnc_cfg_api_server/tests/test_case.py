@@ -9,6 +9,9 @@ logger = logging.getLogger(__name__)
 from cfgm_common.utils import _DEFAULT_ZK_DB_RESYNC_PATH_PREFIX
 from cfgm_common.utils import _DEFAULT_ZK_DB_SYNC_COMPLETE_ZNODE_PATH_PREFIX
 from cfgm_common.utils import _DEFAULT_ZK_LOCK_TIMEOUT
+from cfgm_common.utils import _DEFAULT_ZK_DB_RESYNC_CHECKPOINT_PATH_PREFIX
+from vnc_cfg_api_server.vnc_db import DbResyncCheckpoint
+from vnc_cfg_api_server.vnc_db import RESYNC_SERIAL_TYPE_GROUPS
 
 from cfgm_common.utils import (
     _DEFAULT_ZK_DB_SYNC_COMPLETE_ZNODE_PATH_PREFIX
@@ -177,4 +180,55 @@ class TestAPIServerDBresync(ApiServerTestCase):
         # so other test cases runs from the begining
         mock_zk._zk_client.update_node(PATH_SYNC, '2011')
 
+    def test_db_resync_resumes_from_checkpoint(self):
+        DB_RESYNC = self._api_server._db_conn
+        DB_RESYNC_original = self._api_server._db_conn._dbe_resync
+        zk_client = self._api_server._db_conn._zk_db._zk_client
+        self._api_server._args.contrail_version = '21.5'
+
+        # a previous resync of that version was interrupted after
+        # virtual networks were resynced
+        checkpoint = DbResyncCheckpoint(zk_client, '21.5', 'crashed')
+        checkpoint.set_done('virtual_network')
+
+        resynced_types = []
+        def mock_db_resync(obj_type, obj_uuids):
+            resynced_types.append(obj_type)
+            return DB_RESYNC_original(obj_type, obj_uuids)
+
+        # kazoo returns the znode values as bytes
+        read_node_original = zk_client.read_node
+        def mock_read_node(path, *args, **kwargs):
+            value = read_node_original(path, *args, **kwargs)
+            if isinstance(value, str):
+                value = value.encode()
+            return value
+
+        with mock.patch.object(DB_RESYNC, '_dbe_resync',
+                               side_effect=mock_db_resync), \
+                mock.patch.object(zk_client, 'read_node',
+                                  side_effect=mock_read_node):
+            self._api_server._db_conn._db_resync_done.clear()
+            self._api_server._db_init_entries()
+            self._api_server._db_conn.wait_for_resync_done()
+
+        try:
+            self.assertNotIn('virtual_network', resynced_types)
+            self.assertIn('project', resynced_types)
+            # dependent types are resynced one after the other
+            for first, second in RESYNC_SERIAL_TYPE_GROUPS:
+                if first in resynced_types and second in resynced_types:
+                    self.assertLess(
+                        max(i for i, t in enumerate(resynced_types)
+                            if t == first),
+                        min(i for i, t in enumerate(resynced_types)
+                            if t == second))
+            self.assertEqual('21.5', zk_client.read_node(PATH_SYNC))
+            # checkpoints are removed once the resync completes
+            self.assertFalse(zk_client.exists(
+                '%s/21.5' % _DEFAULT_ZK_DB_RESYNC_CHECKPOINT_PATH_PREFIX))
+        finally:
+            zk_client.update_node(PATH_SYNC, '2011')
+            self._api_server._args.contrail_version = '2011'
+
 #END of TestAPIServerDBresync
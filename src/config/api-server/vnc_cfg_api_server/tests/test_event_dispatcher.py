@@ -4,6 +4,7 @@ import json
 import gevent
 
 from ..event_dispatcher import EventDispatcher
+from ..event_dispatcher import WatcherQueue as DispatcherWatcherQueue
 
 from testtools import TestCase
 from flexmock import flexmock
@@ -106,12 +107,11 @@ class TestRegisterClient(TestCase):
         expected_request_fields = [
             "routing_instances",
             "id_perms",
-            "display_name",
-            "id_perms"]
+            "display_name"]
         for resource_type in watcher_resource_types:
             result_request_fields = self._dispatcher._get_watchers()[
                 resource_type].obj_fields
-            self.assertEquals(len(result_request_fields), 4)
+            self.assertEquals(len(result_request_fields), 3)
             self.assertEquals(
                 set(expected_request_fields),
                 set(result_request_fields))
@@ -810,3 +810,133 @@ class TestInitialize(TestCase):
                 ),
                 self._dispatcher.initialize(resource_type)
             )
+
+
+class TestFanOut(TestCase):
+    def setUp(self):
+        self._dispatcher = EventDispatcher()
+        self.reads = []
+        vn_resp = {
+            'uuid': '123',
+            'fq_name': ['default-domain', 'default-project', 'vn'],
+            'parent_type': 'project',
+            'parent_uuid': '71d08380',
+            'display_name': 'vn',
+            'id_perms': {},
+            'routing_instances': []}
+
+        def dbe_read(resource_type, resource_id, obj_fields=None):
+            self.reads.append(obj_fields)
+            return True, vn_resp
+
+        mockVncDBClient = flexmock(dbe_read=dbe_read)
+        mockVncDBClient.should_receive('config_log').and_return()
+        self._dispatcher._set_db_conn(mockVncDBClient)
+        self.dropped_before = self._dispatcher.get_watcher_stats()[
+            "dropped_watchers"]
+        super(TestFanOut, self).setUp()
+
+    def tearDown(self):
+        self._dispatcher._set_notification_queue(Queue())
+        self._dispatcher._set_watchers({})
+        self._dispatcher._set_db_conn(None)
+        self._dispatcher._set_max_pending_events(0)
+        super(TestFanOut, self).tearDown()
+
+    def subscribe(self, *fields_list):
+        client_queues = []
+        for fields in fields_list:
+            query = {}
+            if fields:
+                query = {"virtual_network": {"fields": fields}}
+            client_queue = DispatcherWatcherQueue(query)
+            self._dispatcher.subscribe_client(
+                client_queue, ["virtual_network"])
+            client_queues.append(client_queue)
+        return client_queues
+
+    def notify_update(self):
+        watcher = self._dispatcher._get_watchers()["virtual_network"]
+        self._dispatcher.process_notification(
+            {"oper": "UPDATE", "type": "virtual_network", "uuid": "123"},
+            watcher.obj_fields, watcher.queues[:])
+
+    def test_single_read_with_union_of_fields(self):
+        self.subscribe(*([["display_name", "id_perms"]] * 50 +
+                         [["id_perms", "routing_instances"]] * 50))
+        self.notify_update()
+        self.assertEquals(1, len(self.reads))
+        self.assertEquals(
+            set(["display_name", "id_perms", "routing_instances"]),
+            set(self.reads[0]))
+        self.assertEquals(3, len(self.reads[0]))
+
+    def test_event_shared_by_field_set(self):
+        queues_xy = self.subscribe(*[["display_name", "id_perms"]] * 3)
+        queues_yx = self.subscribe(["id_perms", "display_name"])
+        queues_z = self.subscribe(["routing_instances"])
+        queues_all = self.subscribe(None, None)
+        self.notify_update()
+
+        events_xy = [q.get_nowait() for q in queues_xy + queues_yx]
+        self.assertTrue(all(event is events_xy[0] for event in events_xy))
+        event_z = queues_z[0].get_nowait()
+        self.assertIsNot(events_xy[0], event_z)
+        self.assertNotIn("display_name", json.loads(event_z["data"])[
+            "virtual-network"])
+        events_all = [q.get_nowait() for q in queues_all]
+        self.assertIs(events_all[0], events_all[1])
+        self.assertIn("routing_instances", json.loads(events_all[0]["data"])[
+            "virtual-network"])
+
+    def test_delete_event_shared(self):
+        client_queues = self.subscribe(["display_name"], None)
+        self._dispatcher.process_notification(
+            {"oper": "DELETE", "type": "virtual_network", "uuid": "123"},
+            ["display_name", "all"], client_queues)
+        self.assertIs(client_queues[0].get_nowait(),
+                      client_queues[1].get_nowait())
+        self.assertEquals([], self.reads)
+
+    def test_slow_consumer_dropped(self):
+        self._dispatcher._set_max_pending_events(3)
+        slow_queue, fast_queue = self.subscribe(None, ["display_name"])
+        for _ in range(5):
+            self.notify_update()
+            fast_queue.get_nowait()
+
+        self.assertEquals([fast_queue], self._dispatcher._get_watchers()[
+            "virtual_network"].queues)
+        self.assertEquals(["display_name"], self._dispatcher._get_watchers()[
+            "virtual_network"].obj_fields)
+        # pending events are replaced by a stop event
+        self.assertEquals(1, slow_queue.qsize())
+        slow_stats = slow_queue.get_stats()
+        self.assertEquals(3, slow_stats["events_dropped"])
+        self.assertEquals(0, slow_stats["events_sent"])
+        self.assertEquals(0.0, slow_stats["lag"])
+        event = slow_queue.get_nowait()
+        self.assertEquals("stop", event["event"])
+        self.assertIn("3 events pending", event["data"])
+        self.assertEquals(1, self._dispatcher.get_watcher_stats()[
+            "dropped_watchers"] - self.dropped_before)
+
+    def test_watcher_lag_stats(self):
+        client_queue, = self.subscribe(["display_name"])
+        self.notify_update()
+        self.notify_update()
+        gevent.sleep(0.05)
+        client_queue.get_nowait()
+
+        stats = self._dispatcher.get_watcher_stats()
+        self.assertEquals(1, len(stats["watchers"]))
+        watcher_stats = stats["watchers"][0]
+        self.assertEquals(["virtual_network"],
+                          watcher_stats["resource_types"])
+        self.assertEquals(1, watcher_stats["pending_events"])
+        self.assertEquals(2, watcher_stats["events_queued"])
+        self.assertEquals(1, watcher_stats["events_sent"])
+        self.assertGreaterEqual(watcher_stats["lag"], 0.05)
+        self.assertGreaterEqual(
+            watcher_stats["oldest_pending_event_age"], 0.05)
+
@@ -1716,6 +1716,38 @@ class TestPermissions(test_case.ApiServerTestCase):
         self.admin.vnc_lib.logical_router_update(lr)
 
 
+    def test_rbac_rules_from_object_cache(self):
+        # the API access lists are read from the object cache, the rules
+        # collapsed for each request must not modify the cached ones
+        cache_mgr = self._api_server._db_conn._object_db._obj_cache_mgr
+        global_rg = vnc_read_obj(self.admin.vnc_lib, 'api-access-list',
+            name=['default-global-system-config', 'default-api-access-list'])
+        vnc_aal_add_rule(self.admin.vnc_lib, global_rg,
+                         '* %s:R' % self.alice.role)
+        self.addCleanup(vnc_aal_del_rule, self.admin.vnc_lib, global_rg,
+                        '* %s:R' % self.alice.role)
+
+        vn = VirtualNetwork('alice-vn-%s' % self.id(),
+                            self.alice.project_obj)
+        self.alice.vnc_lib.virtual_network_create(vn)
+        for _ in range(3):
+            self.alice.vnc_lib.virtual_network_read(id=vn.uuid)
+        self.alice.vnc_lib.virtual_network_delete(id=vn.uuid)
+
+        for rg_uuid in (self.alice.proj_rg.uuid, global_rg.uuid):
+            cached = cache_mgr._cache.get(rg_uuid)
+            self.assertIsNotNone(cached)
+            for rule in cached.obj_dict['api_access_list_entries'][
+                    'rbac_rule']:
+                self.assertNotEqual('*', rule['rule_field'])
+        # the project rule is not merged in the global one
+        cached = cache_mgr._cache[global_rg.uuid]
+        for rule in cached.obj_dict['api_access_list_entries']['rbac_rule']:
+            if rule['rule_object'] == '*':
+                perms = dict((perm['role_name'], perm['role_crud'])
+                             for perm in rule['rule_perms'])
+                self.assertEqual('R', perms[self.alice.role])
+
     def test_rbac_vpg_ownership(self):
 
         rv = self.admin.vnc_lib.set_aaa_mode("rbac")
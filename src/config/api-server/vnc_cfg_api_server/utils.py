@@ -97,6 +97,17 @@ def parse_args(args_str):
         'object_cache_entries': '10000', # max number of objects cached for read
         'object_cache_exclude_types': '', # csv of object types to *not* cache
         'debug_object_cache_types': '', # csv of object types to debug cache
+        'object_cache_coherency': 'timestamp', # 'timestamp' or 'notify'
+        'object_cache_max_staleness': '300', # in seconds, 'notify' mode only
+        'prop_index_fields': '', # csv of <object type>:<property> to index
+        'uuid_cache_entries': '0', # max uuid to fq_name cached, 0 no limit
+        'fq_name_cache_entries': '0', # max fq_name to uuid cached, 0 disables
+        'fq_name_cache_ttl': '300', # secs fq_names found cached, 0 no limit
+        'fq_name_negative_cache_ttl': '0', # secs fq_names not found cached
+        'db_walk_chunk_size': '1000', # objects of a type resynced at once
+        'db_walk_concurrency': '1', # chunks resynced in parallel
+        'db_resync_high_water_mark': False, # checkpoint resync per chunk
+        'zk_id_lease_size': '0', # IDs leased at once per worker, 0 disables
         'db_engine': 'cassandra',
         'max_request_size': 1024000,
         'amqp_timeout': 660,
@@ -111,6 +122,7 @@ def parse_args(args_str):
         'enable_latency_stats_log': False,
         'enable_api_stats_log': False,
         'watch_keepalive_interval': 60,
+        'watch_max_pending_events': 0, # 0 to never drop slow watchers
         'worker_introspect_ports': '',
         'worker_admin_ports': '',
         'contrail_version': '',
@@ -382,6 +394,58 @@ def parse_args(args_str):
         "--debug_object_cache_types",
         help="Comma separated values of object types to debug trace between "
              "the cache and the DB")
+    parser.add_argument(
+        "--object_cache_coherency", choices=['timestamp', 'notify'],
+        help="How cached objects are kept coherent with the DB: "
+             "'timestamp' checks DB timestamps on each hit, 'notify' "
+             "relies on message bus notifications, default timestamp")
+    parser.add_argument(
+        "--object_cache_max_staleness",
+        help="Maximum age in seconds of a cached object served without "
+             "re-reading it in 'notify' coherency mode, default 300")
+    parser.add_argument(
+        "--prop_index_fields",
+        help="Comma separated values of <object type>:<property name> of "
+             "simple properties to index and use to filter lists. A "
+             "property index is only used once all the api-servers index "
+             "it, configure it on all of them")
+    parser.add_argument(
+        "--uuid_cache_entries",
+        help="Maximum number of object fq_names and types cached by UUID, "
+             "least recently used ones are evicted, default 0 (no limit)")
+    parser.add_argument(
+        "--fq_name_cache_entries",
+        help="Maximum number of object UUIDs cached by type and fq_name, "
+             "invalidated on object creation and deletion notifications, "
+             "default 0 (disabled)")
+    parser.add_argument(
+        "--fq_name_cache_ttl",
+        help="Maximum seconds a type and fq_name found is cached when the "
+             "fq_name cache is enabled, which bounds how long a deletion "
+             "whose notification is lost is missed, 0 for no limit, "
+             "default 300")
+    parser.add_argument(
+        "--fq_name_negative_cache_ttl",
+        help="Seconds a type and fq_name not found is cached when the "
+             "fq_name cache is enabled, default 0 (not cached)")
+    parser.add_argument(
+        "--db_walk_chunk_size",
+        help="Number of objects of a same type read and resynced at once "
+             "while walking the DB at startup, default 1000")
+    parser.add_argument(
+        "--db_walk_concurrency",
+        help="Number of chunks of objects resynced in parallel while "
+             "walking the DB at startup, default 1")
+    parser.add_argument(
+        "--zk_id_lease_size",
+        help="Number of virtual network, security group and tag IDs each "
+             "worker leases at once in zookeeper to allocate them without "
+             "racing the other workers, default 0 (disabled)")
+    parser.add_argument(
+        "--db_resync_high_water_mark", action="store_true",
+        help="Record the last object resynced of each type so that a "
+             "restarted DB resync resumes after it instead of resyncing "
+             "the type again")
     parser.add_argument("--db_engine",
         help="Database engine to use, default cassandra")
     parser.add_argument("--max_request_size", type=int,
@@ -396,6 +460,11 @@ def parse_args(args_str):
     parser.add_argument(
         "--watch_keepalive_interval", type=int,
         help="Interval in seconds after watch api will send keepalive message")
+    parser.add_argument(
+        "--watch_max_pending_events", type=int,
+        help="Number of events pending for a watch client after which the "
+             "client is considered too slow and its watch is stopped, "
+             "0 (default) for no limit")
     parser.add_argument("--worker_introspect_ports",
         help="List of introspect ports for uwsgi workers")
     parser.add_argument("--worker_admin_ports",
@@ -420,6 +489,8 @@ def parse_args(args_str):
     args_obj.cassandra_use_ssl = (str(args_obj.cassandra_use_ssl).lower() == 'true')
     args_obj.config_api_ssl_enable = (str(args_obj.config_api_ssl_enable).lower() == 'true')
     args_obj.zookeeper_ssl_enable = (str(args_obj.zookeeper_ssl_enable).lower() == 'true')
+    args_obj.db_resync_high_water_mark = (
+        str(args_obj.db_resync_high_water_mark).lower() == 'true')
     # convert log_local to a boolean
     if not isinstance(args_obj.log_local, bool):
         args_obj.log_local = bool(literal_eval(args_obj.log_local))
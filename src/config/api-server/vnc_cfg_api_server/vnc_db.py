@@ -44,6 +44,8 @@ from cfgm_common.utils import _DEFAULT_ZK_FABRIC_ENTERPRISE_PATH_PREFIX
 from cfgm_common.utils import _DEFAULT_ZK_FABRIC_SP_PATH_PREFIX
 from cfgm_common.utils import _DEFAULT_ZK_DB_RESYNC_PATH_PREFIX
 from cfgm_common.utils import _DEFAULT_ZK_DB_SYNC_COMPLETE_ZNODE_PATH_PREFIX
+from cfgm_common.utils import _DEFAULT_ZK_DB_RESYNC_CHECKPOINT_PATH_PREFIX
+from cfgm_common.utils import _DEFAULT_ZK_PROP_INDEX_BUILD_LOCK_PATH
 from cfgm_common.utils import _DEFAULT_ZK_LOCK_TIMEOUT
 from cfgm_common import vnc_greenlets
 from cfgm_common import PERMS_RWX
@@ -69,6 +71,19 @@ import functools
 import sys
 
 RESYNC_MAX_WORKERS = 500
+# seconds between checks of object types resynced by other workers
+RESYNC_CLAIM_RETRY_INTERVAL = 5
+# The workers resync the object types they claim in parallel, and a
+# worker walks the chunks of the types it claimed interleaved. That is safe
+# for the types whose resync only updates their own objects. The types of
+# a group below update objects of the others (a project updates the
+# internal virtual networks of its routers, a virtual machine interface
+# the annotations of its port group) from objects read before: a group is
+# claimed as a whole and its types are resynced one after the other.
+RESYNC_SERIAL_TYPE_GROUPS = [
+    ('project', 'virtual_network'),
+    ('virtual_port_group', 'virtual_machine_interface'),
+]
 
 
 def get_trace_id():
@@ -111,18 +126,38 @@ class VncServerCassandraClient(VncCassandraClient):
                  pool_size=20,
                  # Default to None, VncCassandraClient will raise an
                  # exception if not well configured.
-                 cassandra_driver=None):
+                 cassandra_driver=None, obj_cache_coherency=None,
+                 obj_cache_max_staleness=None, prop_index_fields=None,
+                 prop_index_server_id=None,
+                 walk_chunk_size=1000, walk_concurrency=1,
+                 uuid_cache_entries=0, fq_name_cache_entries=0,
+                 fq_name_cache_ttl=300, fq_name_negative_cache_ttl=0):
         self._db_client_mgr = db_client_mgr
         keyspaces = datastore_api.UUID_KEYSPACE.copy()
+        # created even without indexed properties, every api-server records
+        # the properties it indexes there
+        keyspaces[datastore_api.UUID_KEYSPACE_NAME] = dict(
+            keyspaces[datastore_api.UUID_KEYSPACE_NAME],
+            **datastore_api.OBJ_PROP_INDEX_CF)
         keyspaces[self._USERAGENT_KEYSPACE_NAME] = {
             self._USERAGENT_KV_CF_NAME: {}}
         super(VncServerCassandraClient, self).__init__(
             cass_srv_list, db_prefix=db_prefix, rw_keyspaces=keyspaces, logger=self.config_log,
             generate_url=db_client_mgr.generate_url, reset_config=reset_config,
             credential=cassandra_credential, walk=walk,
+            walk_chunk_size=walk_chunk_size,
+            walk_concurrency=walk_concurrency,
             obj_cache_entries=obj_cache_entries,
             obj_cache_exclude_types=obj_cache_exclude_types,
             debug_obj_cache_types=debug_obj_cache_types,
+            obj_cache_coherency=obj_cache_coherency,
+            obj_cache_max_staleness=obj_cache_max_staleness,
+            prop_index_fields=prop_index_fields,
+            prop_index_server_id=prop_index_server_id,
+            uuid_cache_entries=uuid_cache_entries,
+            fq_name_cache_entries=fq_name_cache_entries,
+            fq_name_cache_ttl=fq_name_cache_ttl,
+            fq_name_negative_cache_ttl=fq_name_negative_cache_ttl,
             log_response_time=log_response_time, ssl_enabled=ssl_enabled,
             ca_certs=ca_certs, cassandra_driver=cassandra_driver)
     # end __init__
@@ -173,17 +208,20 @@ class VncServerCassandraClient(VncCassandraClient):
     def ref_update(self, obj_type, obj_uuid, ref_obj_type, ref_uuid,
                    ref_data, operation, id_perms, relax_ref_for_delete=False):
         bch = self._cassandra_driver.get_cf_batch(datastore_api.OBJ_UUID_CF_NAME)
+        ref_updates = []
         if operation == 'ADD':
-            self._create_ref(bch, obj_type, obj_uuid, ref_obj_type, ref_uuid,
-                             ref_data)
+            ref_updates = self._create_ref(bch, obj_type, obj_uuid,
+                                           ref_obj_type, ref_uuid, ref_data)
             if relax_ref_for_delete:
                 self._relax_ref_for_delete(bch, obj_uuid, ref_uuid)
         elif operation == 'DELETE':
-            self._delete_ref(bch, obj_type, obj_uuid, ref_obj_type, ref_uuid)
+            ref_updates = self._delete_ref(bch, obj_type, obj_uuid,
+                                           ref_obj_type, ref_uuid)
         else:
             pass
         self.update_last_modified(bch, obj_type, obj_uuid, id_perms)
         bch.send()
+        return ref_updates
     # end ref_update
 
     def ref_relax_for_delete(self, obj_uuid, ref_uuid):
@@ -279,10 +317,13 @@ class VncServerKombuClient(VncKombuClient):
                  host_ip, rabbit_health_check_interval, worker_id, **kwargs):
         self._event_dispatcher = EventDispatcher(
             db_client_mgr=db_client_mgr,
-            spawn_dispatch_greenlet=True
+            spawn_dispatch_greenlet=True,
+            max_pending_events=(db_client_mgr._api_svr_mgr._args.
+                                watch_max_pending_events)
         )
         self._db_client_mgr = db_client_mgr
         self._sandesh = db_client_mgr._sandesh
+        self._notification_listeners = []
         listen_port = db_client_mgr.get_server_port()
         q_name = 'vnc_config.%s-%s-%s' % (socket.getfqdn(host_ip),
             listen_port, worker_id)
@@ -297,6 +338,21 @@ class VncServerKombuClient(VncKombuClient):
         self._db_client_mgr.config_log(msg, level)
     # end config_log
 
+    def add_notification_listener(self, listener):
+        # listener(oper_info) is called for every notification received,
+        # e.g. by extensions keeping their own caches of config objects
+        self._notification_listeners.append(listener)
+    # end add_notification_listener
+
+    def _notify_listeners(self, oper_info):
+        for listener in self._notification_listeners:
+            try:
+                listener(oper_info)
+            except Exception as e:
+                self.config_log("Notification listener %s failed: %s" % (
+                    listener, str(e)), level=SandeshLevel.SYS_ERR)
+    # end _notify_listeners
+
     @ignore_exceptions
     def _generate_msgbus_notify_trace(self, oper_info):
         req_id = oper_info.get('request-id',
@@ -318,6 +374,7 @@ class VncServerKombuClient(VncKombuClient):
             trace = self._generate_msgbus_notify_trace(oper_info)
 
             self._db_client_mgr.dbe_uve_trace(**oper_info)
+            self._notify_listeners(oper_info)
             if oper_info['oper'] == 'CREATE':
                 self._dbe_create_notification(oper_info)
                 self._event_dispatcher.notify_event_dispatcher(oper_info)
@@ -327,6 +384,10 @@ class VncServerKombuClient(VncKombuClient):
             elif oper_info['oper'] == 'DELETE':
                 self._dbe_delete_notification(oper_info)
                 self._event_dispatcher.notify_event_dispatcher(oper_info)
+            elif oper_info['oper'] == 'UPDATE-IMPLICIT':
+                self._db_client_mgr._object_db._obj_cache_mgr.\
+                    invalidate_from_notification(oper_info)
+                return
             else:
                 return
 
@@ -360,6 +421,11 @@ class VncServerKombuClient(VncKombuClient):
         obj_type = obj_info['type']
         obj_uuid = obj_info['uuid']
 
+        self._db_client_mgr._object_db.cache_fq_name_to_uuid_del(
+            obj_type, obj_info['fq_name'])
+        self._db_client_mgr._object_db._obj_cache_mgr.\
+            invalidate_from_notification(obj_info)
+
         try:
             r_class = self._db_client_mgr.get_resource_class(obj_type)
             ok, result = r_class.dbe_create_notification(
@@ -391,6 +457,9 @@ class VncServerKombuClient(VncKombuClient):
         obj_uuid = obj_info['uuid']
         extra_dict = obj_info.get('extra_dict')
 
+        self._db_client_mgr._object_db._obj_cache_mgr.\
+            invalidate_from_notification(obj_info)
+
         try:
             r_class = self._db_client_mgr.get_resource_class(obj_type)
             ok, result = r_class.dbe_update_notification(obj_uuid, extra_dict)
@@ -420,6 +489,10 @@ class VncServerKombuClient(VncKombuClient):
 
         db_client_mgr = self._db_client_mgr
         db_client_mgr._object_db.cache_uuid_to_fq_name_del(obj_uuid)
+        db_client_mgr._object_db.cache_fq_name_to_uuid_del(
+            obj_type, obj_info['fq_name'])
+        db_client_mgr._object_db._obj_cache_mgr.invalidate_from_notification(
+            obj_info)
 
         try:
             r_class = self._db_client_mgr.get_resource_class(obj_type)
@@ -484,7 +557,8 @@ class VncZkClient(object):
 
     def __init__(self, instance_id, zk_server_ip, host_ip, reset_config, db_prefix,
                  sandesh_hdl, log_response_time=None, zk_ssl_enable=False,
-                 zk_ssl_keyfile=None, zk_ssl_certificate=None, zk_ssl_ca_cert=None):
+                 zk_ssl_keyfile=None, zk_ssl_certificate=None, zk_ssl_ca_cert=None,
+                 id_lease_size=0):
         self._db_prefix = db_prefix
         if db_prefix:
             client_pfx = db_prefix + '-'
@@ -535,6 +609,11 @@ class VncZkClient(object):
 
         self._subnet_allocators = {}
         self._ae_id_allocator = {}
+        # allocators of IDs created in bulk lease blocks of IDs per worker
+        lease_kwargs = {
+            'lease_size': id_lease_size,
+            'lease_owner': '%s-%s' % (host_ip, instance_id),
+        }
 
         # Initialize the Aggregated Ethernet allocator
         self._vpg_id_allocator = IndexAllocator(self._zk_client,
@@ -544,12 +623,14 @@ class VncZkClient(object):
         # Initialize the virtual network ID allocator
         self._vn_id_allocator = IndexAllocator(self._zk_client,
                                                _vn_id_alloc_path,
-                                               self._VN_MAX_ID)
+                                               self._VN_MAX_ID,
+                                               **lease_kwargs)
 
         # Initialize the security group ID allocator
         self._sg_id_allocator = IndexAllocator(self._zk_client,
                                                _sg_id_alloc_path,
-                                               self._SG_MAX_ID)
+                                               self._SG_MAX_ID,
+                                               **lease_kwargs)
         # 0 is not a valid sg id any more. So, if it was previously allocated,
         # delete it and reserve it
         if self._sg_id_allocator.read(0) != '__reserved__':
@@ -579,6 +660,7 @@ class VncZkClient(object):
                 self._zk_client,
                 self._tag_value_id_alloc_path % type_name,
                 self._TAG_VALUE_MAX_ID,
+                **lease_kwargs
             ) for type_name in list(constants.TagTypeNameToId.keys())}
 
         # Initialize the user defined tag value ID allocator for pref-defined tag-type.
@@ -598,6 +680,13 @@ class VncZkClient(object):
             start_idx=1,
             size=self._SUB_CLUSTER_MAX_ID_4_BYTES)
 
+    def release_id_leases(self):
+        allocators = [self._vn_id_allocator, self._sg_id_allocator]
+        allocators.extend(self._tag_value_id_allocator.values())
+        for allocator in allocators:
+            allocator.release_leases()
+    # end release_id_leases
+
     def master_election(self, path, func, *args):
         self._zk_client.master_election(
             self._zk_path_pfx + path, os.getpid(),
@@ -1188,12 +1277,123 @@ class VncZkClient(object):
         else:
             self._sub_cluster_id_allocator.delete(sub_cluster_id)
 
+class DbResyncCheckpoint(object):
+    """Progress of a DB resync recorded in zookeeper so that a restarted
+    api-server resumes it and the api-server workers split the object types
+    left to resync.
+
+    <prefix>/<build version>/types/<obj type>: 'done' once the type is
+        resynced or, if high water marks are enabled, the uuid of the last
+        object of the last chunk resynced in the DB walk order
+    <prefix>/<build version>/claims/<claim>: ephemeral node holding the
+        id of the worker resyncing the type or group of types named by
+        claim, the id must be unique to the worker (host name, process
+        and worker id)
+    """
+    _DONE = 'done'
+
+    def __init__(self, zk_client, build_version, worker_id,
+                 high_water_mark=False):
+        self._zk_client = zk_client
+        self._build_version = build_version
+        self._worker_id = worker_id
+        self.high_water_mark = high_water_mark
+        self._path = '%s/%s' % (_DEFAULT_ZK_DB_RESYNC_CHECKPOINT_PATH_PREFIX,
+                                build_version)
+    # end __init__
+
+    def _type_path(self, obj_type):
+        return '%s/types/%s' % (self._path, obj_type)
+    # end _type_path
+
+    def _claim_path(self, claim):
+        return '%s/claims/%s' % (self._path, claim)
+    # end _claim_path
+
+    def _read(self, path):
+        # zookeeper returns bytes
+        value = self._zk_client.read_node(path)
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        return value
+    # end _read
+
+    def _write(self, path, value):
+        if self._zk_client.exists(path):
+            self._zk_client.update_node(path, value)
+        else:
+            self._zk_client.create_node(path, value)
+    # end _write
+
+    def is_complete(self):
+        return (self._read(_DEFAULT_ZK_DB_SYNC_COMPLETE_ZNODE_PATH_PREFIX) ==
+                self._build_version)
+    # end is_complete
+
+    def is_done(self, obj_type):
+        return self._read(self._type_path(obj_type)) == self._DONE
+    # end is_done
+
+    def get_high_water_mark(self, obj_type):
+        value = self._read(self._type_path(obj_type))
+        if not self.high_water_mark or value == self._DONE:
+            return None
+        return value
+    # end get_high_water_mark
+
+    def set_high_water_mark(self, obj_type, obj_uuid):
+        self._write(self._type_path(obj_type), obj_uuid)
+    # end set_high_water_mark
+
+    def set_done(self, obj_type):
+        self._write(self._type_path(obj_type), self._DONE)
+    # end set_done
+
+    def claim(self, claim, obj_types=None):
+        # claim the object types (obj_types, default [claim]) not done yet.
+        # An existing claim is lost to its worker, unless it holds our id
+        # (created by a retry of ours). The types are checked again once
+        # the claim is taken as the worker which completed them releases
+        # its claim once they are marked done
+        obj_types = obj_types or [claim]
+        if all(self.is_done(obj_type) for obj_type in obj_types):
+            return False
+        path = self._claim_path(claim)
+        try:
+            self._zk_client.create_node(path, self._worker_id,
+                                        ephemeral=True)
+        except ResourceExistsError:
+            if self._read(path) != self._worker_id:
+                return False
+        if (all(self.is_done(obj_type) for obj_type in obj_types) or
+                self.is_complete()):
+            self.release(claim)
+            return False
+        return True
+    # end claim
+
+    def release(self, claim):
+        self._zk_client.delete_node(self._claim_path(claim))
+    # end release
+
+    def clear(self):
+        self._zk_client.delete_node(self._path, recursive=True)
+    # end clear
+# end class DbResyncCheckpoint
+
+
 class VncDbClient(object):
     def __init__(self, api_svr_mgr, db_srv_list, rabbit_servers, rabbit_port,
                  rabbit_user, rabbit_password, rabbit_vhost, rabbit_ha_mode,
                  host_ip, reset_config=False, zk_server_ip=None,
                  db_prefix='', db_credential=None, obj_cache_entries=0,
                  obj_cache_exclude_types=None, debug_obj_cache_types=None,
+                 obj_cache_coherency=None, obj_cache_max_staleness=None,
+                 prop_index_fields=None, db_walk_chunk_size=1000,
+                 db_walk_concurrency=1, db_resync_high_water_mark=False,
+                 uuid_cache_entries=0, fq_name_cache_entries=0,
+                 fq_name_cache_ttl=300, fq_name_negative_cache_ttl=0,
+                 zk_id_lease_size=0,
                  db_engine='cassandra', cassandra_use_ssl=False,
                  cassandra_ca_certs=None, cassandra_driver=None,
                  zk_ssl_enable=False, zk_ssl_keyfile=None,
@@ -1227,6 +1427,8 @@ class VncDbClient(object):
         }
 
         self._db_resync_done = gevent.event.Event()
+        self._db_resync_high_water_mark = db_resync_high_water_mark
+        self._dbe_resync_kwargs = {}
 
         self.log_cassandra_response_time = functools.partial(self.log_db_response_time, "CASSANDRA")
         self.log_zk_response_time = functools.partial(self.log_db_response_time, "ZK")
@@ -1242,7 +1444,8 @@ class VncDbClient(object):
                                       zk_ssl_enable=zk_ssl_enable,
                                       zk_ssl_keyfile=zk_ssl_keyfile,
                                       zk_ssl_certificate=zk_ssl_certificate,
-                                      zk_ssl_ca_cert=zk_ssl_ca_cert)
+                                      zk_ssl_ca_cert=zk_ssl_ca_cert,
+                                      id_lease_size=zk_id_lease_size)
             def db_client_init():
                 msg = "Connecting to database on %s" % (db_srv_list)
                 self.config_log(msg, level=SandeshLevel.SYS_NOTICE)
@@ -1258,9 +1461,25 @@ class VncDbClient(object):
                     obj_cache_exclude_types, debug_obj_cache_types,
                     self.log_cassandra_response_time,
                     ssl_enabled=cassandra_use_ssl, ca_certs=cassandra_ca_certs,
-                    cassandra_driver=cassandra_driver)
+                    cassandra_driver=cassandra_driver,
+                    obj_cache_coherency=obj_cache_coherency,
+                    obj_cache_max_staleness=obj_cache_max_staleness,
+                    prop_index_fields=prop_index_fields,
+                    prop_index_server_id=socket.getfqdn(host_ip),
+                    walk_chunk_size=db_walk_chunk_size,
+                    walk_concurrency=db_walk_concurrency,
+                    uuid_cache_entries=uuid_cache_entries,
+                    fq_name_cache_entries=fq_name_cache_entries,
+                    fq_name_cache_ttl=fq_name_cache_ttl,
+                    fq_name_negative_cache_ttl=fq_name_negative_cache_ttl)
 
             self._zk_db.master_election("/api-server-election", db_client_init)
+
+            # a single api-server builds the property index at a time
+            prop_index_mgr = self._object_db._prop_index_mgr
+            if prop_index_mgr.is_enabled():
+                prop_index_mgr.build_in_background(self._zk_db._zk_client.lock(
+                    _DEFAULT_ZK_PROP_INDEX_BUILD_LOCK_PATH))
         else:
             msg = ("Contrail API server does not support database backend "
                    "'%s'" % db_engine)
@@ -1346,20 +1565,15 @@ class VncDbClient(object):
         build_version = self._api_svr_mgr._args.contrail_version
         self.config_log("Contrail Version is(%s)" % build_version , level=SandeshLevel.SYS_INFO)
         walk_only=False
+        self._dbe_resync_kwargs = {}
         with ZookeeperLock(**zk_dbe_lock):
             try:
                 zk_sync_node = self._zk_db._zk_client.read_node(_DEFAULT_ZK_DB_SYNC_COMPLETE_ZNODE_PATH_PREFIX)
                 self.config_log("zk_sync_node data (%s)" % zk_sync_node , level=SandeshLevel.SYS_INFO)
                 if not zk_sync_node:
                     self.config_log("DBERESYNC: running dbe-resync", level=SandeshLevel.SYS_INFO)
-                    self._object_db.walk(self._dbe_resync)
-                    self._zk_db._zk_client.create_node(_DEFAULT_ZK_DB_SYNC_COMPLETE_ZNODE_PATH_PREFIX,build_version)
-                    self.config_log("DBERESYNC: Completed successfully", level=SandeshLevel.SYS_INFO)
-                elif zk_sync_node and (zk_sync_node != build_version):
+                elif zk_sync_node != build_version:
                     self.config_log("DBERESYNC: running dbe-resync on update scenario", level=SandeshLevel.SYS_INFO)
-                    self._object_db.walk(self._dbe_resync)
-                    self._zk_db._zk_client.update_node(_DEFAULT_ZK_DB_SYNC_COMPLETE_ZNODE_PATH_PREFIX,build_version)
-                    self.config_log("DBERESYNC: Completed successfully for upgrade scenario", level=SandeshLevel.SYS_INFO)
                 else:
                     walk_only=True
             except Exception as e:
@@ -1368,7 +1582,29 @@ class VncDbClient(object):
         if walk_only:
             self.config_log("DBERESYNC: running walk", level=SandeshLevel.SYS_INFO)
             self._object_db.walk()
+        else:
+            # the lock is only held to check and mark the resync complete,
+            # workers resync the object types they claim meanwhile
+            worker_id = '%s-%s-%s' % (socket.getfqdn(), os.getpid(),
+                                      self._api_svr_mgr.get_worker_id())
+            checkpoint = DbResyncCheckpoint(
+                self._zk_db._zk_client, build_version, worker_id,
+                high_water_mark=self._db_resync_high_water_mark)
+            self._db_resync_checkpointed(checkpoint)
+            with ZookeeperLock(**zk_dbe_lock):
+                try:
+                    zk_sync_node = self._zk_db._zk_client.read_node(_DEFAULT_ZK_DB_SYNC_COMPLETE_ZNODE_PATH_PREFIX)
+                    if not zk_sync_node:
+                        self._zk_db._zk_client.create_node(_DEFAULT_ZK_DB_SYNC_COMPLETE_ZNODE_PATH_PREFIX,build_version)
+                    elif zk_sync_node != build_version:
+                        self._zk_db._zk_client.update_node(_DEFAULT_ZK_DB_SYNC_COMPLETE_ZNODE_PATH_PREFIX,build_version)
+                    checkpoint.clear()
+                except Exception as e:
+                    self.config_log("DBERESYNC: found exception (%s)" % e, level=SandeshLevel.SYS_ERR)
+                    raise
+            self.config_log("DBERESYNC: Completed successfully", level=SandeshLevel.SYS_INFO)
 
+        self._dbe_resync_kwargs = {}
         self.config_log("Cassandra DB walk completed.",
             level=SandeshLevel.SYS_INFO)
         self._update_default_quota()
@@ -1378,6 +1614,112 @@ class VncDbClient(object):
         self._db_resync_done.set()
     # end db_resync
 
+    def _db_resync_checkpointed(self, checkpoint):
+        # all the objects are walked to prime the caches, only the types
+        # claimed are resynced. Types left unclaimed by a worker which died
+        # are claimed again until every type seen is resynced. The types of
+        # RESYNC_SERIAL_TYPE_GROUPS are resynced once the walk is done, a
+        # group by the worker claiming it, one type after the other
+        seen_types = set()
+        claimed = set()
+        resume_after = {}
+        chunk_done = None
+        if checkpoint.high_water_mark:
+            chunk_done = checkpoint.set_high_water_mark
+        serial_types = set(obj_type for group in RESYNC_SERIAL_TYPE_GROUPS
+                           for obj_type in group)
+
+        def resume(obj_type):
+            obj_uuid = checkpoint.get_high_water_mark(obj_type)
+            if obj_uuid:
+                self.config_log("DBERESYNC: resuming %s after %s" %
+                                (obj_type, obj_uuid),
+                                level=SandeshLevel.SYS_INFO)
+                resume_after[obj_type] = obj_uuid
+        # end resume
+
+        def claim(obj_type):
+            if not checkpoint.claim(obj_type):
+                return False
+            claimed.add(obj_type)
+            resume(obj_type)
+            return True
+        # end claim
+
+        def claim_seen(obj_type):
+            seen_types.add(obj_type)
+            if obj_type in serial_types:
+                return False
+            return claim(obj_type)
+        # end claim_seen
+
+        def walk(type_filter):
+            self._object_db.walk(self._dbe_resync, type_filter=type_filter,
+                                 chunk_done=chunk_done,
+                                 resume_after=resume_after)
+            if resume_after:
+                # object of the high water mark was deleted, resync those
+                # types from the beginning
+                self.config_log("DBERESYNC: high water mark not found for "
+                                "%s" % ', '.join(resume_after),
+                                level=SandeshLevel.SYS_NOTICE)
+                not_resumed = set(resume_after)
+                resume_after.clear()
+                self._object_db.walk(
+                    self._dbe_resync,
+                    type_filter=lambda obj_type: obj_type in not_resumed,
+                    chunk_done=chunk_done)
+        # end walk
+
+        def resync(type_filter):
+            walk(type_filter)
+            for obj_type in claimed:
+                checkpoint.set_done(obj_type)
+                checkpoint.release(obj_type)
+            claimed.clear()
+        # end resync
+
+        def resync_group(group):
+            group_types = [obj_type for obj_type in group
+                           if obj_type in seen_types]
+            name = '+'.join(group)
+            if not checkpoint.claim(name, group_types):
+                return False
+            try:
+                for obj_type in group_types:
+                    if checkpoint.is_done(obj_type):
+                        continue
+                    resume(obj_type)
+                    walk(lambda t, obj_type=obj_type: t == obj_type)
+                    checkpoint.set_done(obj_type)
+            finally:
+                checkpoint.release(name)
+            return True
+        # end resync_group
+
+        resync(claim_seen)
+        while True:
+            remaining = [obj_type for obj_type in seen_types
+                         if not checkpoint.is_done(obj_type)]
+            if not remaining or checkpoint.is_complete():
+                return
+            resynced = False
+            for obj_type in remaining:
+                if obj_type not in serial_types:
+                    claim(obj_type)
+            if claimed:
+                resync(lambda obj_type: obj_type in claimed)
+                resynced = True
+            for group in RESYNC_SERIAL_TYPE_GROUPS:
+                if set(group) & set(remaining):
+                    resynced = resync_group(group) or resynced
+            if not resynced:
+                self.config_log("DBERESYNC: waiting for %s resynced by "
+                                "other workers" % ', '.join(remaining),
+                                level=SandeshLevel.SYS_INFO)
+                gevent.sleep(RESYNC_CLAIM_RETRY_INTERVAL)
+    # end _db_resync_checkpointed
+
     def wait_for_resync_done(self):
         self._db_resync_done.wait()
     # end wait_for_resync_done
@@ -1602,11 +1944,48 @@ class VncDbClient(object):
         self.config_log(msg, level=SandeshLevel.SYS_DEBUG)
         obj_class = cfgm_common.utils.obj_type_to_vnc_class(obj_type, __name__)
         obj_fields = list(obj_class.prop_fields) + list(obj_class.ref_fields)
-        kwargs = {}
         if obj_type == 'project':
             obj_fields.append('logical_routers')
         elif obj_type == 'virtual_machine_interface':
             obj_fields.extend(['virtual_port_group_refs', 'virtual_port_group_back_refs'])
+        kwargs = self._get_dbe_resync_kwargs(obj_type)
+
+        (ok, obj_dicts) = self._object_db.object_read(
+                               obj_type, obj_uuids, field_names=obj_fields)
+
+        uve_trace_list = []
+        workers = []
+        for obj_dict in obj_dicts:
+            uve_trace_list.append(("RESYNC", obj_type, obj_dict['uuid'], obj_dict))
+            workers.append(gevent.spawn(
+                self._dbe_resync_worker, obj_type, obj_dict, **kwargs))
+            if len(workers) == RESYNC_MAX_WORKERS:
+                gevent.joinall(workers)
+                workers = []
+
+        # wait for all task to complete
+        gevent.joinall(workers)
+
+        # Send UVEs resync with a pool of workers
+        uve_workers = gevent.pool.Group()
+        def format_args_for_dbe_uve_trace(args):
+            return self.dbe_uve_trace(*args)
+        uve_workers.map(format_args_for_dbe_uve_trace, uve_trace_list)
+
+        msg = "Finished DB Resync for %s" % obj_type
+        self.config_log(msg, level=SandeshLevel.SYS_DEBUG)
+    # end _dbe_resync
+
+    def _get_dbe_resync_kwargs(self, obj_type):
+        # the DB walk resyncs a type by chunks, objects needed by the
+        # workers of a type are read once and shared by all its chunks
+        try:
+            return self._dbe_resync_kwargs[obj_type]
+        except KeyError:
+            pass
+
+        kwargs = {}
+        if obj_type == 'virtual_machine_interface':
             # get the list of vpg
             ok, vpg_fqname_uuid_map, _ = self._object_db.object_list('virtual_port_group')
             vpg_uuids = [vpg_uuid for _, vpg_uuid in vpg_fqname_uuid_map]
@@ -1628,34 +2007,9 @@ class VncDbClient(object):
             # update kwargs with vpg, fabric list
             kwargs.update({'vpgs': vpgs, 'fabrics': fabrics})
 
-        (ok, obj_dicts) = self._object_db.object_read(
-                               obj_type, obj_uuids, field_names=obj_fields)
-
-        uve_trace_list = []
-        self._workers = []
-        worker_count = 0
-        for obj_dict in obj_dicts:
-            uve_trace_list.append(("RESYNC", obj_type, obj_dict['uuid'], obj_dict))
-            self._workers.append(gevent.spawn(
-                self._dbe_resync_worker, obj_type, obj_dict, **kwargs))
-            worker_count += 1
-            if worker_count == RESYNC_MAX_WORKERS:
-                gevent.joinall(self._workers)
-                self._workers = []
-                worker_count = 0
-
-        # wait for all task to complete
-        gevent.joinall(self._workers)
-
-        # Send UVEs resync with a pool of workers
-        uve_workers = gevent.pool.Group()
-        def format_args_for_dbe_uve_trace(args):
-            return self.dbe_uve_trace(*args)
-        uve_workers.map(format_args_for_dbe_uve_trace, uve_trace_list)
-
-        msg = "Finished DB Resync for %s" % obj_type
-        self.config_log(msg, level=SandeshLevel.SYS_DEBUG)
-    # end _dbe_resync
+        self._dbe_resync_kwargs[obj_type] = kwargs
+        return kwargs
+    # end _get_dbe_resync_kwargs
 
     def _dbe_resync_worker(self, obj_type, obj_dict, **kwargs):
             #obj_type, obj_dict = self.resync_task_q.get()
@@ -2488,6 +2842,10 @@ class VncDbClient(object):
         return obj_uuid
     # end fq_name_to_uuid
 
+    def fq_names_to_uuids(self, obj_type, fq_names):
+        return self._object_db.fq_names_to_uuids(obj_type, fq_names)
+    # end fq_names_to_uuids
+
     def uuid_to_fq_name(self, obj_uuid):
         return self._object_db.uuid_to_fq_name(obj_uuid)
     # end uuid_to_fq_name
@@ -2525,14 +2883,15 @@ class VncDbClient(object):
     def ref_update(self, obj_type, obj_uuid, ref_obj_type, ref_uuid, ref_data,
                    operation, id_perms, attr_to_publish=None,
                    relax_ref_for_delete=False):
-        self._object_db.ref_update(obj_type, obj_uuid, ref_obj_type,
-                                   ref_uuid, ref_data, operation, id_perms,
-                                   relax_ref_for_delete)
+        ref_updates = self._object_db.ref_update(
+            obj_type, obj_uuid, ref_obj_type, ref_uuid, ref_data, operation,
+            id_perms, relax_ref_for_delete)
         fq_name = self.uuid_to_fq_name(obj_uuid)
         self._msgbus.dbe_publish('UPDATE', obj_type, obj_uuid, fq_name,
                                  extra_dict=attr_to_publish)
-        if obj_type == ref_obj_type:
-            self._dbe_publish_update_implicit(obj_type, [ref_uuid])
+        # the symmetric refs and, with the notify coherent object cache,
+        # the referred objects with new back-refs
+        self._dbe_publish_update_implicit(obj_type, ref_updates or [])
         return True, ''
     # ref_update
 
@@ -2600,6 +2959,11 @@ class VncDbClient(object):
         self._msgbus.reset()
     # end reset
 
+    def release_id_leases(self):
+        if getattr(self, '_zk_db', None):
+            self._zk_db.release_id_leases()
+    # end release_id_leases
+
     def get_worker_id(self):
         return self._api_svr_mgr.get_worker_id()
     # end get_worker_id
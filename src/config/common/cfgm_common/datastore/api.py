@@ -31,6 +31,24 @@ OBJ_FQ_NAME_CF_NAME = ConfigKeyspaceMap.get_cf_name(UUID_KEYSPACE_NAME,
 OBJ_SHARED_CF_NAME = ConfigKeyspaceMap.get_cf_name(UUID_KEYSPACE_NAME,
                                                    'OBJ_SHARED_CF')
 
+# key: '<object type>:<property name>:<JSON value>', column: (<uuid>, null)
+# opt-in secondary index of simple properties (see 'prop_index_fields'),
+# row 'META:built' lists ('<object type>:<property name>', <build start
+# time>) indexed for all existing objects, row 'META:servers' lists
+# (<server id>, {'<object type>:<property name>': <time indexed since>})
+# the properties each api-server indexes on writes. Not part of
+# UUID_KEYSPACE as only the api-server uses it
+OBJ_PROP_INDEX_CF_NAME = ConfigKeyspaceMap.get_cf_name(UUID_KEYSPACE_NAME,
+                                                       'OBJ_PROP_INDEX_CF')
+OBJ_PROP_INDEX_CF = {
+    OBJ_PROP_INDEX_CF_NAME: {
+        'cf_args': {
+            'autopack_names': False,
+            'autopack_values': False,
+        },
+    },
+}
+
 UUID_KEYSPACE = {
     UUID_KEYSPACE_NAME: {
         OBJ_UUID_CF_NAME: {
@@ -63,16 +81,48 @@ OptionsDefault = {
     'reset_config': False,
     'credential': None,
     'walk': True,
+    # objects of a same type handed at once to the DB walk callback
+    'walk_chunk_size': 1000,
+    # max number of chunks processed at once by the DB walk callback
+    'walk_concurrency': 1,
     'obj_cache_entries': 0,
+    # max number of entries of the uuid to fq_name and type cache, 0 for
+    # no limit
+    'uuid_cache_entries': 0,
+    # max number of entries of the fq_name to uuid cache, 0 disables it
+    'fq_name_cache_entries': 0,
+    # seconds fq_names found are cached, 0 for no limit
+    'fq_name_cache_ttl': 300,
+    # seconds fq_names not found are cached, 0 to not cache them
+    'fq_name_negative_cache_ttl': 0,
     'obj_cache_exclude_types': None,
     'debug_obj_cache_types': None,
+    # 'timestamp': validate each cache hit against DB column timestamps
+    # 'notify': trust cache hits until invalidated by a notification or
+    #           until older than 'obj_cache_max_staleness' seconds
+    'obj_cache_coherency': 'timestamp',
+    'obj_cache_max_staleness': 300,
+    # list of '<object type>:<property name>' of simple properties indexed
+    # in OBJ_PROP_INDEX_CF_NAME to filter lists without scanning the type
+    'prop_index_fields': None,
+    # id the api-server records its indexed properties under, clients
+    # without an id do not write objects
+    'prop_index_server_id': None,
     'log_response_time': None,
     'ssl_enabled': False,
     'ca_certs': None,
     'pool_size': 0,
     'use_workers': True,
+    # 'queue': workers get requests from polled multiprocessing queues
+    # 'pipe': workers exchange frames through pipes waited on by gevent
+    'workers_transport': 'queue',
     'num_groups': None,
     'num_workers': None,
+    # prepare queries once per shape and route them with their partition
+    # key, CQL driver only
+    'use_prepared_statements': True,
+    # rows read by page from Cassandra, CQL driver only
+    'fetch_size': 2048,
     'use_concurrency': True,
     'concurrency_starts': 1,
     'concurrency': 1000,
@@ -4,18 +4,26 @@
 
 import collections
 import datetime
+import errno
+import functools
 import importlib
 import itertools
 import math
+import multiprocessing
 from multiprocessing import Process
 from multiprocessing.queues import Queue
+import os
 import queue
 import ssl
+import struct
 import sys
+import tempfile
 
 import gevent
 import gevent.lock
+import gevent.os
 import gevent.queue
+import gevent.socket
 from pysandesh.gen_py.process_info.ttypes import ConnectionStatus
 from pysandesh.gen_py.sandesh.ttypes import SandeshLevel
 from sandesh_common.vns import constants as vns_constants
@@ -36,6 +44,7 @@ try:
     connector.protocol = importlib.import_module('cassandra.protocol')
     connector.cqlengine = importlib.import_module('cassandra.cqlengine')
     connector.concurrent = importlib.import_module('cassandra.concurrent')
+    connector.policies = importlib.import_module('cassandra.policies')
 except ImportError:
     connector = None
 
@@ -79,6 +88,13 @@ DEFAULT_NUM_GROUPS = 4
 # Number of workers used to execute SELECT queries
 DEFAULT_NUM_WORKERS = 4
 
+# Responses of PipePool workers larger than this number of bytes are
+# passed through a file in shared memory instead of the pipe
+DEFAULT_SHM_THRESHOLD = 1 << 20
+
+# Directory of the files passing responses of PipePool workers
+SHM_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
 # String will be encoded in UTF-8 if necessary (Python2 support)
 StringType = six.text_type
 
@@ -87,6 +103,19 @@ JsonToObject = json.loads
 
 RowsResultType = collections.OrderedDict
 
+# Rows of JSON values, each value is decoded when first read so that the
+# columns filtered out by the callers are never decoded.
+JsonRowsResultType = json.LazyJsonDict
+
+
+def log_decode_error(logger, cf_name, key, column, value, error):
+    # TODO(sahid): Imported from thrift's driver, we should investigate
+    # and fix that problem.
+    msg = ("can't decode JSON value, cf: '{}', key:'{}' "
+           "error: '{}'. Use it as it: '{}'".format(
+               cf_name, key, error, value))
+    logger(msg, level=SandeshLevel.SYS_INFO)
+
 
 # This is encapsulating the ResultSet iterator that to provide feature
 # to filter the columns, decode JSON or add timestamp.
@@ -124,14 +153,17 @@ class Iter(six.Iterator):
             try:
                 v = JsonToObject(v)
             except (ValueError, TypeError) as e:
-                # TODO(sahid): Imported from thrift's driver, we
-                # should investigate and fix that problem.
-                msg = ("can't decode JSON value, cf: '{}', key:'{}' "
-                       "error: '{}'. Use it as it: '{}'".format(
-                           self.cf_name, k, e, v))
-                self.logger(msg, level=SandeshLevel.SYS_INFO)
+                log_decode_error(self.logger, self.cf_name, k, None, v, e)
         return v
 
+    def rows(self, k, rows):
+        if self.decode_json:
+            return JsonRowsResultType(
+                rows, timestamps=self.include_timestamp,
+                on_error=functools.partial(
+                    log_decode_error, self.logger, self.cf_name, k))
+        return RowsResultType(rows)
+
     def timestamp(self, v, w):
         if self.include_timestamp:
             return (v, w)
@@ -141,12 +173,13 @@ class Iter(six.Iterator):
         return self.timestamp(self.decode(v, k), w)
 
     def next(self):
+        # values are decoded by the rows returned, see rows()
         if self.include_timestamp:
             # 0.column, 1.value, 2.timestamp
-            dispatch = lambda k, r: (r[0], self.format_value(r[1], r[2], k))
+            dispatch = lambda k, r: (r[0], (r[1], r[2]))
         else:
             # 0.column, 1.value
-            dispatch = lambda k, r: (r[0], self.decode(r[1], k))
+            dispatch = lambda k, r: (r[0], r[1])
 
         while(True):
             key, (success, results) = next(self.it)
@@ -174,7 +207,7 @@ class Iter(six.Iterator):
 
                 if self.columns and self.columns == columns_found:
                     break
-            return key, RowsResultType(rows)
+            return key, self.rows(key, rows)
 
 
 # This is implementing our Cassandra API for the driver provided by
@@ -192,6 +225,8 @@ class CassandraDriverCQL(datastore_api.CassandraDriver):
             raise ImportError("the CQL connector is not defined, can't "
                               "be null at this step. Please verify "
                               "dependencies.")
+        # prepared statements by query
+        self._prepared = {}
         super(CassandraDriverCQL, self).__init__(server_list, **options)
 
     # Options are defined here because they can be dinamic depending
@@ -348,6 +383,10 @@ class CassandraDriverCQL(datastore_api.CassandraDriver):
                 consistency_level=self.ConsistencyLevel,
                 row_factory=self.RowFactory,
                 request_timeout=120,
+                # statements carrying a routing key are sent straight
+                # to a replica of their partition
+                load_balancing_policy=connector.policies.TokenAwarePolicy(
+                    connector.policies.DCAwareRoundRobinPolicy()),
             ),
         }
 
@@ -409,8 +448,17 @@ class CassandraDriverCQL(datastore_api.CassandraDriver):
 
         self._cluster = self.create_cluster()
         self._cluster.connect()
-
-        PoolClass = Pool if self.options.use_workers else DummyPool
+        self._prepared = {}
+
+        if not self.options.use_workers:
+            PoolClass = DummyPool
+        elif self.options.workers_transport == 'pipe':
+            PoolClass = PipePool
+        elif self.options.workers_transport == 'queue':
+            PoolClass = Pool
+        else:
+            raise VncError("unknown workers transport '{}'".format(
+                self.options.workers_transport))
         self.pool = PoolClass(
             self.options.num_groups or DEFAULT_NUM_GROUPS,
             self.options.num_workers or DEFAULT_NUM_WORKERS,
@@ -450,8 +498,8 @@ class CassandraDriverCQL(datastore_api.CassandraDriver):
         self.report_status_up()
 
     def _Create_Session(self, keyspace, cf_name, **cf_args):
-        self._cf_dict[cf_name] = self._cluster.connect(
-            keyspace)
+        ses = self._cluster.connect(keyspace)
+        self._cf_dict[cf_name] = ses
 
     def _Column_Families(self, keyspace, prefixed=False):
         if not prefixed:
@@ -573,6 +621,7 @@ class CassandraDriverCQL(datastore_api.CassandraDriver):
     def initializer(self, group_id, worker_id):
         self._cluster = self.create_cluster()
         self._cluster.connect()
+        self._prepared = {}
 
         # Ensures keyspaces/tables are ready before to continue
         while not self.are_keyspaces_ready(self.options.rw_keyspaces):
@@ -662,6 +711,12 @@ class CassandraDriverCQL(datastore_api.CassandraDriver):
                                 include_timestamp,
                                 decode_json,
                                 num_columns)
+        # the rows sent back by a worker process lost the logger of their
+        # values failing to decode
+        for key, rows in req:
+            if isinstance(rows, JsonRowsResultType) and rows.on_error is None:
+                rows.on_error = functools.partial(
+                    log_decode_error, self.options.logger, cf_name, key)
         return req
 
     def _Get_CF_Batch(self, cf_name, keyspace_name=None):
@@ -766,7 +821,9 @@ class CassandraDriverCQL(datastore_api.CassandraDriver):
                 yield k, rows
 
         current_key, aggregator = None, []
-        for row in ses.execute(cql, arg):
+        # range scans are read by pages of rows
+        for row in ses.execute(*self.statement(
+                ses, cql, arg, fetch_size=self.options.fetch_size)):
             key, row = row[0], row[1:]
 
             if current_key is None:
@@ -799,7 +856,7 @@ class CassandraDriverCQL(datastore_api.CassandraDriver):
         if finish:
             cql += "AND column1 <= textAsBlob(%s) "
             arg.append(StringType(finish))
-        return ses.execute(cql, arg).one()[0]
+        return ses.execute(*self.statement(ses, cql, arg, key)).one()[0]
 
     def _Insert(self, key, columns, keyspace_name=None, cf_name=None,
                 batch=None, column_family=None):
@@ -829,9 +886,9 @@ class CassandraDriverCQL(datastore_api.CassandraDriver):
             for column, value in columns.items():
                 if len(batch) >= self.options.batch_limit:
                     batch.send()
-                batch.add_insert(key, cql, [StringType(key),
-                                            StringType(column),
-                                            StringType(value)])
+                batch.add_insert(key, *self.statement(
+                    ses, cql, [StringType(key), StringType(column),
+                               StringType(value)], key))
             if local_batch:
                 batch.send()
         else:
@@ -852,12 +909,47 @@ class CassandraDriverCQL(datastore_api.CassandraDriver):
                              StringType(column)])
         self.apply(ses, cql, args)
 
+    def prepare(self, ses, cql):
+        # statements are prepared once per query shape, the CF name being
+        # part of the query
+        try:
+            return self._prepared[cql]
+        except KeyError:
+            prepared = self._prepared[cql] = ses.prepare(
+                cql.replace('%s', '?'))
+            return prepared
+
+    def statement(self, ses, cql, arg, key=None, fetch_size=None):
+        """Return the statement and parameters to execute a query.
+
+        When prepared statements are used, the query is bound to its
+        parameters and routed with the partition key `key` to its
+        replicas, the keys being stored as blobs of the UTF-8 strings.
+        Rows are read by pages of `fetch_size` rows when set, the session
+        default otherwise.
+        """
+        if not self.options.use_prepared_statements:
+            if fetch_size:
+                cql = connector.query.SimpleStatement(
+                    cql, fetch_size=fetch_size)
+            return cql, arg
+        bound = self.prepare(ses, cql).bind(arg)
+        if key is not None:
+            bound.routing_key = StringType(key).encode('utf-8')
+        if fetch_size:
+            bound.fetch_size = fetch_size
+        return bound, None
+
     def apply(self, ses, cql, args):
+        # the partition key is the first parameter of the queries
+        statements = [self.statement(ses, cql, arg, arg[0])
+                      for arg in args]
         if self.options.use_concurrency and\
            len(args) < self.options.concurrency_starts:
-            return [(True, ses.execute(cql, arg)) for arg in args]
-        return connector.concurrent.execute_concurrent_with_args(
-            ses, cql, args, concurrency=self.options.concurrency)
+            return [(True, ses.execute(*statement))
+                    for statement in statements]
+        return connector.concurrent.execute_concurrent(
+            ses, statements, concurrency=self.options.concurrency)
 
     def _Remove(self, key, columns=None, keyspace_name=None, cf_name=None,
                 batch=None, column_family=None):
@@ -885,9 +977,10 @@ class CassandraDriverCQL(datastore_api.CassandraDriver):
             if batch is not None:
                 if len(batch) >= self.options.batch_limit:
                     batch.send()
-                batch.add_remove(key, cql, [StringType(key)])
+                batch.add_remove(key, *self.statement(
+                    ses, cql, [StringType(key)], key))
             else:
-                ses.execute(cql, [StringType(key)])
+                ses.execute(*self.statement(ses, cql, [StringType(key)], key))
         else:
             cql = """
               DELETE FROM "{}"
@@ -896,8 +989,8 @@ class CassandraDriverCQL(datastore_api.CassandraDriver):
             """.format(cf_name)
             if batch is not None:
                 for column in columns:
-                    batch.add_remove(key, cql, [StringType(key),
-                                                StringType(column)])
+                    batch.add_remove(key, *self.statement(
+                        ses, cql, [StringType(key), StringType(column)], key))
                 if local_batch:
                     batch.send()
             else:
@@ -933,6 +1026,14 @@ class CassandraDriverCQL(datastore_api.CassandraDriver):
 
 # A cooperative queue with gevent
 class CoopQueue(Queue):
+    def __init__(self, maxsize=0):
+        if six.PY2:
+            super(CoopQueue, self).__init__(maxsize)
+        else:
+            # Python 3 queues need a multiprocessing context
+            super(CoopQueue, self).__init__(
+                maxsize, ctx=multiprocessing.get_context())
+
     def get(self):
         while True:
             try:
@@ -959,6 +1060,16 @@ class Pool(object):
         self.workers = []
         self.groups = gevent.queue.Queue()
 
+    @staticmethod
+    def reinit_gevent():
+        # de-install events running from master to the children.
+        gevent.reinit()
+        hub = gevent.get_hub()
+        del hub.threadpool
+        hub._threadpool = None
+        hub.destroy(destroy_loop=True)
+        gevent.get_hub(default=True)
+
     def prefork(self):
         for group_id in six.moves.xrange(self.num_groups):
             group = []
@@ -966,15 +1077,7 @@ class Pool(object):
                 qin, qout = CoopQueue(), CoopQueue()
 
                 def my_loop():
-                    # de-install events running from master to the
-                    # children.
-                    gevent.reinit()
-                    hub = gevent.get_hub()
-                    del hub.threadpool
-                    hub._threadpool = None
-                    hub.destroy(destroy_loop=True)
-                    gevent.get_hub(default=True)
-
+                    self.reinit_gevent()
                     self.initializer(group_id, worker_id)
                     try:
                         for args, params in iter(qin.get, 'STOP'):
@@ -1002,6 +1105,14 @@ class Pool(object):
         self.workers = []
         self.groups = gevent.queue.Queue()
 
+    def send(self, worker, args, params):
+        _, qin, _ = worker
+        qin.put((args, params))
+
+    def receive(self, worker):
+        _, _, qout = worker
+        return qout.get()
+
     def compute(self, args, *append_args):
         while not self.are_workers_alive():
             self.lock_prefork.acquire()
@@ -1011,22 +1122,222 @@ class Pool(object):
             gevent.sleep(0.1)
 
         group = self.groups.get()
-        gsize = math.ceil(len(args) / float(len(group))) or 1
+        gsize = int(math.ceil(len(args) / float(len(group)))) or 1
 
         workers = []
         for i, n in enumerate(six.moves.xrange(0, len(args), gsize)):
-            _, qin, _ = group[i]
-            qin.put((args[n:n + gsize], append_args))
+            self.send(group[i], args[n:n + gsize], append_args)
             workers.append(i)
         response = []
         for i in workers:
-            _, _, qout = group[i]
-            response.append(qout.get())
-        result = list(itertools.chain(*response))
+            response.append(self.receive(group[i]))
         self.groups.put(group)
+        # a worker failing a request returns the error once the responses
+        # of the other workers are read
+        for rows in response:
+            if isinstance(rows, BaseException):
+                raise rows
+        result = list(itertools.chain(*response))
         return result
 
 
+# One way channel over a pipe made before forking a worker of PipePool,
+# each process closes the end it does not use. Both ends are
+# non-blocking and wait on the gevent hub for the pipe to be ready.
+class PipeChannel(object):
+    # kind of frame and size of its payload
+    HEADER = struct.Struct('!BQ')
+    READ_SIZE = 1 << 20
+
+    def __init__(self):
+        self.read_fd, self.write_fd = os.pipe()
+        gevent.os.make_nonblocking(self.read_fd)
+        gevent.os.make_nonblocking(self.write_fd)
+
+    def _close_fd(self, name):
+        fd = getattr(self, name)
+        if fd is not None:
+            setattr(self, name, None)
+            os.close(fd)
+
+    def close_reader(self):
+        self._close_fd('read_fd')
+
+    def close_writer(self):
+        self._close_fd('write_fd')
+
+    def close(self):
+        self.close_reader()
+        self.close_writer()
+
+    def _write(self, data):
+        data = memoryview(data)
+        while data:
+            try:
+                data = data[os.write(self.write_fd, data):]
+            except OSError as e:
+                if e.errno not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    raise
+                gevent.socket.wait_write(self.write_fd)
+
+    def _read(self, size):
+        chunks = []
+        while size:
+            try:
+                chunk = os.read(self.read_fd, min(size, self.READ_SIZE))
+            except OSError as e:
+                if e.errno not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    raise
+                gevent.socket.wait_read(self.read_fd)
+                continue
+            if not chunk:
+                raise EOFError("pipe closed by the other process")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
+    def send(self, kind, payload):
+        self._write(self.HEADER.pack(kind, len(payload)) + payload)
+
+    def receive(self):
+        kind, size = self.HEADER.unpack(self._read(self.HEADER.size))
+        return kind, self._read(size)
+
+
+# Pool whose workers get requests and send responses through pipes the
+# gevent hub waits on, instead of queues polled every millisecond by both
+# the master and the idle workers. Responses larger than `shm_threshold`
+# bytes are written to a file in shared memory and only its name goes
+# through the pipe, the master reads them at once instead of by chunks
+# of the pipe buffer.
+class PipePool(Pool):
+    FRAME_REQUEST = 0
+    FRAME_RESPONSE = 1
+    FRAME_SHM_RESPONSE = 2
+    FRAME_ERROR = 3
+
+    def __init__(self, num_groups, num_workers, target, initializer,
+                 shm_threshold=DEFAULT_SHM_THRESHOLD):
+        super(PipePool, self).__init__(num_groups, num_workers, target,
+                                       initializer)
+        self.shm_threshold = shm_threshold
+        self.channels = []
+        # set when a worker may be out of sync with its channels
+        self.broken = False
+
+    @staticmethod
+    def dumps(obj):
+        return six.moves.cPickle.dumps(obj, six.moves.cPickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def loads(data):
+        return six.moves.cPickle.loads(data)
+
+    def prefork(self):
+        # ends of the channels of the master, closed by the workers
+        master_channels = []
+        for group_id in six.moves.xrange(self.num_groups):
+            group = []
+            for worker_id in six.moves.xrange(self.num_workers):
+                chin, chout = PipeChannel(), PipeChannel()
+
+                def my_loop():
+                    self.reinit_gevent()
+                    for channel in master_channels:
+                        channel.close()
+                    chin.close_writer()
+                    chout.close_reader()
+                    self.initializer(group_id, worker_id)
+                    try:
+                        self.worker_loop(group_id, worker_id, chin, chout)
+                    except (KeyboardInterrupt, EOFError):
+                        pass
+
+                p = Process(target=my_loop)
+                p.daemon = True
+                p.start()
+                chin.close_reader()
+                chout.close_writer()
+                master_channels.extend([chin, chout])
+                self.channels.extend([chin, chout])
+
+                self.workers.append(p)
+                group.append((p, chin, chout))
+
+            self.groups.put(group)
+
+    def worker_loop(self, group_id, worker_id, chin, chout):
+        while True:
+            _, payload = chin.receive()
+            args, params = self.loads(payload)
+            try:
+                result = self.target(group_id, worker_id, args, params)
+                payload = self.dumps(result)
+            except Exception as e:
+                try:
+                    payload = self.dumps(e)
+                except Exception:
+                    payload = self.dumps(VncError(str(e)))
+                chout.send(self.FRAME_ERROR, payload)
+                continue
+            if len(payload) <= self.shm_threshold:
+                chout.send(self.FRAME_RESPONSE, payload)
+                continue
+            fd, path = tempfile.mkstemp(prefix='contrail-cql-', dir=SHM_DIR)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(payload)
+            except Exception:
+                os.unlink(path)
+                raise
+            chout.send(self.FRAME_SHM_RESPONSE, path.encode('utf-8'))
+
+    def are_workers_alive(self):
+        if self.broken:
+            return False
+        return super(PipePool, self).are_workers_alive()
+
+    def terminate_workers(self):
+        super(PipePool, self).terminate_workers()
+        for channel in self.channels:
+            channel.close()
+        self.channels = []
+        self.broken = False
+
+    def send(self, worker, args, params):
+        _, chin, _ = worker
+        try:
+            chin.send(self.FRAME_REQUEST, self.dumps((args, params)))
+        except BaseException:
+            self.broken = True
+            raise
+
+    def receive(self, worker):
+        _, _, chout = worker
+        try:
+            kind, payload = chout.receive()
+        except BaseException:
+            # the worker may still send the response of an aborted
+            # request which would be read by the next one, restart the
+            # workers
+            self.broken = True
+            raise
+        if kind == self.FRAME_SHM_RESPONSE:
+            path = payload.decode('utf-8')
+            try:
+                with open(path, 'rb') as f:
+                    payload = f.read()
+            finally:
+                os.unlink(path)
+        elif kind == self.FRAME_ERROR:
+            try:
+                return self.loads(payload)
+            except Exception as e:
+                return VncError("worker error can't be decoded: {}".format(
+                    e))
+        return self.loads(payload)
+
+
 class DummyPool(Pool):
 
     def prefork(self):
@@ -73,6 +73,7 @@ class CassandraDriverCQL(cassandra_cql.CassandraDriverCQL):
 
     def _Init_Cluster(self, *args, **kwargs):
         self.server = cassandra_fake_impl.CassandraFakeServer()
+        self._prepared = {}
         self.pool = cassandra_cql.DummyPool(
             1, 1, self.worker, self.initializer)
         for ks, cf_dict in itertools.chain(
@@ -102,8 +103,19 @@ class CassandraDriverCQL(cassandra_cql.CassandraDriverCQL):
     def _Keyspace_Properties(self, keyspace):
         return {'strategy_options': {'replication_factor': '1'}}
 
+    def statement(self, ses, cql, arg, key=None, fetch_size=None):
+        # the fake server executes queries given as strings, it returns
+        # whole ranges
+        if not self.options.use_prepared_statements:
+            fetch_size = None
+        return super(CassandraDriverCQL, self).statement(
+            ses, cql, arg, key, fetch_size)
+
     def apply(self, ses, cql, args):
-        return [ses.execute(cql, arg) for arg in args]
+        # fake prepared statements are bound in place, execute each one
+        # before binding the next
+        return [ses.execute(*self.statement(ses, cql, arg, arg[0]))
+                for arg in args]
 
     def _handle_exceptions(self, func, oper=None):
         def wrapper(*args, **kwargs):
@@ -23,6 +23,10 @@ class ConfigKeyspaceMap(object):
                 "name": "obj_shared_table",
                 "issu": True,
             },
+            "OBJ_PROP_INDEX_CF": {
+                "name": "obj_prop_index_table",
+                "issu": False,
+            },
         },
         DEVICE_MANAGER_KEYSPACE_NAME: {
             "PR_VN_IP_CF": {
@@ -5,6 +5,56 @@ try:
     import simplejson as json
 except ImportError:
     import json
+import collections
+try:
+    from collections.abc import ItemsView, ValuesView
+except ImportError:
+    from collections import ItemsView, ValuesView
+
+from cfgm_common import importutils
+
+# Decoders tried in order to pick the backend of loads(). Encoding always
+# goes through (simple)json so that the values written stay byte for byte
+# the ones already stored, only the decoding is accelerated.
+DECODER_BACKENDS = collections.OrderedDict([
+    ('orjson', 'orjson.loads'),
+    ('json', None),
+])
+
+_backend = None
+_fast_loads = None
+
+
+def use_backend(name=None):
+    """Select the decoder of loads().
+
+    Without a name, the first backend of DECODER_BACKENDS installed is
+    used. Returns the name of the backend selected.
+    """
+    global _backend, _fast_loads
+    names = [name] if name else list(DECODER_BACKENDS)
+    for name in names:
+        path = DECODER_BACKENDS[name]
+        try:
+            fast_loads = path and importutils.import_class(path)
+        except ImportError:
+            continue
+        _backend, _fast_loads = name, fast_loads
+        return name
+    raise ImportError('no JSON decoder backend available in %s' % names)
+
+
+def backend():
+    """Name of the backend decoding loads()."""
+    return _backend
+
+
+def register_backend(name, path):
+    """Add the decoder at dotted path `path` in front of the backends."""
+    backends = [(name, path)] + [(n, p) for n, p in DECODER_BACKENDS.items()
+                                 if n != name]
+    DECODER_BACKENDS.clear()
+    DECODER_BACKENDS.update(backends)
 
 
 def load(fp, *args, **kwargs):
@@ -14,6 +64,13 @@ def load(fp, *args, **kwargs):
 
 def loads(s, *args, **kwargs):
     """Deserialize to a Python object."""
+    if _fast_loads is not None and not args and not kwargs:
+        try:
+            return _fast_loads(s)
+        except ValueError:
+            # the accelerated decoders are stricter than json (NaN, integers
+            # over 64 bits, lone surrogates...), json decides of the result
+            pass
     return json.loads(s, *args, **kwargs)
 
 
@@ -25,3 +82,132 @@ def dump(obj, fp, *args, **kwargs):
 def dumps(obj, *args, **kwargs):
     """Serialize Python object to JSON."""
     return json.dumps(obj, *args, **kwargs)
+
+
+class LazyJsonDict(collections.OrderedDict):
+    """Ordered dict of JSON encoded values decoded on first access.
+
+    Values are JSON strings, or (JSON string, timestamp) tuples when
+    `timestamps` is set. A value that can't be decoded is kept as it is
+    after on_error(key, value, error) is called. Pickling keeps the values
+    not decoded yet encoded but drops on_error.
+    """
+
+    def __init__(self, items=(), timestamps=False, on_error=None):
+        self._pending = set()
+        self.timestamps = timestamps
+        self.on_error = on_error
+        super(LazyJsonDict, self).__init__()
+        for key, value in items:
+            collections.OrderedDict.__setitem__(self, key, value)
+            self._pending.add(key)
+
+    def _decode(self, key):
+        value = collections.OrderedDict.__getitem__(self, key)
+        if key not in self._pending:
+            return value
+        self._pending.discard(key)
+        encoded = value[0] if self.timestamps else value
+        try:
+            decoded = loads(encoded)
+        except (ValueError, TypeError) as e:
+            if self.on_error is not None:
+                self.on_error(key, encoded, e)
+            return value
+        if self.timestamps:
+            decoded = (decoded, value[1])
+        collections.OrderedDict.__setitem__(self, key, decoded)
+        return decoded
+
+    def _decode_all(self):
+        for key in list(self._pending):
+            self._decode(key)
+
+    def __getitem__(self, key):
+        return self._decode(key)
+
+    def __setitem__(self, key, value):
+        self._pending.discard(key)
+        collections.OrderedDict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self._pending.discard(key)
+        collections.OrderedDict.__delitem__(self, key)
+
+    def __iter__(self):
+        # defined so that dict(), {**d} and dict.update() copy the values
+        # through __getitem__ and not the encoded ones
+        return collections.OrderedDict.__iter__(self)
+
+    def __eq__(self, other):
+        self._decode_all()
+        if isinstance(other, LazyJsonDict):
+            other._decode_all()
+        return collections.OrderedDict.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        self._decode_all()
+        return collections.OrderedDict.__repr__(self)
+
+    def __reduce__(self):
+        return (_rebuild_lazy_json_dict,
+                (self.__class__, self._raw_items(), list(self._pending),
+                 self.timestamps))
+
+    def _raw_items(self):
+        return [(key, collections.OrderedDict.__getitem__(self, key))
+                for key in collections.OrderedDict.__iter__(self)]
+
+    def get(self, key, default=None):
+        if key in self:
+            return self._decode(key)
+        return default
+
+    def pop(self, key, *default):
+        if key in self:
+            value = self._decode(key)
+            del self[key]
+            return value
+        return collections.OrderedDict.pop(self, key, *default)
+
+    def popitem(self, last=True):
+        if not self:
+            raise KeyError('dictionary is empty')
+        key = next(reversed(self) if last else iter(self))
+        return key, self.pop(key)
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self._decode(key)
+        self[key] = default
+        return default
+
+    def items(self):
+        return ItemsView(self)
+
+    def values(self):
+        return ValuesView(self)
+
+    iteritems = items
+    itervalues = values
+
+    def copy(self):
+        return _rebuild_lazy_json_dict(
+            self.__class__, self._raw_items(), self._pending, self.timestamps,
+            self.on_error)
+
+
+def _rebuild_lazy_json_dict(cls, items, pending, timestamps, on_error=None):
+    d = cls(timestamps=timestamps, on_error=on_error)
+    for key, value in items:
+        collections.OrderedDict.__setitem__(d, key, value)
+    d._pending.update(pending)
+    return d
+
+
+use_backend()
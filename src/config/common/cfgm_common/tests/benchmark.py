@@ -0,0 +1,47 @@
+from __future__ import print_function
+from __future__ import unicode_literals
+#
+# Copyright (c) 2013 Juniper Networks, Inc. All rights reserved.
+#
+"""Helpers of the benchmarks living next to the unit tests.
+
+The benchmarks are skipped by the unit test runs, they run only with the
+CFGM_BENCHMARKS environment variable set, e.g.:
+
+    CFGM_BENCHMARKS=1 python -m pytest -s -k Benchmark <test file>
+"""
+import os
+import time
+import unittest
+
+BENCHMARKS_ENV = 'CFGM_BENCHMARKS'
+
+
+def benchmark(test):
+    """Skip the decorated test case or test unless benchmarks are run."""
+    return unittest.skipUnless(
+        os.environ.get(BENCHMARKS_ENV),
+        'benchmark, set %s=1 to run it' % BENCHMARKS_ENV)(test)
+
+
+class Timer(object):
+    """Context manager measuring the time spent in its block."""
+
+    def __enter__(self):
+        self.start = time.time()
+        self.elapsed = None
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed = time.time() - self.start
+
+    @property
+    def msec(self):
+        return self.elapsed * 1e3
+
+
+def report(title, lines):
+    """Print the result lines of a benchmark under a title."""
+    print('\n%s:' % title)
+    for line in lines:
+        print('  %s' % line)
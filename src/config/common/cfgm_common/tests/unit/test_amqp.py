@@ -4,7 +4,12 @@
 # Copyright (c) 2020 Juniper Networks, Inc. All rights reserved.
 #
 
+from builtins import object
+from builtins import range
 import unittest
+
+import gevent
+import gevent.queue
 import mock
 
 from cfgm_common.vnc_amqp import VncAmqpHandle
@@ -23,3 +28,144 @@ class TestVncAmqp(unittest.TestCase):
         vnc._vnc_kombu = mock.MagicMock()
         vnc.close()
         vnc._vnc_kombu.shutdown.assert_called_once_with()
+
+
+class FakeVirtualNetwork(object):
+    _dict = {}
+    obj_type = 'virtual_network'
+
+    def __init__(self, uuid):
+        self.uuid = uuid
+        self.name = uuid
+        self.evaluations = 0
+
+    def get_key(self):
+        return self.uuid
+
+    def skip_evaluate(self, from_type):
+        return False
+
+    def evaluate(self):
+        self.evaluations += 1
+
+    @classmethod
+    def get(cls, key):
+        return cls._dict.get(key)
+
+
+class FakeVirtualMachineInterface(FakeVirtualNetwork):
+    _dict = {}
+    obj_type = 'virtual_machine_interface'
+
+    def __init__(self, uuid):
+        super(FakeVirtualMachineInterface, self).__init__(uuid)
+        self.virtual_network = 'vn'
+        self.updates = 0
+
+    def update(self):
+        self.updates += 1
+
+    @classmethod
+    def get_by_uuid(cls, uuid):
+        return cls._dict.get(uuid)
+
+    @classmethod
+    def locate(cls, key):
+        return cls._dict.setdefault(key, cls(key))
+
+    @classmethod
+    def delete(cls, key):
+        cls._dict.pop(key, None)
+
+
+class TestVncAmqpBatch(unittest.TestCase):
+    REACTION_MAP = {
+        'virtual_machine_interface': {'self': ['virtual_network']},
+        'virtual_network': {'self': [], 'virtual_machine_interface': []},
+    }
+
+    def setUp(self):
+        FakeVirtualNetwork._dict = {'vn': FakeVirtualNetwork('vn')}
+        FakeVirtualMachineInterface._dict = {}
+        self.db_cls = mock.MagicMock()
+        self.db_cls._indexed_by_name = False
+        self.db_cls.get_obj_type_map.return_value = {
+            'virtual_network': FakeVirtualNetwork,
+            'virtual_machine_interface': FakeVirtualMachineInterface,
+        }
+
+    def get_handle(self, batch_window=0):
+        vnc = VncAmqpHandle(mock.MagicMock(), mock.MagicMock(), self.db_cls,
+                            self.REACTION_MAP, 'test', mock.MagicMock(),
+                            '127.0.0.1', batch_window=batch_window)
+        vnc._db_resync_done.set()
+        return vnc
+
+    @staticmethod
+    def notification(oper, uuid):
+        return {'oper': oper, 'type': 'virtual-machine-interface',
+                'uuid': uuid, 'fq_name': ['default-domain', 'project', uuid]}
+
+    def test_collapse_notifications(self):
+        batch = [
+            self.notification('CREATE', 'vmi1'),
+            self.notification('UPDATE', 'vmi2'),
+            self.notification('UPDATE', 'vmi1'),
+            self.notification('UPDATE-IMPLICIT', 'vmi3'),
+            self.notification('UPDATE', 'vmi2'),
+            self.notification('DELETE', 'vmi2'),
+            self.notification('CREATE', 'vmi2'),
+        ]
+        notifications = VncAmqpHandle._collapse_notifications(batch)
+        self.assertEqual([('CREATE', 'vmi1'), ('DELETE', 'vmi2'),
+                          ('CREATE', 'vmi2')],
+                         [(n['oper'], n['uuid']) for n in notifications])
+
+    def test_batch_evaluates_dependencies_once(self):
+        vnc = self.get_handle(batch_window=0.01)
+        vnc._process_batch([self.notification('CREATE', 'vmi%d' % i)
+                            for i in range(10)])
+        vnc._process_batch([self.notification('UPDATE', 'vmi%d' % (i % 10))
+                            for i in range(100)])
+        vnc._process_batch([self.notification('DELETE', 'vmi0')])
+
+        self.assertEqual(3, FakeVirtualNetwork.get('vn').evaluations)
+        vmi = FakeVirtualMachineInterface.get('vmi1')
+        self.assertEqual(1, vmi.updates)
+        self.assertEqual(2, vmi.evaluations)
+        self.assertIsNone(FakeVirtualMachineInterface.get('vmi0'))
+        stats = vnc.get_batch_stats()
+        self.assertEqual(3, stats['batches'])
+        self.assertEqual(111, stats['notifications'])
+        self.assertEqual(90, stats['collapsed_notifications'])
+        self.assertEqual(100, stats['max_batch_size'])
+        # the vn is evaluated once instead of 10 times by the creation and
+        # the update batches
+        self.assertEqual(2 * 9, stats['evaluations_saved'])
+
+    def test_queued_notifications_are_batched(self):
+        vnc = self.get_handle(batch_window=0.01)
+        vnc._vnc_kombu = mock.MagicMock()
+        vnc._batch_queue = gevent.queue.Queue()
+        vnc._batch_greenlet = gevent.spawn(vnc._batch_notifications)
+        try:
+            for i in range(1000):
+                vnc._vnc_subscribe_callback(
+                    self.notification('CREATE', 'vmi%d' % (i % 10)))
+            gevent.sleep(0.1)
+        finally:
+            vnc.close()
+        self.assertEqual(10, len(FakeVirtualMachineInterface._dict))
+        self.assertEqual(1, FakeVirtualNetwork.get('vn').evaluations)
+        self.assertEqual(1, vnc.get_batch_stats()['batches'])
+
+    def test_without_batch_each_notification_is_evaluated(self):
+        vnc = self.get_handle()
+        for i in range(10):
+            vnc._vnc_subscribe_callback(
+                self.notification('CREATE', 'vmi%d' % i))
+        for i in range(100):
+            vnc._vnc_subscribe_callback(
+                self.notification('UPDATE', 'vmi%d' % (i % 10)))
+        self.assertEqual(110, FakeVirtualNetwork.get('vn').evaluations)
+        self.assertEqual(0, vnc.get_batch_stats()['batches'])
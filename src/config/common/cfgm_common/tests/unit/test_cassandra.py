@@ -4,11 +4,18 @@
 # Copyright (c) 2020 Juniper Networks, Inc. All rights reserved.
 #
 
-import mock
+import os
+import time
 import unittest
 
+import gevent
+import mock
+import six
+
+from cfgm_common import jsonutils as json
 from cfgm_common.datastore import api as datastore_api
-from cfgm_common.exceptions import NoIdError
+from cfgm_common.exceptions import NoIdError, VncError
+from cfgm_common.tests.benchmark import benchmark
 from pysandesh.connection_info import ConnectionState
 from pysandesh.gen_py.process_info.ttypes import ConnectionStatus
 from pysandesh.gen_py.process_info.ttypes import ConnectionType as ConnType
@@ -325,9 +332,11 @@ class TestCassandraDriverCQL(unittest.TestCase):
             lambda x: x))
         [x.start() for x in p]
 
+        # the queries are checked as sent without being prepared
         self.drv = cassandra_cql.CassandraDriverCQL(['a', 'b'], logger=mock.MagicMock(),
                                                     inserts_use_batch=False,
-                                                    removes_use_batch=False)
+                                                    removes_use_batch=False,
+                                                    use_prepared_statements=False)
         self.drv.pool = cassandra_cql.DummyPool(
             1, 1, self.drv.worker, self.drv.initializer)
 
@@ -420,9 +429,12 @@ class TestCassandraDriverCQL(unittest.TestCase):
             SELECT blobAsText(key), blobAsText(column1), value
             FROM "obj_uuid_table"
             WHERE column1 IN (textAsBlob(%s), textAsBlob(%s)) ALLOW FILTERING
-            """, session.execute)
+            """, cassandra_cql.connector.query.SimpleStatement)
+        # read by pages of fetch_size rows
+        statement = cassandra_cql.connector.query.SimpleStatement
+        self.assertEqual(2048, statement.call_args[1]['fetch_size'])
         session.execute.assert_called_once_with(
-            mock.ANY, [u'a_col1', u'a_col2'])
+            statement.return_value, [u'a_col1', u'a_col2'])
 
     @mock.patch('cfgm_common.datastore.drivers.cassandra_cql.Iter.next')
     def test_cql_select(self, mock_Iter_next):
@@ -650,3 +662,363 @@ class TestCassandraDriverCQL(unittest.TestCase):
             mock.call('a_key', mock.ANY, ['a_key', 'a_col2'])],
             any_order=True)
         batch.send.assert_not_called()
+
+
+class TestCassandraDriverCQLPrepared(unittest.TestCase):
+    def setUp(self):
+        cassandra_cql.connector = mock.MagicMock()
+
+        def _Init_Cluster(self):
+            self._cf_dict = {
+                datastore_api.OBJ_UUID_CF_NAME: mock.MagicMock(),
+            }
+            self._cluster = mock.MagicMock()
+        p = mock.patch(
+            'cfgm_common.datastore.drivers.cassandra_cql.CassandraDriverCQL._Init_Cluster',
+            _Init_Cluster)
+        p.start()
+        self.addCleanup(p.stop)
+        self.drv = cassandra_cql.CassandraDriverCQL(
+            ['a', 'b'], logger=mock.MagicMock(), removes_use_batch=False)
+        self.drv.pool = cassandra_cql.DummyPool(
+            1, 1, self.drv.worker, self.drv.initializer)
+        self.ses = self.drv.get_cf(datastore_api.OBJ_UUID_CF_NAME)
+
+    def test_prepared_once_per_shape(self):
+        for key in ('a_key1', 'a_key2'):
+            self.drv._Get_Count(datastore_api.OBJ_UUID_CF_NAME, key)
+        self.drv._Get_Count(datastore_api.OBJ_UUID_CF_NAME, 'a_key1',
+                            start='a')
+        self.assertEqual(2, self.ses.prepare.call_count)
+        cql = self.ses.prepare.call_args_list[0][0][0]
+        self.assertIn('textAsBlob(?)', cql)
+        self.assertNotIn('%s', cql)
+        prepared = self.ses.prepare.return_value
+        prepared.bind.assert_any_call([u'a_key2'])
+        self.ses.execute.assert_called_with(prepared.bind.return_value, None)
+
+    def test_routing_key(self):
+        self.drv._Remove('a_key\u00e9', cf_name=datastore_api.OBJ_UUID_CF_NAME)
+        bound = self.ses.prepare.return_value.bind.return_value
+        self.ses.execute.assert_called_once_with(bound, None)
+        self.assertEqual(u'a_key\u00e9'.encode('utf-8'), bound.routing_key)
+
+    def test_batch_of_bound_statements(self):
+        batch = mock.MagicMock()
+        batch.cf_name = datastore_api.OBJ_UUID_CF_NAME
+        batch.__len__.return_value = 0
+        self.drv._Insert('a_key', {'a_col1': 'a_val1', 'a_col2': 'a_val2'},
+                         batch=batch)
+        self.assertEqual(1, self.ses.prepare.call_count)
+        bound = self.ses.prepare.return_value.bind.return_value
+        batch.add_insert.assert_called_with('a_key', bound, None)
+        self.assertEqual(2, batch.add_insert.call_count)
+
+    def test_range_not_routed(self):
+        list(self.drv._Get_Range(datastore_api.OBJ_UUID_CF_NAME))
+        bound = self.ses.prepare.return_value.bind
+        bound.assert_called_once_with([])
+        self.assertIsInstance(bound.return_value.routing_key, mock.MagicMock)
+
+    def test_range_fetch_size(self):
+        list(self.drv._Get_Range(datastore_api.OBJ_UUID_CF_NAME))
+        bound = self.ses.prepare.return_value.bind.return_value
+        self.assertEqual(2048, bound.fetch_size)
+
+    def test_range_fetch_size_simple_statement(self):
+        drv = cassandra_cql.CassandraDriverCQL(
+            ['a', 'b'], logger=mock.MagicMock(), fetch_size=100,
+            use_prepared_statements=False)
+        ses = drv.get_cf(datastore_api.OBJ_UUID_CF_NAME)
+        list(drv._Get_Range(datastore_api.OBJ_UUID_CF_NAME))
+        simple_statement = cassandra_cql.connector.query.SimpleStatement
+        simple_statement.assert_called_once_with(mock.ANY, fetch_size=100)
+        ses.execute.assert_called_once_with(simple_statement.return_value,
+                                            [])
+
+
+@benchmark
+class TestPreparedStatementsBenchmark(unittest.TestCase):
+    # statements prepared and round trips to the fake server of objects
+    # created then read by a client, with and without preparing
+    NUM_OBJECTS = 200
+
+    def _run(self, use_prepared_statements):
+        from cfgm_common.datastore.drivers import cassandra_fake
+        from cfgm_common.tests import cassandra_fake_impl
+        cassandra_fake_impl.reset()
+        table_class = cassandra_fake_impl._TableCQLSupport
+        prepare, execute = table_class.prepare, table_class.execute
+        with mock.patch.object(table_class, 'prepare', autospec=True,
+                               side_effect=prepare) as prepare_mock, \
+                mock.patch.object(table_class, 'execute', autospec=True,
+                                  side_effect=execute) as execute_mock:
+            drv = cassandra_fake.CassandraDriverCQL(
+                [], rw_keyspaces=datastore_api.UUID_KEYSPACE,
+                logger=mock.MagicMock(),
+                use_prepared_statements=use_prepared_statements)
+            cf_name = datastore_api.OBJ_UUID_CF_NAME
+            keys = ['obj-%d' % i for i in range(self.NUM_OBJECTS)]
+            start = time.time()
+            for key in keys:
+                drv.insert(key, {'fq_name': '["a", "%s"]' % key,
+                                 'type': '"virtual_network"'},
+                           cf_name=cf_name)
+            drv.multiget(cf_name, keys, columns=['fq_name', 'type'])
+            for key in keys:
+                drv.get(cf_name, key, start='fq_name', finish='type')
+            elapsed = time.time() - start
+            # the fake server prepares and executes again the queries it
+            # gets as strings, only count the statements of the driver
+            statements = [call[0][1] for call in execute_mock.call_args_list]
+            prepared = prepare_mock.call_count
+            if not use_prepared_statements:
+                statements = [statement for statement in statements
+                              if isinstance(statement, six.string_types)]
+                prepared = 0
+            routed = sum(
+                1 for statement in statements
+                if getattr(statement, 'routing_key', None) is not None)
+            return prepared, len(statements), routed, elapsed
+
+    def test_prepared_statements(self):
+        print("\n%d objects inserted, multiget and read:" % self.NUM_OBJECTS)
+        for use_prepared_statements in (False, True):
+            prepared, round_trips, routed, elapsed = self._run(
+                use_prepared_statements)
+            print("  %-12s %4d preparations, %4d round trips, %4d routed, "
+                  "%.1f msec" % (
+                      'prepared' if use_prepared_statements else 'simple',
+                      prepared, round_trips, routed, elapsed * 1e3))
+            if use_prepared_statements:
+                self.assertEqual(3, prepared)
+                self.assertEqual(round_trips, routed)
+            else:
+                self.assertEqual(0, routed)
+
+
+@benchmark
+class TestJsonDecodeBenchmark(unittest.TestCase):
+    # decoding of a synthetic obj_uuid_table dump of virtual machine
+    # interfaces read with timestamps, every column decoded up front with
+    # the stdlib or the selected backend, or decoded lazily by the rows
+    # while rendering a few fields only
+    NUM_OBJECTS = 2000
+
+    def setUp(self):
+        self.addCleanup(json.use_backend, json.backend())
+
+    def dump(self):
+        rows = []
+        for i in range(self.NUM_OBJECTS):
+            uuid = '7a8c6e52-0000-4000-8000-%012d' % i
+            columns = [
+                ('fq_name', json.dumps(['default-domain', 'project-%d' % (
+                    i % 20), 'vmi-%d' % i])),
+                ('type', json.dumps('virtual_machine_interface')),
+                ('parent_type', json.dumps('project')),
+                ('parent:project:7a8c6e52-1111-4000-8000-%012d' % (i % 20),
+                 json.dumps(None)),
+                ('prop:id_perms', json.dumps({
+                    'enable': True, 'uuid': {'uuid_mslong': i,
+                                             'uuid_lslong': i * 7},
+                    'created': '2020-01-01T00:00:00.000000',
+                    'last_modified': '2020-01-01T00:00:00.000000',
+                    'permissions': {'owner': 'cloud-admin', 'owner_access': 7,
+                                    'group': 'cloud-admin-group',
+                                    'group_access': 7, 'other_access': 7},
+                    'user_visible': True, 'description': None,
+                    'creator': None})),
+                ('prop:perms2', json.dumps({
+                    'owner': 'a1b2c3d4e5f6', 'owner_access': 7,
+                    'global_access': 0, 'share': []})),
+                ('prop:display_name', json.dumps('vmi-%d' % i)),
+                ('prop:annotations', json.dumps({'key_value_pair': [
+                    {'key': 'k%d' % k, 'value': 'v%d' % k}
+                    for k in range(4)]})),
+                ('prop:virtual_machine_interface_mac_addresses', json.dumps(
+                    {'mac_address': ['02:00:00:00:%02x:%02x' % (
+                        i // 256 % 256, i % 256)]})),
+                ('prop:virtual_machine_interface_bindings', json.dumps(
+                    {'key_value_pair': [
+                        {'key': 'host_id', 'value': 'compute-%d' % (i % 50)},
+                        {'key': 'vnic_type', 'value': 'normal'}]})),
+                ('ref:virtual_network:7a8c6e52-2222-4000-8000-%012d' % (
+                    i % 100), json.dumps({'attr': None,
+                                          'is_weakref': False})),
+                ('ref:security_group:7a8c6e52-3333-4000-8000-%012d' % (
+                    i % 20), json.dumps({'attr': None,
+                                         'is_weakref': False})),
+                ('backref:instance_ip:7a8c6e52-4444-4000-8000-%012d' % i,
+                 json.dumps({'attr': None, 'is_weakref': False})),
+                ('META:latest_col_ts', json.dumps(None)),
+            ]
+            rows.append((uuid, (True, [
+                (column, value, 1600000000000000 + i)
+                for column, value in columns])))
+        return rows
+
+    def _run(self, rows, fields=None):
+        start = time.time()
+        it = cassandra_cql.Iter(rows, None, include_timestamp=True,
+                                logger=mock.MagicMock())
+        for _, columns in it:
+            for column in fields or list(columns):
+                columns[column]
+        return time.time() - start
+
+    def test_decode_throughput(self):
+        rows = self.dump()
+        size = sum(len(value) for _, (_, columns) in rows
+                   for _, value, _ in columns)
+        print("\n%d objects, %.1f MB of JSON columns:" % (
+            len(rows), size / 1e6))
+        runs = [('stdlib', 'json', None)]
+        if json.backend() != 'json':
+            runs.append((json.backend(), json.backend(), None))
+        # fields read by a list of the interfaces with their id_perms
+        runs.append(('lazy ' + json.backend(), json.backend(),
+                     ['type', 'fq_name', 'prop:id_perms']))
+        for name, backend, fields in runs:
+            json.use_backend(backend)
+            elapsed = self._run(rows, fields)
+            print("  %-18s %7.1f msec, %6.1f MB/s" % (
+                name, elapsed * 1e3, size / 1e6 / elapsed))
+
+
+def rows_target(group_id, worker_id, args, params):
+    # worker target returning num_columns decoded columns per key
+    num_columns, fail = params
+    if fail:
+        raise VncError('failed to read %s' % args[0][0])
+    return [(arg[0], cassandra_cql.RowsResultType(
+        ('prop:%d' % i, {'key': arg[0], 'index': i, 'enable': True})
+        for i in range(num_columns))) for arg in args]
+
+
+class TestPipePool(unittest.TestCase):
+    def get_pool(self, **kwargs):
+        pool = cassandra_cql.PipePool(2, 2, rows_target, lambda *args: None,
+                                      **kwargs)
+        self.addCleanup(pool.terminate_workers)
+        return pool
+
+    def expected(self, keys, num_columns):
+        return rows_target(0, 0, [[key] for key in keys], (num_columns, False))
+
+    def test_compute(self):
+        pool = self.get_pool()
+        keys = ['key-%d' % i for i in range(5)]
+        result = pool.compute([[key] for key in keys], 3, False)
+        self.assertEqual(self.expected(keys, 3), result)
+        self.assertIsInstance(result[0][1], cassandra_cql.RowsResultType)
+        self.assertEqual(4, len(pool.workers))
+        # requests reuse the workers
+        result = pool.compute([['key']], 1, False)
+        self.assertEqual(self.expected(['key'], 1), result)
+        self.assertEqual(4, len(pool.workers))
+
+    def test_shared_memory_response(self):
+        def shm_files():
+            return set(name for name in os.listdir(
+                cassandra_cql.SHM_DIR or '/tmp')
+                if name.startswith('contrail-cql-'))
+
+        pool = self.get_pool(shm_threshold=1024)
+        files = shm_files()
+        keys = ['key-%d' % i for i in range(100)]
+        result = pool.compute([[key] for key in keys], 10, False)
+        self.assertEqual(self.expected(keys, 10), result)
+        self.assertEqual(files, shm_files())
+
+    def test_worker_error(self):
+        pool = self.get_pool()
+        self.assertRaises(VncError, pool.compute,
+                          [['key-%d' % i] for i in range(4)], 1, True)
+        workers = list(pool.workers)
+        # the workers are kept and in sync with their channels
+        for _ in range(2):
+            result = pool.compute([['key']], 1, False)
+            self.assertEqual(self.expected(['key'], 1), result)
+        self.assertEqual(workers, pool.workers)
+
+    def test_worker_restarted(self):
+        pool = self.get_pool()
+        pool.compute([['key']], 1, False)
+        workers = list(pool.workers)
+        workers[0].terminate()
+        workers[0].join()
+        result = pool.compute([['key']], 1, False)
+        self.assertEqual(self.expected(['key'], 1), result)
+        self.assertFalse(set(workers) & set(pool.workers))
+
+    def test_aborted_request_restarts_workers(self):
+        pool = self.get_pool()
+        pool.compute([['key']], 1, False)
+        workers = list(pool.workers)
+        with gevent.Timeout(0.0001, False):
+            pool.compute([['key-%d' % i] for i in range(10000)], 100, False)
+        self.assertTrue(pool.broken)
+        result = pool.compute([['key']], 1, False)
+        self.assertEqual(self.expected(['key'], 1), result)
+        self.assertFalse(set(workers) & set(pool.workers))
+
+
+@benchmark
+class TestPoolBenchmark(unittest.TestCase):
+    # master process latency of small reads and throughput of a large
+    # multiget by pool of workers, and CPU burnt by idle workers. Timings
+    # of process pools vary with the load of the host, they are only
+    # reported
+    NUM_SMALL_READS = 200
+    NUM_ROWS = 100000
+    NUM_COLUMNS = 5
+    IDLE_TIME = 0.5
+
+    @staticmethod
+    def cpu_time(pids):
+        ticks = 0
+        for pid in pids:
+            with open('/proc/%d/stat' % pid) as f:
+                stat = f.read().rsplit(')', 1)[1].split()
+            # utime and stime
+            ticks += int(stat[11]) + int(stat[12])
+        return float(ticks) / os.sysconf('SC_CLK_TCK')
+
+    def _bench(self, pool_class):
+        pool = pool_class(1, 4, rows_target, lambda *args: None)
+        self.addCleanup(pool.terminate_workers)
+        pool.compute([['warm-up']], 1, False)
+
+        latencies = []
+        for i in range(self.NUM_SMALL_READS):
+            start = time.time()
+            pool.compute([['key-%d' % i]], self.NUM_COLUMNS, False)
+            latencies.append(time.time() - start)
+        latencies.sort()
+
+        args = [['key-%d' % i] for i in range(self.NUM_ROWS)]
+        start = time.time()
+        result = pool.compute(args, self.NUM_COLUMNS, False)
+        throughput = self.NUM_ROWS / (time.time() - start)
+        self.assertEqual(self.NUM_ROWS, len(result))
+
+        idle_cpu = None
+        pids = [p.pid for p in pool.workers]
+        if pids and os.path.isdir('/proc'):
+            cpu = self.cpu_time(pids)
+            time.sleep(self.IDLE_TIME)
+            idle_cpu = (self.cpu_time(pids) - cpu) / self.IDLE_TIME
+        return (latencies[len(latencies) // 2],
+                latencies[len(latencies) * 99 // 100], throughput, idle_cpu)
+
+    def test_transports(self):
+        print("\npool       small read p50/p99 (msec)  %d rows multiget  "
+              "idle workers CPU" % self.NUM_ROWS)
+        for name, pool_class in (('DummyPool', cassandra_cql.DummyPool),
+                                 ('Pool', cassandra_cql.Pool),
+                                 ('PipePool', cassandra_cql.PipePool)):
+            p50, p99, throughput, idle_cpu = self._bench(pool_class)
+            print("%-10s %8.3f / %-8.3f          %8d rows/s   %s" % (
+                name, p50 * 1e3, p99 * 1e3, throughput,
+                '-' if idle_cpu is None else '%.1f%%' % (idle_cpu * 100)))
@@ -0,0 +1,119 @@
+from __future__ import unicode_literals
+import copy
+import json
+import pickle
+import unittest
+
+import mock
+
+from cfgm_common import jsonutils
+
+
+class TestBackend(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(jsonutils.use_backend, jsonutils.backend())
+
+    def test_stdlib_backend(self):
+        self.assertEqual('json', jsonutils.use_backend('json'))
+        self.assertEqual({'a': [1, None]}, jsonutils.loads('{"a": [1, null]}'))
+
+    def test_missing_backend_skipped(self):
+        jsonutils.register_backend('missing', 'missing_json_module.loads')
+        self.addCleanup(jsonutils.DECODER_BACKENDS.pop, 'missing')
+        self.assertEqual('missing', list(jsonutils.DECODER_BACKENDS)[0])
+        self.assertNotEqual('missing', jsonutils.use_backend())
+        self.assertRaises(ImportError, jsonutils.use_backend, 'missing')
+
+    def test_backend_falls_back_on_stricter_decoder(self):
+        fast_loads = mock.Mock(side_effect=ValueError('NaN'))
+        with mock.patch.object(jsonutils, '_fast_loads', fast_loads):
+            value = jsonutils.loads('[NaN]')
+        fast_loads.assert_called_once_with('[NaN]')
+        self.assertNotEqual(value[0], value[0])
+
+    def test_backends_decode_alike(self):
+        values = ['{"fq_name": ["default-domain", "p\\u00e9", "vn"]}',
+                  '{"attr": {"ip": "10.0.0.1", "prefix": 24.5}, '
+                  '"is_weakref": false}',
+                  'null', '"\\ud83d\\ude00"', '[%d]' % (1 << 70)]
+        for name in jsonutils.DECODER_BACKENDS:
+            try:
+                jsonutils.use_backend(name)
+            except ImportError:
+                continue
+            for value in values:
+                self.assertEqual(json.loads(value), jsonutils.loads(value))
+
+    def test_encoding_unchanged(self):
+        obj = {'fq_name': ['default-domain', 'vn'], 'enable': True}
+        for name in jsonutils.DECODER_BACKENDS:
+            try:
+                jsonutils.use_backend(name)
+            except ImportError:
+                continue
+            self.assertEqual(json.dumps(obj), jsonutils.dumps(obj))
+
+
+class TestLazyJsonDict(unittest.TestCase):
+    def get_dict(self, timestamps=False, on_error=None):
+        items = [('fq_name', '["a", "b"]'), ('prop:enable', 'true'),
+                 ('prop:bad', '{oops')]
+        if timestamps:
+            items = [(key, (value, 42)) for key, value in items]
+        return jsonutils.LazyJsonDict(items, timestamps=timestamps,
+                                      on_error=on_error)
+
+    def test_decodes_on_access_only(self):
+        d = self.get_dict()
+        with mock.patch.object(jsonutils, 'loads',
+                               side_effect=jsonutils.loads) as loads:
+            self.assertEqual(['a', 'b'], d['fq_name'])
+            self.assertEqual(['a', 'b'], d.get('fq_name'))
+            self.assertEqual(['fq_name', 'prop:enable', 'prop:bad'], list(d))
+            self.assertIn('prop:enable', d)
+        loads.assert_called_once_with('["a", "b"]')
+
+    def test_timestamps(self):
+        d = self.get_dict(timestamps=True)
+        self.assertEqual((['a', 'b'], 42), d['fq_name'])
+        self.assertEqual((True, 42), d.pop('prop:enable'))
+        self.assertNotIn('prop:enable', d)
+
+    def test_decode_error_keeps_value(self):
+        on_error = mock.Mock()
+        d = self.get_dict(on_error=on_error)
+        self.assertEqual('{oops', d['prop:bad'])
+        self.assertEqual('{oops', d['prop:bad'])
+        on_error.assert_called_once_with('prop:bad', '{oops', mock.ANY)
+
+    def test_copies_are_decoded(self):
+        expected = {'fq_name': ['a', 'b'], 'prop:enable': True,
+                    'prop:bad': '{oops'}
+        self.assertEqual(expected, dict(self.get_dict()))
+        self.assertEqual(expected, dict(**self.get_dict()))
+        self.assertEqual(expected, dict(self.get_dict().items()))
+        self.assertEqual(sorted(expected.values(), key=str),
+                         sorted(self.get_dict().values(), key=str))
+        updated = {}
+        updated.update(self.get_dict())
+        self.assertEqual(expected, updated)
+        self.assertEqual(self.get_dict(), expected)
+        self.assertEqual(self.get_dict(), self.get_dict())
+        self.assertEqual(expected, json.loads(json.dumps(self.get_dict())))
+
+    def test_copy_stays_lazy(self):
+        d = self.get_dict()
+        d['fq_name']
+        for other in (d.copy(), copy.copy(d), copy.deepcopy(d),
+                      pickle.loads(pickle.dumps(d))):
+            self.assertIsInstance(other, jsonutils.LazyJsonDict)
+            self.assertEqual(set(['prop:enable', 'prop:bad']), other._pending)
+            self.assertEqual(True, other['prop:enable'])
+            self.assertEqual(['a', 'b'], other['fq_name'])
+
+    def test_setitem_not_decoded(self):
+        d = self.get_dict()
+        d['prop:enable'] = 'false'
+        self.assertEqual('false', d['prop:enable'])
+        self.assertEqual(('prop:bad', '{oops'), d.popitem())
+        self.assertEqual('new', d.setdefault('prop:new', 'new'))
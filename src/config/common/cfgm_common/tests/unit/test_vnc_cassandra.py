@@ -0,0 +1,1669 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2020 Juniper Networks, Inc. All rights reserved.
+#
+
+import copy
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import uuid
+
+import gevent
+import mock
+
+from cfgm_common import vnc_cassandra
+from cfgm_common.datastore import api as datastore_api
+from cfgm_common.datastore.drivers import cassandra_fake
+from cfgm_common.tests import cassandra_fake_impl
+from cfgm_common.tests.benchmark import benchmark, report, Timer
+from cfgm_common import vnc_db
+from cfgm_common.vnc_db import DBBase, DBSnapshot
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    idx = min(len(samples) - 1, int(round(pct / 100.0 * len(samples))))
+    return samples[idx]
+
+
+class VncCassandraTestCase(unittest.TestCase):
+    # VncCassandraClient running against the in-memory fake Cassandra
+    # server through the CQL driver.
+
+    def setUp(self):
+        cassandra_fake_impl.reset()
+        p = mock.patch.object(vnc_cassandra, 'CassandraDriverCQL',
+                              cassandra_fake.CassandraDriverCQL)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def get_db(self, **options):
+        kwargs = {
+            'rw_keyspaces': datastore_api.UUID_KEYSPACE,
+            'logger': mock.MagicMock(),
+            'walk': False,
+            'obj_cache_entries': 10000,
+        }
+        kwargs.update(options)
+        return vnc_cassandra.VncCassandraClient([], 'cql', **kwargs)
+
+    def create_vn(self, db, name=None, **props):
+        obj_uuid = str(uuid.uuid4())
+        obj_dict = {
+            'fq_name': ['default-domain', 'default-project',
+                        name or 'vn-%s' % obj_uuid],
+            'uuid': obj_uuid,
+            'id_perms': {'enable': True},
+            'display_name': name or 'vn-%s' % obj_uuid,
+        }
+        obj_dict.update(props)
+        db.object_create('virtual_network', obj_uuid, obj_dict)
+        return obj_uuid
+
+    def create_project(self, db, name='default-project'):
+        obj_uuid = str(uuid.uuid4())
+        db.object_create('project', obj_uuid, {
+            'fq_name': ['default-domain', name],
+            'uuid': obj_uuid,
+            'id_perms': {'enable': True},
+        })
+        return obj_uuid
+
+    def create_vmi(self, db, vn_uuids, project=None, **props):
+        obj_uuid = str(uuid.uuid4())
+        obj_dict = {
+            'fq_name': ['default-domain', project or 'default-project',
+                        'vmi-%s' % obj_uuid],
+            'uuid': obj_uuid,
+            'id_perms': {'enable': True},
+            'display_name': 'vmi-%s' % obj_uuid,
+            'virtual_machine_interface_mac_addresses': {
+                'mac_address': ['02:00:00:00:00:01']},
+            'virtual_network_refs': [
+                {'to': db.uuid_to_fq_name(vn_uuid), 'uuid': vn_uuid,
+                 'attr': None} for vn_uuid in vn_uuids],
+        }
+        if project:
+            obj_dict['parent_type'] = 'project'
+        obj_dict.update(props)
+        db.object_create('virtual_machine_interface', obj_uuid, obj_dict)
+        return obj_uuid
+
+    def read_cold(self, db, obj_type, obj_uuid, field_names=None):
+        # read an object with an empty uuid to fq_name cache, returns it
+        # with the mocks of the driver reads
+        db._cache_uuid_to_fq_name.clear()
+        driver = db._cassandra_driver
+        with mock.patch.object(driver, '_Multiget',
+                               wraps=driver._Multiget) as multiget, \
+                mock.patch.object(driver, '_Get', wraps=driver._Get) as get:
+            ok, result = db.object_read(obj_type, [obj_uuid],
+                                        field_names=field_names)
+        self.assertTrue(ok)
+        return result[0], multiget, get
+
+    def count_calls(self, db, method):
+        driver = db._cassandra_driver
+        return mock.patch.object(driver, method,
+                                 wraps=getattr(driver, method))
+
+
+class TestObjectCacheCoherency(VncCassandraTestCase):
+
+    def test_default_is_timestamp(self):
+        db = self.get_db()
+        self.assertFalse(db._obj_cache_mgr.is_notify_coherent())
+
+    def test_unknown_mode(self):
+        self.assertRaises(Exception, self.get_db,
+                          obj_cache_coherency='whatever')
+
+    def test_timestamp_hit_checks_db(self):
+        db = self.get_db()
+        vn_uuid = self.create_vn(db)
+        db.object_read('virtual_network', [vn_uuid], ret_readonly=True)
+
+        with self.count_calls(db, 'multiget') as multiget:
+            db.object_read('virtual_network', [vn_uuid],
+                           field_names=['display_name'], ret_readonly=True)
+        self.assertEqual(2, multiget.call_count)
+        self.assertEqual(1, db._obj_cache_mgr.hits)
+
+    def test_notify_hit_skips_db(self):
+        db = self.get_db(obj_cache_coherency='notify')
+        vn_uuid = self.create_vn(db)
+        db.object_read('virtual_network', [vn_uuid], ret_readonly=True)
+
+        with self.count_calls(db, 'multiget') as multiget:
+            db.object_read('virtual_network', [vn_uuid],
+                           field_names=['display_name'], ret_readonly=True)
+        # only the (empty) miss multiget remains
+        multiget.assert_called_once_with(
+            datastore_api.OBJ_UUID_CF_NAME, [], start='d', timestamp=True)
+        self.assertEqual(1, db._obj_cache_mgr.hits)
+
+    def test_notify_invalidation(self):
+        db = self.get_db(obj_cache_coherency='notify')
+        cache_mgr = db._obj_cache_mgr
+        vn_uuid = self.create_vn(db)
+        db.object_read('virtual_network', [vn_uuid], ret_readonly=True)
+        self.assertIn(vn_uuid, cache_mgr._cache)
+
+        cache_mgr.invalidate_from_notification(
+            {'oper': 'UPDATE', 'type': 'virtual_network', 'uuid': vn_uuid})
+        self.assertNotIn(vn_uuid, cache_mgr._cache)
+        self.assertEqual(1, cache_mgr.invalidations)
+
+    def test_notify_invalidation_of_refs_and_parent(self):
+        db = self.get_db(obj_cache_coherency='notify')
+        cache_mgr = db._obj_cache_mgr
+        vn_uuid = self.create_vn(db)
+        parent_uuid = self.create_vn(db)
+        db.object_read('virtual_network', [vn_uuid, parent_uuid],
+                       ret_readonly=True)
+
+        cache_mgr.invalidate_from_notification({
+            'oper': 'CREATE',
+            'type': 'virtual_machine_interface',
+            'uuid': str(uuid.uuid4()),
+            'obj_dict': {
+                'parent_uuid': parent_uuid,
+                'virtual_network_refs': [{'to': [], 'uuid': vn_uuid}],
+            }})
+        self.assertNotIn(vn_uuid, cache_mgr._cache)
+        self.assertNotIn(parent_uuid, cache_mgr._cache)
+
+    def test_notify_ignored_in_timestamp_mode(self):
+        db = self.get_db()
+        vn_uuid = self.create_vn(db)
+        db.object_read('virtual_network', [vn_uuid], ret_readonly=True)
+
+        db._obj_cache_mgr.invalidate_from_notification(
+            {'oper': 'UPDATE', 'type': 'virtual_network', 'uuid': vn_uuid})
+        self.assertIn(vn_uuid, db._obj_cache_mgr._cache)
+
+    def test_notify_staleness_bound(self):
+        db = self.get_db(obj_cache_coherency='notify',
+                         obj_cache_max_staleness=10)
+        cache_mgr = db._obj_cache_mgr
+        vn_uuid = self.create_vn(db)
+        db.object_read('virtual_network', [vn_uuid], ret_readonly=True)
+
+        cache_mgr._cache[vn_uuid].cached_at -= 11
+        db.object_read('virtual_network', [vn_uuid], ret_readonly=True)
+        self.assertEqual(1, cache_mgr.stale_evictions)
+        self.assertEqual(0, cache_mgr.hits)
+        # re-read from DB and cached again
+        self.assertIn(vn_uuid, cache_mgr._cache)
+
+    def test_notify_backrefs_not_cached(self):
+        db = self.get_db(obj_cache_coherency='notify')
+        cache_mgr = db._obj_cache_mgr
+        vn_uuid = self.create_vn(db)
+        db.object_read('virtual_network', [vn_uuid],
+                       field_names=['display_name'], ret_readonly=True)
+
+        db.object_read('virtual_network', [vn_uuid],
+                       field_names=['virtual_machine_interface_back_refs'],
+                       ret_readonly=True)
+        self.assertEqual(0, cache_mgr.hits)
+        self.assertEqual(1, cache_mgr.stale_evictions)
+
+    def test_notify_invalidation_during_read_not_cached(self):
+        db = self.get_db(obj_cache_coherency='notify')
+        cache_mgr = db._obj_cache_mgr
+        vn_uuid = self.create_vn(db)
+
+        multiget = db._cassandra_driver.multiget
+
+        def racing_multiget(*args, **kwargs):
+            result = multiget(*args, **kwargs)
+            cache_mgr.invalidate('virtual_network', [vn_uuid])
+            return result
+
+        with mock.patch.object(db._cassandra_driver, 'multiget',
+                               side_effect=racing_multiget):
+            ok, result = db.object_read('virtual_network', [vn_uuid],
+                                        ret_readonly=True)
+        self.assertEqual(vn_uuid, result[0]['uuid'])
+        self.assertNotIn(vn_uuid, cache_mgr._cache)
+
+    def test_stats(self):
+        db = self.get_db(obj_cache_coherency='notify')
+        vn_uuid = self.create_vn(db)
+        db.object_read('virtual_network', [vn_uuid], ret_readonly=True)
+        db.object_read('virtual_network', [vn_uuid], ret_readonly=True)
+
+        stats = db._obj_cache_mgr.get_stats()
+        self.assertEqual('notify', stats['coherency'])
+        self.assertEqual(1, stats['entries'])
+        self.assertEqual(1, stats['hits'])
+        self.assertEqual(1, stats['misses'])
+
+    def test_stale_counted_once(self):
+        db = self.get_db()
+        cache_mgr = db._obj_cache_mgr
+        vn_uuid = self.create_vn(db)
+        db.object_read('virtual_network', [vn_uuid], ret_readonly=True)
+
+        cache_mgr._cache[vn_uuid].row_latest_ts -= 1
+        db.object_read('virtual_network', [vn_uuid], ret_readonly=True)
+        self.assertEqual(1, cache_mgr.stale_evictions)
+        self.assertEqual(1, cache_mgr.misses)
+
+    def test_local_evict_during_read_not_cached(self):
+        db = self.get_db(obj_cache_coherency='notify')
+        cache_mgr = db._obj_cache_mgr
+        vn_uuid = self.create_vn(db)
+
+        multiget = db._cassandra_driver.multiget
+
+        def racing_multiget(*args, **kwargs):
+            result = multiget(*args, **kwargs)
+            db.object_update('virtual_network', vn_uuid,
+                             {'display_name': 'updated'})
+            return result
+
+        with mock.patch.object(db._cassandra_driver, 'multiget',
+                               side_effect=racing_multiget):
+            db.object_read('virtual_network', [vn_uuid], ret_readonly=True)
+        self.assertNotIn(vn_uuid, cache_mgr._cache)
+
+    def test_notify_ref_updates_returned(self):
+        # the referred objects with new back-refs are returned to be
+        # notified to the peers, as the symmetric refs
+        for coherency, notified in (('timestamp', False), ('notify', True)):
+            db = self.get_db(obj_cache_coherency=coherency)
+            vn_uuid = self.create_vn(db)
+            vmi_uuid = self.create_vmi(db, [])
+            ok, ref_updates = db.object_update(
+                'virtual_machine_interface', vmi_uuid,
+                {'virtual_network_refs': [
+                    {'to': db.uuid_to_fq_name(vn_uuid), 'uuid': vn_uuid,
+                     'attr': None}]})
+            self.assertEqual([vn_uuid] if notified else [], ref_updates)
+
+
+@benchmark
+class TestObjectCacheCoherencyBenchmark(VncCassandraTestCase):
+    # dbe_read latency of cache hits, timestamp-check vs notify modes.
+    # Absolute numbers depend on the fake server, the DB round-trips
+    # are counted to show what a real cluster would pay.
+    NUM_OBJECTS = 200
+    NUM_READS = 2000
+
+    def _bench(self, coherency):
+        db = self.get_db(obj_cache_coherency=coherency)
+        vn_uuids = [self.create_vn(db) for _ in range(self.NUM_OBJECTS)]
+        db.object_read('virtual_network', vn_uuids, ret_readonly=True)
+
+        samples = []
+        with self.count_calls(db, 'multiget') as multiget:
+            for i in range(self.NUM_READS):
+                vn_uuid = vn_uuids[i % self.NUM_OBJECTS]
+                start = time.time()
+                db.object_read('virtual_network', [vn_uuid],
+                               field_names=['display_name'],
+                               ret_readonly=True)
+                samples.append(time.time() - start)
+            round_trips = sum(1 for call in multiget.call_args_list
+                              if call[0][1])
+        return (percentile(samples, 50), percentile(samples, 99),
+                round_trips)
+
+    def test_hit_latency(self):
+        ts_p50, ts_p99, ts_round_trips = self._bench('timestamp')
+        nt_p50, nt_p99, nt_round_trips = self._bench('notify')
+        print("\ndbe_read cache hit latency (usec) over %d reads:\n"
+              "  timestamp: p50=%.1f p99=%.1f DB round-trips=%d\n"
+              "  notify:    p50=%.1f p99=%.1f DB round-trips=%d" % (
+                  self.NUM_READS,
+                  ts_p50 * 1e6, ts_p99 * 1e6, ts_round_trips,
+                  nt_p50 * 1e6, nt_p99 * 1e6, nt_round_trips))
+        self.assertEqual(self.NUM_READS, ts_round_trips)
+        self.assertEqual(0, nt_round_trips)
+
+
+class TestObjectCacheCopyOnWrite(VncCassandraTestCase):
+
+    def setUp(self):
+        super(TestObjectCacheCopyOnWrite, self).setUp()
+        self.db = self.get_db()
+        self.vn_uuid = self.create_vn(self.db)
+        self.vmi_uuid = self.create_vmi(self.db, [self.vn_uuid])
+
+    def read(self, field_names=None):
+        ok, result = self.db.object_read(
+            'virtual_machine_interface', [self.vmi_uuid],
+            field_names=field_names, ret_readonly=True)
+        return result[0]
+
+    def cached(self):
+        return self.db._obj_cache_mgr._cache[self.vmi_uuid].obj_dict
+
+    def test_cached_object_is_frozen(self):
+        self.read()
+        refs = self.cached()['virtual_network_refs']
+        self.assertRaises(RuntimeError, refs.append, {})
+        self.assertRaises(RuntimeError, refs[0].__setitem__, 'href', 'x')
+
+    def test_views_share_cached_values(self):
+        self.read()
+        obj_dict = self.read(['virtual_network_refs'])
+        cached_refs = self.cached()['virtual_network_refs']
+        self.assertIs(cached_refs,
+                      dict.__getitem__(obj_dict, 'virtual_network_refs'))
+        with mock.patch.object(copy, 'deepcopy',
+                               wraps=copy.deepcopy) as deepcopy:
+            json.dumps(self.read())
+        self.assertEqual(0, deepcopy.call_count)
+
+    def test_view_iteration_copy_on_write(self):
+        self.read()
+        obj_dict = self.read()
+        for field, value in obj_dict.items():
+            if isinstance(value, dict):
+                value['foo'] = 'bar'
+        dict(obj_dict)['virtual_network_refs'][0]['href'] = 'bar'
+        refs = []
+        refs.extend(dict(**obj_dict)['virtual_network_refs'])
+        refs[0]['attr'] = 'bar'
+        for ref in obj_dict.copy()['virtual_network_refs']:
+            ref['to'] = ['bar']
+        for value in obj_dict.values():
+            if isinstance(value, list):
+                value.append('foo')
+
+        cached = self.cached()
+        self.assertNotIn('foo', cached['id_perms'])
+        self.assertEqual(1, len(cached['virtual_network_refs']))
+        self.assertNotIn('href', cached['virtual_network_refs'][0])
+        self.assertIsNone(cached['virtual_network_refs'][0]['attr'])
+        self.assertNotEqual(['bar'], cached['virtual_network_refs'][0]['to'])
+        self.assertEqual(
+            ['02:00:00:00:00:01'],
+            cached['virtual_machine_interface_mac_addresses']['mac_address'])
+
+    def test_rbac_rules_modified_in_place(self):
+        # get_rbac_rules reads the API access lists read-only, extends a
+        # list with their rules and modifies the rules
+        db = self.get_db()
+        obj_uuid = str(uuid.uuid4())
+        rule = {'rule_object': 'virtual-network', 'rule_field': None,
+                'rule_perms': [{'role_name': 'admin', 'role_crud': 'CRUD'}]}
+        db.object_create('api_access_list', obj_uuid, {
+            'fq_name': ['default-domain', 'default-api-access-list'],
+            'uuid': obj_uuid,
+            'id_perms': {'enable': True},
+            'api_access_list_entries': {'rbac_rule': [rule]},
+        })
+        for _ in range(2):
+            ok, result = db.object_read('api_access_list', [obj_uuid],
+                                        ret_readonly=True)
+            rule_list = []
+            rule_list.extend(
+                result[0]['api_access_list_entries'].get('rbac_rule'))
+            for read_rule in rule_list:
+                self.assertIsNone(read_rule['rule_field'])
+                read_rule['rule_field'] = '*'
+                read_rule['rule_perms'] = [{'role_name': 'member',
+                                            'role_crud': 'R'}]
+                read_rule['rule_perms'].append({'role_name': 'admin',
+                                                'role_crud': 'CRUD'})
+        cached = db._obj_cache_mgr._cache[obj_uuid].obj_dict
+        self.assertEqual([rule],
+                         cached['api_access_list_entries']['rbac_rule'])
+
+    def test_view_copy_on_write(self):
+        self.read()
+        obj_dict = self.read(['virtual_network_refs',
+                              'virtual_machine_interface_mac_addresses'])
+        obj_dict['virtual_network_refs'].append({'uuid': 'foo'})
+        obj_dict['virtual_network_refs'][0]['href'] = 'bar'
+        obj_dict['virtual_machine_interface_mac_addresses'][
+            'mac_address'].append('02:00:00:00:00:02')
+        obj_dict['name'] = 'vmi'
+        del obj_dict['uuid']
+
+        self.assertEqual(2, len(obj_dict['virtual_network_refs']))
+        obj_dict = self.read(['virtual_network_refs',
+                              'virtual_machine_interface_mac_addresses'])
+        self.assertEqual(self.cached()['virtual_network_refs'],
+                         obj_dict['virtual_network_refs'])
+        self.assertEqual(1, len(obj_dict['virtual_network_refs']))
+        self.assertNotIn('href', obj_dict['virtual_network_refs'][0])
+        self.assertEqual(
+            ['02:00:00:00:00:01'],
+            obj_dict['virtual_machine_interface_mac_addresses']['mac_address'])
+        self.assertNotIn('name', obj_dict)
+        self.assertIn('uuid', obj_dict)
+
+    def test_view_serialize_and_copy(self):
+        self.read()
+        obj_dict = self.read()
+        self.assertEqual(json.loads(json.dumps(self.cached())),
+                         json.loads(json.dumps(obj_dict)))
+        obj_copy = copy.deepcopy(obj_dict)
+        self.assertIs(dict, type(obj_copy))
+        obj_copy['virtual_network_refs'][0]['href'] = 'bar'
+        self.assertNotIn('href', self.cached()['virtual_network_refs'][0])
+
+
+@benchmark
+class TestObjectCacheCopyOnWriteBenchmark(VncCassandraTestCase):
+    # detail list of VMIs served from the object cache, frozen shared
+    # views vs the former per-field deepcopy
+    NUM_VMIS = 2000
+    NUM_VN_REFS = 4
+
+    @staticmethod
+    def deepcopy_filtered_copy(cached_obj, field_names=None):
+        if not field_names:
+            return cached_obj.obj_dict
+        return {k: copy.deepcopy(cached_obj.obj_dict[k])
+                for k in field_names if k in cached_obj.obj_dict}
+
+    def _list_detail(self, db, vmi_uuids, field_names):
+        start = time.time()
+        ok, result = db.object_read('virtual_machine_interface', vmi_uuids,
+                                    field_names=field_names,
+                                    ret_readonly=True)
+        for obj_dict in result:
+            obj_dict['name'] = obj_dict['fq_name'][-1]
+        json.dumps(result)
+        return time.time() - start, result
+
+    def test_list_detail(self):
+        db = self.get_db(obj_cache_coherency='notify',
+                         obj_cache_entries=self.NUM_VMIS * 2)
+        vn_uuids = [self.create_vn(db) for _ in range(self.NUM_VN_REFS)]
+        vmi_uuids = [self.create_vmi(db, vn_uuids)
+                     for _ in range(self.NUM_VMIS)]
+        obj_class = db._get_resource_class('virtual_machine_interface')
+        field_names = list(obj_class.prop_fields | obj_class.ref_fields)
+        self._list_detail(db, vmi_uuids, field_names)
+
+        with mock.patch.object(copy, 'deepcopy',
+                               wraps=copy.deepcopy) as deepcopy:
+            cow_time, cow_result = self._list_detail(
+                db, vmi_uuids, field_names)
+        self.assertEqual(0, deepcopy.call_count)
+        with mock.patch.object(
+                vnc_cassandra.ObjectCacheManager.CachedObject,
+                'get_filtered_copy', self.deepcopy_filtered_copy):
+            deepcopy_time, deepcopy_result = self._list_detail(
+                db, vmi_uuids, field_names)
+        self.assertEqual(json.loads(json.dumps(deepcopy_result)),
+                         json.loads(json.dumps(cow_result)))
+        print("\ndetail list of %d VMIs from cache (msec):\n"
+              "  deepcopy:      %.1f\n"
+              "  copy-on-write: %.1f" % (
+                  self.NUM_VMIS, deepcopy_time * 1e3, cow_time * 1e3))
+
+
+class TestObjectListParentBackRefAnchor(VncCassandraTestCase):
+
+    def setUp(self):
+        super(TestObjectListParentBackRefAnchor, self).setUp()
+        self.db = self.get_db()
+        self.project_uuid = self.create_project(self.db, 'project')
+        self.vn_uuids = [self.create_vn(self.db) for _ in range(3)]
+        # 10 VMIs refer to VN 0, 20 to VN 1 and none to VN 2
+        self.vmi_uuids = [
+            self.create_vmi(self.db, [self.vn_uuids[i % 3 and 1]],
+                            project='project')
+            for i in range(30)]
+
+    def list_vmis(self, **kwargs):
+        ok, result, _ = self.db.object_list(
+            'virtual_machine_interface', parent_uuids=[self.project_uuid],
+            **kwargs)
+        self.assertTrue(ok)
+        return {obj_uuid for _, obj_uuid in result}
+
+    def test_back_ref_filter(self):
+        expected = set(self.vmi_uuids[::3])
+        self.assertEqual(expected,
+                         self.list_vmis(back_ref_uuids=[self.vn_uuids[0]]))
+        self.assertEqual(set(self.vmi_uuids),
+                         self.list_vmis(back_ref_uuids=self.vn_uuids))
+        self.assertEqual(set(),
+                         self.list_vmis(back_ref_uuids=[self.vn_uuids[2]]))
+
+    def test_back_ref_filter_with_obj_uuids(self):
+        self.assertEqual(
+            set(self.vmi_uuids[:1]),
+            self.list_vmis(back_ref_uuids=[self.vn_uuids[0]],
+                           obj_uuids=self.vmi_uuids[:2]))
+
+    def test_back_ref_filter_paged(self):
+        self.db._MULTIGET_PAGE_SIZE = 7
+        with self.count_calls(self.db, 'multiget') as multiget, \
+                self.count_calls(self.db, 'get') as get:
+            result = self.list_vmis(back_ref_uuids=[self.vn_uuids[0]])
+        self.assertEqual(set(self.vmi_uuids[::3]), result)
+        ref_reads = [call for call in multiget.call_args_list
+                     if call[1].get('start') == 'ref:']
+        self.assertEqual([7, 7, 7, 7, 2],
+                         [len(call[0][1]) for call in ref_reads])
+        self.assertFalse([call for call in get.call_args_list
+                          if call[1].get('start') == 'ref:'])
+
+
+@benchmark
+class TestObjectListParentBackRefAnchorBenchmark(VncCassandraTestCase):
+    # driver calls of a parent + back-ref anchored list of a project
+    # with thousands of ports
+    NUM_VMIS = 3000
+
+    def test_list_driver_calls(self):
+        db = self.get_db()
+        project_uuid = self.create_project(db, 'project')
+        vn_uuids = [self.create_vn(db) for _ in range(2)]
+        for i in range(self.NUM_VMIS):
+            self.create_vmi(db, [vn_uuids[i % 2]], project='project')
+        # warm the uuid to fq_name cache, only ref reads are measured
+        db.object_list('virtual_machine_interface',
+                       parent_uuids=[project_uuid])
+
+        driver = db._cassandra_driver
+        with mock.patch.object(driver, '_Multiget',
+                               wraps=driver._Multiget) as multiget, \
+                mock.patch.object(driver, '_Get',
+                                  wraps=driver._Get) as get:
+            start = time.time()
+            ok, result, _ = db.object_list(
+                'virtual_machine_interface', parent_uuids=[project_uuid],
+                back_ref_uuids=[vn_uuids[0]])
+            elapsed = time.time() - start
+        driver_calls = multiget.call_count + get.call_count
+        print("\nparent + back-ref anchored list of %d VMIs: "
+              "%d driver calls (%d multiget, %d get), %.1f msec" % (
+                  self.NUM_VMIS, driver_calls, multiget.call_count,
+                  get.call_count, elapsed * 1e3))
+        self.assertEqual(self.NUM_VMIS // 2, len(result))
+        # children columns, then ref columns in pages of rows
+        pages = -(-self.NUM_VMIS // db._MULTIGET_PAGE_SIZE)
+        self.assertEqual(1 + pages, driver_calls)
+
+
+class TestRenderLinkedFqNames(VncCassandraTestCase):
+    # fq_names of children, refs and back-refs are resolved by pages of
+    # rows on uuid to fq_name cache misses
+
+    def test_back_refs_and_children(self):
+        db = self.get_db(obj_cache_entries=0)
+        project_uuid = self.create_project(db, 'project')
+        vn_uuid = self.create_vn(db)
+        vmi_uuids = [self.create_vmi(db, [vn_uuid], project='project')
+                     for _ in range(5)]
+        vn, multiget, get = self.read_cold(
+            db, 'virtual_network', vn_uuid,
+            ['virtual_machine_interface_back_refs'])
+        self.assertEqual(
+            sorted((['default-domain', 'project', 'vmi-%s' % vmi_uuid],
+                    vmi_uuid) for vmi_uuid in vmi_uuids),
+            sorted((back_ref['to'], back_ref['uuid'])
+                   for back_ref in vn['virtual_machine_interface_back_refs']))
+        # object row, then fq_names of the back-refs
+        self.assertEqual(0, get.call_count)
+        self.assertEqual(2, multiget.call_count)
+
+        project, _, get = self.read_cold(
+            db, 'project', project_uuid, ['virtual_machine_interfaces'])
+        self.assertEqual(
+            set(vmi_uuids),
+            set(child['uuid']
+                for child in project['virtual_machine_interfaces']))
+        self.assertEqual(0, get.call_count)
+
+    def test_refs(self):
+        db = self.get_db(obj_cache_entries=0)
+        vn_uuid = self.create_vn(db, 'vn')
+        vmi_uuid = self.create_vmi(db, [vn_uuid])
+        vmi, _, get = self.read_cold(db, 'virtual_machine_interface',
+                                     vmi_uuid)
+        self.assertEqual(
+            [{'to': ['default-domain', 'default-project', 'vn'],
+              'uuid': vn_uuid, 'attr': None}],
+            vmi['virtual_network_refs'])
+        self.assertEqual(0, get.call_count)
+
+    def test_missing_back_ref(self):
+        db = self.get_db(obj_cache_entries=0)
+        vn_uuid = self.create_vn(db)
+        vmi_uuids = [self.create_vmi(db, [vn_uuid]) for _ in range(2)]
+        # a back-ref to an object row removed behind the client's back
+        db._cassandra_driver.remove(vmi_uuids[0],
+                                    cf_name=datastore_api.OBJ_UUID_CF_NAME)
+        vn, _, get = self.read_cold(db, 'virtual_network', vn_uuid,
+                                    ['virtual_machine_interface_back_refs'])
+        self.assertEqual(
+            [vmi_uuids[1]],
+            [back_ref['uuid']
+             for back_ref in vn['virtual_machine_interface_back_refs']])
+        self.assertEqual(0, get.call_count)
+
+
+@benchmark
+class TestRenderLinkedFqNamesBenchmark(VncCassandraTestCase):
+    # cold cache read latency of a network by number of back-refs, a
+    # round trip to the fake server costs ROUND_TRIP_TIME
+    ROUND_TRIP_TIME = 0.0005
+
+    def _read(self, num_back_refs, per_uuid):
+        cassandra_fake_impl.reset()
+        db = self.get_db(obj_cache_entries=0)
+        vn_uuid = self.create_vn(db)
+        for _ in range(num_back_refs):
+            self.create_vmi(db, [vn_uuid])
+        driver = db._cassandra_driver
+        _multiget = driver._Multiget
+        _get = driver._Get
+
+        def multiget(*args, **kwargs):
+            time.sleep(self.ROUND_TRIP_TIME)
+            return _multiget(*args, **kwargs)
+
+        def get(*args, **kwargs):
+            time.sleep(self.ROUND_TRIP_TIME)
+            return _get(*args, **kwargs)
+
+        linked_fq_names = db._cache_linked_fq_names
+        with mock.patch.object(driver, '_Multiget', multiget), \
+                mock.patch.object(driver, '_Get', get):
+            if per_uuid:
+                # resolve each fq_name on its own as _read_back_ref did
+                db._cache_linked_fq_names = lambda *args: set()
+            try:
+                start = time.time()
+                vn, multiget, get = self.read_cold(
+                    db, 'virtual_network', vn_uuid,
+                    ['virtual_machine_interface_back_refs'])
+                elapsed = time.time() - start
+            finally:
+                db._cache_linked_fq_names = linked_fq_names
+        self.assertEqual(num_back_refs,
+                         len(vn['virtual_machine_interface_back_refs']))
+        return elapsed, multiget.call_count + get.call_count
+
+    def test_cold_read_latency(self):
+        print("\ncold read of a network by number of back-refs:")
+        for num_back_refs in (10, 100, 1000):
+            per_uuid, per_uuid_calls = self._read(num_back_refs, True)
+            bulk, bulk_calls = self._read(num_back_refs, False)
+            print("  %4d back-refs: per uuid %4d calls %7.1f msec, "
+                  "bulk %d calls %5.1f msec" % (
+                      num_back_refs, per_uuid_calls, per_uuid * 1e3,
+                      bulk_calls, bulk * 1e3))
+            self.assertEqual(num_back_refs + 1, per_uuid_calls)
+            self.assertEqual(2, bulk_calls)
+
+
+class TestUuidToFqNameCache(unittest.TestCase):
+    def test_add_get(self):
+        cache = vnc_cassandra.UuidToFqNameCache()
+        cache.add('uuid1', ['default-domain', 'project', 'vn1'],
+                  'virtual_network')
+        cache.add('uuid2', ['default-domain', 'project', 'vn2'],
+                  'virtual_network')
+        cache.add('uuid3', ['default-domain', 'project'], 'project')
+        self.assertEqual(['default-domain', 'project', 'vn1'],
+                         cache.get_fq_name('uuid1'))
+        self.assertEqual('project', cache.get_type('uuid3'))
+        self.assertIsNone(cache.get_fq_name('uuid4'))
+        # a returned fq_name is not shared
+        cache.get_fq_name('uuid1').append('x')
+        self.assertEqual(['default-domain', 'project', 'vn1'],
+                         cache.get_fq_name('uuid1'))
+        # the networks of a same project share their head
+        self.assertIs(cache._young['uuid1'][0], cache._young['uuid2'][0])
+        cache.pop('uuid1')
+        self.assertNotIn('uuid1', cache)
+        stats = cache.get_stats()
+        self.assertEqual(2, stats['entries'])
+        self.assertEqual(4, stats['hits'])
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(0.8, stats['hit_rate'])
+        self.assertEqual(2, stats['types'])
+        self.assertGreater(stats['footprint_bytes'], 0)
+
+    def test_bounded(self):
+        cache = vnc_cassandra.UuidToFqNameCache(max_entries=10)
+        for i in range(4):
+            cache.add('uuid%d' % i, ['domain', 'project-%d' % i, 'vn'],
+                      'virtual_network')
+        for i in range(4, 100):
+            # entries used more often than half the cache is renewed stay
+            for j in range(4):
+                self.assertEqual('project-%d' % j,
+                                 cache.get_fq_name('uuid%d' % j)[1])
+            cache.add('uuid%d' % i, ['domain', 'project-%d' % i, 'vn'],
+                      'virtual_network')
+            self.assertLessEqual(len(cache), 10)
+        self.assertEqual(['domain', 'project-99', 'vn'],
+                         cache.get_fq_name('uuid99'))
+        self.assertIsNone(cache.get_fq_name('uuid50'))
+        self.assertEqual(100 - len(cache), cache.get_stats()['evictions'])
+        # interned heads and components of evicted entries are dropped
+        self.assertLessEqual(len(cache._heads), 10)
+
+    def test_unbounded_drops_unused_heads(self):
+        cache = vnc_cassandra.UuidToFqNameCache()
+        for i in range(100):
+            cache.add('uuid%d' % i, ['domain', 'project-%d' % i, 'vn'],
+                      'virtual_network')
+        for i in range(1, 100):
+            cache.pop('uuid%d' % i)
+        self.assertLessEqual(len(cache._heads), 2)
+        self.assertLessEqual(len(cache._components), 4)
+        # renamed entries drop the heads of their former name
+        for i in range(100):
+            cache.add('uuid0', ['domain', 'project-%d' % i, 'vn'],
+                      'virtual_network')
+        self.assertLessEqual(len(cache._heads), 2)
+        self.assertEqual(['domain', 'project-99', 'vn'],
+                         cache.get_fq_name('uuid0'))
+        self.assertIs(cache._young['uuid0'][0],
+                      cache._heads[cache._young['uuid0'][0]])
+
+    def test_db_client(self):
+        cassandra_fake_impl.reset()
+        with mock.patch.object(vnc_cassandra, 'CassandraDriverCQL',
+                               cassandra_fake.CassandraDriverCQL):
+            db = vnc_cassandra.VncCassandraClient(
+                [], 'cql', rw_keyspaces=datastore_api.UUID_KEYSPACE,
+                logger=mock.MagicMock(), walk=False, uuid_cache_entries=2)
+        self.assertEqual(2, db.get_uuid_cache_stats()['max_entries'])
+
+
+@benchmark
+class TestUuidToFqNameCacheBenchmark(unittest.TestCase):
+    # memory of the fq_name and type of ports spread over projects
+    NUM_OBJECTS = 100000
+    NUM_PROJECTS = 100
+
+    def _objects(self):
+        for i in range(self.NUM_OBJECTS):
+            yield (str(uuid.uuid4()),
+                   ['default-domain', 'project-%d' % (i % self.NUM_PROJECTS),
+                    'port-%d' % i],
+                   'virtual_machine_interface')
+
+    def _footprint(self, fill):
+        import tracemalloc
+        objects = list(self._objects())
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            store = fill(objects)
+            after = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        return store, after - before
+
+    def test_memory(self):
+        def fill_dict(objects):
+            # the former cache, a dict of a decoded list and type
+            store = {}
+            for obj_uuid, fq_name, obj_type in objects:
+                store[obj_uuid] = (json.loads(json.dumps(fq_name)),
+                                   json.loads(json.dumps(obj_type)))
+            return store
+
+        def fill_cache(objects):
+            cache = vnc_cassandra.UuidToFqNameCache()
+            for obj_uuid, fq_name, obj_type in objects:
+                cache.add(obj_uuid, json.loads(json.dumps(fq_name)),
+                          json.loads(json.dumps(obj_type)))
+            return cache
+
+        # traced sizes leave out the uuid keys allocated beforehand, the
+        # cache estimate includes them
+        _, dict_size = self._footprint(fill_dict)
+        cache, cache_size = self._footprint(fill_cache)
+        print("\nuuid to fq_name of %d objects: dict %.1f MB, cache %.1f MB "
+              "(estimated %.1f MB)" % (
+                  self.NUM_OBJECTS, dict_size / 1e6, cache_size / 1e6,
+                  cache.get_footprint() / 1e6))
+        self.assertLess(cache_size, dict_size * 0.7)
+
+
+class TestFqNameToUuidCache(VncCassandraTestCase):
+    def get_db(self, **options):
+        kwargs = {
+            'fq_name_cache_entries': 100,
+            'fq_name_negative_cache_ttl': 60,
+        }
+        kwargs.update(options)
+        return super(TestFqNameToUuidCache, self).get_db(**kwargs)
+
+    def fq_name(self, name):
+        return ['default-domain', 'default-project', name]
+
+    def test_cache_hit(self):
+        db = self.get_db()
+        vn_uuid = self.create_vn(db, 'vn1')
+        db._cache_fq_name_to_uuid.clear()
+        with self.count_calls(db, '_Get') as get:
+            for _ in range(3):
+                self.assertEqual(vn_uuid, db.fq_name_to_uuid(
+                    'virtual_network', self.fq_name('vn1')))
+        self.assertEqual(1, get.call_count)
+        stats = db.get_fq_name_cache_stats()
+        self.assertEqual(2, stats['hits'])
+        self.assertEqual(1, stats['misses'])
+
+    def test_disabled(self):
+        db = self.get_db(fq_name_cache_entries=0)
+        self.create_vn(db, 'vn1')
+        with self.count_calls(db, '_Get') as get:
+            for _ in range(3):
+                db.fq_name_to_uuid('virtual_network', self.fq_name('vn1'))
+            self.assertRaises(vnc_cassandra.NoIdError, db.fq_name_to_uuid,
+                              'virtual_network', self.fq_name('vn2'))
+        self.assertEqual(4, get.call_count)
+
+    def test_negative_cache(self):
+        db = self.get_db()
+        with self.count_calls(db, '_Get') as get:
+            for _ in range(3):
+                self.assertRaises(vnc_cassandra.NoIdError,
+                                  db.fq_name_to_uuid, 'virtual_network',
+                                  self.fq_name('vn1'))
+        self.assertEqual(1, get.call_count)
+        # a local creation drops the negative entry
+        vn_uuid = self.create_vn(db, 'vn1')
+        self.assertEqual(vn_uuid, db.fq_name_to_uuid(
+            'virtual_network', self.fq_name('vn1')))
+
+    def test_negative_cache_expires(self):
+        db = self.get_db(fq_name_negative_cache_ttl=0.01)
+        self.assertRaises(vnc_cassandra.NoIdError, db.fq_name_to_uuid,
+                          'virtual_network', self.fq_name('vn1'))
+        # created by another server whose notification is not received
+        other_db = self.get_db()
+        vn_uuid = self.create_vn(other_db, 'vn1')
+        self.assertRaises(vnc_cassandra.NoIdError, db.fq_name_to_uuid,
+                          'virtual_network', self.fq_name('vn1'))
+        time.sleep(0.02)
+        self.assertEqual(vn_uuid, db.fq_name_to_uuid(
+            'virtual_network', self.fq_name('vn1')))
+
+    def test_delete_and_notification(self):
+        db = self.get_db()
+        other_db = self.get_db()
+        vn_uuid = self.create_vn(db, 'vn1')
+        self.assertEqual(vn_uuid, other_db.fq_name_to_uuid(
+            'virtual_network', self.fq_name('vn1')))
+        db.object_delete('virtual_network', vn_uuid)
+        self.assertRaises(vnc_cassandra.NoIdError, db.fq_name_to_uuid,
+                          'virtual_network', self.fq_name('vn1'))
+        new_uuid = self.create_vn(db, 'vn1')
+        # stale until the notifications are received
+        self.assertEqual(vn_uuid, other_db.fq_name_to_uuid(
+            'virtual_network', self.fq_name('vn1')))
+        other_db.cache_fq_name_to_uuid_del('virtual_network',
+                                           self.fq_name('vn1'))
+        self.assertEqual(new_uuid, other_db.fq_name_to_uuid(
+            'virtual_network', self.fq_name('vn1')))
+
+    def test_drop_during_read_not_cached(self):
+        db = self.get_db()
+        vn_uuid = self.create_vn(db, 'vn1')
+        db._cache_fq_name_to_uuid.clear()
+        driver = db._cassandra_driver
+        _get = driver._Get
+
+        def racing_get(*args, **kwargs):
+            result = _get(*args, **kwargs)
+            db.cache_fq_name_to_uuid_del('virtual_network',
+                                         self.fq_name('vn1'))
+            return result
+
+        with mock.patch.object(driver, '_Get', racing_get):
+            self.assertEqual(vn_uuid, db.fq_name_to_uuid(
+                'virtual_network', self.fq_name('vn1')))
+        self.assertEqual(0, len(db._cache_fq_name_to_uuid))
+
+    def test_drop_of_other_type_during_read_cached(self):
+        db = self.get_db()
+        vn_uuid = self.create_vn(db, 'vn1')
+        db._cache_fq_name_to_uuid.clear()
+        driver = db._cassandra_driver
+        _get = driver._Get
+
+        def racing_get(*args, **kwargs):
+            result = _get(*args, **kwargs)
+            db.cache_fq_name_to_uuid_del('virtual_machine_interface',
+                                         self.fq_name('vmi1'))
+            return result
+
+        with mock.patch.object(driver, '_Get', racing_get):
+            self.assertEqual(vn_uuid, db.fq_name_to_uuid(
+                'virtual_network', self.fq_name('vn1')))
+        self.assertEqual(1, len(db._cache_fq_name_to_uuid))
+
+    def test_cache_expires(self):
+        db = self.get_db(fq_name_cache_ttl=0.01)
+        other_db = self.get_db()
+        vn_uuid = self.create_vn(db, 'vn1')
+        self.assertEqual(vn_uuid, other_db.fq_name_to_uuid(
+            'virtual_network', self.fq_name('vn1')))
+        # deleted and created again by another server whose notifications
+        # are not received
+        other_db.object_delete('virtual_network', vn_uuid)
+        new_uuid = self.create_vn(other_db, 'vn1')
+        self.assertEqual(vn_uuid, db.fq_name_to_uuid(
+            'virtual_network', self.fq_name('vn1')))
+        time.sleep(0.02)
+        self.assertEqual(new_uuid, db.fq_name_to_uuid(
+            'virtual_network', self.fq_name('vn1')))
+        self.assertEqual(1, db.get_fq_name_cache_stats()['expirations'])
+
+    def test_bounded(self):
+        cache = vnc_cassandra.FqNameToUuidCache(max_entries=10,
+                                                negative_ttl=60)
+        for i in range(100):
+            cache.add('virtual_network', ['vn%d' % i], 'uuid%d' % i)
+            cache.add_missing('virtual_network', ['missing%d' % i])
+            self.assertLessEqual(len(cache), 10)
+            self.assertLessEqual(len(cache._negative), 10)
+        self.assertEqual((True, 'uuid99'),
+                         cache.lookup('virtual_network', ['vn99']))
+        self.assertEqual((True, None),
+                         cache.lookup('virtual_network', ['missing99']))
+        self.assertEqual((False, None),
+                         cache.lookup('virtual_network', ['vn0']))
+
+    def test_bulk(self):
+        db = self.get_db()
+        vn_uuids = [self.create_vn(db, 'vn%d' % i) for i in range(5)]
+        fq_names = [self.fq_name('vn%d' % i) for i in range(6)]
+        db._cache_fq_name_to_uuid.clear()
+        db.fq_name_to_uuid('virtual_network', fq_names[0])
+        with self.count_calls(db, '_Get') as get:
+            self.assertEqual(vn_uuids + [None], db.fq_names_to_uuids(
+                'virtual_network', fq_names))
+        self.assertEqual(5, get.call_count)
+        # found and missing names are cached
+        with self.count_calls(db, '_Get') as get:
+            self.assertEqual(vn_uuids + [None], db.fq_names_to_uuids(
+                'virtual_network', fq_names))
+        self.assertEqual(0, get.call_count)
+
+
+@benchmark
+class TestFqNameToUuidCacheBenchmark(VncCassandraTestCase):
+    # resolving the names of the networks of a project, a round trip to the
+    # fake server costs ROUND_TRIP_TIME
+    NUM_NETWORKS = 200
+    ROUND_TRIP_TIME = 0.0005
+
+    def _resolve(self, db, fq_names, bulk):
+        driver = db._cassandra_driver
+        _get = driver._Get
+
+        def get(*args, **kwargs):
+            gevent.sleep(self.ROUND_TRIP_TIME)
+            return _get(*args, **kwargs)
+
+        with mock.patch.object(driver, '_Get', get):
+            start = time.time()
+            if bulk:
+                obj_uuids = db.fq_names_to_uuids('virtual_network', fq_names)
+            else:
+                obj_uuids = [db.fq_name_to_uuid('virtual_network', fq_name)
+                             for fq_name in fq_names]
+            return obj_uuids, time.time() - start
+
+    def test_lookups(self):
+        db = self.get_db(fq_name_cache_entries=10000)
+        vn_uuids = [self.create_vn(db, 'vn-%d' % i)
+                    for i in range(self.NUM_NETWORKS)]
+        fq_names = [['default-domain', 'default-project', 'vn-%d' % i]
+                    for i in range(self.NUM_NETWORKS)]
+        results = []
+        for name, bulk in (('one by one', False), ('bulk', True),
+                           ('cached', False)):
+            if name != 'cached':
+                db._cache_fq_name_to_uuid.clear()
+            obj_uuids, elapsed = self._resolve(db, fq_names, bulk)
+            self.assertEqual(vn_uuids, obj_uuids)
+            results.append(elapsed)
+            print("%s%d names %-10s %7.1f msec" % (
+                '\n' if name == 'one by one' else '', self.NUM_NETWORKS,
+                name, elapsed * 1e3))
+        one_by_one, bulk, cached = results
+        self.assertLess(bulk * 2, one_by_one)
+        self.assertLess(cached * 10, one_by_one)
+
+
+class PropIndexTestCase(VncCassandraTestCase):
+    INDEX_FIELDS = [
+        'virtual_machine_interface:display_name',
+        'virtual_machine_interface:virtual_machine_interface_device_owner',
+    ]
+
+    def setUp(self):
+        super(PropIndexTestCase, self).setUp()
+        # builds are run explicitly by the tests
+        self.build_patch = mock.patch.object(vnc_cassandra.PropIndexManager,
+                                             'build_in_background')
+        self.build_patch.start()
+        self.addCleanup(self.build_patch.stop)
+        p = mock.patch.object(vnc_cassandra.PropIndexManager,
+                              '_CLOCK_SKEW', 0)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def get_indexed_db(self, index_fields=None, server_id='server-1',
+                       **options):
+        keyspace_name = datastore_api.UUID_KEYSPACE_NAME
+        keyspaces = {keyspace_name: dict(
+            datastore_api.UUID_KEYSPACE[keyspace_name],
+            **datastore_api.OBJ_PROP_INDEX_CF)}
+        return self.get_db(rw_keyspaces=keyspaces,
+                           prop_index_fields=self.INDEX_FIELDS
+                           if index_fields is None else index_fields,
+                           prop_index_server_id=server_id,
+                           **options)
+
+    def list_vmis(self, db, filters):
+        ok, result, _ = db.object_list('virtual_machine_interface',
+                                       filters=filters)
+        self.assertTrue(ok)
+        return set(obj_uuid for _, obj_uuid in result)
+
+    @staticmethod
+    def uuid_rows_read(multiget):
+        return sum(len(call[0][1]) for call in multiget.call_args_list
+                   if call[0][0] == datastore_api.OBJ_UUID_CF_NAME)
+
+
+class TestPropIndex(PropIndexTestCase):
+
+    def setUp(self):
+        super(TestPropIndex, self).setUp()
+        self.db = self.get_indexed_db()
+        self.db._prop_index_mgr.build()
+        self.vmi_uuids = [
+            self.create_vmi(
+                self.db, [],
+                virtual_machine_interface_device_owner='owner-%d' % (i % 2))
+            for i in range(10)]
+
+    def test_invalid_fields(self):
+        self.assertRaises(Exception, self.get_indexed_db,
+                          index_fields=['display_name'])
+        self.assertRaises(Exception, self.get_indexed_db,
+                          index_fields=['virtual_machine_interface:id_perms'])
+
+    def test_list_uses_index(self):
+        display_name = 'vmi-%s' % self.vmi_uuids[3]
+        with self.count_calls(self.db, 'multiget') as multiget:
+            result = self.list_vmis(self.db, {'display_name': [display_name]})
+        self.assertEqual(set([self.vmi_uuids[3]]), result)
+        self.assertEqual(1, self.db._prop_index_mgr.lookups)
+        # only the index match is checked against the object columns
+        self.assertEqual(1, self.uuid_rows_read(multiget))
+
+        result = self.list_vmis(self.db, {
+            'display_name': [display_name, 'vmi-%s' % self.vmi_uuids[4]],
+            'virtual_machine_interface_device_owner': ['owner-0'],
+        })
+        self.assertEqual(set([self.vmi_uuids[4]]), result)
+
+    def test_not_indexed_filter_scans(self):
+        result = self.list_vmis(self.db, {
+            'virtual_machine_interface_device_owner': ['owner-1'],
+            'virtual_machine_interface_disable_policy': [False],
+        })
+        self.assertEqual(set(), result)
+        self.assertEqual(0, self.db._prop_index_mgr.lookups)
+        self.assertEqual(1, self.db._prop_index_mgr.scans)
+
+    def test_update(self):
+        self.db.object_update(
+            'virtual_machine_interface', self.vmi_uuids[0],
+            {'virtual_machine_interface_device_owner': 'owner-2'})
+        self.assertEqual(
+            set(self.vmi_uuids[2::2]),
+            self.list_vmis(self.db, {
+                'virtual_machine_interface_device_owner': ['owner-0']}))
+        self.assertEqual(
+            set(self.vmi_uuids[:1]),
+            self.list_vmis(self.db, {
+                'virtual_machine_interface_device_owner': ['owner-2']}))
+        index_uuids = self.db._prop_index_mgr.lookup(
+            'virtual_machine_interface',
+            {'virtual_machine_interface_device_owner': ['owner-0']})
+        self.assertNotIn(self.vmi_uuids[0], index_uuids)
+
+    def test_delete(self):
+        self.db.object_delete('virtual_machine_interface', self.vmi_uuids[0])
+        index_uuids = self.db._prop_index_mgr.lookup(
+            'virtual_machine_interface',
+            {'virtual_machine_interface_device_owner': ['owner-0']})
+        self.assertEqual(set(self.vmi_uuids[2::2]), index_uuids)
+
+    def test_extra_index_entries_checked(self):
+        self.db._prop_index_mgr.add(
+            'virtual_machine_interface', self.vmi_uuids[1],
+            {'virtual_machine_interface_device_owner': 'owner-0'})
+        self.assertEqual(
+            set(self.vmi_uuids[::2]),
+            self.list_vmis(self.db, {
+                'virtual_machine_interface_device_owner': ['owner-0']}))
+
+    def test_build_existing_objects(self):
+        vmi_uuid = self.create_vmi(
+            self.db, [], virtual_machine_interface_disable_policy=True)
+        index_fields = [
+            'virtual_machine_interface:virtual_machine_interface_disable_policy']
+        filters = {'virtual_machine_interface_disable_policy': [True]}
+
+        db = self.get_indexed_db(index_fields=index_fields)
+        self.assertIsNone(db._prop_index_mgr.lookup(
+            'virtual_machine_interface', filters))
+        db._MULTIGET_PAGE_SIZE = 3
+        with self.count_calls(db, 'multiget') as multiget:
+            db._prop_index_mgr.build()
+        self.assertEqual(4, len([
+            call for call in multiget.call_args_list
+            if call[0][0] == datastore_api.OBJ_UUID_CF_NAME]))
+        self.assertEqual(set([vmi_uuid]), db._prop_index_mgr.lookup(
+            'virtual_machine_interface', filters))
+        # built state is persisted for next clients
+        db = self.get_indexed_db(index_fields=index_fields)
+        self.assertEqual(set(), db._prop_index_mgr.get_pending_props(
+            'virtual_machine_interface'))
+
+    def test_server_not_indexing_property_scans(self):
+        display_name = 'vmi-%s' % self.vmi_uuids[3]
+        filters = {'display_name': [display_name]}
+        # another api-server indexes display_name only, from now on
+        db = self.get_indexed_db(
+            index_fields=['virtual_machine_interface:display_name'],
+            server_id='server-2')
+        self.assertEqual(set([self.vmi_uuids[3]]),
+                         self.list_vmis(self.db, filters))
+        self.assertEqual(0, self.db._prop_index_mgr.lookups)
+        self.assertEqual(1, self.db._prop_index_mgr.scans)
+
+        db._prop_index_mgr.build()
+        self.assertEqual(set([self.vmi_uuids[3]]),
+                         self.list_vmis(self.db, filters))
+        self.assertEqual(1, self.db._prop_index_mgr.lookups)
+        # device owner is not indexed by server-2 and not built again
+        self.assertIsNone(self.db._prop_index_mgr.lookup(
+            'virtual_machine_interface',
+            {'virtual_machine_interface_device_owner': ['owner-0']}))
+        self.db._prop_index_mgr.build()
+        self.assertEqual(
+            set(['virtual_machine_interface_device_owner']),
+            self.db._prop_index_mgr.get_pending_props(
+                'virtual_machine_interface'))
+
+    def test_server_restart(self):
+        # restarted with the same properties, the index stays built
+        db = self.get_indexed_db()
+        self.assertEqual(set(), db._prop_index_mgr.get_pending_props(
+            'virtual_machine_interface'))
+        # restarted without a property, then with it again, objects written
+        # meanwhile may not be indexed
+        db = self.get_indexed_db(
+            index_fields=['virtual_machine_interface:display_name'])
+        vmi_uuid = self.create_vmi(
+            db, [], virtual_machine_interface_device_owner='owner-0')
+        db = self.get_indexed_db()
+        filters = {'virtual_machine_interface_device_owner': ['owner-0']}
+        self.assertIsNone(db._prop_index_mgr.lookup(
+            'virtual_machine_interface', filters))
+        db._prop_index_mgr.build()
+        self.assertEqual(set(self.vmi_uuids[::2] + [vmi_uuid]),
+                         db._prop_index_mgr.lookup(
+                             'virtual_machine_interface', filters))
+
+    def test_build_holds_lock(self):
+        lock = mock.MagicMock()
+        mgr = self.db._prop_index_mgr
+        with mock.patch.object(mgr, 'build') as build:
+            build.side_effect = lambda: self.assertEqual(
+                1, lock.__enter__.call_count)
+            self.build_patch.stop()
+            greenlet = mgr.build_in_background(lock)
+            greenlet.join()
+        self.assertEqual(1, build.call_count)
+        self.assertEqual(1, lock.__exit__.call_count)
+
+
+@benchmark
+class TestPropIndexBenchmark(PropIndexTestCase):
+    # filtered list of a type, index lookup vs scan of the type
+    NUM_VMIS = 5000
+
+    def test_filtered_list(self):
+        db = self.get_indexed_db()
+        db._prop_index_mgr.build()
+        vmi_uuids = [
+            self.create_vmi(
+                db, [],
+                virtual_machine_interface_device_owner='owner-%d' % (i % 100))
+            for i in range(self.NUM_VMIS)]
+        filters = {'display_name': ['vmi-%s' % vmi_uuids[42]]}
+
+        results = {}
+        for name, lookup in (('scan', None), ('index', mock.DEFAULT)):
+            with self.count_calls(db, 'multiget') as multiget, \
+                    mock.patch.object(db._prop_index_mgr, 'lookup',
+                                      wraps=db._prop_index_mgr.lookup,
+                                      return_value=lookup):
+                start = time.time()
+                result = self.list_vmis(db, filters)
+                elapsed = time.time() - start
+            self.assertEqual(set([vmi_uuids[42]]), result)
+            results[name] = (elapsed, self.uuid_rows_read(multiget))
+        print("\nlist of %d VMIs filtered by display_name:\n"
+              "  scan:  %.1f msec, %d object rows read\n"
+              "  index: %.1f msec, %d object rows read" % (
+                  self.NUM_VMIS,
+                  results['scan'][0] * 1e3, results['scan'][1],
+                  results['index'][0] * 1e3, results['index'][1]))
+        self.assertEqual(self.NUM_VMIS, results['scan'][1])
+        self.assertEqual(1, results['index'][1])
+
+
+class TestWalk(VncCassandraTestCase):
+
+    def setUp(self):
+        super(TestWalk, self).setUp()
+        db = self.get_db()
+        self.project_uuids = [self.create_project(db, 'project-%d' % i)
+                              for i in range(2)]
+        self.vn_uuids = [self.create_vn(db) for _ in range(7)]
+
+    def test_chunks_by_type(self):
+        db = self.get_db(walk_chunk_size=3)
+        calls = []
+        db.walk(lambda obj_type, uuid_list: calls.append(
+            (obj_type, list(uuid_list))))
+
+        self.assertTrue(all(len(uuid_list) <= 3 for _, uuid_list in calls))
+        walked = {}
+        for obj_type, uuid_list in calls:
+            walked.setdefault(obj_type, []).extend(uuid_list)
+        self.assertEqual(set(self.vn_uuids),
+                         set(walked['virtual_network']))
+        self.assertEqual(len(self.vn_uuids), len(walked['virtual_network']))
+        self.assertEqual(set(self.project_uuids), set(walked['project']))
+        self.assertEqual(9, db.get_walk_stats()['objects_processed'])
+
+    def test_results_and_errors(self):
+        db = self.get_db(walk_chunk_size=2)
+
+        def fn(obj_type, uuid_list):
+            if obj_type == 'project':
+                raise Exception('resync failure')
+            return uuid_list
+
+        results = db.walk(fn)
+        self.assertEqual(set(self.vn_uuids),
+                         set(obj_uuid for result in results
+                             for obj_uuid in result))
+        self.assertEqual(9, db.get_walk_stats()['objects_read'])
+
+    def test_primes_fq_name_cache(self):
+        db = self.get_db()
+        db.walk()
+        with self.count_calls(db, 'get') as get:
+            db.uuid_to_fq_name(self.vn_uuids[0])
+        self.assertEqual(0, get.call_count)
+
+    def test_type_filter(self):
+        db = self.get_db(walk_chunk_size=3)
+        filtered = []
+        calls = []
+
+        def type_filter(obj_type):
+            filtered.append(obj_type)
+            return obj_type == 'virtual_network'
+
+        db.walk(lambda obj_type, uuid_list: calls.append(obj_type),
+                type_filter=type_filter)
+        self.assertEqual(['project', 'virtual_network'], sorted(filtered))
+        self.assertEqual({'virtual_network'}, set(calls))
+        self.assertEqual(9, db.get_walk_stats()['objects_read'])
+
+    def test_chunk_done_in_scan_order(self):
+        db = self.get_db(walk_chunk_size=2, walk_concurrency=3)
+        scan_order = []
+        done = []
+
+        def fn(obj_type, uuid_list):
+            scan_order.extend(uuid_list)
+            # first chunks finish last
+            gevent.sleep(0.01 / (len(scan_order)))
+
+        db.walk(fn, type_filter=lambda obj_type: obj_type == 'virtual_network',
+                chunk_done=lambda obj_type, last_uuid: done.append(last_uuid))
+        self.assertEqual(scan_order[1::2] + scan_order[-1:], done)
+
+    def test_resume_after(self):
+        db = self.get_db(walk_chunk_size=2)
+        walked = []
+        db.walk(lambda obj_type, uuid_list: walked.extend(uuid_list),
+                type_filter=lambda obj_type: obj_type == 'virtual_network')
+
+        resumed = []
+        resume_after = {'virtual_network': walked[3], 'project': 'stale'}
+        db.walk(lambda obj_type, uuid_list: resumed.extend(uuid_list),
+                resume_after=resume_after)
+        self.assertEqual(walked[4:], [obj_uuid for obj_uuid in resumed
+                                      if obj_uuid in walked])
+        self.assertNotIn(self.project_uuids[0], resumed)
+        # types whose uuid was not found are left
+        self.assertEqual({'project': 'stale'}, resume_after)
+
+    def test_chunks_in_flight_bounded(self):
+        db = self.get_db(walk_chunk_size=2, walk_concurrency=2)
+        in_flight = [0, 0]
+
+        def fn(obj_type, uuid_list):
+            in_flight[0] += len(uuid_list)
+            in_flight[1] = max(in_flight)
+            gevent.sleep(0.001)
+            in_flight[0] -= len(uuid_list)
+
+        db.walk(fn)
+        self.assertEqual(4, in_flight[1])
+
+
+@benchmark
+class TestWalkBenchmark(VncCassandraTestCase):
+    # DB walk memory is bounded by chunks in flight whatever the size of
+    # the database
+    CHUNK_SIZE = 100
+    CONCURRENCY = 4
+
+    def _walk(self, num_objects):
+        cassandra_fake_impl.reset()
+        db = self.get_db(walk_chunk_size=self.CHUNK_SIZE,
+                         walk_concurrency=self.CONCURRENCY)
+        self.create_project(db)
+        for _ in range(num_objects):
+            self.create_vn(db)
+
+        in_flight = [0]
+        peak = [0, 0]
+
+        def fn(obj_type, uuid_list):
+            in_flight[0] += len(uuid_list)
+            peak[0] = max(peak[0], in_flight[0])
+            peak[1] = max(peak[1], len(uuid_list))
+            gevent.sleep(0.001)
+            in_flight[0] -= len(uuid_list)
+
+        db.walk(fn)
+        stats = db.get_walk_stats()
+        elapsed = stats['end_time'] - stats['start_time']
+        return peak[0], elapsed, stats['objects_read']
+
+    def test_walk_memory(self):
+        print("\nDB walk by chunks of %d, %d in flight:" % (
+            self.CHUNK_SIZE, self.CONCURRENCY))
+        for num_objects in (1000, 4000):
+            peak, elapsed, objects_read = self._walk(num_objects)
+            print("  %5d objects: peak %d uuids in flight, %.0f objects/s" % (
+                objects_read, peak, objects_read / elapsed))
+            self.assertLessEqual(peak, self.CHUNK_SIZE * self.CONCURRENCY)
+
+
+class VirtualNetworkDB(DBBase):
+    _dict = {}
+    obj_type = 'virtual_network'
+
+
+class DBSnapshotTestCase(VncCassandraTestCase):
+
+    def setUp(self):
+        super(DBSnapshotTestCase, self).setUp()
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        self.path = os.path.join(tmp_dir, 'snapshot')
+        self.addCleanup(DBBase.clear)
+
+    def list_vns(self, db, snapshot=None, fields=None):
+        # list the VNs from the snapshot saved by the previous call,
+        # returns them with the uuids read from the DB
+        if snapshot is None:
+            snapshot = DBSnapshot(self.path)
+            snapshot.load()
+        VirtualNetworkDB.init(None, mock.MagicMock(), db, snapshot=snapshot)
+        with mock.patch.object(db, 'object_read',
+                               wraps=db.object_read) as object_read:
+            objs = VirtualNetworkDB.list_obj(fields=fields)
+        snapshot.save()
+        read_uuids = set()
+        for call in object_read.call_args_list:
+            read_uuids.update(call[0][1])
+        return (dict((obj['uuid'], obj) for obj in objs), read_uuids)
+
+
+class TestDBSnapshot(DBSnapshotTestCase):
+
+    def test_reads_objects_updated_since(self):
+        db = self.get_db()
+        project_uuid = self.create_project(db)
+        vn_uuids = [self.create_vn(db) for _ in range(5)]
+        objs, read_uuids = self.list_vns(db)
+        self.assertEqual(set(vn_uuids), set(objs))
+        self.assertEqual(set(vn_uuids), read_uuids)
+
+        objs, read_uuids = self.list_vns(db)
+        self.assertEqual(set(), read_uuids)
+        # ms resolution timestamps of the fake server
+        time.sleep(0.002)
+        db.object_update('virtual_network', vn_uuids[0],
+                         {'display_name': 'updated'})
+        db.object_delete('virtual_network', vn_uuids[1])
+        self.create_vmi(db, [vn_uuids[2]])
+        vn_uuids.append(self.create_vn(db))
+
+        objs, read_uuids = self.list_vns(db)
+        self.assertEqual(set([vn_uuids[0], vn_uuids[2], vn_uuids[5]]),
+                         read_uuids)
+        VirtualNetworkDB.init(None, mock.MagicMock(), db)
+        expected = dict((obj['uuid'], obj)
+                        for obj in VirtualNetworkDB.list_obj())
+        self.assertEqual(expected, objs)
+        self.assertEqual('updated', objs[vn_uuids[0]]['display_name'])
+        self.assertEqual(1, len(
+            objs[vn_uuids[2]]['virtual_machine_interface_back_refs']))
+        self.assertNotIn(vn_uuids[1], objs)
+        self.assertNotIn(project_uuid, objs)
+
+    def test_field_projections_saved_apart(self):
+        db = self.get_db()
+        vn_uuid = self.create_vn(db, name='vn')
+        self.list_vns(db)
+        objs, read_uuids = self.list_vns(db, fields=['display_name'])
+        self.assertEqual(set([vn_uuid]), read_uuids)
+        self.assertNotIn('id_perms', objs[vn_uuid])
+        objs, read_uuids = self.list_vns(db)
+        self.assertEqual(set(), read_uuids)
+        self.assertIn('id_perms', objs[vn_uuid])
+
+    def test_types_without_timestamps_read(self):
+        db = self.get_db(obj_cache_exclude_types=['virtual_network'])
+        vn_uuid = self.create_vn(db)
+        self.list_vns(db)
+        _, read_uuids = self.list_vns(db)
+        self.assertEqual(set([vn_uuid]), read_uuids)
+
+    def test_unreadable_snapshot_ignored(self):
+        db = self.get_db()
+        vn_uuid = self.create_vn(db)
+        for content in ('# another version\n', DBSnapshot.VERSION + 'x\n'):
+            with open(self.path, 'w') as f:
+                f.write(content)
+            snapshot = DBSnapshot(self.path)
+            self.assertFalse(snapshot.load())
+            objs, read_uuids = self.list_vns(db, snapshot)
+            self.assertEqual(set([vn_uuid]), read_uuids)
+        self.assertTrue(DBSnapshot(self.path).load())
+
+
+@benchmark
+class TestDBSnapshotBenchmark(DBSnapshotTestCase):
+    # startup list of the VNs without and with a snapshot saved before a
+    # few of them are updated
+    NUM_OBJECTS = 5000
+    NUM_UPDATED = 50
+
+    def test_startup_time(self):
+        # the fake server has no network round-trips, the objects read
+        # from the DB show what a real cluster would pay
+        db = self.get_db(obj_cache_entries=0)
+        vn_uuids = [self.create_vn(db) for _ in range(self.NUM_OBJECTS)]
+        VirtualNetworkDB.init(None, mock.MagicMock(), db)
+        with Timer() as cold:
+            VirtualNetworkDB.list_obj()
+        self.list_vns(db)
+        time.sleep(0.002)
+        for vn_uuid in vn_uuids[:self.NUM_UPDATED]:
+            db.object_update('virtual_network', vn_uuid,
+                             {'display_name': 'updated'})
+        snapshot = DBSnapshot(self.path)
+        with Timer() as warm:
+            snapshot.load()
+            VirtualNetworkDB.init(None, mock.MagicMock(), db,
+                                  snapshot=snapshot)
+            objs = VirtualNetworkDB.list_obj()
+        self.assertEqual(self.NUM_UPDATED, snapshot.misses)
+        self.assertEqual(self.NUM_OBJECTS, len(objs))
+        report('list_obj of %d objects, %d updated since the snapshot' % (
+            self.NUM_OBJECTS, self.NUM_UPDATED), [
+            'without snapshot: %8.1f msec, %d objects read' % (
+                cold.msec, self.NUM_OBJECTS),
+            'with snapshot:    %8.1f msec, %d objects read' % (
+                warm.msec, snapshot.misses)])
+
+
+class IterObjTestCase(VncCassandraTestCase):
+    NUM_OBJECTS = 10
+
+    def setUp(self):
+        super(IterObjTestCase, self).setUp()
+        self.db = self.get_db()
+        self.vn_uuids = [self.create_vn(self.db, name='vn-%d' % i)
+                         for i in range(self.NUM_OBJECTS)]
+        VirtualNetworkDB.init(None, mock.MagicMock(), self.db)
+        self.addCleanup(DBBase.clear)
+        p = mock.patch.object(VirtualNetworkDB, '_read_chunk_size', 2)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def slow_reads(self, latency):
+        # delay the object reads, returns the peak of reads in flight
+        object_read = self.db.object_read
+        in_flight = [0, 0]
+
+        def read(*args, **kwargs):
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+            try:
+                gevent.sleep(latency)
+                return object_read(*args, **kwargs)
+            finally:
+                in_flight[0] -= 1
+        p = mock.patch.object(self.db, 'object_read', side_effect=read)
+        p.start()
+        self.addCleanup(p.stop)
+        return in_flight
+
+
+class TestIterObj(IterObjTestCase):
+
+    def test_chunks_in_flight_keep_order(self):
+        in_flight = self.slow_reads(0.001)
+        uuids = [obj['uuid'] for obj in
+                 VirtualNetworkDB.iter_obj(chunks_in_flight=3)]
+        self.assertEqual(self.vn_uuids, uuids)
+        self.assertEqual(3, in_flight[1])
+        self.assertEqual(self.vn_uuids, [
+            obj['uuid'] for obj in VirtualNetworkDB.list_obj()])
+
+    def test_default_chunks_in_flight(self):
+        in_flight = self.slow_reads(0.001)
+        VirtualNetworkDB.list_obj()
+        self.assertEqual(1, in_flight[1])
+        VirtualNetworkDB.init(None, mock.MagicMock(), self.db,
+                              read_chunks_in_flight=2)
+        self.assertEqual(self.vn_uuids, [
+            obj['uuid'] for obj in VirtualNetworkDB.list_obj()])
+        self.assertEqual(2, in_flight[1])
+
+    def test_read_ahead_bounded(self):
+        self.slow_reads(0)
+        with mock.patch.object(self.db, 'object_read',
+                               wraps=self.db.object_read) as object_read:
+            objs = VirtualNetworkDB.iter_obj(chunks_in_flight=2)
+            next(objs)
+            gevent.sleep(0.01)
+            # the chunk consumed, 2 read ahead and one blocked in the pool
+            self.assertLessEqual(object_read.call_count, 4)
+            objs.close()
+
+    def test_field_projection(self):
+        objs = list(VirtualNetworkDB.iter_obj(fields=['display_name']))
+        self.assertEqual(['vn-%d' % i for i in range(self.NUM_OBJECTS)],
+                         [obj['display_name'] for obj in objs])
+        for obj in objs:
+            self.assertNotIn('id_perms', obj)
+            self.assertIn('fq_name', obj)
+
+    def test_vnc_objects_built_when_yielded(self):
+        vnc_cls = mock.MagicMock()
+        with mock.patch.object(vnc_db, 'obj_type_to_vnc_class',
+                               return_value=vnc_cls):
+            objs = VirtualNetworkDB.iter_obj(vnc_obj=True)
+            self.assertEqual(vnc_cls.from_dict.return_value, next(objs))
+            self.assertEqual(1, vnc_cls.from_dict.call_count)
+            self.assertEqual(self.vn_uuids[0],
+                             vnc_cls.from_dict.call_args[1]['uuid'])
+
+    def test_unreadable_chunk_stops(self):
+        object_read = self.db.object_read
+        results = [None, (False, 'error')]
+
+        def read(obj_type, uuids, **kwargs):
+            return results.pop(0) or object_read(obj_type, uuids, **kwargs)
+        with mock.patch.object(self.db, 'object_read', side_effect=read):
+            self.assertEqual(self.vn_uuids[:2], [
+                obj['uuid'] for obj in VirtualNetworkDB.list_obj()])
+
+
+@benchmark
+class TestIterObjBenchmark(IterObjTestCase):
+    # list of the VNs by chunks of 2 with a simulated DB latency per read
+    NUM_OBJECTS = 400
+    LATENCY = 0.005
+
+    def test_chunks_in_flight(self):
+        self.slow_reads(self.LATENCY)
+        lines = []
+        for chunks_in_flight in (1, 2, 4, 8):
+            with Timer() as timer:
+                for _ in VirtualNetworkDB.iter_obj(
+                        chunks_in_flight=chunks_in_flight):
+                    pass
+            lines.append('%d chunks in flight: %8.1f msec' % (
+                chunks_in_flight, timer.msec))
+        report('iter_obj of %d objects by chunks of 2, %.0f msec per read' % (
+            self.NUM_OBJECTS, self.LATENCY * 1e3), lines)
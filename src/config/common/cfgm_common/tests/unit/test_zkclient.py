@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2020 Juniper Networks, Inc. All rights reserved.
+#
+
+import unittest
+
+from cfgm_common.exceptions import ResourceExhaustionError
+from cfgm_common.exceptions import ResourceExistsError
+from cfgm_common.tests.benchmark import benchmark
+from cfgm_common.zkclient import IndexAllocator
+
+
+class FakeZookeeperClient(object):
+    # ZookeeperClient API on an in-memory tree shared by the allocators of
+    # all simulated workers, it counts round trips and creation conflicts.
+
+    def __init__(self):
+        self.nodes = {}
+        # ephemeral node paths to the session which created them
+        self.ephemeral = {}
+        self.session = 0
+        self.reads = 0
+        self.writes = 0
+        self.conflicts = 0
+
+    def create_node(self, path, value=None, ephemeral=False):
+        self.writes += 1
+        if path in self.nodes:
+            if self.nodes[path] == value:
+                return True
+            self.conflicts += 1
+            raise ResourceExistsError(path, str(self.nodes[path]),
+                                      'zookeeper')
+        self.nodes[path] = value
+        if ephemeral:
+            self.ephemeral[path] = self.session
+
+    def delete_node(self, path, recursive=False):
+        self.writes += 1
+        self.nodes.pop(path, None)
+        self.ephemeral.pop(path, None)
+
+    def read_node(self, path, include_timestamp=False):
+        self.reads += 1
+        return self.nodes.get(path)
+
+    def get_children(self, path):
+        self.reads += 1
+        return [node[len(path):] for node in self.nodes
+                if node.startswith(path) and '/' not in node[len(path):]]
+
+    def new_session(self):
+        # the process restarts, return the session it had
+        self.session += 1
+        return self.session - 1
+
+    def expire_session(self, owner, session=None):
+        for path, path_session in list(self.ephemeral.items()):
+            if self.nodes[path] == owner and session in (None, path_session):
+                self.delete_node(path)
+
+
+class TestIndexAllocatorLease(unittest.TestCase):
+    PATH = '/id/virtual-networks/'
+
+    def setUp(self):
+        self.zk = FakeZookeeperClient()
+
+    def get_allocator(self, owner, size=100, lease_size=10):
+        return IndexAllocator(self.zk, self.PATH, size,
+                              lease_size=lease_size, lease_owner=owner)
+
+    def test_alloc_from_leased_block(self):
+        allocator = self.get_allocator('worker-1')
+        ids = [allocator.alloc('vn-%d' % i) for i in range(12)]
+        self.assertEqual(list(range(12)), ids)
+        self.assertEqual([(0, 9), (10, 19)], allocator.get_leases())
+        # an index znode is still created for each id with its value
+        self.assertEqual('vn-11', allocator.read(11))
+        self.assertEqual(
+            {'/id/virtual-networks-leases/0000000000',
+             '/id/virtual-networks-leases/0000000001'}, set(self.zk.ephemeral))
+
+    def test_workers_alloc_from_disjoint_blocks(self):
+        allocator1 = self.get_allocator('worker-1')
+        allocator2 = self.get_allocator('worker-2')
+        ids1 = [allocator1.alloc('a') for _ in range(5)]
+        ids2 = [allocator2.alloc('b') for _ in range(5)]
+        self.assertEqual(list(range(5)), ids1)
+        self.assertEqual(list(range(10, 15)), ids2)
+        self.assertEqual(0, self.zk.conflicts)
+
+    def test_skips_full_blocks(self):
+        allocator = self.get_allocator('worker-1')
+        for idx in range(10):
+            allocator.reserve(idx, 'reserved')
+        self.assertEqual(10, allocator.alloc('a'))
+        self.assertEqual([(10, 19)], allocator.get_leases())
+
+    def test_index_reserved_in_lease(self):
+        allocator1 = self.get_allocator('worker-1')
+        allocator2 = self.get_allocator('worker-2')
+        allocator1.alloc('a')
+        # another worker reserves an id in the block leased by worker-1
+        allocator2.reserve(1, 'b')
+        self.assertEqual(2, allocator1.alloc('c'))
+        self.assertEqual('b', allocator1.read(1))
+
+    def test_release_leases(self):
+        allocator1 = self.get_allocator('worker-1')
+        ids = [allocator1.alloc('a') for _ in range(3)]
+        allocator1.release_leases()
+        self.assertEqual([], allocator1.get_leases())
+        self.assertEqual(set(), set(self.zk.ephemeral))
+
+        # ids allocated in the released block stay allocated
+        allocator2 = self.get_allocator('worker-2')
+        self.assertEqual(3, allocator2.alloc('b'))
+        self.assertEqual([(0, 9)], allocator2.get_leases())
+        self.assertNotIn(allocator2.alloc('b'), ids)
+
+    def test_restarted_worker_adopts_its_leases(self):
+        allocator = self.get_allocator('worker-1')
+        allocator.alloc('a')
+        restarted = self.get_allocator('worker-1')
+        self.assertEqual([(0, 9)], restarted.get_leases())
+        self.assertEqual(1, restarted.alloc('a'))
+
+    def test_adopted_leases_survive_previous_session(self):
+        allocator = self.get_allocator('worker-1')
+        allocator.alloc('a')
+        previous_session = self.zk.new_session()
+        restarted = self.get_allocator('worker-1')
+        self.zk.expire_session('worker-1', previous_session)
+        self.assertEqual([(0, 9)], restarted.get_leases())
+        self.assertIn(self.PATH.rstrip('/') + '-leases/0000000000',
+                      self.zk.ephemeral)
+        allocator2 = self.get_allocator('worker-2')
+        self.assertEqual(10, allocator2.alloc('b'))
+        self.assertEqual(1, restarted.alloc('a'))
+
+    def test_session_loss_releases_leases(self):
+        allocator1 = self.get_allocator('worker-1')
+        allocator1.alloc('a')
+        self.zk.expire_session('worker-1')
+        allocator2 = self.get_allocator('worker-2')
+        self.assertEqual(1, allocator2.alloc('b'))
+
+    def test_fall_back_when_all_blocks_leased(self):
+        # 20 ids in 2 blocks
+        allocator1 = self.get_allocator('worker-1', size=19)
+        allocator2 = self.get_allocator('worker-2', size=19)
+        allocator1.alloc('a')
+        allocator2.alloc('b')
+        ids = set(allocator1.alloc('a') for _ in range(18))
+        self.assertEqual(set(range(1, 10)) | set(range(11, 20)), ids)
+        self.assertRaises(ResourceExhaustionError, allocator1.alloc, 'a')
+
+
+@benchmark
+class TestIndexAllocatorLeaseBenchmark(unittest.TestCase):
+    # Workers create objects concurrently, each through its own allocator
+    # whose in-memory state only knows its own allocations
+    WORKERS = 8
+    IDS_PER_WORKER = 250
+    LEASE_SIZE = 100
+
+    def _run(self, lease_size):
+        zk = FakeZookeeperClient()
+        allocators = [
+            IndexAllocator(zk, '/id/security-groups/id/', 1 << 20,
+                           lease_size=lease_size,
+                           lease_owner='worker-%d' % worker)
+            for worker in range(self.WORKERS)]
+        ids = []
+        for i in range(self.IDS_PER_WORKER):
+            for worker, allocator in enumerate(allocators):
+                ids.append(allocator.alloc('sg-%d-%d' % (worker, i)))
+        self.assertEqual(len(ids), len(set(ids)))
+        return zk
+
+    def test_contention(self):
+        num_ids = self.WORKERS * self.IDS_PER_WORKER
+        print("\n%d workers allocating %d ids:" % (self.WORKERS, num_ids))
+        shared = self._run(0)
+        leased = self._run(self.LEASE_SIZE)
+        for name, zk in (('shared', shared),
+                         ('leases of %d' % self.LEASE_SIZE, leased)):
+            print("  %-14s %6d zk writes, %6d conflicts, %.2f writes/id" % (
+                name, zk.writes, zk.conflicts,
+                float(zk.writes) / num_ids))
+        self.assertEqual(0, leased.conflicts)
+        self.assertGreater(shared.conflicts, num_ids)
+        self.assertLess(leased.writes * 2, shared.writes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -48,6 +48,8 @@ _DEFAULT_ZK_FABRIC_ENTERPRISE_PATH_PREFIX = '/validation/fabric/enterprise'
 
 _DEFAULT_ZK_DB_RESYNC_PATH_PREFIX = '/vnc_api_server_locks/dbe_resync'
 _DEFAULT_ZK_DB_SYNC_COMPLETE_ZNODE_PATH_PREFIX = '/vnc_api_server_locks/dbe-resync-complete'
+_DEFAULT_ZK_DB_RESYNC_CHECKPOINT_PATH_PREFIX = '/vnc_api_server_locks/dbe-resync-checkpoint'
+_DEFAULT_ZK_PROP_INDEX_BUILD_LOCK_PATH = '/vnc_api_server_locks/prop-index-build'
 
 def cgitb_hook(info=None, **kwargs):
     vnc_cgitb.Hook(**kwargs).handle(info or sys.exc_info())
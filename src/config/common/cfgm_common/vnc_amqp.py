@@ -2,8 +2,10 @@ from __future__ import unicode_literals
 from future import standard_library
 standard_library.install_aliases()
 from builtins import object
+from collections import OrderedDict
 import socket
 import gevent
+import gevent.queue
 from six import StringIO
 from pprint import pformat
 from requests.exceptions import ConnectionError
@@ -20,7 +22,7 @@ class VncAmqpHandle(object):
 
     def __init__(self, sandesh, logger, db_cls, reaction_map, q_name_prefix,
                  rabbitmq_cfg, host_ip, trace_file=None, timer_obj=None,
-                 register_handler=True):
+                 register_handler=True, batch_window=0):
         self.sandesh = sandesh
         self.logger = logger
         self.db_cls = db_cls
@@ -33,6 +35,20 @@ class VncAmqpHandle(object):
         self.host_ip = host_ip
         self.register_handler = register_handler
         self._vnc_kombu = None
+        # when set, notifications received within batch_window seconds are
+        # handled together and their dependencies evaluated once
+        self._batch_window = batch_window
+        self._batch_queue = None
+        self._batch_greenlet = None
+        self._batch_trackers = None
+        self._batch_stats = {
+            'batches': 0,
+            'notifications': 0,
+            'collapsed_notifications': 0,
+            'max_batch_size': 0,
+            'evaluations': 0,
+            'evaluations_saved': 0,
+        }
 
     def establish(self):
         q_name = '.'.join([self.q_name_prefix, socket.getfqdn(self.host_ip)])
@@ -47,6 +63,9 @@ class VncAmqpHandle(object):
                 kombu_ssl_certfile=self._rabbitmq_cfg['ssl_certfile'],
                 kombu_ssl_ca_certs=self._rabbitmq_cfg['ssl_ca_certs'],
                 register_handler=self.register_handler)
+        if self._batch_window and self._batch_greenlet is None:
+            self._batch_queue = gevent.queue.Queue()
+            self._batch_greenlet = gevent.spawn(self._batch_notifications)
 
     def msgbus_store_err_msg(self, msg):
         self.msg_tracer.error = msg
@@ -81,15 +100,23 @@ class VncAmqpHandle(object):
             obj_class.clear_ignored_errors()
 
     def _vnc_subscribe_callback(self, oper_info):
+        if self._batch_queue is not None:
+            # the message is acked once queued, a restart resyncs from
+            # the database anyway
+            self._batch_queue.put(oper_info)
+            return
         self._db_resync_done.wait()
+        self._handle_notification(oper_info, self.vnc_subscribe_actions)
+
+    def _handle_notification(self, oper_info, actions):
         try:
             self.oper_info = oper_info
-            self.vnc_subscribe_actions()
+            actions()
 
         except ConnectionError:
             try:
                 # retry write during api-server ConnectionError
-                self.vnc_subscribe_actions()
+                actions()
             except ConnectionError:
                 # log the exception, and exit during api-server
                 # ConnectionError on retry to let standby to become active.
@@ -112,6 +139,100 @@ class VncAmqpHandle(object):
             del self.obj
             del self.dependency_tracker
 
+    def _batch_notifications(self):
+        while True:
+            batch = [self._batch_queue.get()]
+            # let the burst this notification belongs to arrive
+            gevent.sleep(self._batch_window)
+            while not self._batch_queue.empty():
+                batch.append(self._batch_queue.get_nowait())
+            self._db_resync_done.wait()
+            try:
+                self._process_batch(batch)
+            except Exception:
+                self.log_exception()
+
+    @staticmethod
+    def _collapse_notifications(batch):
+        # One notification is kept per object, at the place of its first
+        # one. Objects are read back from the API server or the database
+        # when handling a notification, so a creation or an update followed
+        # by updates only needs to be handled once, and a deletion
+        # supersedes them.
+        notifications = []
+        positions = {}
+        for oper_info in batch:
+            oper = oper_info.get('oper')
+            if oper == 'UPDATE-IMPLICIT':
+                continue
+            position = positions.get(oper_info.get('uuid'))
+            if (position is not None and oper in ('UPDATE', 'DELETE') and
+                    notifications[position]['oper'] in ('CREATE', 'UPDATE')):
+                if notifications[position]['oper'] == 'UPDATE' or \
+                        oper == 'DELETE':
+                    notifications[position] = oper_info
+                continue
+            positions[oper_info.get('uuid')] = len(notifications)
+            notifications.append(oper_info)
+        return notifications
+
+    def _process_batch(self, batch):
+        notifications = self._collapse_notifications(batch)
+        self._batch_trackers = []
+        try:
+            for oper_info in notifications:
+                self._handle_notification(oper_info,
+                                          self.vnc_subscribe_actions)
+            trackers = self._batch_trackers
+        finally:
+            self._batch_trackers = None
+
+        evaluations, merged = self._merge_dependency_trackers(trackers)
+        num_evaluations = sum(len(ids) for ids in merged.resources.values())
+        stats = self._batch_stats
+        stats['batches'] += 1
+        stats['notifications'] += len(batch)
+        stats['collapsed_notifications'] += len(batch) - len(notifications)
+        stats['max_batch_size'] = max(stats['max_batch_size'], len(batch))
+        stats['evaluations'] += num_evaluations
+        stats['evaluations_saved'] += evaluations - num_evaluations
+        self.logger.debug(
+            "Notification batch of %d messages on %d objects: %d "
+            "evaluations, %d saved" % (len(batch), len(notifications),
+                                        num_evaluations,
+                                        evaluations - num_evaluations))
+        if not num_evaluations:
+            return
+
+        def evaluate_batch():
+            self.obj_type = None
+            self.obj_class = None
+            self.obj = trackers[-1][0]
+            self.dependency_tracker = merged
+            self.create_msgbus_trace(None, 'BATCH', None)
+            self.evaluate_dependency()
+        self._handle_notification({'oper': 'BATCH'}, evaluate_batch)
+
+    def _merge_dependency_trackers(self, trackers):
+        # returns the number of evaluations the trackers would have done on
+        # their own and a tracker evaluating each of their resources once
+        merged = DependencyTracker(self.db_cls.get_obj_type_map(),
+                                   self.reaction_map)
+        evaluations = 0
+        seen = set()
+        for _, tracker in trackers:
+            for res_type, res_id_list in list(tracker.resources.items()):
+                evaluations += len(res_id_list)
+                res_ids = merged.resources.setdefault(res_type, [])
+                for res_id in res_id_list:
+                    if (res_type, res_id) not in seen:
+                        seen.add((res_type, res_id))
+                        res_ids.append(res_id)
+        return evaluations, merged
+
+    def get_batch_stats(self):
+        return dict(self._batch_stats)
+
     def create_msgbus_trace(self, request_id, oper, uuid):
         self.msg_tracer = MessageBusNotifyTrace(request_id=request_id,
                                                 operation=oper, uuid=uuid)
@@ -148,6 +269,12 @@ class VncAmqpHandle(object):
                     "Object %s uuid %s was not found for operation %s" %
                     (self. obj_type, obj_id, oper))
             return
+        if self._batch_trackers is not None:
+            # evaluated with the rest of the batch
+            if self.dependency_tracker:
+                self._batch_trackers.append((self.obj,
+                                             self.dependency_tracker))
+            return
         self.evaluate_dependency()
 
     def _get_key_from_oper_info(self):
@@ -167,6 +294,8 @@ class VncAmqpHandle(object):
         obj_fq_name = self.oper_info['fq_name']
         self.db_cls._object_db.cache_uuid_to_fq_name_add(
                 obj_id, obj_fq_name, self.obj_type)
+        self.db_cls._object_db.cache_fq_name_to_uuid_del(
+                self.obj_type, obj_fq_name)
         self._set_meta()
         try:
             self.obj = self.obj_class.locate(obj_key)
@@ -225,6 +354,8 @@ class VncAmqpHandle(object):
         obj_id = self.oper_info['uuid']
         self.obj = self.obj_class.get_by_uuid(obj_id)
         self.db_cls._object_db.cache_uuid_to_fq_name_del(obj_id)
+        self.db_cls._object_db.cache_fq_name_to_uuid_del(
+                self.obj_type, self.oper_info['fq_name'])
         if self.obj is None:
             return
         self.dependency_tracker = DependencyTracker(
@@ -281,6 +412,10 @@ class VncAmqpHandle(object):
                         self.timer.timed_yield()
 
     def close(self):
+        if self._batch_greenlet is not None:
+            self._batch_greenlet.kill()
+            self._batch_greenlet = None
+            self._batch_queue = None
         if self._vnc_kombu is not None:
             # VncKombuClient is instancied when calling 'establish()',
             # if for some reasons (mostly related to cleanup after
@@ -11,8 +11,11 @@ from builtins import range
 from builtins import object
 import copy
 import os
+import sys
+import time
 
 import gevent
+import gevent.pool
 from pprint import pformat
 import six
 
@@ -33,6 +36,13 @@ JSON_NONE = json.dumps(None)
 
 
 class VncCassandraClient(object):
+    # max number of rows read by a multiget when paging through a list of
+    # keys built by the client
+    _MULTIGET_PAGE_SIZE = 1000
+    # fq_names not cached read at once by fq_names_to_uuids
+    _FQ_NAME_LOOKUP_CONCURRENCY = 20
+    # number of objects read between two DB walk progress logs
+    _WALK_PROGRESS_INTERVAL = 10000
 
     @staticmethod
     def _is_metadata(column_name):
@@ -127,7 +137,14 @@ class VncCassandraClient(object):
         self._logger('VNCCassandra started with driver {}'.format(driverClass),
                      level=SandeshLevel.SYS_INFO)
 
-        self._cache_uuid_to_fq_name = {}
+        self._cache_uuid_to_fq_name = UuidToFqNameCache(
+            max_entries=self._cassandra_driver.options.uuid_cache_entries)
+        self._cache_fq_name_to_uuid = FqNameToUuidCache(
+            max_entries=self._cassandra_driver.options.fq_name_cache_entries,
+            ttl=self._cassandra_driver.options.fq_name_cache_ttl,
+            negative_ttl=(
+                self._cassandra_driver.options.fq_name_negative_cache_ttl))
+        self._walk_stats = {}
 
         self._obj_cache_mgr = ObjectCacheManager(
             self._cassandra_driver.options.logger,
@@ -135,9 +152,18 @@ class VncCassandraClient(object):
             max_entries=self._cassandra_driver.options.obj_cache_entries,
             obj_cache_exclude_types=self._cassandra_driver.options.obj_cache_exclude_types,
             debug_obj_cache_types=self._cassandra_driver.options.debug_obj_cache_types,
+            coherency=self._cassandra_driver.options.obj_cache_coherency,
+            max_staleness=self._cassandra_driver.options.obj_cache_max_staleness,
         )
         self._obj_cache_exclude_types = self._cassandra_driver.options.obj_cache_exclude_types or []
 
+        self._prop_index_mgr = PropIndexManager(
+            self._cassandra_driver.options.logger,
+            self,
+            index_fields=self._cassandra_driver.options.prop_index_fields,
+            server_id=self._cassandra_driver.options.prop_index_server_id,
+        )
+
         # these functions make calls to pycassa xget() and get_range()
         # generator functions which can't be wrapped around handle_exceptions()
         # at the time of cassandra init, hence need to wrap these functions that
@@ -160,6 +186,8 @@ class VncCassandraClient(object):
             self.uuid_to_obj_type)
         self.fq_name_to_uuid = self._cassandra_driver._handle_exceptions(
             self.fq_name_to_uuid)
+        self.fq_names_to_uuids = self._cassandra_driver._handle_exceptions(
+            self.fq_names_to_uuids)
         self.get_shared = self._cassandra_driver._handle_exceptions(
             self.get_shared)
         self.walk = self._cassandra_driver._handle_exceptions(self.walk)
@@ -278,6 +306,10 @@ class VncCassandraClient(object):
                 self._obj_cache_mgr.evict(obj_type, [ref_uuid])
             else:
                 self.update_latest_col_ts(bch, ref_uuid)
+                if self._obj_cache_mgr.is_notify_coherent():
+                    # peers cache the back-refs of the referred object,
+                    # have it published like the symmetric refs
+                    symmetric_ref_updates.append(ref_uuid)
         return symmetric_ref_updates
     # end _create_ref
 
@@ -346,6 +378,10 @@ class VncCassandraClient(object):
                 self._obj_cache_mgr.evict(obj_type, [old_ref_uuid])
             else:
                 self.update_latest_col_ts(bch, old_ref_uuid)
+                if self._obj_cache_mgr.is_notify_coherent():
+                    # peers cache the back-refs of the referred object,
+                    # have it published like the symmetric refs
+                    symmetric_ref_updates.append(old_ref_uuid)
         return symmetric_ref_updates
     # end _update_ref
 
@@ -385,6 +421,10 @@ class VncCassandraClient(object):
                 self._obj_cache_mgr.evict(obj_type, [ref_uuid])
             else:
                 self.update_latest_col_ts(bch, ref_uuid)
+                if self._obj_cache_mgr.is_notify_coherent():
+                    # peers cache the back-refs of the referred object,
+                    # have it published like the symmetric refs
+                    symmetric_ref_updates.append(ref_uuid)
 
         if send:
             bch.send()
@@ -493,6 +533,13 @@ class VncCassandraClient(object):
                                        ref_data)
                 symmetric_ref_updates.extend(ret)
 
+        index_props = self._prop_index_mgr.get_indexed_props(obj_type)
+        if index_props:
+            self._prop_index_mgr.add(
+                obj_type, obj_id,
+                dict((prop_name, obj_dict.get(prop_name))
+                     for prop_name in index_props))
+
         self._cassandra_driver.insert(obj_id, obj_cols, batch=bch)
         if not uuid_batch:
             bch.send()
@@ -508,6 +555,10 @@ class VncCassandraClient(object):
                 cf_name=datastore_api.OBJ_FQ_NAME_CF_NAME,
                 key=obj_type,
                 columns=fq_name_cols)
+        self.cache_fq_name_to_uuid_del(obj_type, obj_dict['fq_name'])
+        if not fqname_batch:
+            self._cache_fq_name_to_uuid.add(obj_type, obj_dict['fq_name'],
+                                            obj_id)
 
         return (True, symmetric_ref_updates)
     # end object_create
@@ -557,6 +608,7 @@ class VncCassandraClient(object):
         #   1. pick the hits, and for the misses..
         #   2. read from db, cache, filter with fields
         #      else read from db with specified field filters
+        cache_generation = self._obj_cache_mgr.generation
         if (field_names is None or
             set(field_names) & (backref_fields | children_fields)):
             # atleast one backref/children field is needed
@@ -614,6 +666,7 @@ class VncCassandraClient(object):
                 obj_type,
                 rendered_objs_to_cache,
                 req_fields,
+                generation=cache_generation,
             )
             obj_dicts = hit_obj_dicts + field_filtered_objs
 
@@ -669,8 +722,32 @@ class VncCassandraClient(object):
                                       {'META:latest_col_ts':
                                        JSON_NONE},
                                       batch=bch)
+        if self._obj_cache_mgr.is_notify_coherent():
+            # no timestamp check on hits, drop our copy of the
+            # back-refs/children now, peers rely on notifications
+            self._obj_cache_mgr.invalidate(None, [obj_uuid])
     # end update_latest_col_ts
 
+    def object_read_stamps(self, obj_type, obj_uuids):
+        # write timestamps of the id_perms and latest_col_ts columns by
+        # uuid, they change with any prop, ref, back-ref or child update.
+        # Back-ref and children updates are not tracked for the types
+        # excluded from the cache, no stamps for them.
+        if not obj_uuids or obj_type in self._obj_cache_exclude_types:
+            return {}
+        obj_rows = self._cassandra_driver.multiget(
+            datastore_api.OBJ_UUID_CF_NAME, obj_uuids,
+            columns=['prop:id_perms', 'META:latest_col_ts'], timestamp=True)
+        stamps = {}
+        for obj_uuid, obj_cols in list(obj_rows.items()):
+            try:
+                stamps[obj_uuid] = [obj_cols['prop:id_perms'][1],
+                                    obj_cols['META:latest_col_ts'][1]]
+            except KeyError:
+                continue
+        return stamps
+    # end object_read_stamps
+
     def object_update(self, obj_type, obj_uuid, new_obj_dict, uuid_batch=None):
         obj_class = self._get_resource_class(obj_type)
         # Grab ref-uuids and properties in new version
@@ -717,10 +794,15 @@ class VncCassandraClient(object):
             bch = self._cassandra_driver.get_cf_batch(
                 datastore_api.OBJ_UUID_CF_NAME)
 
+        index_props = (self._prop_index_mgr.get_indexed_props(obj_type) &
+                       set(new_props))
+        old_index_props = {}
         for col_name, col_value in self._cassandra_driver.xget(
                 datastore_api.OBJ_UUID_CF_NAME, obj_uuid):
             if self._is_prop(col_name):
                 (_, prop_name) = col_name.split(':')
+                if prop_name in index_props:
+                    old_index_props[prop_name] = json.loads(col_value)
                 if prop_name == 'id_perms':
                     # id-perms always has to be updated for last-mod timestamp
                     # get it from request dict(or from db if not in request dict)
@@ -798,12 +880,29 @@ class VncCassandraClient(object):
             else:
                 self._create_prop(bch, obj_uuid, prop_name, new_props[prop_name])
 
+        # index new values before the object is updated and drop old ones
+        # once it is
+        index_props = [prop_name for prop_name in index_props
+                       if (new_obj_dict[prop_name] !=
+                           old_index_props.get(prop_name))]
+        if index_props:
+            self._prop_index_mgr.add(
+                obj_type, obj_uuid,
+                dict((prop_name, new_obj_dict[prop_name])
+                     for prop_name in index_props))
+
         if not uuid_batch:
             try:
                 bch.send()
             finally:
                 self._obj_cache_mgr.evict(obj_type, [obj_uuid])
 
+        if index_props:
+            self._prop_index_mgr.remove(
+                obj_type, obj_uuid,
+                dict((prop_name, old_index_props.get(prop_name))
+                     for prop_name in index_props))
+
         return (True, symmetric_ref_updates)
     # end object_update
 
@@ -820,6 +919,15 @@ class VncCassandraClient(object):
             if not coll_infos or not filters:
                 return coll_infos
 
+            index_uuids = self._prop_index_mgr.lookup(obj_type, filters)
+            if index_uuids is not None:
+                # only objects found in the index are checked below
+                coll_infos = dict((obj_uuid, info) for obj_uuid, info in
+                                  list(coll_infos.items())
+                                  if obj_uuid in index_uuids)
+                if not coll_infos:
+                    return coll_infos
+
             filtered_infos = {}
             columns = ['prop:%s' % filter_key for filter_key in filters if
                        filter_key in obj_class.prop_fields]
@@ -893,30 +1001,47 @@ class VncCassandraClient(object):
                                      num_columns=num_columns,
                                      timestamp=True)
 
+            def filter_rows_back_ref(coll_infos):
+                # keep objects referring at least one of back_ref_uuids,
+                # ref columns of all candidates are read in pages of rows
+                back_ref_uuid_set = set(back_ref_uuids)
+                coll_uuids = list(coll_infos.keys())
+                filtered_infos = {}
+                for i in range(0, len(coll_uuids), self._MULTIGET_PAGE_SIZE):
+                    page_uuids = coll_uuids[i:i + self._MULTIGET_PAGE_SIZE]
+                    rows = self._cassandra_driver.multiget(
+                        datastore_api.OBJ_UUID_CF_NAME,
+                        page_uuids,
+                        start='ref:',
+                        finish='ref;')
+                    for obj_uuid in page_uuids:
+                        # give chance for zk heartbeat/ping
+                        gevent.sleep(0)
+                        for col_name in rows.get(obj_uuid) or []:
+                            if col_name.split(':')[2] in back_ref_uuid_set:
+                                filtered_infos[obj_uuid] = coll_infos[obj_uuid]
+                                break
+                return filtered_infos
+            # end filter_rows_back_ref
+
             def filter_rows_parent_anchor(sort=False):
                 # flatten to [('children:<type>:<uuid>', (<val>,<ts>), *]
                 all_cols = [cols for obj_key in list(obj_rows.keys())
                                  for cols in list(obj_rows[obj_key].items())]
                 all_child_infos = {}
+                obj_uuid_set = set(obj_uuids or [])
                 for col_name, col_val_ts in all_cols:
                     # give chance for zk heartbeat/ping
                     gevent.sleep(0)
                     child_uuid = col_name.split(':')[2]
-                    if obj_uuids and child_uuid not in obj_uuids:
+                    if obj_uuid_set and child_uuid not in obj_uuid_set:
                         continue
-                    if back_ref_uuids:
-                        child_cols = self._cassandra_driver.get(
-                            datastore_api.OBJ_UUID_CF_NAME,
-                            child_uuid,
-                            start='ref:',
-                            finish='ref;')
-                        child_ref_ids = {col.split(':')[2]
-                                         for col in child_cols or []}
-                        if not set(back_ref_uuids) & child_ref_ids:
-                            continue
                     all_child_infos[child_uuid] = {'uuid': child_uuid,
                                                    'tstamp': col_val_ts[1]}
 
+                if back_ref_uuids:
+                    all_child_infos = filter_rows_back_ref(all_child_infos)
+
                 filt_child_infos = filter_rows(all_child_infos, filters)
 
                 if not sort:
@@ -1065,6 +1190,13 @@ class VncCassandraClient(object):
                                                      'fq_name')
         bch = self._cassandra_driver.get_cf_batch(datastore_api.OBJ_UUID_CF_NAME)
 
+        index_props = self._prop_index_mgr.get_indexed_props(obj_type)
+        if index_props:
+            index_cols = self._cassandra_driver.get(
+                datastore_api.OBJ_UUID_CF_NAME, obj_uuid,
+                columns=['prop:%s' % prop_name for prop_name in index_props])
+            index_cols = index_cols or {}
+
         # unlink from parent
         col_start = 'parent:'
         col_fin = 'parent;'
@@ -1101,6 +1233,12 @@ class VncCassandraClient(object):
         finally:
             self._obj_cache_mgr.evict(obj_type, [obj_uuid])
 
+        if index_props:
+            self._prop_index_mgr.remove(
+                obj_type, obj_uuid,
+                dict((prop_name, index_cols.get('prop:%s' % prop_name))
+                     for prop_name in index_props))
+
         # Update fqname table
         fq_name_str = ':'.join(fq_name)
         fq_name_col = utils.encode_string(fq_name_str) + ':' + obj_uuid
@@ -1109,8 +1247,9 @@ class VncCassandraClient(object):
             key=obj_type,
             columns=[fq_name_col])
 
-        # Purge map naming cache
+        # Purge map naming caches
         self.cache_uuid_to_fq_name_del(obj_uuid)
+        self.cache_fq_name_to_uuid_del(obj_type, fq_name)
 
         return (True, symmetric_ref_updates)
     # end object_delete
@@ -1156,46 +1295,137 @@ class VncCassandraClient(object):
     # end prop_collection_read
 
     def cache_uuid_to_fq_name_add(self, id, fq_name, obj_type):
-        self._cache_uuid_to_fq_name[id] = (fq_name, obj_type)
+        self._cache_uuid_to_fq_name.add(id, fq_name, obj_type)
     # end cache_uuid_to_fq_name_add
 
     def cache_uuid_to_fq_name_del(self, id):
-        self._cache_uuid_to_fq_name.pop(id, None)
+        self._cache_uuid_to_fq_name.pop(id)
     # end cache_uuid_to_fq_name_del
 
+    def get_uuid_cache_stats(self):
+        return self._cache_uuid_to_fq_name.get_stats()
+    # end get_uuid_cache_stats
+
+    def cache_fq_name_to_uuid_del(self, obj_type, fq_name):
+        self._cache_fq_name_to_uuid.drop(obj_type, fq_name)
+    # end cache_fq_name_to_uuid_del
+
+    def get_fq_name_cache_stats(self):
+        return self._cache_fq_name_to_uuid.get_stats()
+    # end get_fq_name_cache_stats
+
     def uuid_to_fq_name(self, id):
-        try:
-            return copy.copy(self._cache_uuid_to_fq_name[id][0])
-        except KeyError:
-            obj = self._cassandra_driver.get(datastore_api.OBJ_UUID_CF_NAME, id,
-                                             columns=['fq_name', 'type'])
-            if not obj:
-                raise NoIdError(id)
-            if 'type' not in obj or 'fq_name' not in obj:
-                raise NoIdError(id)
-            fq_name = obj['fq_name']
-            obj_type = obj['type']
-            self.cache_uuid_to_fq_name_add(id, fq_name, obj_type)
-            return copy.copy(fq_name)
+        # a cache hit is a new list built from the cached entry
+        fq_name = self._cache_uuid_to_fq_name.get_fq_name(id)
+        if fq_name is not None:
+            return fq_name
+        obj = self._cassandra_driver.get(datastore_api.OBJ_UUID_CF_NAME, id,
+                                         columns=['fq_name', 'type'])
+        if not obj:
+            raise NoIdError(id)
+        if 'type' not in obj or 'fq_name' not in obj:
+            raise NoIdError(id)
+        fq_name = obj['fq_name']
+        obj_type = obj['type']
+        self.cache_uuid_to_fq_name_add(id, fq_name, obj_type)
+        return copy.copy(fq_name)
     # end uuid_to_fq_name
 
+    def _cache_uuids_to_fq_names(self, uuids):
+        # read the fq_name and type of uuids by pages of rows into the uuid
+        # to fq_name cache, returns the uuids not found in the DB
+        uuids = list(uuids)
+        missing_uuids = set()
+        for i in range(0, len(uuids), self._MULTIGET_PAGE_SIZE):
+            page_uuids = uuids[i:i + self._MULTIGET_PAGE_SIZE]
+            rows = self._cassandra_driver.multiget(
+                datastore_api.OBJ_UUID_CF_NAME, page_uuids,
+                columns=['fq_name', 'type'])
+            for obj_uuid in page_uuids:
+                obj = rows.get(obj_uuid) or {}
+                if 'type' not in obj or 'fq_name' not in obj:
+                    missing_uuids.add(obj_uuid)
+                    continue
+                self.cache_uuid_to_fq_name_add(obj_uuid, obj['fq_name'],
+                                               obj['type'])
+        return missing_uuids
+    # end _cache_uuids_to_fq_names
+
     def uuid_to_obj_type(self, id):
-        try:
-            return self._cache_uuid_to_fq_name[id][1]
-        except KeyError:
-            obj = self._cassandra_driver.get(datastore_api.OBJ_UUID_CF_NAME, id,
-                           columns=['fq_name', 'type'])
-            if not obj:
-                raise NoIdError(id)
-            if 'type' not in obj or 'fq_name' not in obj:
-                raise NoIdError(id)
-            fq_name = obj['fq_name']
-            obj_type = obj['type']
-            self.cache_uuid_to_fq_name_add(id, fq_name, obj_type)
+        obj_type = self._cache_uuid_to_fq_name.get_type(id)
+        if obj_type is not None:
             return obj_type
+        obj = self._cassandra_driver.get(datastore_api.OBJ_UUID_CF_NAME, id,
+                       columns=['fq_name', 'type'])
+        if not obj:
+            raise NoIdError(id)
+        if 'type' not in obj or 'fq_name' not in obj:
+            raise NoIdError(id)
+        fq_name = obj['fq_name']
+        obj_type = obj['type']
+        self.cache_uuid_to_fq_name_add(id, fq_name, obj_type)
+        return obj_type
     # end uuid_to_obj_type
 
     def fq_name_to_uuid(self, obj_type, fq_name):
+        found, obj_uuid = self._cache_fq_name_to_uuid.lookup(obj_type,
+                                                             fq_name)
+        if found:
+            if obj_uuid is None:
+                raise NoIdError('%s %s' % (
+                    obj_type, utils.encode_string(':'.join(fq_name))))
+            return obj_uuid
+        generation = self._cache_fq_name_to_uuid.get_generation(obj_type)
+        try:
+            obj_uuid = self._read_fq_name_uuid(obj_type, fq_name)
+        except NoIdError:
+            self._cache_fq_name_to_uuid.add_missing(obj_type, fq_name,
+                                                    generation)
+            raise
+        self._cache_fq_name_to_uuid.add(obj_type, fq_name, obj_uuid,
+                                        generation)
+        return obj_uuid
+    # end fq_name_to_uuid
+
+    def fq_names_to_uuids(self, obj_type, fq_names):
+        # returns the uuids of fq_names of a same type in their order, None
+        # for the ones not found. fq_names not cached are read
+        # concurrently
+        obj_uuids = [None] * len(fq_names)
+        missed = []
+        for i, fq_name in enumerate(fq_names):
+            found, obj_uuid = self._cache_fq_name_to_uuid.lookup(obj_type,
+                                                                 fq_name)
+            if found:
+                obj_uuids[i] = obj_uuid
+            else:
+                missed.append(i)
+        if not missed:
+            return obj_uuids
+
+        generation = self._cache_fq_name_to_uuid.get_generation(obj_type)
+
+        def read(i):
+            try:
+                obj_uuids[i] = self._read_fq_name_uuid(obj_type, fq_names[i])
+            except NoIdError:
+                pass
+        # end read
+
+        pool = gevent.pool.Pool(self._FQ_NAME_LOOKUP_CONCURRENCY)
+        for _ in pool.imap_unordered(read, missed):
+            pass
+        for i in missed:
+            if obj_uuids[i] is None:
+                self._cache_fq_name_to_uuid.add_missing(
+                    obj_type, fq_names[i], generation)
+            else:
+                self._cache_fq_name_to_uuid.add(
+                    obj_type, fq_names[i], obj_uuids[i], generation)
+        return obj_uuids
+    # end fq_names_to_uuids
+
+    def _read_fq_name_uuid(self, obj_type, fq_name):
         fq_name_str = utils.encode_string(':'.join(fq_name))
 
         col_infos = self._cassandra_driver.get(datastore_api.OBJ_FQ_NAME_CF_NAME,
@@ -1210,7 +1440,7 @@ class VncCassandraClient(object):
         if obj_type != 'route_target' and fq_name_uuid[:-1] != fq_name:
             raise NoIdError('%s %s' % (obj_type, fq_name_str))
         return fq_name_uuid[-1]
-    # end fq_name_to_uuid
+    # end _read_fq_name_uuid
 
     # return all objects shared with a (share_type, share_id)
     def get_shared(self, obj_type, share_id='', share_type='global'):
@@ -1258,6 +1488,11 @@ class VncCassandraClient(object):
         map_fields = obj_class.prop_map_fields
         prop_fields = obj_class.prop_fields - (list_fields | map_fields)
 
+        # resolve the fq_names of all rendered children, refs and back-refs
+        # together instead of one DB read per uuid to fq_name cache miss
+        missing_uuids = self._cache_linked_fq_names(obj_class, obj_rows,
+                                                    field_names)
+
         results = {}
         for obj_uuid, obj_cols in list(obj_rows.items()):
             if 'type' not in obj_cols or 'fq_name' not in obj_cols:
@@ -1339,6 +1574,8 @@ class VncCassandraClient(object):
                     if child_type+'s' not in children_fields:
                         continue
 
+                    if child_uuid in missing_uuids:
+                        continue
                     child_tstamp = obj_cols[col_name][1]
                     try:
                         self._read_child(result, obj_uuid, child_type,
@@ -1363,6 +1600,8 @@ class VncCassandraClient(object):
                     if (field_names and
                         '%s_back_refs' %(back_ref_type) not in field_names):
                         continue
+                    if back_ref_uuid in missing_uuids:
+                        continue
 
                     try:
                         self._read_back_ref(result, obj_uuid, back_ref_type,
@@ -1417,6 +1656,35 @@ class VncCassandraClient(object):
         return results
     # end _render_obj_from_db
 
+    def _cache_linked_fq_names(self, obj_class, obj_rows, field_names):
+        # cache the fq_names of the children, refs and back-refs of the rows
+        # _render_obj_from_db renders, returns the ones not found in the DB
+        link_fields = (
+            (self._is_children, 's', obj_class.children_fields),
+            (self._is_ref, '_refs', obj_class.ref_fields),
+            (self._is_backref, '_back_refs', obj_class.backref_fields),
+        )
+        uuids = set()
+        for obj_cols in obj_rows.values():
+            obj_type = obj_cols.get('type')
+            if not obj_type or obj_type[0] != obj_class.object_type:
+                continue
+            for col_name in obj_cols:
+                for is_link, field_suffix, fields in link_fields:
+                    if not is_link(col_name):
+                        continue
+                    (_, link_type, link_uuid) = col_name.split(':')
+                    field = link_type + field_suffix
+                    if (field in fields and
+                            not (field_names and field not in field_names) and
+                            link_uuid not in self._cache_uuid_to_fq_name):
+                        uuids.add(link_uuid)
+                    break
+        if not uuids:
+            return set()
+        return self._cache_uuids_to_fq_names(uuids)
+    # end _cache_linked_fq_names
+
     def _read_child(self, result, obj_uuid, child_obj_type, child_uuid,
                     child_tstamp):
         if '%ss' % (child_obj_type) not in result:
@@ -1474,8 +1742,86 @@ class VncCassandraClient(object):
         result['%s_back_refs' % (back_ref_obj_type)].append(back_ref_info)
     # end _read_back_ref
 
-    def walk(self, fn=None):
-        type_to_object = {}
+    def walk(self, fn=None, type_filter=None, chunk_done=None,
+             resume_after=None):
+        # stream type and fq_name of all objects to prime the uuid to
+        # fq_name cache and, as they are read, hand object uuids to fn by
+        # chunks of a same type with at most 'walk_concurrency' chunks
+        # processed at once. Memory is bounded by a partial chunk per type
+        # plus the chunks in flight whatever the size of the database.
+        # fn can be called several times for a type
+        # - type_filter(obj_type) is called once per type, fn is only
+        #   called for types it accepts
+        # - chunk_done(obj_type, last_uuid) is called once all chunks of a
+        #   type up to the one ending by last_uuid were processed, in the
+        #   order of the scan which is stable while the ring is unchanged
+        # - resume_after maps a type to the last uuid of a previous walk,
+        #   objects of that type are skipped up to it. Types are popped
+        #   from the dict as their uuid is found, the ones left were not
+        #   found and were skipped entirely
+        chunk_size = self._cassandra_driver.options.walk_chunk_size
+        pool = gevent.pool.Pool(
+            self._cassandra_driver.options.walk_concurrency)
+        type_chunks = {}
+        type_selected = {}
+        # per type: sequence of the next chunk, last uuid of the pending
+        # chunks by sequence and sequence of the next chunk to report
+        type_progress = {}
+        walk_results = []
+        stats = self._walk_stats = {
+            'objects_read': 0,
+            'objects_processed': 0,
+            'chunks': 0,
+            'start_time': time.time(),
+            'end_time': None,
+        }
+
+        def report(obj_type, seq):
+            progress = type_progress[obj_type]
+            progress['done'].add(seq)
+            while progress['reported'] in progress['done']:
+                progress['done'].remove(progress['reported'])
+                last_uuid = progress['last_uuids'].pop(progress['reported'])
+                progress['reported'] += 1
+                chunk_done(obj_type, last_uuid)
+        # end report
+
+        def invoke(obj_type, uuid_list, seq):
+            try:
+                result = fn(obj_type, uuid_list)
+                if result:
+                    walk_results.append(result)
+            except Exception as e:
+                self._logger('Error in db walk invoke %s' % (str(e)),
+                             level=SandeshLevel.SYS_ERR)
+            finally:
+                stats['objects_processed'] += len(uuid_list)
+            if chunk_done is not None:
+                try:
+                    report(obj_type, seq)
+                except Exception as e:
+                    self._logger('Error in db walk chunk done %s' % (str(e)),
+                                 level=SandeshLevel.SYS_ERR)
+        # end invoke
+
+        def dispatch(obj_type, uuid_list):
+            self._logger('DB walk: obj_type %s len %s'
+                         % (obj_type, len(uuid_list)),
+                         level=SandeshLevel.SYS_DEBUG)
+            stats['chunks'] += 1
+            try:
+                progress = type_progress[obj_type]
+            except KeyError:
+                progress = type_progress[obj_type] = {
+                    'next': 0, 'last_uuids': {}, 'done': set(),
+                    'reported': 0}
+            seq = progress['next']
+            progress['next'] += 1
+            progress['last_uuids'][seq] = uuid_list[-1]
+            # blocks while the pool is full, throttling DB reads
+            pool.spawn(invoke, obj_type, uuid_list, seq)
+        # end dispatch
+
         for obj_uuid, obj_col in self._cassandra_driver.get_range(
                 datastore_api.OBJ_UUID_CF_NAME,
                 columns=['type', 'fq_name']):
@@ -1484,41 +1830,391 @@ class VncCassandraClient(object):
                 obj_fq_name = json.loads(obj_col['fq_name'])
                 # prep cache to avoid n/w round-trip in db.read for ref
                 self.cache_uuid_to_fq_name_add(obj_uuid, obj_fq_name, obj_type)
-
-                try:
-                    type_to_object[obj_type].append(obj_uuid)
-                except KeyError:
-                    type_to_object[obj_type] = [obj_uuid]
             except Exception as e:
                 self._logger('Error in db walk read %s' % (str(e)),
                              level=SandeshLevel.SYS_ERR)
                 continue
 
-        if fn is None:
-            return []
-        walk_results = []
-        for obj_type, uuid_list in list(type_to_object.items()):
-            try:
-                self._logger('DB walk: obj_type %s len %s'
-                             % (obj_type, len(uuid_list)),
-                             level=SandeshLevel.SYS_INFO)
-                result = fn(obj_type, uuid_list)
-                if result:
-                    walk_results.append(result)
-            except Exception as e:
-                self._logger('Error in db walk invoke %s' % (str(e)),
-                             level=SandeshLevel.SYS_ERR)
+            stats['objects_read'] += 1
+            if stats['objects_read'] % self._WALK_PROGRESS_INTERVAL == 0:
+                self._log_walk_progress()
+            if fn is None:
                 continue
-
+            if type_filter is not None:
+                try:
+                    selected = type_selected[obj_type]
+                except KeyError:
+                    selected = type_selected[obj_type] = type_filter(obj_type)
+                if not selected:
+                    continue
+            if resume_after and obj_type in resume_after:
+                if resume_after[obj_type] == obj_uuid:
+                    del resume_after[obj_type]
+                continue
+            try:
+                uuid_list = type_chunks[obj_type]
+            except KeyError:
+                uuid_list = type_chunks[obj_type] = []
+            uuid_list.append(obj_uuid)
+            if len(uuid_list) >= chunk_size:
+                del type_chunks[obj_type]
+                dispatch(obj_type, uuid_list)
+
+        for obj_type, uuid_list in list(type_chunks.items()):
+            dispatch(obj_type, uuid_list)
+        pool.join()
+
+        stats['end_time'] = time.time()
+        self._log_walk_progress()
         return walk_results
     # end walk
+
+    def _log_walk_progress(self):
+        stats = self._walk_stats
+        elapsed = (stats['end_time'] or time.time()) - stats['start_time']
+        rate = stats['objects_read'] / elapsed if elapsed else 0
+        self._logger('DB walk %s: %d objects read, %d processed in %d '
+                     'chunks, %.1fs elapsed (%d objects/s)' % (
+                         'completed' if stats['end_time'] else 'in progress',
+                         stats['objects_read'], stats['objects_processed'],
+                         stats['chunks'], elapsed, rate),
+                     level=SandeshLevel.SYS_INFO)
+    # end _log_walk_progress
+
+    def get_walk_stats(self):
+        return dict(self._walk_stats)
+    # end get_walk_stats
 # end class VncCassandraClient
 
 
+class UuidToFqNameCache(object):
+    # Cache of the fq_name and type of objects by UUID. An entry is a
+    # (head, name) tuple where head is an interned tuple of the type code
+    # and the parent fq_name components, shared by the objects of a type
+    # under a same parent, and components are interned strings.
+    # When bounded, entries live in two generations: added and hit entries
+    # go in the young one and the old one is dropped when the young one
+    # holds half of the entries, evicting the least recently used entries
+    # by halves without keeping an order per entry. The heads and
+    # components no entry uses any more are dropped when half the cache is
+    # evicted, or when more entries than it holds were removed or renamed.
+    # number of entries sampled to estimate the memory footprint
+    _FOOTPRINT_SAMPLES = 1000
+
+    def __init__(self, max_entries=0):
+        self.max_entries = int(max_entries or 0)
+        self._young = {}
+        self._old = {}
+        self._heads = {}
+        self._components = {}
+        self._type_codes = {}
+        self._types = []
+        # entries removed or renamed since the last compaction
+        self._dropped = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    # end __init__
+
+    def __len__(self):
+        return len(self._young) + len(self._old)
+
+    def __contains__(self, obj_uuid):
+        return obj_uuid in self._young or obj_uuid in self._old
+
+    def _intern(self, component):
+        return self._components.setdefault(component, component)
+
+    def add(self, obj_uuid, fq_name, obj_type):
+        type_code = self._type_codes.get(obj_type)
+        if type_code is None:
+            type_code = len(self._types)
+            self._type_codes[obj_type] = type_code
+            self._types.append(obj_type)
+        head = (type_code,) + tuple(self._intern(component)
+                                    for component in fq_name[:-1])
+        head = self._heads.setdefault(head, head)
+        # names are mostly unique, only share already known ones
+        name = self._components.get(fq_name[-1], fq_name[-1])
+        entry = self._old.pop(obj_uuid, None) or self._young.get(obj_uuid)
+        if entry is not None and entry != (head, name):
+            self._dropped += 1
+        self._young[obj_uuid] = (head, name)
+        self._shrink()
+        self._compact_dropped()
+    # end add
+
+    def pop(self, obj_uuid):
+        if (self._young.pop(obj_uuid, None) is None and
+                self._old.pop(obj_uuid, None) is None):
+            return
+        self._dropped += 1
+        self._compact_dropped()
+    # end pop
+
+    def clear(self):
+        self._young = {}
+        self._old = {}
+        self._heads = {}
+        self._components = {}
+        self._dropped = 0
+    # end clear
+
+    def _compact(self):
+        # drop the heads and components of the entries gone
+        self._heads = {}
+        self._components = {}
+        self._dropped = 0
+        for entries in (self._young, self._old):
+            for obj_uuid, (head, name) in list(entries.items()):
+                head = (head[0],) + tuple(self._intern(component)
+                                          for component in head[1:])
+                entries[obj_uuid] = (self._heads.setdefault(head, head),
+                                     name)
+    # end _compact
+
+    def _compact_dropped(self):
+        if self._dropped > len(self):
+            self._compact()
+    # end _compact_dropped
+
+    def _shrink(self):
+        if not self.max_entries:
+            return
+        if len(self._young) < max(1, self.max_entries // 2):
+            return
+        self.evictions += len(self._old)
+        self._old = self._young
+        self._young = {}
+        if len(self._heads) + len(self._components) > len(self._old):
+            self._compact()
+    # end _shrink
+
+    def _lookup(self, obj_uuid):
+        entry = self._young.get(obj_uuid)
+        if entry is None:
+            entry = self._old.pop(obj_uuid, None)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._young[obj_uuid] = entry
+            self._shrink()
+        self.hits += 1
+        return entry
+    # end _lookup
+
+    def get_fq_name(self, obj_uuid):
+        entry = self._lookup(obj_uuid)
+        if entry is None:
+            return None
+        head, name = entry
+        fq_name = list(head[1:])
+        fq_name.append(name)
+        return fq_name
+    # end get_fq_name
+
+    def get_type(self, obj_uuid):
+        entry = self._lookup(obj_uuid)
+        if entry is None:
+            return None
+        return self._types[entry[0][0]]
+    # end get_type
+
+    def get_footprint(self):
+        # estimated size in bytes, exact for the containers and the
+        # interned heads and components, sampled for the entries
+        size = sum(sys.getsizeof(d) for d in (
+            self._young, self._old, self._heads, self._components))
+        size += sum(sys.getsizeof(head) for head in self._heads)
+        size += sum(sys.getsizeof(component)
+                    for component in self._components)
+        num_entries = len(self)
+        if not num_entries:
+            return size
+        components = self._components
+        sample_size = 0
+        num_samples = 0
+        for entries in (self._young, self._old):
+            for obj_uuid, entry in six.iteritems(entries):
+                if num_samples >= self._FOOTPRINT_SAMPLES:
+                    break
+                sample_size += sys.getsizeof(obj_uuid) + sys.getsizeof(entry)
+                if components.get(entry[1]) is not entry[1]:
+                    sample_size += sys.getsizeof(entry[1])
+                num_samples += 1
+        return size + sample_size * num_entries // num_samples
+    # end get_footprint
+
+    def get_stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': float(self.hits) / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'heads': len(self._heads),
+            'components': len(self._components),
+            'types': len(self._types),
+            'footprint_bytes': self.get_footprint(),
+        }
+    # end get_stats
+# end class UuidToFqNameCache
+
+
+class FqNameToUuidCache(object):
+    # Cache of object UUIDs by type and fq_name. An object keeps its
+    # fq_name for its whole life, so entries are dropped when an object of
+    # that type and fq_name is created or deleted, locally or on
+    # notification. Entries are also cached for ttl seconds at most, and
+    # fq_names not found for negative_ttl seconds, which bounds how long a
+    # deletion or a creation is missed when its notification is late or
+    # lost, 0 is no bound for found entries and no caching of the ones not
+    # found. A lookup result is not cached if an entry of its type was
+    # dropped while it was read from the DB. Entries are evicted by
+    # generations as in UuidToFqNameCache, max_entries 0 disables the
+    # cache.
+
+    def __init__(self, max_entries=0, ttl=0, negative_ttl=0):
+        self.max_entries = int(max_entries or 0)
+        self.ttl = float(ttl or 0)
+        self.negative_ttl = float(negative_ttl or 0)
+        # (type, fq_name) to (uuid, expiry time or None)
+        self._young = {}
+        self._old = {}
+        self._negative = {}
+        # bumped on each drop of a type and on clear, read before a DB
+        # lookup and checked when caching its result
+        self._generations = {}
+        self._clears = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+    # end __init__
+
+    def __len__(self):
+        return len(self._young) + len(self._old)
+
+    def get_generation(self, obj_type):
+        return self._clears, self._generations.get(obj_type, 0)
+    # end get_generation
+
+    def lookup(self, obj_type, fq_name):
+        # returns (found, uuid), uuid is None for an fq_name cached as not
+        # found
+        if not self.max_entries:
+            return False, None
+        key = (obj_type, tuple(fq_name))
+        entry = self._young.get(key)
+        if entry is None:
+            entry = self._old.pop(key, None)
+            if entry is not None:
+                self._young[key] = entry
+                self._shrink()
+        if entry is not None:
+            obj_uuid, expiry = entry
+            if expiry is None or expiry > time.time():
+                self.hits += 1
+                return True, obj_uuid
+            self._young.pop(key, None)
+            self.expirations += 1
+        expiry = self._negative.get(key)
+        if expiry is not None:
+            if expiry > time.time():
+                self.negative_hits += 1
+                return True, None
+            del self._negative[key]
+        self.misses += 1
+        return False, None
+    # end lookup
+
+    def add(self, obj_type, fq_name, obj_uuid, generation=None):
+        if not self.max_entries:
+            return
+        if (generation is not None and
+                generation != self.get_generation(obj_type)):
+            return
+        key = (obj_type, tuple(fq_name))
+        self._negative.pop(key, None)
+        self._old.pop(key, None)
+        expiry = None
+        if self.ttl:
+            expiry = time.time() + self.ttl
+        self._young[key] = (obj_uuid, expiry)
+        self._shrink()
+    # end add
+
+    def add_missing(self, obj_type, fq_name, generation=None):
+        if not self.max_entries or not self.negative_ttl:
+            return
+        if (generation is not None and
+                generation != self.get_generation(obj_type)):
+            return
+        now = time.time()
+        if len(self._negative) >= self.max_entries:
+            self._negative = dict(
+                (key, expiry) for key, expiry in self._negative.items()
+                if expiry > now)
+            if len(self._negative) >= self.max_entries:
+                self.evictions += len(self._negative)
+                self._negative = {}
+        self._negative[(obj_type, tuple(fq_name))] = now + self.negative_ttl
+    # end add_missing
+
+    def drop(self, obj_type, fq_name):
+        self._generations[obj_type] = self._generations.get(obj_type, 0) + 1
+        key = (obj_type, tuple(fq_name))
+        self._young.pop(key, None)
+        self._old.pop(key, None)
+        self._negative.pop(key, None)
+    # end drop
+
+    def clear(self):
+        self._clears += 1
+        self._young = {}
+        self._old = {}
+        self._negative = {}
+    # end clear
+
+    def _shrink(self):
+        if len(self._young) < max(1, self.max_entries // 2):
+            return
+        self.evictions += len(self._old)
+        self._old = self._young
+        self._young = {}
+    # end _shrink
+
+    def get_stats(self):
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            'entries': len(self),
+            'negative_entries': len(self._negative),
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            'negative_ttl': self.negative_ttl,
+            'hits': self.hits,
+            'negative_hits': self.negative_hits,
+            'misses': self.misses,
+            'hit_rate': (float(self.hits + self.negative_hits) / lookups
+                         if lookups else 0.0),
+            'expirations': self.expirations,
+            'evictions': self.evictions,
+        }
+    # end get_stats
+# end class FqNameToUuidCache
+
+
 class ObjectCacheManager(object):
     class CachedObject(object):
-        # provide a read-only copy in so far as
-        # top level keys cannot be add/mod/del
+        # cached objects are stored frozen (nested dicts and lists are
+        # made read-only) so every reader shares the same structure, reads
+        # get a CowDict view that copies a nested value (one level) only
+        # when a caller reaches it through item access to modify it.
+        # Containers are kept dict/list subclasses rather than tuples so
+        # they serialize and compare like the rendered object.
         class RODict(dict):
             def __readonly__(self, *args, **kwargs):
                 raise RuntimeError("Cannot modify ReadOnlyDict")
@@ -1530,31 +2226,165 @@ class ObjectCacheManager(object):
             update = __readonly__
             setdefault = __readonly__
             del __readonly__
+
+            def __copy__(self):
+                return dict(self)
+
+            def __deepcopy__(self, memo):
+                return copy.deepcopy(dict(self), memo)
         # end RODict
 
-        def __init__(self, obj_dict, id_perms_ts, row_latest_ts):
-            self.obj_dict = self.RODict(obj_dict)
+        class ROList(list):
+            def __readonly__(self, *args, **kwargs):
+                raise RuntimeError("Cannot modify ReadOnlyList")
+            __setitem__ = __readonly__
+            __delitem__ = __readonly__
+            __iadd__ = __readonly__
+            __imul__ = __readonly__
+            append = __readonly__
+            extend = __readonly__
+            insert = __readonly__
+            pop = __readonly__
+            remove = __readonly__
+            reverse = __readonly__
+            sort = __readonly__
+            clear = __readonly__
+            del __readonly__
+
+            def __copy__(self):
+                return list(self)
+
+            def __deepcopy__(self, memo):
+                return copy.deepcopy(list(self), memo)
+        # end ROList
+
+        class CowDict(dict):
+            # mutable at top level, a frozen value reached with item
+            # access, iteration, items() or values() is replaced by a
+            # shallow mutable copy of itself. Overriding __iter__ also makes
+            # dict(view) and ** go through __getitem__.
+            def __getitem__(self, key):
+                value = dict.__getitem__(self, key)
+                cow_value = ObjectCacheManager.CachedObject.thaw(value)
+                if cow_value is not value:
+                    dict.__setitem__(self, key, cow_value)
+                return cow_value
+
+            def __iter__(self):
+                return dict.__iter__(self)
+
+            def get(self, key, default=None):
+                if key in self:
+                    return self[key]
+                return default
+
+            def setdefault(self, key, default=None):
+                if key not in self:
+                    dict.__setitem__(self, key, default)
+                return self[key]
+
+            def pop(self, key, *args):
+                if key in self:
+                    value = self[key]
+                    dict.__delitem__(self, key)
+                    return value
+                return dict.pop(self, key, *args)
+
+            def items(self):
+                return [(key, self[key]) for key in list(dict.keys(self))]
+
+            def values(self):
+                return [self[key] for key in list(dict.keys(self))]
+
+            def copy(self):
+                return type(self)(dict.items(self))
+
+            def __copy__(self):
+                return dict(self)
+
+            def __deepcopy__(self, memo):
+                return copy.deepcopy(dict(self), memo)
+        # end CowDict
+
+        class CowList(list):
+            def __getitem__(self, index):
+                value = list.__getitem__(self, index)
+                if isinstance(index, slice):
+                    return type(self)(value)
+                cow_value = ObjectCacheManager.CachedObject.thaw(value)
+                if cow_value is not value:
+                    list.__setitem__(self, index, cow_value)
+                return cow_value
+
+            def __iter__(self):
+                for index in range(len(self)):
+                    yield self[index]
+
+            def __reversed__(self):
+                for index in range(len(self) - 1, -1, -1):
+                    yield self[index]
+
+            def copy(self):
+                return type(self)(list.__iter__(self))
+
+            def __copy__(self):
+                return list(self)
+
+            def __deepcopy__(self, memo):
+                return copy.deepcopy(list(self), memo)
+        # end CowList
+
+        @classmethod
+        def freeze(cls, value):
+            if isinstance(value, dict):
+                return cls.RODict((k, cls.freeze(v))
+                                  for k, v in value.items())
+            if isinstance(value, list):
+                return cls.ROList(cls.freeze(v) for v in value)
+            return value
+        # end freeze
+
+        @classmethod
+        def thaw(cls, value):
+            if type(value) is cls.RODict:
+                return cls.CowDict(value)
+            if type(value) is cls.ROList:
+                return cls.CowList(value)
+            return value
+        # end thaw
+
+        def __init__(self, obj_dict, id_perms_ts, row_latest_ts,
+                     has_backrefs_children=True):
+            self.obj_dict = self.freeze(obj_dict)
             self.id_perms_ts = id_perms_ts
             self.row_latest_ts = row_latest_ts
+            self.has_backrefs_children = has_backrefs_children
+            self.cached_at = time.time()
         # end __init__
 
         def update_obj_dict(self, new_obj_dict):
-            self.obj_dict = self.RODict(new_obj_dict)
+            self.obj_dict = self.freeze(new_obj_dict)
+            self.cached_at = time.time()
         # end update_obj_dict
 
         def get_filtered_copy(self, field_names=None):
+            # no field is copied, see CowDict
             if not field_names:
-                return self.obj_dict
+                return self.CowDict(self.obj_dict)
 
-            # TODO filter with field_names
-            return {k: copy.deepcopy(self.obj_dict[k])
-                    for k in field_names if k in self.obj_dict}
+            obj_dict = self.obj_dict
+            return self.CowDict((k, obj_dict[k])
+                                for k in field_names if k in obj_dict)
         # end get_filtered_copy
 
     # end class CachedObject
 
+    COHERENCY_TIMESTAMP = 'timestamp'
+    COHERENCY_NOTIFY = 'notify'
+
     def __init__(self, logger, db_client, max_entries,
-                 obj_cache_exclude_types=None, debug_obj_cache_types=None):
+                 obj_cache_exclude_types=None, debug_obj_cache_types=None,
+                 coherency=None, max_staleness=None):
         self._logger = logger
         self.max_entries = max_entries
         self._db_client = db_client
@@ -1562,13 +2392,53 @@ class ObjectCacheManager(object):
         self._obj_cache_exclude_types = set(obj_cache_exclude_types or [])
         self._debug_obj_cache_types = set(debug_obj_cache_types or [])
         self._debug_obj_cache_types -= self._obj_cache_exclude_types
+        self.coherency = coherency or self.COHERENCY_TIMESTAMP
+        if self.coherency not in (self.COHERENCY_TIMESTAMP,
+                                  self.COHERENCY_NOTIFY):
+            raise VncError("Unknown object cache coherency mode '%s'" %
+                           self.coherency)
+        # in notify mode, upper bound (in seconds) an entry can be served
+        # without being re-read, covers lost or not-published notifications
+        # (e.g. back-ref or children updates on peer api-servers)
+        self.max_staleness = float(max_staleness or 0)
+        self.hits = 0
+        self.misses = 0
+        self.stale_evictions = 0
+        self.invalidations = 0
+        # bumped on each invalidation, lets a reader detect that an
+        # invalidation happened while it was reading from the DB
+        self.generation = 0
     # end __init__
 
+    def is_notify_coherent(self):
+        return self.coherency == self.COHERENCY_NOTIFY
+    # end is_notify_coherent
+
+    def get_stats(self):
+        return {
+            'coherency': self.coherency,
+            'max_staleness': self.max_staleness,
+            'entries': len(self._cache),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale_evictions': self.stale_evictions,
+            'invalidations': self.invalidations,
+        }
+    # end get_stats
+
     def _log(self, msg, level=SandeshLevel.SYS_DEBUG):
         msg = 'Object UUID cache manager: %s' % msg
         self._logger(msg, level)
 
     def evict(self, obj_type, obj_uuids):
+        # objects written locally, a read racing with the write must not
+        # cache what it read before it
+        self.generation += 1
+        self._evict(obj_type, obj_uuids)
+    # end evict
+
+    def _evict(self, obj_type, obj_uuids):
         for obj_uuid in obj_uuids:
             try:
                 cached_obj = self._cache.pop(obj_uuid)
@@ -1582,9 +2452,34 @@ class ObjectCacheManager(object):
                              )
             except KeyError:
                 continue
-    # end evict
+    # end _evict
+
+    def invalidate(self, obj_type, obj_uuids):
+        self.generation += 1
+        for obj_uuid in obj_uuids:
+            if obj_uuid in self._cache:
+                self.invalidations += 1
+                self._evict(obj_type, [obj_uuid])
+    # end invalidate
+
+    def invalidate_from_notification(self, oper_info):
+        # evict the notified object and, when the notification carries the
+        # object dict (CREATE/DELETE), its parent and referred objects as
+        # their children/back-ref columns changed too
+        if not self.is_notify_coherent():
+            return
+        obj_uuids = [oper_info['uuid']]
+        obj_dict = oper_info.get('obj_dict') or {}
+        if obj_dict.get('parent_uuid'):
+            obj_uuids.append(obj_dict['parent_uuid'])
+        for field, value in list(obj_dict.items()):
+            if not field.endswith('_refs') or not isinstance(value, list):
+                continue
+            obj_uuids.extend(ref['uuid'] for ref in value if 'uuid' in ref)
+        self.invalidate(oper_info.get('type'), obj_uuids)
+    # end invalidate_from_notification
 
-    def set(self, obj_type, db_rendered_objs, req_fields):
+    def set(self, obj_type, db_rendered_objs, req_fields, generation=None):
 
         # build up results with field filter
         result_obj_dicts = []
@@ -1592,6 +2487,19 @@ class ObjectCacheManager(object):
             result_fields = set(req_fields) | set(['fq_name', 'uuid',
                  'parent_type', 'parent_uuid'])
 
+        if (self.is_notify_coherent() and generation is not None and
+                generation != self.generation):
+            # an invalidation raced with the DB read, rows may predate it
+            # and nothing would evict them before the staleness bound
+            for render_info in list(db_rendered_objs.values()):
+                cached_obj = self.CachedObject(render_info['obj_dict'], 0, 0)
+                if req_fields:
+                    result_obj_dicts.append(
+                        cached_obj.get_filtered_copy(result_fields))
+                else:
+                    result_obj_dicts.append(cached_obj.get_filtered_copy())
+            return result_obj_dicts
+
         for obj_uuid, render_info in list(db_rendered_objs.items()):
             id_perms_ts = render_info.get('id_perms_ts', 0)
             row_latest_ts = render_info.get('row_latest_ts', 0)
@@ -1631,8 +2539,9 @@ class ObjectCacheManager(object):
                     # 'keys()' returns an iterator with PY3.
                     key = next(iter(list(self._cache.keys())))
 
-                self.evict(obj_type, [key])
+                self._evict(obj_type, [key])
 
+            cached_obj.has_backrefs_children = 'row_latest_ts' in render_info
             self._cache[obj_uuid] = cached_obj
             if req_fields:
                 result_obj_dicts.append(
@@ -1665,6 +2574,11 @@ class ObjectCacheManager(object):
 
         stale_uuids = []
 
+        if self.is_notify_coherent():
+            return self._read_notify_coherent(
+                obj_class, hit_uuids, miss_uuids, req_fields,
+                include_backrefs_children)
+
         # staleness when include_backrefs_children is False = id_perms tstamp
         #     when include_backrefs_children is True = latest_col_ts tstamp
         if include_backrefs_children:
@@ -1714,6 +2628,7 @@ class ObjectCacheManager(object):
                 stale_uuids.append(hit_uuid)
                 continue
 
+            self.hits += 1
             if req_fields:
                 obj_dicts.append(cached_obj.get_filtered_copy(result_fields))
             else:
@@ -1740,7 +2655,10 @@ class ObjectCacheManager(object):
                          )
         # end for all hit in cache
 
-        self.evict(obj_class.object_type, stale_uuids)
+        self._evict(obj_class.object_type, stale_uuids)
+        self.stale_evictions += len(stale_uuids)
+        # stale entries are counted once, as stale evictions
+        self.misses += len(miss_uuids) - len(stale_uuids)
 
         if obj_class.object_type in self._debug_obj_cache_types:
             self._log("read missing UUIDs: %s\nread stale UUIDs: %s" % (
@@ -1749,6 +2667,53 @@ class ObjectCacheManager(object):
         return obj_dicts, miss_uuids
     # end read
 
+    def _read_notify_coherent(self, obj_class, hit_uuids, miss_uuids,
+                              req_fields, include_backrefs_children):
+        # entries are evicted on notifications, so a hit is served without
+        # any DB round-trip unless it outlived the staleness bound or it
+        # was cached without the back-refs/children now requested
+        obj_dicts = []
+        stale_uuids = []
+        result_fields = {'fq_name', 'uuid', 'parent_type', 'parent_uuid'}
+        if req_fields:
+            result_fields = set(req_fields) | result_fields
+        now = time.time()
+
+        for hit_uuid in hit_uuids:
+            cached_obj = self._cache[hit_uuid]
+            if (self.max_staleness and
+                    now - cached_obj.cached_at > self.max_staleness):
+                if obj_class.object_type in self._debug_obj_cache_types:
+                    self._log("read '%s' from cache failed, entry older "
+                              "than %ss" % (hit_uuid, self.max_staleness))
+                miss_uuids.append(hit_uuid)
+                stale_uuids.append(hit_uuid)
+                continue
+            if (include_backrefs_children and
+                    not cached_obj.has_backrefs_children):
+                miss_uuids.append(hit_uuid)
+                stale_uuids.append(hit_uuid)
+                continue
+
+            self.hits += 1
+            if req_fields:
+                obj_dicts.append(cached_obj.get_filtered_copy(result_fields))
+            else:
+                obj_dicts.append(cached_obj.get_filtered_copy())
+        # end for all hit in cache
+
+        self._evict(obj_class.object_type, stale_uuids)
+        self.stale_evictions += len(stale_uuids)
+        # stale entries are counted once, as stale evictions
+        self.misses += len(miss_uuids) - len(stale_uuids)
+
+        if obj_class.object_type in self._debug_obj_cache_types:
+            self._log("read missing UUIDs: %s\nread stale UUIDs: %s" % (
+                ", ".join(miss_uuids), ", ".join(stale_uuids)))
+
+        return obj_dicts, miss_uuids
+    # end _read_notify_coherent
+
     def dump_cache(self, obj_uuids=None, count=10):
         obj_dicts = {}
         i = 1
@@ -1774,3 +2739,306 @@ class ObjectCacheManager(object):
         return obj_dicts
 
 # end class ObjectCacheManager
+
+
+class PropIndexManager(object):
+    # Opt-in secondary index of simple (not complex, list or map) object
+    # properties, rows are keyed by '<object type>:<property name>:<JSON
+    # value>' with a column per object UUID. Entries for new values are
+    # written before the object and entries for old values are removed
+    # after it, and the index only narrows the candidates that are still
+    # checked against the object columns, so a failed write or a build
+    # racing with updates can leave extra entries but not miss objects.
+    #
+    # The index of a property is only used to filter lists when it is
+    # authoritative: every api-server recorded it indexes the property on
+    # writes, and the last build of the index, indexing the objects
+    # existing before, started after all of them did (with a clock skew
+    # margin). An api-server restarted without a property, or with a
+    # property it did not index before, makes its index scanned again
+    # until it is built again. api-servers which never recorded their
+    # indexed properties (older versions) cannot be accounted for, the
+    # index must only be configured once all of them record theirs.
+    _BUILT_KEY = 'META:built'
+    _SERVERS_KEY = 'META:servers'
+    _CLOCK_SKEW = 30
+
+    def __init__(self, logger, db_client, index_fields=None, server_id=None):
+        self._logger = logger
+        self._db_client = db_client
+        self._index_fields = {}
+        for index_field in index_fields or []:
+            if not index_field.strip():
+                continue
+            try:
+                obj_type, prop_name = index_field.strip().split(':')
+            except ValueError:
+                raise VncError("Invalid property index field '%s', expected "
+                               "'<object type>:<property name>'" %
+                               index_field)
+            obj_type = obj_type.replace('-', '_')
+            prop_name = prop_name.replace('-', '_')
+            obj_class = db_client._get_resource_class(obj_type)
+            if (obj_class is None or
+                    prop_name not in obj_class.prop_fields or
+                    prop_name in obj_class.prop_list_fields or
+                    prop_name in obj_class.prop_map_fields or
+                    obj_class.prop_field_types[prop_name]['is_complex']):
+                raise VncError("Cannot index '%s', only simple properties "
+                               "can be indexed" % index_field)
+            self._index_fields.setdefault(obj_type, set()).add(prop_name)
+        self._server_id = server_id
+        # {<object type>: {<property name>: <build start time>}}
+        self._built = {}
+        # {<server id>: {'<object type>:<property name>': <indexed since>}}
+        self._servers = {}
+        self.lookups = 0
+        self.scans = 0
+        if server_id is not None:
+            self._register()
+    # end __init__
+
+    def _log(self, msg, level=SandeshLevel.SYS_DEBUG):
+        msg = 'Property index manager: %s' % msg
+        self._logger(msg, level)
+
+    @staticmethod
+    def _decode(value):
+        # the values of the UUID keyspace are JSON decoded by the CQL driver
+        if isinstance(value, (six.text_type, six.binary_type)):
+            return json.loads(value)
+        return value
+    # end _decode
+
+    def _load_meta(self):
+        rows = self._db_client._cassandra_driver.multiget(
+            datastore_api.OBJ_PROP_INDEX_CF_NAME,
+            [self._BUILT_KEY, self._SERVERS_KEY])
+        built = {}
+        for col_name, value in list(rows.get(self._BUILT_KEY, {}).items()):
+            obj_type, prop_name = col_name.split(':')
+            built.setdefault(obj_type, {})[prop_name] = \
+                self._decode(value) or 0
+        self._built = built
+        self._servers = dict(
+            (server_id, self._decode(value)) for server_id, value in
+            list(rows.get(self._SERVERS_KEY, {}).items()))
+    # end _load_meta
+
+    def _register(self):
+        # record the properties this server indexes on writes before it
+        # writes any object, keeping the time a property was first indexed
+        # if it was indexed before the restart
+        self._load_meta()
+        now = time.time()
+        previous = self._servers.get(self._server_id, {})
+        record = {}
+        for obj_type, prop_names in list(self._index_fields.items()):
+            for prop_name in prop_names:
+                field = '%s:%s' % (obj_type, prop_name)
+                record[field] = previous.get(field, now)
+        self._db_client._cassandra_driver.insert(
+            self._SERVERS_KEY, {self._server_id: json.dumps(record)},
+            cf_name=datastore_api.OBJ_PROP_INDEX_CF_NAME)
+        self._servers[self._server_id] = record
+    # end _register
+
+    def _indexed_since(self, obj_type, prop_name):
+        # latest time an api-server started indexing the property, None if
+        # one does not index it
+        field = '%s:%s' % (obj_type, prop_name)
+        since = 0
+        for record in list(self._servers.values()):
+            if field not in record:
+                return None
+            since = max(since, record[field])
+        return since
+    # end _indexed_since
+
+    def _is_authoritative(self, obj_type, prop_name):
+        since = self._indexed_since(obj_type, prop_name)
+        built = self._built.get(obj_type, {}).get(prop_name)
+        return (since is not None and built is not None and
+                since + self._CLOCK_SKEW <= built)
+    # end _is_authoritative
+
+    def is_enabled(self):
+        return bool(self._index_fields)
+    # end is_enabled
+
+    def get_indexed_props(self, obj_type):
+        return self._index_fields.get(obj_type, set())
+    # end get_indexed_props
+
+    def get_pending_props(self, obj_type):
+        return set(prop_name for prop_name in self.get_indexed_props(obj_type)
+                   if not self._is_authoritative(obj_type, prop_name))
+    # end get_pending_props
+
+    @staticmethod
+    def _index_key(obj_type, prop_name, value):
+        return '%s:%s:%s' % (obj_type, prop_name, json.dumps(value))
+    # end _index_key
+
+    def add(self, obj_type, obj_uuid, props, bch=None):
+        # props: {<property name>: <value>} of indexed properties
+        driver = self._db_client._cassandra_driver
+        send = bch is None
+        if send:
+            bch = driver.get_cf_batch(datastore_api.OBJ_PROP_INDEX_CF_NAME)
+        for prop_name, value in list(props.items()):
+            if value is None:
+                continue
+            driver.insert(self._index_key(obj_type, prop_name, value),
+                          {obj_uuid: JSON_NONE}, batch=bch)
+        if send:
+            bch.send()
+    # end add
+
+    def remove(self, obj_type, obj_uuid, props):
+        driver = self._db_client._cassandra_driver
+        bch = driver.get_cf_batch(datastore_api.OBJ_PROP_INDEX_CF_NAME)
+        for prop_name, value in list(props.items()):
+            if value is None:
+                continue
+            driver.remove(self._index_key(obj_type, prop_name, value),
+                          columns=[obj_uuid], batch=bch)
+        bch.send()
+    # end remove
+
+    def lookup(self, obj_type, filters):
+        # UUIDs of objects which may match all filters, None when a filter
+        # key is not indexed or its index is not authoritative and the
+        # caller has to scan. The index state is read again for each lookup
+        # so a server restarted with other properties is accounted for
+        # before it writes objects.
+        if not filters or not set(filters) <= self.get_indexed_props(
+                obj_type):
+            if filters and self.get_indexed_props(obj_type):
+                self.scans += 1
+            return None
+        self._load_meta()
+        if self.get_pending_props(obj_type) & set(filters):
+            self.scans += 1
+            return None
+
+        self.lookups += 1
+        obj_uuids = None
+        for prop_name, values in list(filters.items()):
+            rows = self._db_client._cassandra_driver.multiget(
+                datastore_api.OBJ_PROP_INDEX_CF_NAME,
+                [self._index_key(obj_type, prop_name, value)
+                 for value in values])
+            prop_uuids = set(col_name for cols in list(rows.values())
+                             for col_name in cols)
+            if obj_uuids is None:
+                obj_uuids = prop_uuids
+            else:
+                obj_uuids &= prop_uuids
+            if not obj_uuids:
+                break
+        return obj_uuids
+    # end lookup
+
+    def _build_page(self, obj_type, prop_names, obj_uuids):
+        driver = self._db_client._cassandra_driver
+        rows = driver.multiget(
+            datastore_api.OBJ_UUID_CF_NAME, obj_uuids,
+            columns=['prop:%s' % prop_name for prop_name in prop_names])
+        bch = driver.get_cf_batch(datastore_api.OBJ_PROP_INDEX_CF_NAME)
+        for obj_uuid, cols in list(rows.items()):
+            self.add(obj_type, obj_uuid,
+                     dict((prop_name, cols.get('prop:%s' % prop_name))
+                          for prop_name in prop_names),
+                     bch=bch)
+        bch.send()
+        # give chance for other greenlets
+        gevent.sleep(0)
+        return len(obj_uuids)
+    # end _build_page
+
+    def build(self):
+        # index objects existing before their properties were indexed by
+        # all the api-servers, reading the property columns by pages of
+        # objects. A build only starts once the clock skew margin passed
+        # since the last api-server started indexing the properties.
+        driver = self._db_client._cassandra_driver
+        page_size = self._db_client._MULTIGET_PAGE_SIZE
+        self._load_meta()
+        for obj_type in list(self._index_fields.keys()):
+            prop_names = set()
+            start = time.time()
+            for prop_name in self.get_pending_props(obj_type):
+                since = self._indexed_since(obj_type, prop_name)
+                if since is None:
+                    self._log("not building index of %s property %s, not "
+                              "indexed by all api-servers" % (
+                                  obj_type, prop_name),
+                              level=SandeshLevel.SYS_NOTICE)
+                    continue
+                prop_names.add(prop_name)
+                start = max(start, since + self._CLOCK_SKEW)
+            if not prop_names:
+                continue
+            gevent.sleep(max(start - time.time(), 0))
+            start = time.time()
+            self._log("building index of %s properties %s" % (
+                obj_type, ', '.join(sorted(prop_names))),
+                level=SandeshLevel.SYS_NOTICE)
+            num_objs = 0
+            page_uuids = []
+            for col_name, _ in driver.xget(datastore_api.OBJ_FQ_NAME_CF_NAME,
+                                           obj_type):
+                page_uuids.append(
+                    utils.decode_string(col_name).split(':')[-1])
+                if len(page_uuids) >= page_size:
+                    num_objs += self._build_page(
+                        obj_type, prop_names, page_uuids)
+                    page_uuids = []
+            if page_uuids:
+                num_objs += self._build_page(obj_type, prop_names, page_uuids)
+
+            driver.insert(self._BUILT_KEY,
+                          dict(('%s:%s' % (obj_type, prop_name),
+                                json.dumps(start))
+                               for prop_name in prop_names),
+                          cf_name=datastore_api.OBJ_PROP_INDEX_CF_NAME)
+            self._built.setdefault(obj_type, {}).update(
+                (prop_name, start) for prop_name in prop_names)
+            self._log("built index of %s properties %s for %d objects" % (
+                obj_type, ', '.join(sorted(prop_names)), num_objs),
+                level=SandeshLevel.SYS_NOTICE)
+    # end build
+
+    def build_in_background(self, lock=None):
+        # lock, held while building so that a single api-server builds the
+        # index, the others find it built once they get it
+        def _build():
+            try:
+                if lock is None:
+                    self.build()
+                    return
+                with lock:
+                    self.build()
+            except Exception as e:
+                self._log("failed to build index: %s" % e,
+                          level=SandeshLevel.SYS_ERR)
+        return gevent.spawn(_build)
+    # end build_in_background
+
+    def get_stats(self):
+        return {
+            'indexed': dict((obj_type, sorted(prop_names)) for
+                            obj_type, prop_names in
+                            list(self._index_fields.items())),
+            'built': dict((obj_type, sorted(prop_names)) for
+                          obj_type, prop_names in list(self._built.items())),
+            'pending': dict((obj_type, sorted(self.get_pending_props(
+                obj_type))) for obj_type in self._index_fields),
+            'servers': sorted(self._servers),
+            'lookups': self.lookups,
+            'scans': self.scans,
+        }
+    # end get_stats
+
+# end class PropIndexManager
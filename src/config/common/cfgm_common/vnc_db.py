@@ -11,9 +11,14 @@ from builtins import object
 from future.utils import with_metaclass
 from past.builtins import basestring
 from collections import OrderedDict
+import io
+import os
+
+import gevent.pool
 from six import StringIO
 from vnc_api.gen.resource_client import *
 
+from cfgm_common import jsonutils as json
 from cfgm_common.utils import cgitb_hook
 from .exceptions import NoIdError
 from .utils import obj_type_to_vnc_class, compare_refs
@@ -41,6 +46,119 @@ class DBBaseMeta(type):
         return item in cls._dict
 
 
+class DBSnapshot(object):
+    """Local snapshot of the object dicts listed by DBBase.list_obj.
+
+    Each object is saved with the write timestamps of its id_perms and
+    META:latest_col_ts columns, which change with any update of the
+    object, its refs, back-refs or children. When the snapshot is loaded,
+    list_obj reads from the DB only the objects whose timestamps moved
+    since, the objects of the types without timestamps and the new ones.
+    Objects no longer listed are dropped from the snapshot.
+    """
+
+    VERSION = '# cfgm_common.vnc_db.DBSnapshot 1\n'
+
+    def __init__(self, path, logger=None):
+        self._path = path
+        self._logger = logger
+        # {(obj_type, fields): {uuid: [stamps, obj_dict JSON]}}
+        self._objects = {}
+        self.hits = 0
+        self.misses = 0
+    # end __init__
+
+    @staticmethod
+    def _key(obj_type, fields):
+        if fields is None:
+            return obj_type
+        return '%s:%s' % (obj_type, ','.join(sorted(fields)))
+    # end _key
+
+    def _log(self, msg):
+        if self._logger is not None:
+            self._logger.info(msg)
+    # end _log
+
+    def load(self):
+        self._objects = {}
+        if not os.path.exists(self._path):
+            return False
+        try:
+            with io.open(self._path, encoding='utf-8') as f:
+                if f.readline() != self.VERSION:
+                    self._log('Ignoring snapshot %s of another version' %
+                              self._path)
+                    return False
+                for line in f:
+                    key, uuid, id_perms_ts, latest_col_ts, obj_json = \
+                        line.rstrip('\n').split('\t', 4)
+                    self._objects.setdefault(key, {})[uuid] = [
+                        [int(id_perms_ts), int(latest_col_ts)], obj_json]
+        except (IOError, OSError, ValueError) as e:
+            self._log('Ignoring snapshot %s, cannot be read: %s' %
+                      (self._path, e))
+            self._objects = {}
+            return False
+        self._log('Loaded %d objects from snapshot %s' %
+                  (sum(len(objs) for objs in self._objects.values()),
+                   self._path))
+        return True
+    # end load
+
+    def save(self):
+        tmp_path = '%s.tmp' % self._path
+        try:
+            with io.open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(self.VERSION)
+                for key, objs in self._objects.items():
+                    for uuid, (stamps, obj_json) in objs.items():
+                        f.write('%s\t%s\t%d\t%d\t%s\n' % (
+                            key, uuid, stamps[0], stamps[1], obj_json))
+            os.rename(tmp_path, self._path)
+        except (IOError, OSError) as e:
+            if self._logger is not None:
+                self._logger.error('Cannot save snapshot %s: %s' %
+                                   (self._path, e))
+            return False
+        self._log('Saved %d objects to snapshot %s, %d read from it, %d '
+                  'from the DB' % (
+                      sum(len(objs) for objs in self._objects.values()),
+                      self._path, self.hits, self.misses))
+        return True
+    # end save
+
+    def list_obj(self, object_db, obj_type, uuids, fields, read_objs):
+        # read_objs(obj_type, uuids, fields) reads the objects from the
+        # DB. Stamps are read first so that an update racing with the
+        # read is read again on the next start.
+        key = self._key(obj_type, fields)
+        stamps = object_db.object_read_stamps(obj_type, uuids)
+        saved = self._objects.get(key, {})
+        objs = {}
+        entries = {}
+        miss_uuids = []
+        for uuid in uuids:
+            entry = saved.get(uuid)
+            if entry is not None and entry[0] == stamps.get(uuid):
+                objs[uuid] = json.loads(entry[1])
+                entries[uuid] = entry
+            else:
+                miss_uuids.append(uuid)
+        self.hits += len(objs)
+        self.misses += len(miss_uuids)
+        for obj_dict in read_objs(obj_type, miss_uuids, fields):
+            uuid = obj_dict['uuid']
+            objs[uuid] = obj_dict
+            if uuid in stamps:
+                entries[uuid] = [stamps[uuid], json.dumps(obj_dict)]
+        self._objects[key] = entries
+        return [objs[uuid] for uuid in uuids if uuid in objs]
+    # end list_obj
+
+# end class DBSnapshot
+
+
 class DBBase(object, with_metaclass(DBBaseMeta)):
     # This is the base class for all DB objects. All derived objects must
     # have a class member called _dict of dictionary type.
@@ -49,17 +167,26 @@ class DBBase(object, with_metaclass(DBBaseMeta)):
     _logger = None
     _object_db = None
     _manager = None
+    _snapshot = None
     _ignored_errors = OrderedDict()
+    # uuids read per object_read by list_obj and iter_obj, and how many of
+    # these reads are in flight
+    _read_chunk_size = 1000
+    _read_chunks_in_flight = 1
 
     # objects in the database could be indexed by uuid or fq-name
     # set _indexed_by_name to True in the derived class to use fq-name as index
     _indexed_by_name = False
 
     @classmethod
-    def init(cls, manager, logger, object_db):
+    def init(cls, manager, logger, object_db, snapshot=None,
+             read_chunks_in_flight=1):
+        # snapshot, a loaded DBSnapshot list_obj reads the objects from
         cls._logger = logger
         cls._object_db = object_db
         cls._manager = manager
+        cls._snapshot = snapshot
+        cls._read_chunks_in_flight = max(int(read_chunks_in_flight), 1)
         cls._meta_data = None
     # end init
 
@@ -68,6 +195,7 @@ class DBBase(object, with_metaclass(DBBaseMeta)):
         cls._logger = None
         cls._object_db = None
         cls._manager = None
+        cls._snapshot = None
     # end clear
 
     @classmethod
@@ -369,38 +497,87 @@ class DBBase(object, with_metaclass(DBBaseMeta)):
 
     @classmethod
     def list_obj(cls, obj_type=None, fields=None):
+        return list(cls.iter_obj(obj_type, fields))
+
+    @classmethod
+    def list_vnc_obj(cls, obj_type=None, fields=None):
+        return cls.iter_obj(obj_type, fields, vnc_obj=True)
+
+    @classmethod
+    def iter_obj(cls, obj_type=None, fields=None, vnc_obj=False,
+                 chunks_in_flight=None):
+        """Stream the objects of a type as they are read from the DB.
+
+        Objects are read by chunks with up to chunks_in_flight reads in
+        flight, the number init() was given by default, and yielded in
+        the order they are listed, as dicts or as vnc_api objects built
+        when they are yielded with vnc_obj set. Only the chunks in flight
+        are kept in memory. fields restricts the fields read, uuid,
+        fq_name, parent_type and parent_uuid are always returned. The
+        iteration stops at the first chunk that cannot be read.
+        """
         obj_type = obj_type or cls.obj_type
         ok, result, _ = cls._object_db.object_list(obj_type)
         if not ok:
-            return []
+            return
         uuids = [uuid for _, uuid in result]
+        if cls._snapshot is not None:
+            obj_dicts = cls._snapshot.list_obj(
+                cls._object_db, obj_type, uuids, fields, cls._read_objs)
+        else:
+            obj_dicts = cls._iter_read(obj_type, uuids, fields,
+                                       chunks_in_flight)
+        if not vnc_obj:
+            for obj_dict in obj_dicts:
+                yield obj_dict
+            return
+        vnc_cls = obj_type_to_vnc_class(obj_type, __name__)
+        for obj_dict in obj_dicts:
+            obj = vnc_cls.from_dict(**obj_dict)
+            obj.clear_pending_updates()
+            yield obj
+    # end iter_obj
+
+    @classmethod
+    def _read_objs(cls, obj_type, uuids, fields=None):
+        return list(cls._iter_read(obj_type, uuids, fields))
+
+    @classmethod
+    def _iter_read(cls, obj_type, uuids, fields=None, chunks_in_flight=None):
         # if there are more objects, one list to retrieve
         # all objects takes several minutes
         # split into multiple chunks
-        chunk_count = 1000
+        chunk_count = cls._read_chunk_size
         uuid_chunks = [uuids[i:i + chunk_count] for i in range(
             0, len(uuids), chunk_count)]
-        objs = []
-        try:
-            for uuid_chunk in uuid_chunks:
-                ok, objs_chunk = cls._object_db.object_read(
+
+        def read(uuid_chunk):
+            try:
+                return cls._object_db.object_read(
                     obj_type, uuid_chunk, field_names=fields)
+            except NoIdError:
+                # the only object of the chunk is gone
+                return True, []
+        # end read
+
+        chunks_in_flight = chunks_in_flight or cls._read_chunks_in_flight
+        if chunks_in_flight > 1 and len(uuid_chunks) > 1:
+            pool = gevent.pool.Pool(chunks_in_flight)
+            # in order, the chunks read ahead are bounded by the pool
+            results = pool.imap(read, uuid_chunks, maxsize=chunks_in_flight)
+        else:
+            pool = None
+            results = (read(uuid_chunk) for uuid_chunk in uuid_chunks)
+        try:
+            for ok, objs_chunk in results:
                 if not ok:
-                    return objs
-                objs += objs_chunk
-        except NoIdError:
-            return objs
-        return objs
-
-    @classmethod
-    def list_vnc_obj(cls, obj_type=None, fields=None):
-        obj_type = obj_type or cls.obj_type
-        vnc_cls = obj_type_to_vnc_class(obj_type, __name__)
-        obj_dicts = cls.list_obj(obj_type, fields)
-        for obj_dict in obj_dicts:
-            obj = vnc_cls.from_dict(**obj_dict)
-            obj.clear_pending_updates()
-            yield obj
+                    return
+                for obj_dict in objs_chunk:
+                    yield obj_dict
+        finally:
+            if pool is not None:
+                pool.kill()
+    # end _iter_read
 
     def get_parent_uuid(self, obj):
         if 'parent_uuid' in obj:
@@ -24,7 +24,9 @@ class VncObjectDBClient(object):
                  # svc_monitor, we consider to continue using `thrift`
                  # until we are sure they are compliant with other
                  # drivers.
-                 cassandra_driver='thrift'):
+                 cassandra_driver='thrift', uuid_cache_entries=0,
+                 fq_name_cache_entries=0, fq_name_cache_ttl=300,
+                 fq_name_negative_cache_ttl=0):
             if db_engine == 'cassandra':
                 self._object_db = vnc_cassandra.VncCassandraClient(
                     server_list,
@@ -39,6 +41,10 @@ class VncObjectDBClient(object):
                     obj_cache_entries=obj_cache_entries,
                     obj_cache_exclude_types=obj_cache_exclude_types,
                     debug_obj_cache_types=debug_obj_cache_types,
+                    uuid_cache_entries=uuid_cache_entries,
+                    fq_name_cache_entries=fq_name_cache_entries,
+                    fq_name_cache_ttl=fq_name_cache_ttl,
+                    fq_name_negative_cache_ttl=fq_name_negative_cache_ttl,
                     ssl_enabled=ssl_enabled,
                     ca_certs=ca_certs,
                     cassandra_driver=cassandra_driver)
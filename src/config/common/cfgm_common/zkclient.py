@@ -63,9 +63,16 @@ class ZookeeperLock(object):
 
 
 class IndexAllocator(object):
+    # With a lease size, each allocator leases blocks of lease_size indexes
+    # with an ephemeral znode under <path without trailing '/'>-leases/ and
+    # allocates from its own blocks first, so that allocators of the
+    # different workers do not race for the same indexes. Each allocated
+    # index still has its znode holding its value, leases only partition
+    # the index space and are released on close or when the session ends.
 
     def __init__(self, zookeeper_client, path, size=0, start_idx=0,
-                 reverse=False, alloc_list=None, max_alloc=0):
+                 reverse=False, alloc_list=None, max_alloc=0, lease_size=0,
+                 lease_owner=None):
         self._size = size
         self._start_idx = start_idx
         if alloc_list is None:
@@ -90,6 +97,32 @@ class IndexAllocator(object):
             if idx_int >= 0:
                 self._set_in_use(self._in_use, idx_int)
         # end for idx
+
+        self._lease_size = lease_size
+        self._lease_path = path.rstrip('/') + '-leases/'
+        self._lease_owner = lease_owner or '%s-%s' % (socket.getfqdn(),
+                                                      os.getpid())
+        # blocks leased by this allocator
+        self._leases = []
+        if lease_size:
+            for block in self._zookeeper_client.get_children(
+                    self._lease_path):
+                lease = self._lease_path + block
+                owner = self._zookeeper_client.read_node(lease)
+                if isinstance(owner, bytes):
+                    owner = owner.decode()
+                if owner != self._lease_owner:
+                    continue
+                # the lease of a previous process goes away with its
+                # session, take it again under the current session
+                self._zookeeper_client.delete_node(lease)
+                try:
+                    self._zookeeper_client.create_node(
+                        lease, self._lease_owner, ephemeral=True)
+                except ResourceExistsError:
+                    # leased meanwhile by another allocator
+                    continue
+                self._leases.append(int(block))
     # end __init__
 
     # Given a set of ranges (alloc_list), return
@@ -291,11 +324,84 @@ class IndexAllocator(object):
         raise ResourceExhaustionError()
     # end _alloc_from_pools
 
+    def _alloc_from_block(self, block):
+        start_bit = block * self._lease_size
+        end_bit = min(start_bit + self._lease_size, self._max_alloc)
+        if start_bit >= len(self._in_use):
+            idx = start_bit
+        else:
+            block_bitarray = self._in_use[start_bit:end_bit]
+            if block_bitarray.all():
+                if start_bit + len(block_bitarray) >= end_bit:
+                    return None
+                idx = start_bit + len(block_bitarray)
+            else:
+                idx = start_bit + block_bitarray.index(0)
+        self._set_in_use(self._in_use, idx)
+        return idx
+    # end _alloc_from_block
+
+    def _lease_block(self):
+        # lease the first block not leased by another allocator which has
+        # a free index, with a single znode creation
+        leased = set(int(block) for block in
+                     self._zookeeper_client.get_children(self._lease_path))
+        num_blocks = -(-self._max_alloc // self._lease_size)
+        for block in range(num_blocks):
+            if block in leased:
+                continue
+            start_bit = block * self._lease_size
+            end_bit = min(start_bit + self._lease_size, self._max_alloc)
+            if self._in_use[start_bit:end_bit].count() >= end_bit - start_bit:
+                continue
+            try:
+                self._zookeeper_client.create_node(
+                    self._lease_path + "%(#)010d" % {'#': block},
+                    self._lease_owner, ephemeral=True)
+            except ResourceExistsError:
+                # leased meanwhile by another allocator
+                continue
+            self._leases.append(block)
+            return block
+        return None
+    # end _lease_block
+
+    def _alloc_from_leases(self):
+        for block in self._leases:
+            idx = self._alloc_from_block(block)
+            if idx is not None:
+                return idx
+        block = self._lease_block()
+        if block is not None:
+            return self._alloc_from_block(block)
+        return None
+    # end _alloc_from_leases
+
+    def release_leases(self):
+        # give back the leased blocks, allocated indexes keep their znode
+        for block in self._leases:
+            self._zookeeper_client.delete_node(
+                self._lease_path + "%(#)010d" % {'#': block})
+        self._leases = []
+    # end release_leases
+
+    def get_leases(self):
+        return [(self._get_zk_index_from_bit(block * self._lease_size),
+                 self._get_zk_index_from_bit(
+                     min((block + 1) * self._lease_size,
+                         self._max_alloc) - 1))
+                for block in self._leases]
+    # end get_leases
+
     def alloc(self, value=None, pools=None):
+        idx = None
         if pools:
             idx = self._alloc_from_pools(pools)
-        else:
-            # Allocates a index from the allocation list
+        elif self._lease_size:
+            idx = self._alloc_from_leases()
+        if idx is None and not pools:
+            # Allocates a index from the allocation list, also when every
+            # free index is leased by another allocator
             if self._in_use.all():
                 idx = len(self._in_use)
                 if idx > self._max_alloc:
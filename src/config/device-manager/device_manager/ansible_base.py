@@ -61,6 +61,9 @@ class AnsibleBase(object):
             'last_commit_duration': '',
             'commit_status_message': '',
             'total_commits_sent_since_up': 0,
+            'last_config_size': 0,
+            'last_config_delta_size': 0,
+            'last_config_export_duration': 0,
         }
         self.initialize()
         self.device_connect()
@@ -198,7 +201,8 @@ class AnsibleBase(object):
     # end device_get
 
     @abc.abstractmethod
-    def push_conf(self, feature_configs=None, is_delete=False):
+    def push_conf(self, feature_configs=None, is_delete=False,
+                  feature_jsons=None):
         """Push config to device."""
         return 0
     # end push_conf
@@ -32,6 +32,7 @@ from cfgm_common.uve.feature_flags.ttypes import (
     UveFeatureFlagConfig, UveFeatureFlagConfigTrace
 )
 from cfgm_common.uve.physical_router.ttypes import (
+    PhysicalRouterPushScheduler, PhysicalRouterPushSchedulerTrace,
     UvePhysicalRouterConfig, UvePhysicalRouterConfigTrace
 )
 from cfgm_common.uve.physical_router_config.ttypes import (
@@ -45,8 +46,6 @@ from cfgm_common.vnc_db import FeatureFlagBase
 from cfgm_common.vnc_object_db import VncObjectDBClient
 from cfgm_common.zkclient import IndexAllocator
 from future.utils import native_str
-import gevent
-from gevent import queue
 from netaddr import IPAddress
 from past.builtins import basestring
 from past.utils import old_div
@@ -59,6 +58,9 @@ from .device_conf import DeviceConf
 from .dm_utils import DMIndexer
 from .dm_utils import DMUtils
 from .dm_utils import PushConfigState
+from .feature_config_cache import FeatureConfigCache
+from .feature_config_cache import ReadRecorder
+from .push_scheduler import PushScheduler
 
 
 class DBBaseDM(DBBase):
@@ -71,6 +73,13 @@ class DBBaseDM(DBBase):
             cls.locate(obj['uuid'], obj)
     # end locate
 
+    @classmethod
+    def get(cls, key):
+        if ReadRecorder.active:
+            ReadRecorder.record(cls.obj_type, key)
+        return cls._dict.get(key)
+    # end get
+
     @staticmethod
     def _read_key_value_pair(obj, prop):
         kvps = None
@@ -536,6 +545,7 @@ class PhysicalRouterDM(DBBaseDM):
     _dict = {}
     obj_type = 'physical_router'
     _sandesh = None
+    _push_scheduler = None
 
     def __init__(self, uuid, obj_dict=None):
         """Physical Router Object"""
@@ -553,7 +563,6 @@ class PhysicalRouterDM(DBBaseDM):
         self.router_mode = None
         self.e2_service_index = 0
         self.e2_service_providers = set()
-        self.nc_q = queue.Queue(maxsize=1)
         self.vn_ip_map = {'irb': {}, 'lo0': {}}
         self.allocated_asn = None
         self.config_sent = False
@@ -566,7 +575,8 @@ class PhysicalRouterDM(DBBaseDM):
         self.port_tuples = []
         self.node_profile = None
         self.plugins = None
-        self.nc_handler_gl = None
+        self.feature_config_cache = FeatureConfigCache(
+            PushConfigState.get_push_incremental_features())
         self.telemetry_profile = None
         self.device_family = None
         self.intent_maps = set()
@@ -576,10 +586,40 @@ class PhysicalRouterDM(DBBaseDM):
         self.set_conf_sent_state(False)
         self.config_repush_interval = PushConfigState.get_repush_interval()
         self.config_repush_count = 0
-        self.nc_handler_gl = vnc_greenlets.VncGreenlet("VNC Device Manager",
-                                                       self.nc_handler)
     # end __init__
 
+    @classmethod
+    def init_push_scheduler(cls, max_pushes=0, max_fabric_pushes=0):
+        if cls._push_scheduler is not None:
+            cls._push_scheduler.stop()
+        cls._push_scheduler = PushScheduler(
+            cls._logger, max_pushes, max_fabric_pushes,
+            stats_callback=cls.push_scheduler_uve_send)
+    # end init_push_scheduler
+
+    @classmethod
+    def push_scheduler(cls):
+        if cls._push_scheduler is None:
+            cls.init_push_scheduler()
+        return cls._push_scheduler
+    # end push_scheduler
+
+    @staticmethod
+    def push_scheduler_uve_send(stats):
+        scheduler_trace = PhysicalRouterPushScheduler(
+            name=socket.getfqdn(),
+            push_queue_depth=stats['queue_depth'],
+            fabric_push_queue_depths=stats['fabric_queue_depths'],
+            pushes_in_progress=stats['pushes_in_progress'],
+            fabric_pushes_in_progress=stats['fabric_pushes_in_progress'],
+            push_triggers=stats['triggers'],
+            push_triggers_coalesced=stats['coalesced'],
+            pushes=stats['pushes'])
+        scheduler_msg = PhysicalRouterPushSchedulerTrace(
+            data=scheduler_trace, sandesh=DBBaseDM._sandesh)
+        scheduler_msg.send(sandesh=DBBaseDM._sandesh)
+    # end push_scheduler_uve_send
+
     def use_ansible_plugin(self):
         return (PushConfigState.is_push_mode_ansible() and not
                 self.is_ec2_role())
@@ -724,8 +764,21 @@ class PhysicalRouterDM(DBBaseDM):
 
         self.reinit_device_plugin()
         self.allocate_asn()
+        self.feature_config_cache.invalidate()
     # end update
 
+    # the features read the physical router and its refs directly, not
+    # through the dependency tracker
+    def add_ref(self, ref_type, ref, attr=None):
+        super(PhysicalRouterDM, self).add_ref(ref_type, ref, attr)
+        self.feature_config_cache.invalidate()
+    # end add_ref
+
+    def delete_ref(self, ref_type, ref):
+        super(PhysicalRouterDM, self).delete_ref(ref_type, ref)
+        self.feature_config_cache.invalidate()
+    # end delete_ref
+
     def _role_assignment_changed(self, obj):
         # If this is a change to the role assignment,
         # get the job transaction info and update
@@ -967,19 +1020,9 @@ class PhysicalRouterDM(DBBaseDM):
             % self.uuid)
     # end allocate_asn
 
-    def wait_for_config_push(self, timeout=1):
-        if self.use_ansible_plugin() and self.config_manager:
-            while self.config_manager.push_in_progress():
-                try:
-                    self.nc_q.get(True, timeout)
-                except queue.Empty:
-                    pass
-    # end wait_for_config_push
-
     def delete_handler(self):
-        self.wait_for_config_push()
-        if self.nc_handler_gl:
-            gevent.kill(self.nc_handler_gl)
+        # drop the pushes queued and wait for the push in progress
+        self.push_scheduler().remove(self.uuid)
 
         self.update_single_ref('bgp_router', {})
         self.update_multiple_refs('virtual_network', {})
@@ -1028,6 +1071,9 @@ class PhysicalRouterDM(DBBaseDM):
             if obj.config_manager:
                 obj.config_manager.clear()
         cls._dict = {}
+        if cls._push_scheduler is not None:
+            cls._push_scheduler.stop()
+            cls._push_scheduler = None
     # end reset
 
     def is_junos_service_ports_enabled(self):
@@ -1037,30 +1083,31 @@ class PhysicalRouterDM(DBBaseDM):
         return False
     # end is_junos_service_ports_enabled
 
-    def block_and_set_config_state(self, timeout):
-        try:
-            if self.nc_q.get(True, timeout) is not None:
-                self.set_config_state(reset_retry_count=False)
-        except queue.Empty:
-            self.set_config_state()
-    # end block_and_set_config_state
-
-    def set_config_state(self, reset_retry_count=True):
-        try:
-            if reset_retry_count:
-                self.config_repush_count = 0
-            self.nc_q.put_nowait(1)
-        except queue.Full:
-            pass
+    def schedule_config_retry(self, delay):
+        # the retry is pushed earlier if the config changes in the meantime
+        self.feature_config_cache.invalidate()
+        self.push_scheduler().schedule(
+            self.uuid, self.nc_handler, fabric=self.fabric,
+            priority=PushScheduler.PRIORITY_RETRY, delay=delay)
+    # end schedule_config_retry
+
+    def set_config_state(self, reset_retry_count=True,
+                         changed_resources=None):
+        # changed_resources, the objects changed by type since the last
+        # push, None when not known
+        self.feature_config_cache.invalidate(changed_resources)
+        if reset_retry_count:
+            self.config_repush_count = 0
+        self.push_scheduler().schedule(self.uuid, self.nc_handler,
+                                       fabric=self.fabric)
     # end
 
     def nc_handler(self):
-        while self.nc_q.get() is not None:
-            try:
-                self.push_config()
-            except Exception as e:
-                tb = traceback.format_exc()
-                self._logger.error("Exception: " + str(e) + tb)
+        try:
+            self.push_config()
+        except Exception as e:
+            tb = traceback.format_exc()
+            self._logger.error("Exception: " + str(e) + tb)
     # end
 
     def is_valid_ip(self, ip_str):
@@ -1349,7 +1396,7 @@ class PhysicalRouterDM(DBBaseDM):
                     [2 * self.config_repush_interval,
                      PushConfigState.get_repush_max_interval()])
                 self.config_repush_count += 1
-                self.block_and_set_config_state(self.config_repush_interval)
+                self.schedule_config_retry(self.config_repush_interval)
                 return True
             # succesful commit: reset repush interval
             self.config_repush_count = 0
@@ -1463,18 +1510,20 @@ class PhysicalRouterDM(DBBaseDM):
             return
 
         if self.use_ansible_plugin():
-            feature_configs = {}
-            for plugin in self.plugins:
-                feature_config = plugin.feature_config()
-                if feature_config:
-                    feature_configs[feature_config.name] = feature_config
+            feature_configs, feature_jsons = \
+                self.feature_config_cache.build(
+                    self.plugins, self.config_manager.export_dict)
             config_size = self.config_manager.push_conf(
-                feature_configs=feature_configs)
+                feature_configs=feature_configs, feature_jsons=feature_jsons)
         else:
             config_size = self.config_manager.push_conf()
 
         if not config_size:
             return
+        # only the config changes are sent when the device plugin takes a
+        # delta, the commit time depends on their size
+        config_size = self.config_manager.get_commit_stats().get(
+            'last_config_delta_size') or config_size
         self.set_conf_sent_state(True)
         self.uve_send()
         if self.config_manager.retry() and self.config_repush_count < \
@@ -1484,14 +1533,16 @@ class PhysicalRouterDM(DBBaseDM):
                 [2 * self.config_repush_interval,
                  PushConfigState.get_repush_max_interval()])
             self.config_repush_count += 1
-            self.block_and_set_config_state(self.config_repush_interval)
+            self.schedule_config_retry(self.config_repush_interval)
         else:
             # successful commit: reset repush interval to base
             self.config_repush_count = 0
             self.config_repush_interval = PushConfigState.get_repush_interval()
             if PushConfigState.get_push_delay_enable():
-                # sleep, delay=compute max delay between two successive commits
-                gevent.sleep(self.get_push_config_interval(config_size))
+                # hold the next push of the device, delay=compute max delay
+                # between two successive commits
+                self.push_scheduler().hold(
+                    self.uuid, self.get_push_config_interval(config_size))
     # end push_config
 
     def get_push_config_interval(self, last_config_size):
@@ -1537,6 +1588,23 @@ class PhysicalRouterDM(DBBaseDM):
                 'commit_status_message', '')
             pr_trace.total_commits_sent_since_up = commit_stats.get(
                 'total_commits_sent_since_up', 0)
+            if self.use_ansible_plugin():
+                feature_stats = self.feature_config_cache.stats
+                pr_trace.last_config_size = commit_stats.get(
+                    'last_config_size', 0)
+                pr_trace.last_config_delta_size = commit_stats.get(
+                    'last_config_delta_size', 0)
+                pr_trace.last_config_compute_msec = int(1000 * (
+                    feature_stats['compute_duration'] +
+                    commit_stats.get('last_config_export_duration', 0)))
+                pr_trace.last_features_computed = \
+                    feature_stats['features_computed']
+                pr_trace.last_features_reused = \
+                    feature_stats['features_reused']
+            queue_time, push_latency = \
+                self.push_scheduler().device_stats(self.uuid)
+            pr_trace.last_push_queue_msec = int(1000 * queue_time)
+            pr_trace.last_push_latency_msec = int(1000 * push_latency)
         else:
             pr_trace.netconf_enabled_status = False
 
@@ -20,7 +20,7 @@ import time
 import traceback
 
 from cfgm_common.exceptions import ResourceExhaustionError
-from cfgm_common.vnc_db import DBBase
+from cfgm_common.vnc_db import DBBase, DBSnapshot
 import gevent
 from gevent import monkey
 from pysandesh.connection_info import ConnectionState
@@ -350,6 +350,8 @@ class DeviceManager(object):
         PushConfigState.set_push_delay_max(int(self._args.push_delay_max))
         PushConfigState.set_push_delay_enable(
             bool(self._args.push_delay_enable))
+        PushConfigState.set_push_incremental_features(
+            bool(self._args.push_incremental_features))
 
         self._chksum = ""
         if self._args.collectors:
@@ -415,8 +417,18 @@ class DeviceManager(object):
         # Initialize cassandra
         self._object_db = DMCassandraDB.get_instance(zookeeper_client,
                                                      self._args, self.logger)
-        DBBaseDM.init(self, self.logger, self._object_db)
+        snapshot = None
+        if self._args.db_snapshot_file:
+            snapshot = DBSnapshot(self._args.db_snapshot_file, self.logger)
+            snapshot.load()
+        DBBaseDM.init(
+            self, self.logger, self._object_db, snapshot=snapshot,
+            read_chunks_in_flight=self._args.db_read_chunks_in_flight)
         DBBaseDM._sandesh = self.logger._sandesh
+        PhysicalRouterDM.init_push_scheduler(
+            int(self._args.push_max_concurrency) or
+            int(self._args.max_job_count),
+            int(self._args.push_max_fabric_concurrency))
 
         # DBBaseDM.init should be called before Initializing amqp
         # Initialize amqp
@@ -489,6 +501,9 @@ class DeviceManager(object):
         si_uuid_set = set([si_obj['uuid'] for si_obj in si_obj_list])
         self._object_db.handle_pnf_resource_deletes(si_uuid_set)
 
+        if snapshot is not None:
+            snapshot.save()
+
         for pr in list(PhysicalRouterDM.values()):
             pr.set_config_state()
             pr.uve_send()
@@ -35,7 +35,9 @@ class DMAmqpHandle(VncAmqpHandle):
         super(DMAmqpHandle, self).__init__(logger._sandesh, logger, DBBaseDM,
                                            reaction_map, q_name_prefix,
                                            rabbitmq_cfg, host_ip,
-                                           register_handler=False)
+                                           register_handler=False,
+                                           batch_window=float(
+                                               args.notification_batch_window))
 
     def evaluate_dependency(self):
         if not self.dependency_tracker:
@@ -51,5 +53,6 @@ class DMAmqpHandle(VncAmqpHandle):
                                                            []):
             pr = PhysicalRouterDM.get(pr_id)
             if pr is not None:
-                pr.set_config_state()
+                pr.set_config_state(
+                    changed_resources=self.dependency_tracker.resources)
                 pr.uve_send()
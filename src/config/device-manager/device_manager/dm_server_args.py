@@ -105,6 +105,12 @@ def default_options():
         'dnsmasq_reload_by_signal': False,
         'ztp_timeout': 570,
         'rabbit_health_check_interval': 0,
+        'notification_batch_window': 0,
+        'db_snapshot_file': '',
+        'db_read_chunks_in_flight': 1,
+        'push_incremental_features': False,
+        'push_max_concurrency': 0,
+        'push_max_fabric_concurrency': 0,
         'job_manager_db_conn_retry_timeout': '10',
         'job_manager_db_conn_max_retries': '6',
         'fabric_ansible_dir': '/opt/contrail/fabric_ansible_playbooks',
@@ -214,6 +220,28 @@ def add_parser_arguments(parser):
                         help="Timeout for the DHCP Lease lookup during ZTP")
     parser.add_argument("--rabbit_health_check_interval",
                         help="Interval between rabbitmq heartbeat checks")
+    parser.add_argument("--notification_batch_window",
+                        help="Seconds during which notifications are "
+                             "batched to evaluate their dependencies once, "
+                             "0 disables batching")
+    parser.add_argument("--db_snapshot_file",
+                        help="Local file the objects read at startup are "
+                             "saved to, the next start reads from the DB "
+                             "only the objects updated since, empty "
+                             "disables the snapshot")
+    parser.add_argument("--db_read_chunks_in_flight", type=int,
+                        help="Chunks of objects read at once from the DB "
+                             "at startup")
+    parser.add_argument("--push_incremental_features",
+                        help="Compute again on a config push only the "
+                             "feature configs of which an input object "
+                             "changed")
+    parser.add_argument("--push_max_concurrency", type=int,
+                        help="Max number of config pushes in progress, 0 "
+                             "is max_job_count")
+    parser.add_argument("--push_max_fabric_concurrency", type=int,
+                        help="Max number of config pushes in progress per "
+                             "fabric, 0 is no limit")
     parser.add_argument("--job_manager_db_conn_retry_timeout",
                         help="Timeout between job manager retries")
     parser.add_argument("--job_manager_db_conn_max_retries",
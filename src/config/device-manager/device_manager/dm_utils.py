@@ -24,6 +24,7 @@ class PushConfigState(object):
     PUSH_DELAY_MAX = 100
     PUSH_DELAY_ENABLE = True
     REPUSH_MAX_RETRIES = 10
+    PUSH_INCREMENTAL_FEATURES = False
 
     @classmethod
     def set_push_mode(cls, value):
@@ -67,6 +68,11 @@ class PushConfigState(object):
         cls.REPUSH_MAX_RETRIES = value
     # end set_max_repush_retries
 
+    @classmethod
+    def set_push_incremental_features(cls, value):
+        cls.PUSH_INCREMENTAL_FEATURES = value
+    # end set_push_incremental_features
+
     @classmethod
     def get_repush_interval(cls):
         return cls.REPUSH_INTERVAL
@@ -96,6 +102,11 @@ class PushConfigState(object):
     def get_max_repush_retries(cls):
         return cls.REPUSH_MAX_RETRIES
     # end get_max_repush_retries
+
+    @classmethod
+    def get_push_incremental_features(cls):
+        return cls.PUSH_INCREMENTAL_FEATURES
+    # end get_push_incremental_features
 # end PushConfigState
 
 
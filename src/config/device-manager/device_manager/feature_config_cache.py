@@ -0,0 +1,139 @@
+#
+# Copyright (c) 2020 Juniper Networks, Inc. All rights reserved.
+#
+
+"""Feature configs of a physical router kept from one push to the next."""
+
+from builtins import object
+from hashlib import md5
+import time
+
+
+class ReadRecorder(object):
+    """Record the (object type, key) of the DM objects read while active.
+
+    DBBaseDM.get records its reads in the recorders active. Recorders of
+    concurrent greenlets all see the reads of each other, the inputs
+    recorded are a superset of the actual ones.
+    """
+
+    active = []
+
+    def __enter__(self):
+        self.reads = set()
+        ReadRecorder.active.append(self.reads)
+        return self.reads
+    # end __enter__
+
+    def __exit__(self, *exc_info):
+        ReadRecorder.active.remove(self.reads)
+    # end __exit__
+
+    @classmethod
+    def record(cls, obj_type, key):
+        for reads in cls.active:
+            reads.add((obj_type, key))
+    # end record
+# end ReadRecorder
+
+
+class FeatureConfigEntry(object):
+    def __init__(self, plugin, config, config_json, reads):
+        self.plugin = plugin
+        self.config = config
+        self.config_json = config_json
+        self.fingerprint = md5(config_json.encode('utf-8')).hexdigest() \
+            if config_json is not None else None
+        self.reads = reads
+    # end __init__
+
+    def depends_on(self, changed):
+        for obj_type, keys in changed.items():
+            for key in keys:
+                if (obj_type, key) in self.reads:
+                    return True
+        return False
+    # end depends_on
+# end FeatureConfigEntry
+
+
+class FeatureConfigCache(object):
+    """Feature configs of a physical router with the objects they read.
+
+    A feature config is computed again only when one of the objects read
+    to compute it is among the objects the dependency tracker walked to
+    reach the physical router since. A change of the physical router
+    itself, of its refs, of a type read through class attributes or whole
+    class iterations, or a trigger without changes computes all the
+    feature configs again.
+    """
+
+    # types read by the features through the DM class attributes or by
+    # iterating over all their objects, their reads are not recorded
+    GLOBAL_TYPES = set([
+        'global_system_config', 'global_vrouter_config', 'flow_node',
+        'feature', 'feature_config', 'node_profile', 'role_config',
+        'role_definition', 'physical_role', 'overlay_role', 'fabric',
+        'fabric_namespace', 'feature_flag',
+    ])
+
+    def __init__(self, incremental=False):
+        self.incremental = incremental
+        self._entries = {}
+        self._changed = {}
+        self._invalid = True
+        self.stats = {
+            'compute_duration': 0.0,
+            'features_computed': 0,
+            'features_reused': 0,
+        }
+    # end __init__
+
+    def invalidate(self, resources=None):
+        # resources, the objects walked by the dependency tracker by type,
+        # None invalidates all the feature configs
+        if resources is None:
+            self._invalid = True
+            return
+        for obj_type, keys in resources.items():
+            if obj_type in self.GLOBAL_TYPES:
+                self._invalid = True
+            self._changed.setdefault(obj_type, set()).update(keys)
+    # end invalidate
+
+    def build(self, plugins, export):
+        """Feature configs and their JSON by feature name.
+
+        The feature configs of the plugins are computed again if they
+        might have changed, export(config) returns their JSON.
+        """
+        start = time.time()
+        changed, self._changed = self._changed, {}
+        invalid, self._invalid = self._invalid, False
+        entries = {}
+        computed = 0
+        for plugin in plugins or []:
+            name = plugin.feature_name()
+            entry = self._entries.get(name)
+            if (entry is None or entry.plugin is not plugin or invalid or
+                    not self.incremental or entry.depends_on(changed)):
+                with ReadRecorder() as reads:
+                    config = plugin.feature_config()
+                entry = FeatureConfigEntry(
+                    plugin, config or None,
+                    export(config) if config else None, reads)
+                computed += 1
+            entries[name] = entry
+        self._entries = entries
+        self.stats['compute_duration'] = time.time() - start
+        self.stats['features_computed'] = computed
+        self.stats['features_reused'] = len(entries) - computed
+        configs = {}
+        config_jsons = {}
+        for entry in entries.values():
+            if entry.config is not None:
+                configs[entry.config.name] = entry.config
+                config_jsons[entry.config.name] = entry.config_json
+        return configs, config_jsons
+    # end build
+# end FeatureConfigCache
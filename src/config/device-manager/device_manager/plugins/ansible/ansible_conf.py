@@ -34,6 +34,8 @@ class AnsibleConf(AnsibleBase):
     def __init__(self, logger, params={}):
         """Initialize AnsibleConf init params."""
         self.last_config_hash = None
+        # md5 of the abstract config sections pushed last
+        self.last_section_hashes = None
         self.physical_router = params.get("physical_router")
         super(AnsibleConf, self).__init__(logger)
     # end __init__
@@ -60,6 +62,12 @@ class AnsibleConf(AnsibleBase):
         return True
     # end is_connected
 
+    def supports_config_delta(self):
+        # plugins of which the job applies device_abstract_config_delta
+        # override this
+        return False
+    # end supports_config_delta
+
     def initialize(self):
         super(AnsibleConf, self).initialize()
         self.evpn = None
@@ -145,7 +153,11 @@ class AnsibleConf(AnsibleBase):
     # end set_default_li
 
     def device_send(self, job_template, job_input, is_delete, retry):
-        config_str = json.dumps(job_input, sort_keys=True)
+        # the delta is computed from the config, it is not part of the
+        # config hash
+        config_str = json.dumps(
+            dict((k, v) for k, v in list(job_input.items())
+                 if k != 'device_abstract_config_delta'), sort_keys=True)
         self.push_config_state = PushConfigState.PUSH_STATE_IN_PROGRESS
         start_time = None
         config_size = 0
@@ -306,11 +318,24 @@ class AnsibleConf(AnsibleBase):
         return self.system_config or self.bgp_map or self.pi_map
     # end has_conf
 
-    def send_conf(self, feature_configs=None, is_delete=False, retry=True):
+    def send_conf(self, feature_configs=None, is_delete=False, retry=True,
+                  feature_jsons=None):
         if not self.has_conf() and not is_delete:
             return 0
+        start_time = time.time()
         config = self.prepare_conf(feature_configs=feature_configs,
                                    is_delete=is_delete)
+        sections = self.export_sections(config, feature_jsons)
+        config_json = self.join_sections(sections)
+        delta_json = None
+        if (not is_delete and self.last_section_hashes is not None and
+                self.supports_config_delta()):
+            delta_json = self.config_delta(sections)
+        self.commit_stats['last_config_export_duration'] = \
+            time.time() - start_time
+        self.commit_stats['last_config_size'] = len(config_json)
+        self.commit_stats['last_config_delta_size'] = \
+            len(delta_json) if delta_json is not None else 0
         feature_params, job_template = self.read_node_profile_info()
         if not self.physical_router.fabric_obj:
             self._logger.warning("Could not push "
@@ -334,15 +359,84 @@ class AnsibleConf(AnsibleBase):
             'fabric_fq_name': fabric_fq_name,
             'device_management_ip': self.physical_router.management_ip,
             'additional_feature_params': feature_params,
-            'device_abstract_config': self.export_dict(config),
+            'device_abstract_config': config_json,
             'is_delete': is_delete,
             'manage_underlay': self.physical_router.underlay_managed,
             'enterprise_style':
                 self.physical_router.fabric_obj.enterprise_style
         }
-        return self.device_send(job_template, job_input, is_delete, retry)
+        if delta_json is not None:
+            job_input['device_abstract_config_delta'] = delta_json
+        config_size = self.device_send(job_template, job_input, is_delete,
+                                       retry)
+        if is_delete:
+            self.last_section_hashes = None
+        elif self.push_config_state == PushConfigState.PUSH_STATE_SUCCESS:
+            self.last_section_hashes = self.section_hashes(sections)
+        return config_size
     # end send_conf
 
+    def export_sections(self, config, feature_jsons=None):
+        # JSON of the top level sections of the abstract config, each
+        # feature is a section named features.<feature name>
+        sections = {}
+        for name, value in list(config.__dict__.items()):
+            if name != 'features' and self.do_export(value):
+                sections[name] = self.export_dict(value)
+        features = getattr(config, 'features', None) or {}
+        for name, feature_config in list(features.items()):
+            feature_json = (feature_jsons or {}).get(name)
+            if feature_json is None:
+                feature_json = self.export_dict(feature_config)
+            sections['features.' + name] = feature_json
+        return sections
+    # end export_sections
+
+    @staticmethod
+    def _join_json(items):
+        return '{%s}' % ', '.join(
+            '%s: %s' % (json.dumps(name), items[name])
+            for name in sorted(items))
+    # end _join_json
+
+    @classmethod
+    def join_sections(cls, sections):
+        # abstract config JSON from its section JSONs
+        features = {}
+        items = {}
+        for name, section in list(sections.items()):
+            if name.startswith('features.'):
+                features[name[len('features.'):]] = section
+            else:
+                items[name] = section
+        if features:
+            items['features'] = cls._join_json(features)
+        return cls._join_json(items)
+    # end join_sections
+
+    @staticmethod
+    def section_hashes(sections):
+        return dict((name, md5(section.encode('utf-8')).hexdigest())
+                    for name, section in list(sections.items()))
+    # end section_hashes
+
+    def config_delta(self, sections):
+        # sections added, changed and removed since the last push
+        hashes = self.section_hashes(sections)
+        added = {}
+        changed = {}
+        for name, section in list(sections.items()):
+            last_hash = self.last_section_hashes.get(name)
+            if last_hash is None:
+                added[name] = section
+            elif last_hash != hashes[name]:
+                changed[name] = section
+        removed = sorted(set(self.last_section_hashes) - set(sections))
+        return '{"added": %s, "changed": %s, "removed": %s}' % (
+            self._join_json(added), self._join_json(changed),
+            json.dumps(removed))
+    # end config_delta
+
     def add_dynamic_tunnels(self, tunnel_source_ip, ip_fabric_nets):
         if not self.system_config:
             self.system_config = System()
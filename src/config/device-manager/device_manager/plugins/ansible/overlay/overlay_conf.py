@@ -29,13 +29,15 @@ class OverlayConf(AnsibleConf):
         return super(OverlayConf, cls).register(qconf)
     # end register
 
-    def push_conf(self, feature_configs=None, is_delete=False):
+    def push_conf(self, feature_configs=None, is_delete=False,
+                  feature_jsons=None):
         """."""
         if not self.physical_router:
             return 0
         if is_delete:
             return self.send_conf(is_delete=True)
-        return self.send_conf(feature_configs=feature_configs)
+        return self.send_conf(feature_configs=feature_configs,
+                              feature_jsons=feature_jsons)
     # end push_conf
 
 # end LeafConf
@@ -0,0 +1,274 @@
+#
+# Copyright (c) 2020 Juniper Networks, Inc. All rights reserved.
+#
+
+"""Config push scheduler of the physical routers."""
+
+from builtins import object
+import heapq
+import itertools
+import time
+import traceback
+
+from cfgm_common import vnc_greenlets
+import gevent
+import gevent.event
+
+
+class DevicePushState(object):
+    def __init__(self, key):
+        self.key = key
+        self.push = None
+        self.fabric = None
+        self.priority = None
+        # time the device can be pushed at, None when not queued
+        self.ready_time = None
+        # time of the first trigger not pushed yet
+        self.trigger_time = None
+        # no push before this time
+        self.hold_time = 0
+        self.greenlet = None
+        self.version = 0
+        self.last_queue_time = 0.0
+        self.last_push_latency = 0.0
+    # end __init__
+# end DevicePushState
+
+
+class PushScheduler(object):
+    """Push the config of the devices from one priority queue.
+
+    The triggers of a device already queued are coalesced in one push, a
+    trigger received while the device is pushed queues it again once the
+    push is done. The devices ready are pushed by priority, then in
+    trigger order, within max_pushes concurrent pushes and within
+    max_fabric_pushes concurrent pushes per fabric, 0 is no limit.
+    """
+
+    PRIORITY_CHANGE = 0
+    PRIORITY_RETRY = 1
+
+    def __init__(self, logger, max_pushes=0, max_fabric_pushes=0,
+                 stats_callback=None, stats_interval=5):
+        self._logger = logger
+        self._max_pushes = max_pushes
+        self._max_fabric_pushes = max_fabric_pushes
+        self._stats_callback = stats_callback
+        self._stats_interval = stats_interval
+        self._devices = {}
+        # (priority, seq, key, version) of the devices ready to be pushed
+        self._ready = []
+        # (ready time, seq, key, version) of the devices delayed
+        self._delayed = []
+        self._seq = itertools.count()
+        self._pushes = 0
+        self._fabric_pushes = {}
+        self._wakeup = gevent.event.Event()
+        self._last_stats = None
+        self._last_stats_time = 0
+        self.counters = {
+            'triggers': 0,
+            'coalesced': 0,
+            'pushes': 0,
+        }
+        self._greenlet = vnc_greenlets.VncGreenlet(
+            "VNC Device Manager Push Scheduler", self._dispatch_loop)
+    # end __init__
+
+    def stop(self):
+        self._greenlet.kill()
+        for state in list(self._devices.values()):
+            if state.greenlet is not None:
+                state.greenlet.kill()
+        self._devices = {}
+    # end stop
+
+    def schedule(self, key, push, fabric=None,
+                 priority=PRIORITY_CHANGE, delay=0):
+        """Queue a push of the device with key, push() pushes its config.
+
+        The device is pushed after delay seconds at the earliest, the
+        earliest time and the highest priority of the triggers coalesced
+        apply.
+        """
+        now = time.time()
+        state = self._devices.get(key)
+        if state is None:
+            state = DevicePushState(key)
+            self._devices[key] = state
+        state.push = push
+        state.fabric = fabric
+        self.counters['triggers'] += 1
+        if state.trigger_time is None:
+            state.trigger_time = now
+        ready_time = now + delay
+        if state.ready_time is not None:
+            self.counters['coalesced'] += 1
+            ready_time = min(ready_time, state.ready_time)
+            priority = min(priority, state.priority)
+        state.ready_time = ready_time
+        state.priority = priority
+        if state.greenlet is None:
+            self._enqueue(state)
+    # end schedule
+
+    def hold(self, key, delay):
+        # no push of the device for delay seconds
+        state = self._devices.get(key)
+        if state is not None:
+            state.hold_time = time.time() + delay
+    # end hold
+
+    def remove(self, key, timeout=None):
+        """Drop the pushes queued for the device.
+
+        Wait for timeout seconds at most for the push in progress.
+        """
+        state = self._devices.pop(key, None)
+        if state is None:
+            return
+        state.version += 1
+        if state.greenlet is not None and \
+                state.greenlet is not gevent.getcurrent():
+            state.greenlet.join(timeout)
+        self._wakeup.set()
+    # end remove
+
+    def device_stats(self, key):
+        # seconds waited in the queue and from the first trigger to the end
+        # of the last push of the device
+        state = self._devices.get(key)
+        if state is None:
+            return 0.0, 0.0
+        return state.last_queue_time, state.last_push_latency
+    # end device_stats
+
+    def stats(self):
+        fabric_depths = {}
+        queue_depth = 0
+        for state in list(self._devices.values()):
+            if state.ready_time is None or state.greenlet is not None:
+                continue
+            queue_depth += 1
+            fabric = state.fabric or ''
+            fabric_depths[fabric] = fabric_depths.get(fabric, 0) + 1
+        return {
+            'queue_depth': queue_depth,
+            'fabric_queue_depths': fabric_depths,
+            'pushes_in_progress': self._pushes,
+            'fabric_pushes_in_progress': dict(
+                (f, n) for f, n in list(self._fabric_pushes.items()) if n),
+            'triggers': self.counters['triggers'],
+            'coalesced': self.counters['coalesced'],
+            'pushes': self.counters['pushes'],
+        }
+    # end stats
+
+    def _enqueue(self, state):
+        ready_time = max(state.ready_time, state.hold_time)
+        state.version += 1
+        if ready_time <= time.time():
+            heapq.heappush(self._ready, (state.priority, next(self._seq),
+                                         state.key, state.version))
+        else:
+            heapq.heappush(self._delayed, (ready_time, next(self._seq),
+                                           state.key, state.version))
+        self._wakeup.set()
+    # end _enqueue
+
+    def _queued_state(self, entry):
+        state = self._devices.get(entry[2])
+        if state is None or state.version != entry[3]:
+            # pushed, removed or queued again since
+            return None
+        return state
+    # end _queued_state
+
+    def _dispatch(self):
+        now = time.time()
+        while self._delayed and self._delayed[0][0] <= now:
+            entry = heapq.heappop(self._delayed)
+            state = self._queued_state(entry)
+            if state is not None:
+                heapq.heappush(self._ready, (state.priority, next(self._seq),
+                                             state.key, state.version))
+        blocked = []
+        while self._ready:
+            if self._max_pushes and self._pushes >= self._max_pushes:
+                break
+            entry = heapq.heappop(self._ready)
+            state = self._queued_state(entry)
+            if state is None:
+                continue
+            fabric = state.fabric or ''
+            if self._max_fabric_pushes and self._fabric_pushes.get(
+                    fabric, 0) >= self._max_fabric_pushes:
+                blocked.append(entry)
+                continue
+            self._start(state, now)
+        for entry in blocked:
+            heapq.heappush(self._ready, entry)
+    # end _dispatch
+
+    def _start(self, state, now):
+        fabric = state.fabric or ''
+        self._pushes += 1
+        self._fabric_pushes[fabric] = self._fabric_pushes.get(fabric, 0) + 1
+        self.counters['pushes'] += 1
+        state.version += 1
+        state.ready_time = None
+        trigger_time, state.trigger_time = state.trigger_time, None
+        state.last_queue_time = now - trigger_time
+        state.greenlet = vnc_greenlets.VncGreenlet(
+            "VNC Device Manager",
+            lambda: self._push(state, fabric, trigger_time))
+    # end _start
+
+    def _push(self, state, fabric, trigger_time):
+        try:
+            state.push()
+        except Exception as e:
+            self._logger.error("Push of %s failed: %s %s" % (
+                state.key, str(e), traceback.format_exc()))
+        finally:
+            self._pushes -= 1
+            self._fabric_pushes[fabric] -= 1
+            state.last_push_latency = time.time() - trigger_time
+            state.greenlet = None
+            if state.ready_time is not None and \
+                    self._devices.get(state.key) is state:
+                # triggered again during the push
+                self._enqueue(state)
+            self._wakeup.set()
+    # end _push
+
+    def _send_stats(self, now):
+        if self._stats_callback is None:
+            return None
+        wait = self._last_stats_time + self._stats_interval - now
+        if wait > 0:
+            return wait
+        stats = self.stats()
+        if stats != self._last_stats:
+            self._stats_callback(stats)
+            self._last_stats = stats
+            self._last_stats_time = now
+        return None
+    # end _send_stats
+
+    def _dispatch_loop(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                self._dispatch()
+            except Exception as e:
+                self._logger.error("Push scheduler: %s %s" % (
+                    str(e), traceback.format_exc()))
+            now = time.time()
+            timeouts = [self._send_stats(now)]
+            if self._delayed:
+                timeouts.append(max(self._delayed[0][0] - now, 0))
+            timeouts = [t for t in timeouts if t is not None]
+            self._wakeup.wait(min(timeouts) if timeouts else None)
+    # end _dispatch_loop
+# end PushScheduler
@@ -0,0 +1,90 @@
+#
+# Copyright (c) 2020 Juniper Networks, Inc. All rights reserved.
+#
+import json
+import unittest
+
+from device_manager.feature_config_cache import FeatureConfigCache
+from device_manager.feature_config_cache import ReadRecorder
+
+
+class FakeFeatureConfig(dict):
+    @property
+    def name(self):
+        return self['name']
+
+
+class FakeFeature(object):
+    def __init__(self, name, reads):
+        self.name = name
+        self.reads = reads
+        self.computed = 0
+
+    def feature_name(self):
+        return self.name
+
+    def feature_config(self):
+        self.computed += 1
+        for obj_type, key in self.reads:
+            ReadRecorder.record(obj_type, key)
+        return FakeFeatureConfig({'name': self.name,
+                                  'computed': self.computed})
+
+
+class TestFeatureConfigCache(unittest.TestCase):
+    def setUp(self):
+        super(TestFeatureConfigCache, self).setUp()
+        self.vn = FakeFeature('vn', [('virtual_network', 'vn-1')])
+        self.lr = FakeFeature('lr', [('logical_router', 'lr-1'),
+                                     ('virtual_network', 'vn-2')])
+        self.plugins = [self.vn, self.lr]
+        self.cache = FeatureConfigCache(incremental=True)
+
+    def build(self):
+        return self.cache.build(self.plugins, json.dumps)
+
+    def test_only_features_of_changed_objects_computed(self):
+        configs, jsons = self.build()
+        self.assertEqual(set(['vn', 'lr']), set(configs))
+        self.assertEqual(json.dumps(configs['lr']), jsons['lr'])
+        self.cache.invalidate({'virtual_network': ['vn-2'],
+                               'physical_router': ['pr-1']})
+        configs, _ = self.build()
+        self.assertEqual((1, 2), (self.vn.computed, self.lr.computed))
+        self.assertEqual(2, configs['lr']['computed'])
+        self.assertEqual(1, self.cache.stats['features_computed'])
+        self.assertEqual(1, self.cache.stats['features_reused'])
+        self.build()
+        self.assertEqual((1, 2), (self.vn.computed, self.lr.computed))
+
+    def test_full_invalidation(self):
+        self.build()
+        self.cache.invalidate({'global_system_config': ['gsc']})
+        self.build()
+        self.cache.invalidate()
+        self.build()
+        self.assertEqual((3, 3), (self.vn.computed, self.lr.computed))
+
+    def test_new_plugin_computed(self):
+        self.build()
+        self.plugins = [self.vn, FakeFeature('lr', [])]
+        self.build()
+        self.assertEqual((1, 1), (self.vn.computed,
+                                  self.plugins[1].computed))
+
+    def test_not_incremental(self):
+        self.cache = FeatureConfigCache()
+        self.build()
+        self.build()
+        self.assertEqual((2, 2), (self.vn.computed, self.lr.computed))
+
+    def test_nested_recorders(self):
+        ReadRecorder.record('virtual_network', 'none')
+        with ReadRecorder() as outer:
+            ReadRecorder.record('virtual_network', 'vn-1')
+            with ReadRecorder() as inner:
+                ReadRecorder.record('logical_router', 'lr-1')
+        self.assertEqual(set([('virtual_network', 'vn-1'),
+                              ('logical_router', 'lr-1')]), outer)
+        self.assertEqual(set([('logical_router', 'lr-1')]), inner)
+        self.assertEqual([], ReadRecorder.active)
@@ -0,0 +1,132 @@
+#
+# Copyright (c) 2020 Juniper Networks, Inc. All rights reserved.
+#
+import unittest
+
+import gevent
+import gevent.event
+import mock
+
+from device_manager.push_scheduler import PushScheduler
+
+
+class TestPushScheduler(unittest.TestCase):
+    def setUp(self):
+        super(TestPushScheduler, self).setUp()
+        self.pushed = []
+        self.blocked = {}
+        self.stats = []
+
+    def get_scheduler(self, max_pushes=0, max_fabric_pushes=0):
+        scheduler = PushScheduler(mock.Mock(), max_pushes, max_fabric_pushes,
+                                  stats_callback=self.stats.append,
+                                  stats_interval=0)
+        self.addCleanup(scheduler.stop)
+        return scheduler
+
+    def push(self, key):
+        def push():
+            blocker = self.blocked.get(key)
+            if blocker is not None:
+                blocker.wait()
+            self.pushed.append(key)
+        return push
+
+    def schedule(self, scheduler, key, fabric=None, **kwargs):
+        scheduler.schedule(key, self.push(key), fabric=fabric, **kwargs)
+
+    def test_triggers_coalesced(self):
+        scheduler = self.get_scheduler()
+        for _ in range(3):
+            self.schedule(scheduler, 'pr-1')
+        gevent.sleep(0.01)
+        self.assertEqual(['pr-1'], self.pushed)
+        self.assertEqual(2, scheduler.counters['coalesced'])
+        self.assertEqual(0, self.stats[-1]['queue_depth'])
+
+    def test_trigger_during_push_pushed_after(self):
+        scheduler = self.get_scheduler()
+        self.blocked['pr-1'] = gevent.event.Event()
+        self.schedule(scheduler, 'pr-1')
+        gevent.sleep(0.01)
+        self.schedule(scheduler, 'pr-1')
+        self.schedule(scheduler, 'pr-1')
+        gevent.sleep(0.01)
+        self.assertEqual([], self.pushed)
+        self.blocked['pr-1'].set()
+        gevent.sleep(0.01)
+        self.assertEqual(['pr-1', 'pr-1'], self.pushed)
+
+    def test_concurrency_limits(self):
+        scheduler = self.get_scheduler(max_pushes=3, max_fabric_pushes=2)
+        for key in ('a-1', 'a-2', 'a-3', 'b-1', 'b-2'):
+            self.blocked[key] = gevent.event.Event()
+            self.schedule(scheduler, key, fabric=key[0])
+        gevent.sleep(0.01)
+        stats = scheduler.stats()
+        self.assertEqual(3, stats['pushes_in_progress'])
+        self.assertEqual({'a': 2, 'b': 1}, stats['fabric_pushes_in_progress'])
+        self.assertEqual(2, stats['queue_depth'])
+        self.blocked['a-1'].set()
+        gevent.sleep(0.01)
+        # a-3, queued before b-2, takes the place of a-1
+        self.assertEqual({'a': 2, 'b': 1},
+                         scheduler.stats()['fabric_pushes_in_progress'])
+        self.assertEqual(['a-1'], self.pushed)
+        for blocker in self.blocked.values():
+            blocker.set()
+        gevent.sleep(0.01)
+        self.assertEqual(5, len(self.pushed))
+        self.assertEqual(0, scheduler.stats()['pushes_in_progress'])
+
+    def test_priority_and_delay(self):
+        scheduler = self.get_scheduler(max_pushes=1)
+        self.blocked['pr-0'] = gevent.event.Event()
+        self.schedule(scheduler, 'pr-0')
+        gevent.sleep(0.01)
+        self.schedule(scheduler, 'retry',
+                      priority=PushScheduler.PRIORITY_RETRY)
+        self.schedule(scheduler, 'change')
+        self.schedule(scheduler, 'delayed', delay=0.05)
+        self.blocked['pr-0'].set()
+        gevent.sleep(0.02)
+        self.assertEqual(['pr-0', 'change', 'retry'], self.pushed)
+        gevent.sleep(0.05)
+        self.assertEqual('delayed', self.pushed[-1])
+
+    def test_change_advances_retry(self):
+        scheduler = self.get_scheduler()
+        self.schedule(scheduler, 'pr-1', priority=PushScheduler.PRIORITY_RETRY,
+                      delay=10)
+        gevent.sleep(0.01)
+        self.assertEqual([], self.pushed)
+        self.schedule(scheduler, 'pr-1')
+        gevent.sleep(0.01)
+        self.assertEqual(['pr-1'], self.pushed)
+
+    def test_hold(self):
+        scheduler = self.get_scheduler()
+        self.schedule(scheduler, 'pr-1')
+        gevent.sleep(0.01)
+        scheduler.hold('pr-1', 0.05)
+        self.schedule(scheduler, 'pr-1')
+        gevent.sleep(0.01)
+        self.assertEqual(['pr-1'], self.pushed)
+        gevent.sleep(0.05)
+        self.assertEqual(['pr-1', 'pr-1'], self.pushed)
+        queue_time, latency = scheduler.device_stats('pr-1')
+        self.assertTrue(queue_time >= 0.04)
+        self.assertTrue(latency >= queue_time)
+
+    def test_remove(self):
+        scheduler = self.get_scheduler()
+        self.schedule(scheduler, 'pr-1', delay=0.02)
+        scheduler.remove('pr-1')
+        gevent.sleep(0.03)
+        self.assertEqual([], self.pushed)
+        self.blocked['pr-2'] = gevent.event.Event()
+        self.schedule(scheduler, 'pr-2')
+        gevent.sleep(0.01)
+        gevent.spawn_later(0.01, self.blocked['pr-2'].set)
+        scheduler.remove('pr-2')
+        self.assertEqual(['pr-2'], self.pushed)
@@ -19,7 +19,10 @@ class RouteTargetST(ResourceBaseST):
         asn = ResourceBaseST.get_obj_type_map().get(
             'global_system_config').get_autonomous_system()
 
-        for obj in cls.list_vnc_obj():
+        # route targets are kept only for their fq_name and uuid
+        for obj in cls.iter_obj(
+                fields=['routing_instance_back_refs',
+                        'logical_router_back_refs'], vnc_obj=True):
             try:
                 if (obj.get_routing_instance_back_refs() or
                         obj.get_logical_router_back_refs()):
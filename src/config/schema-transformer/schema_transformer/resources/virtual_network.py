@@ -1029,6 +1029,8 @@ class VirtualNetworkST(ResourceBaseST):
 
         static_acl_entries = None
         dynamic_acl_entries = None
+        # indexes of the static and dynamic acl entries rules
+        acl_rule_lists = {}
         # add a static acl in case of provider-network
         if (not self.network_policys and
             (self.is_provider_network or self.virtual_networks or
@@ -1054,7 +1056,11 @@ class VirtualNetworkST(ResourceBaseST):
                 continue
             for prule in policy.rules:
                 acl_rule_list = self.policy_to_acl_rule(prule, dynamic)
-                acl_rule_list.update_acl_entries(acl_entries)
+                if dynamic not in acl_rule_lists:
+                    acl_rule_lists[dynamic] = AclRuleListST(
+                        acl_entries.get_acl_rule(), dynamic)
+                acl_rule_list.update_acl_entries(acl_entries,
+                                                 acl_rule_lists[dynamic])
                 for arule in acl_rule_list.get_list():
                     match = arule.get_match_condition()
                     action = arule.get_action_list()
@@ -1218,7 +1224,8 @@ class VirtualNetworkST(ResourceBaseST):
                 action = ActionListType("pass")
                 acl = AclRuleType(match, action, RULE_IMPLICIT_ALLOW_UUID)
                 acl_list.append(acl)
-                acl_list.update_acl_entries(static_acl_entries)
+                acl_list.update_acl_entries(static_acl_entries,
+                                            acl_rule_lists.get(False))
             else:
                 # Create any-vn to any-vn deny
                 match = MatchConditionType(
@@ -1227,7 +1234,8 @@ class VirtualNetworkST(ResourceBaseST):
                 action = ActionListType("deny")
                 acl = AclRuleType(match, action, RULE_IMPLICIT_DENY_UUID)
                 acl_list.append(acl)
-                acl_list.update_acl_entries(static_acl_entries)
+                acl_list.update_acl_entries(static_acl_entries,
+                                            acl_rule_lists.get(False))
             self.acl_rule_count = len(static_acl_entries.get_acl_rule())
 
         self.acl = _access_control_list_update(self.acl, self.obj.name,
@@ -1388,10 +1396,16 @@ class VirtualNetworkST(ResourceBaseST):
 
 
 class AclRuleListST(object):
+    # Rules are indexed by protocol, source and destination virtual networks
+    # (or by the fact they match subnets), mirror analyzer when dynamic and
+    # then port ranges, so the subset check of a new rule only looks at the
+    # rules able to contain it instead of the whole list.
+    _SUBNET_KEY = ('subnet',)
 
     def __init__(self, rule_list=None, dynamic=False):
         self._list = rule_list or []
         self.dynamic = dynamic
+        self._reindex()
     # end __init__
 
     def get_list(self):
@@ -1399,8 +1413,10 @@ class AclRuleListST(object):
     # end get_list
 
     def append(self, rule):
-        if not self._rule_is_subset(rule):
+        parsed = self._parse_rule(rule)
+        if not self._rule_is_subset(parsed):
             self._list.append(rule)
+            self._index_rule(parsed)
             return True
         return False
     # end append
@@ -1411,51 +1427,107 @@ class AclRuleListST(object):
         return (lhs.start_port >= rhs.start_port and
                 (rhs.end_port == -1 or lhs.end_port <= rhs.end_port))
 
-    @staticmethod
-    def _address_is_subset(lhs, rhs):
-        if not(rhs.subnet or lhs.subnet or lhs.subnet_list or rhs.subnet_list):
-            return rhs.virtual_network in [lhs.virtual_network, 'any']
-        l_subnets = lhs.subnet_list or []
-        if lhs.subnet:
-            l_subnets.append(lhs.subnet)
-        l_subnets = [IPNetwork('%s/%d' % (s.ip_prefix, s.ip_prefix_len))
-                     for s in l_subnets]
-        r_subnets = rhs.subnet_list or []
-        if rhs.subnet:
-            r_subnets.append(rhs.subnet)
-        r_subnets = [IPNetwork('%s/%d' % (s.ip_prefix, s.ip_prefix_len))
-                     for s in r_subnets]
-        for l_subnet in l_subnets:
-            for r_subnet in r_subnets:
-                if l_subnet in r_subnet:
-                    return True
-        else:
-            return False
-        return True
+    @classmethod
+    def _parse_address(cls, addr):
+        # returns the index key of the address and its subnets as
+        # (version, first, last) integer ranges
+        subnets = list(addr.subnet_list or [])
+        if addr.subnet:
+            subnets.append(addr.subnet)
+        if not subnets:
+            return addr.virtual_network, None
+        networks = []
+        for subnet in subnets:
+            network = IPNetwork('%s/%d' % (subnet.ip_prefix,
+                                           subnet.ip_prefix_len))
+            networks.append((network.version, network.first, network.last))
+        return cls._SUBNET_KEY, networks
+    # end _parse_address
 
-    def _rule_is_subset(self, rule):
-        for elem in self._list:
-            lhs = rule.match_condition
-            rhs = elem.match_condition
-            if (self._port_is_subset(lhs.src_port, rhs.src_port) and
-                    self._port_is_subset(lhs.dst_port, rhs.dst_port) and
-                    rhs.protocol in [lhs.protocol, 'any'] and
-                    self._address_is_subset(lhs.src_address,
-                                            rhs.src_address) and
-                    self._address_is_subset(lhs.dst_address, rhs.dst_address)):
-
-                if not self.dynamic:
+    @staticmethod
+    def _networks_are_subset(lhs, rhs):
+        # an address is a subset as soon as one of its subnets is
+        for l_version, l_first, l_last in lhs:
+            for r_version, r_first, r_last in rhs:
+                if (l_version == r_version and r_first <= l_first and
+                        l_last <= r_last):
                     return True
-                if (rule.action_list.mirror_to.analyzer_name ==
-                        elem.action_list.mirror_to.analyzer_name):
+        return False
+    # end _networks_are_subset
+
+    def _parse_rule(self, rule):
+        match = rule.match_condition
+        src_key, src_networks = self._parse_address(match.src_address)
+        dst_key, dst_networks = self._parse_address(match.dst_address)
+        analyzer = None
+        if self.dynamic and rule.action_list.mirror_to:
+            analyzer = rule.action_list.mirror_to.analyzer_name
+        key = (match.protocol, src_key, dst_key, analyzer)
+        return key, src_networks, dst_networks, rule
+    # end _parse_rule
+
+    def _index_rule(self, parsed):
+        key = parsed[0]
+        match = parsed[-1].match_condition
+        ports = (match.src_port.start_port, match.src_port.end_port,
+                 match.dst_port.start_port, match.dst_port.end_port)
+        self._index.setdefault(key, {}).setdefault(ports, []).append(parsed)
+    # end _index_rule
+
+    def _reindex(self):
+        self._index = {}
+        for rule in self._list:
+            self._index_rule(self._parse_rule(rule))
+    # end _reindex
+
+    def _candidate_keys(self, key):
+        protocol, src_key, dst_key, analyzer = key
+        protocols = set([protocol, 'any'])
+        src_keys = set([src_key])
+        if src_key != self._SUBNET_KEY:
+            src_keys.add('any')
+        dst_keys = set([dst_key])
+        if dst_key != self._SUBNET_KEY:
+            dst_keys.add('any')
+        for candidate in itertools.product(protocols, src_keys, dst_keys):
+            yield candidate + (analyzer,)
+    # end _candidate_keys
+
+    def _rule_is_subset(self, parsed):
+        key, src_networks, dst_networks, rule = parsed
+        lhs = rule.match_condition
+        for candidate_key in self._candidate_keys(key):
+            by_ports = self._index.get(candidate_key)
+            if not by_ports:
+                continue
+            for elems in by_ports.values():
+                rhs = elems[0][-1].match_condition
+                if not (self._port_is_subset(lhs.src_port, rhs.src_port) and
+                        self._port_is_subset(lhs.dst_port, rhs.dst_port)):
+                    continue
+                for _, elem_src_networks, elem_dst_networks, _ in elems:
+                    if (src_networks is not None and
+                            not self._networks_are_subset(
+                                src_networks, elem_src_networks)):
+                        continue
+                    if (dst_networks is not None and
+                            not self._networks_are_subset(
+                                dst_networks, elem_dst_networks)):
+                        continue
                     return True
-        # end for elem
+        # end for candidate_key
         return False
     # end _rule_is_subset
 
-    def update_acl_entries(self, acl_entries):
-        old_list = AclRuleListST(acl_entries.get_acl_rule(), self.dynamic)
-        self._list[:] = [rule for rule in self._list if old_list.append(rule)]
-        acl_entries.set_acl_rule(old_list.get_list())
+    def update_acl_entries(self, acl_entries, acl_rule_list=None):
+        # acl_rule_list is the index of the acl_entries rules kept by callers
+        # merging several rule lists in the same entries
+        if acl_rule_list is None:
+            acl_rule_list = AclRuleListST(acl_entries.get_acl_rule(),
+                                          self.dynamic)
+        self._list[:] = [rule for rule in self._list
+                         if acl_rule_list.append(rule)]
+        self._reindex()
+        acl_entries.set_acl_rule(acl_rule_list.get_list())
     # end update_acl_entries
 # end AclRuleListST
@@ -36,7 +36,9 @@ class STAmqpHandle(VncAmqpHandle):
                                            reaction_map, q_name_prefix,
                                            rabbitmq_cfg, host_ip,
                                            args.trace_file,
-                                           timer_obj=timer_obj)
+                                           timer_obj=timer_obj,
+                                           batch_window=(
+                                               args.notification_batch_window))
 
     def evaluate_dependency(self):
         if not self.dependency_tracker:
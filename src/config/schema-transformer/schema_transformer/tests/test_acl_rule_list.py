@@ -0,0 +1,209 @@
+#
+# Copyright (c) 2020 Juniper Networks, Inc. All rights reserved.
+#
+
+from __future__ import print_function
+
+from builtins import range
+import random
+import time
+import unittest
+
+from netaddr import IPNetwork
+from vnc_api.gen.resource_xsd import AclEntriesType, AclRuleType
+from vnc_api.gen.resource_xsd import ActionListType, AddressType
+from vnc_api.gen.resource_xsd import MatchConditionType, MirrorActionType
+from vnc_api.gen.resource_xsd import PortType, SubnetType
+
+from schema_transformer.resources.virtual_network import AclRuleListST
+
+
+def make_address(vn=None, cidrs=None):
+    if cidrs is None:
+        return AddressType(virtual_network=vn)
+    subnets = [SubnetType(cidr.split('/')[0], int(cidr.split('/')[1]))
+               for cidr in cidrs]
+    return AddressType(subnet_list=subnets)
+
+
+def make_rule(protocol='any', src=None, dst=None, src_port=(0, 65535),
+              dst_port=(0, 65535), analyzer=None):
+    match = MatchConditionType(
+        protocol, src or make_address('any'), PortType(*src_port),
+        dst or make_address('any'), PortType(*dst_port))
+    mirror_to = None
+    if analyzer:
+        mirror_to = MirrorActionType(analyzer_name=analyzer)
+    action = ActionListType(simple_action='pass', mirror_to=mirror_to)
+    return AclRuleType(match, action)
+
+
+class LinearAclRuleList(AclRuleListST):
+    # reference implementation scanning every rule
+
+    @staticmethod
+    def _address_is_subset(lhs, rhs):
+        if not(rhs.subnet or lhs.subnet or lhs.subnet_list or
+               rhs.subnet_list):
+            return rhs.virtual_network in [lhs.virtual_network, 'any']
+        l_subnets = [IPNetwork('%s/%d' % (s.ip_prefix, s.ip_prefix_len))
+                     for s in lhs.subnet_list or []]
+        r_subnets = [IPNetwork('%s/%d' % (s.ip_prefix, s.ip_prefix_len))
+                     for s in rhs.subnet_list or []]
+        return any(l_subnet in r_subnet
+                   for l_subnet in l_subnets for r_subnet in r_subnets)
+
+    def _rule_is_subset(self, parsed):
+        rule = parsed[-1]
+        for elem in self._list:
+            lhs = rule.match_condition
+            rhs = elem.match_condition
+            if (self._port_is_subset(lhs.src_port, rhs.src_port) and
+                    self._port_is_subset(lhs.dst_port, rhs.dst_port) and
+                    rhs.protocol in [lhs.protocol, 'any'] and
+                    self._address_is_subset(lhs.src_address,
+                                            rhs.src_address) and
+                    self._address_is_subset(lhs.dst_address,
+                                            rhs.dst_address)):
+                if not self.dynamic:
+                    return True
+                if (rule.action_list.mirror_to.analyzer_name ==
+                        elem.action_list.mirror_to.analyzer_name):
+                    return True
+        return False
+
+
+def random_rule(rand, analyzers=None):
+    def address():
+        if rand.random() < 0.5:
+            return make_address(rand.choice(['any', 'vn1', 'vn2', 'vn3']))
+        return make_address(cidrs=['10.%d.%d.0/%d' % (
+            rand.randint(0, 3), rand.randint(0, 3),
+            rand.choice([8, 16, 24]))])
+
+    def port():
+        if rand.random() < 0.5:
+            return (0, 65535)
+        start = rand.choice([0, 80, 443, 8000])
+        return (start, start + rand.choice([0, 10, 1000]))
+
+    return make_rule(rand.choice(['any', '6', '17']), address(), address(),
+                     port(), port(),
+                     analyzers and rand.choice(analyzers))
+
+
+class TestAclRuleListST(unittest.TestCase):
+    def test_vn_rule_subset_of_any(self):
+        acl_list = AclRuleListST()
+        self.assertTrue(acl_list.append(make_rule('6', make_address('vn1'),
+                                                  make_address('any'))))
+        self.assertFalse(acl_list.append(make_rule(
+            '6', make_address('vn1'), make_address('vn2'))))
+        self.assertTrue(acl_list.append(make_rule(
+            '17', make_address('vn1'), make_address('vn2'))))
+        self.assertTrue(acl_list.append(make_rule(
+            '6', make_address('vn2'), make_address('vn1'))))
+        self.assertEqual(3, len(acl_list.get_list()))
+
+    def test_port_range_subset(self):
+        acl_list = AclRuleListST()
+        acl_list.append(make_rule(dst_port=(80, 90)))
+        self.assertFalse(acl_list.append(make_rule(dst_port=(82, 85))))
+        self.assertTrue(acl_list.append(make_rule(dst_port=(85, 95))))
+        acl_list.append(make_rule(src_port=(1000, -1)))
+        self.assertFalse(acl_list.append(make_rule(src_port=(2000, 3000))))
+
+    def test_subnet_subset(self):
+        acl_list = AclRuleListST()
+        acl_list.append(make_rule(src=make_address(cidrs=['10.0.0.0/16'])))
+        self.assertFalse(acl_list.append(make_rule(
+            src=make_address(cidrs=['10.0.1.0/24', '20.0.0.0/8']))))
+        self.assertTrue(acl_list.append(make_rule(
+            src=make_address(cidrs=['10.1.0.0/24']))))
+        # a virtual network is never a subset of subnets and vice versa
+        self.assertTrue(acl_list.append(make_rule(src=make_address('vn1'))))
+        self.assertTrue(acl_list.append(make_rule(
+            src=make_address(cidrs=['fd00::/64']))))
+
+    def test_dynamic_rules_subset_with_same_analyzer(self):
+        acl_list = AclRuleListST(dynamic=True)
+        acl_list.append(make_rule(analyzer='analyzer-1'))
+        self.assertTrue(acl_list.append(make_rule(
+            '6', make_address('vn1'), analyzer='analyzer-2')))
+        self.assertFalse(acl_list.append(make_rule(
+            '6', make_address('vn1'), analyzer='analyzer-1')))
+
+    def test_update_acl_entries(self):
+        acl_entries = AclEntriesType(acl_rule=[make_rule('6')])
+        entries_list = AclRuleListST(acl_entries.get_acl_rule())
+        acl_list = AclRuleListST()
+        acl_list.append(make_rule('6', make_address('vn1')))
+        acl_list.append(make_rule('17', make_address('vn1')))
+        acl_list.update_acl_entries(acl_entries, entries_list)
+        self.assertEqual(['17'], [rule.match_condition.protocol
+                                  for rule in acl_list.get_list()])
+        self.assertEqual(['6', '17'], [rule.match_condition.protocol
+                                       for rule in acl_entries.get_acl_rule()])
+        # the index of the entries follows the merged rules
+        self.assertFalse(entries_list.append(make_rule(
+            '17', make_address('vn1'), make_address('vn2'))))
+        # as the index of the filtered list
+        self.assertTrue(acl_list.append(make_rule('6', make_address('vn1'))))
+
+    def test_same_rules_as_linear_scan(self):
+        for dynamic in (False, True):
+            rand = random.Random(dynamic)
+            analyzers = ['analyzer-1', 'analyzer-2'] if dynamic else None
+            indexed = AclRuleListST(dynamic=dynamic)
+            linear = LinearAclRuleList(dynamic=dynamic)
+            for _ in range(2000):
+                rule = random_rule(rand, analyzers)
+                self.assertEqual(linear.append(rule), indexed.append(rule))
+            self.assertEqual(linear.get_list(), indexed.get_list())
+
+
+class TestAclRuleListSTBenchmark(unittest.TestCase):
+    NUM_RULES = 5000
+    # the linear scan is quadratic, only time it on the first rules
+    NUM_LINEAR_RULES = 1000
+
+    def _policy_rules(self):
+        # rules between distinct networks and subnets on a few services,
+        # the typical shape of a large policy
+        rules = []
+        for i in range(self.NUM_RULES):
+            if i % 2:
+                src = make_address('default-domain:project:vn-%d' % i)
+                dst = make_address('default-domain:project:vn-%d' % (i + 1))
+            else:
+                src = make_address(cidrs=['10.%d.%d.0/24' % (
+                    i // 256 % 256, i % 256)])
+                dst = make_address(cidrs=['172.16.%d.0/24' % (i % 256)])
+            port = [22, 80, 443, 8080][i % 4]
+            rules.append(make_rule(['6', '17'][i % 2], src, dst,
+                                   dst_port=(port, port)))
+        return rules
+
+    def _append_all(self, acl_list, rules):
+        start = time.time()
+        for rule in rules:
+            acl_list.append(rule)
+        return time.time() - start
+
+    def test_append_policy(self):
+        rules = self._policy_rules()
+        linear = LinearAclRuleList()
+        indexed = AclRuleListST()
+        linear_time = self._append_all(linear,
+                                       rules[:self.NUM_LINEAR_RULES])
+        indexed_time = self._append_all(indexed, rules)
+        print("\nlinear: %d rules in %.3fs, indexed: %d rules in %.3fs" % (
+            self.NUM_LINEAR_RULES, linear_time, self.NUM_RULES,
+            indexed_time))
+        self.assertEqual(linear.get_list(),
+                         indexed.get_list()[:self.NUM_LINEAR_RULES])
+        self.assertLess(indexed_time, linear_time)
+
+
+if __name__ == '__main__':
+    unittest.main()
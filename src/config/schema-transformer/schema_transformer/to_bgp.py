@@ -27,7 +27,7 @@ import time
 
 from cfgm_common import vnc_cgitb
 from cfgm_common.exceptions import NoIdError, ResourceExhaustionError
-from cfgm_common.vnc_db import DBBase
+from cfgm_common.vnc_db import DBBase, DBSnapshot
 # Import kazoo.client before monkey patching
 from cfgm_common.zkclient import ZookeeperClient
 import gevent
@@ -257,13 +257,22 @@ class SchemaTransformer(object):
         try:
             # Initialize cassandra
             self._object_db = SchemaTransformerDB(self, _zookeeper_client)
-            ResourceBaseST.init(self, self.logger, self._object_db)
+            snapshot = None
+            if self._args.db_snapshot_file:
+                snapshot = DBSnapshot(self._args.db_snapshot_file,
+                                      self.logger)
+                snapshot.load()
+            ResourceBaseST.init(
+                self, self.logger, self._object_db, snapshot=snapshot,
+                read_chunks_in_flight=self._args.db_read_chunks_in_flight)
             ResourceBaseST._sandesh = self.logger._sandesh
             ResourceBaseST._vnc_lib = _vnc_lib
             # connect rabbitmq after DB connection
             self._vnc_amqp.establish()
             ServiceChain.init()
             self.reinit()
+            if snapshot is not None:
+                snapshot.save()
             self._vnc_amqp._db_resync_done.set()
         except Exception:
             self._vnc_amqp._db_resync_done.set()
@@ -622,6 +631,9 @@ def parse_args(args_str):
         'zk_timeout': 120,
         'logical_routers_enabled': True,
         'yield_in_evaluate': False,
+        'notification_batch_window': 0,
+        'db_snapshot_file': '',
+        'db_read_chunks_in_flight': 1,
         'max_bytes': 5000000,
         'backup_count': 10,
     }
@@ -759,6 +771,18 @@ def parse_args(args_str):
                         help="Timeout for ZookeeperClient")
     parser.add_argument("--yield_in_evaluate", type=_bool,
                         help="Yield for other greenlets during evaluate")
+    parser.add_argument("--notification_batch_window", type=float,
+                        help="Seconds during which notifications are "
+                             "batched to evaluate their dependencies once, "
+                             "0 disables batching")
+    parser.add_argument("--db_snapshot_file",
+                        help="Local file the objects read at startup are "
+                             "saved to, the next start reads from the DB "
+                             "only the objects updated since, empty "
+                             "disables the snapshot")
+    parser.add_argument("--db_read_chunks_in_flight", type=int,
+                        help="Chunks of objects read at once from the DB "
+                             "at startup")
     parser.add_argument("--logical_routers_enabled", type=_bool,
                         help="Enabled logical routers")
     parser.add_argument("--cassandra_use_ssl", action="store_true",
@@ -42,6 +42,7 @@ from cfgm_common import svc_info
 from cfgm_common import vnc_cgitb
 from cfgm_common.utils import cgitb_hook
 from cfgm_common.vnc_amqp import VncAmqpHandle
+from cfgm_common.vnc_db import DBSnapshot
 from cfgm_common.exceptions import ResourceExhaustionError
 from vnc_api.utils import AAA_MODE_VALID_VALUES
 from .config_db import *
@@ -86,6 +87,7 @@ class SvcMonitor(object):
         # init object_db
         self._init_db = False
         self._object_db = ServiceMonitorDB(self._args, self.logger)
+        self._db_snapshot = None
 
         # init rabbit connection
         rabbitmq_cfg = get_rabbitmq_cfg(args)
@@ -95,13 +97,21 @@ class SvcMonitor(object):
             host_ip = socket.gethostbyname(socket.getfqdn())
         self.rabbit = VncAmqpHandle(self.logger._sandesh, self.logger,
                 DBBaseSM, REACTION_MAP, 'svc_monitor', rabbitmq_cfg,
-                host_ip, self._args.trace_file)
+                host_ip, self._args.trace_file,
+                batch_window=self._args.notification_batch_window)
         self.rabbit.establish()
 
     def init_db(self):
         if not self._init_db:
             self._init_db = True
-            DBBaseSM.init(self, self.logger, self._object_db)
+            if self._args.db_snapshot_file:
+                self._db_snapshot = DBSnapshot(self._args.db_snapshot_file,
+                                               self.logger)
+                self._db_snapshot.load()
+            DBBaseSM.init(
+                self, self.logger, self._object_db,
+                snapshot=self._db_snapshot,
+                read_chunks_in_flight=self._args.db_read_chunks_in_flight)
 
     def post_init(self, vnc_lib, args=None):
         # api server
@@ -298,6 +308,8 @@ class SvcMonitor(object):
         for cls in list(DBBaseSM.get_obj_type_map().values()):
             for obj in cls.list_obj():
                 cls.locate(obj['uuid'], obj)
+        if self._db_snapshot is not None:
+            self._db_snapshot.save()
 
         # Link SI and VM
         for vm in list(VirtualMachineSM.values()):
@@ -719,6 +731,9 @@ def parse_args(args_str):
         'logging_conf': '',
         'logger_class': None,
         'check_service_interval': '60',
+        'notification_batch_window': 0,
+        'db_snapshot_file': '',
+        'db_read_chunks_in_flight': 1,
         'nova_endpoint_type': 'internalURL',
         'rabbit_use_ssl': False,
         'kombu_ssl_version': '',
@@ -868,6 +883,18 @@ def parse_args(args_str):
                         help="Cassandra password")
     parser.add_argument("--check_service_interval",
                         help="Check service interval")
+    parser.add_argument("--notification_batch_window", type=float,
+                        help="Seconds during which notifications are "
+                             "batched to evaluate their dependencies once, "
+                             "0 disables batching")
+    parser.add_argument("--db_snapshot_file",
+                        help="Local file the objects read at startup are "
+                             "saved to, the next start reads from the DB "
+                             "only the objects updated since, empty "
+                             "disables the snapshot")
+    parser.add_argument("--db_read_chunks_in_flight", type=int,
+                        help="Chunks of objects read at once from the DB "
+                             "at startup")
     parser.add_argument("--analytics_api_ssl_enable",
                         help="Enable SSL in rest api server")
     parser.add_argument("--analytics_api_insecure_enable",
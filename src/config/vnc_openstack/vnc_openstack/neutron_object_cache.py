@@ -0,0 +1,159 @@
+#
+# Copyright (c) 2020 Juniper Networks, Inc. All rights reserved.
+#
+
+"""Process wide cache of the neutron resources converted from VNC objects."""
+
+from builtins import object
+from collections import OrderedDict
+import copy
+import time
+
+from cfgm_common.uve.neutron_object_cache import ttypes as sandesh_cache
+
+
+class NeutronObjectCache(object):
+    """Neutron network, subnet and IPAM dicts by UUID.
+
+    An entry is stored with the version of the VNC object it was converted
+    from (its last modified time) and only returned for that version. It is
+    evicted when an api-server notification for its object, or for the
+    object owning it (the network of a subnet), is received, when the
+    least recently used entries exceed max_entries and max_age seconds
+    after it was stored, 0 is no age bound. The age bound also limits how
+    long an entry converted from a read racing with a ref update, which
+    does not change the version, can be returned.
+
+    The 'network_object' entries are the VNC networks the ports refer to,
+    they are returned as stored and must not be modified.
+    """
+
+    KINDS = ('network', 'subnet', 'ipam', 'network_object')
+    SHARED_KINDS = ('network_object',)
+
+    def __init__(self, max_entries=0, max_age=0):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        # (kind, uuid) to (version, store time, value, owner uuid), least
+        # recently used first
+        self._entries = OrderedDict()
+        # owner uuid to the keys of the entries it owns
+        self._owned = {}
+        self.invalidations = 0
+        self.evictions = 0
+        self.hits = dict((kind, 0) for kind in self.KINDS)
+        self.misses = dict((kind, 0) for kind in self.KINDS)
+    # end __init__
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+    # end enabled
+
+    def get(self, kind, obj_uuid, version=None):
+        if not self.enabled or obj_uuid is None:
+            return None
+        key = (kind, obj_uuid)
+        entry = self._entries.get(key)
+        if entry is not None and (entry[0] != version or (
+                self.max_age and
+                time.time() - entry[1] > self.max_age)):
+            self._remove(key)
+            entry = None
+        if entry is None:
+            self.misses[kind] += 1
+            return None
+        self.hits[kind] += 1
+        del self._entries[key]
+        self._entries[key] = entry
+        if kind in self.SHARED_KINDS:
+            return entry[2]
+        return copy.deepcopy(entry[2])
+    # end get
+
+    def set(self, kind, obj_uuid, value, version=None, owner=None):
+        if not self.enabled or obj_uuid is None or value is None:
+            return
+        key = (kind, obj_uuid)
+        self._remove(key)
+        if kind not in self.SHARED_KINDS:
+            value = copy.deepcopy(value)
+        self._entries[key] = (version, time.time(), value, owner)
+        if owner is not None:
+            self._owned.setdefault(owner, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+    # end set
+
+    def invalidate(self, obj_uuids):
+        for obj_uuid in obj_uuids:
+            keys = [(kind, obj_uuid) for kind in self.KINDS]
+            keys.extend(self._owned.get(obj_uuid, []))
+            for key in keys:
+                if self._remove(key):
+                    self.invalidations += 1
+    # end invalidate
+
+    def invalidate_from_notification(self, oper_info):
+        # notifications of UPDATE-IMPLICIT carry the type of the object
+        # updated, not of the object notified, entries of all kinds are
+        # evicted by UUID. The refs of an object created or deleted have
+        # new back refs (the networks using an IPAM).
+        if not self._entries:
+            return
+        obj_uuids = [oper_info['uuid']]
+        obj_dict = oper_info.get('obj_dict') or {}
+        for field, value in list(obj_dict.items()):
+            if not field.endswith('_refs') or not isinstance(value, list):
+                continue
+            obj_uuids.extend(ref['uuid'] for ref in value if 'uuid' in ref)
+        self.invalidate(obj_uuids)
+    # end invalidate_from_notification
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        owner = entry[3]
+        if owner is not None:
+            owned = self._owned.get(owner)
+            if owned is not None:
+                owned.discard(key)
+                if not owned:
+                    del self._owned[owner]
+        return True
+    # end _remove
+
+    def stats(self):
+        entries = dict((kind, 0) for kind in self.KINDS)
+        for kind, _ in self._entries:
+            entries[kind] += 1
+        return {
+            'enabled': self.enabled,
+            'max_entries': self.max_entries,
+            'max_age': self.max_age,
+            'invalidations': self.invalidations,
+            'evictions': self.evictions,
+            'kinds': [{'kind': kind,
+                       'entries': entries[kind],
+                       'hits': self.hits[kind],
+                       'misses': self.misses[kind]}
+                      for kind in self.KINDS],
+        }
+    # end stats
+
+    def register_introspect_handler(self):
+        sandesh_cache.NeutronObjectCacheReq.handle_request = \
+            self.introspect_handle_request
+    # end register_introspect_handler
+
+    def introspect_handle_request(self, req):
+        stats = self.stats()
+        stats['kinds'] = [sandesh_cache.NeutronObjectCacheKindStats(**kind)
+                          for kind in stats['kinds']]
+        resp = sandesh_cache.NeutronObjectCacheResp(**stats)
+        resp.response(req.context())
+    # end introspect_handle_request
+# end class NeutronObjectCache
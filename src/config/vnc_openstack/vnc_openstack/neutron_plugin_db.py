@@ -55,6 +55,7 @@ import vnc_openstack
 from vnc_openstack.utils import filter_fields
 
 from .context import get_context, use_context
+from .neutron_object_cache import NeutronObjectCache
 
 standard_library.install_aliases()
 
@@ -292,7 +293,8 @@ class DBInterface(object):
                  contrail_extensions_enabled=True,
                  list_optimization_enabled=False,
                  apply_subnet_host_routes=False,
-                 strict_compliance=False):
+                 strict_compliance=False,
+                 object_cache=None):
         """Establish database connection."""
         self._manager = manager
         self.logger = manager.logger
@@ -304,6 +306,9 @@ class DBInterface(object):
 
         self._contrail_extensions_enabled = contrail_extensions_enabled
         self._list_optimization_enabled = list_optimization_enabled
+        if object_cache is None:
+            object_cache = NeutronObjectCache()
+        self._object_cache = object_cache
 
         # Set the lock prefix for security_group_rule modifications
         self.lock_path_prefix = '%s/%s' % (
@@ -672,6 +677,7 @@ class DBInterface(object):
             update_method(obj)
         except AuthFailed as e:
             self._raise_contrail_exception('NotAuthorized', msg=str(e))
+        self._object_cache.invalidate([obj.uuid])
     # end _resource_update
 
     def _resource_delete(self, resource_type, obj_id):
@@ -680,6 +686,7 @@ class DBInterface(object):
             delete_method(id=obj_id)
         except AuthFailed as e:
             self._raise_contrail_exception('NotAuthorized', msg=str(e))
+        self._object_cache.invalidate([obj_id])
     # end _resource_delete
 
     def _subnet_read_tags(self):
@@ -1278,15 +1285,27 @@ class DBInterface(object):
                     'instance-ips': {},
                     'service-instances': {}}
 
-        # Read only the nets associated to port_objs
+        # Read only the nets associated to port_objs and not cached
         net_refs = [port_obj.get_virtual_network_refs()
                     for port_obj in port_objs]
-        net_ids = set(ref[0]['uuid'] for ref in net_refs if ref)
-        net_objs = self._virtual_network_list(obj_uuids=list(net_ids),
-                                              detail=True)
+        net_ids = set()
+        for ref in net_refs:
+            if not ref:
+                continue
+            net_obj = self._object_cache.get('network_object', ref[0]['uuid'])
+            if net_obj is None:
+                net_ids.add(ref[0]['uuid'])
+            else:
+                memo_req['networks'][net_obj.uuid] = net_obj
+        if net_ids:
+            net_objs = self._virtual_network_list(obj_uuids=list(net_ids),
+                                                  detail=True)
+        else:
+            net_objs = []
         for net_obj in net_objs:
-            # dictionary of iip_uuid to iip_obj
+            # dictionary of net_uuid to net_obj
             memo_req['networks'][net_obj.uuid] = net_obj
+            self._object_cache.set('network_object', net_obj.uuid, net_obj)
 
         # Read only the instance-ips associated to port_objs
         iip_objs = self._instance_ip_list(
@@ -1915,12 +1934,30 @@ class DBInterface(object):
                 return True
         return False
 
+    def _network_is_shared(self, net_obj, context):
+        return bool(net_obj.is_shared or (
+            net_obj.perms2 and self._shared_with_tenant(
+                context, net_obj.perms2.share)))
+    # end _network_is_shared
+
     @catch_convert_exception
-    def _network_vnc_to_neutron(self, net_obj, oper=READ, context=None):
+    def _network_vnc_to_neutron(self, net_obj, oper=READ, context=None,
+                                use_cache=False):
+        # use_cache only for net_obj read with all its fields, the cached
+        # dict is returned to all the tenants, 'shared' is set for each
+        id_perms = net_obj.get_id_perms()
+        version = id_perms.get_last_modified()
+        if use_cache:
+            net_q_dict = self._object_cache.get('network', net_obj.uuid,
+                                                version)
+            if net_q_dict is not None:
+                net_q_dict['shared'] = self._network_is_shared(net_obj,
+                                                               context)
+                return net_q_dict
+
         net_q_dict = {}
         extra_dict = {}
 
-        id_perms = net_obj.get_id_perms()
         net_q_dict['id'] = net_obj.uuid
 
         if not net_obj.display_name:
@@ -1933,12 +1970,7 @@ class DBInterface(object):
         net_q_dict['tenant_id'] = net_obj.parent_uuid.replace('-', '')
         net_q_dict['project_id'] = net_obj.parent_uuid.replace('-', '')
         net_q_dict['admin_state_up'] = id_perms.enable
-        if net_obj.is_shared or (
-                net_obj.perms2 and self._shared_with_tenant(
-                context, net_obj.perms2.share)):
-            net_q_dict['shared'] = True
-        else:
-            net_q_dict['shared'] = False
+        net_q_dict['shared'] = self._network_is_shared(net_obj, context)
         net_q_dict['status'] = (constants.NET_STATUS_ACTIVE if id_perms.enable
                                 else constants.NET_STATUS_DOWN)
         if net_obj.router_external:
@@ -1984,8 +2016,8 @@ class DBInterface(object):
             for ipam_ref in ipam_refs:
                 subnets = ipam_ref['attr'].get_ipam_subnets()
                 for subnet in subnets:
-                    sn_dict = self._subnet_vnc_to_neutron(subnet, net_obj,
-                                                          ipam_ref['to'])
+                    sn_dict = self._subnet_vnc_to_neutron(
+                        subnet, net_obj, ipam_ref['to'], use_cache=use_cache)
                     if sn_dict is None:
                         continue
                     net_q_dict['subnets'].append(sn_dict['id'])
@@ -2006,6 +2038,9 @@ class DBInterface(object):
         net_q_dict['created_at'] = net_obj.get_id_perms().get_created()
         net_q_dict['updated_at'] = net_obj.get_id_perms().get_last_modified()
 
+        if use_cache and version is not None:
+            self._object_cache.set('network', net_obj.uuid, net_q_dict,
+                                   version=version)
         return net_q_dict
     # end _network_vnc_to_neutron
 
@@ -2093,7 +2128,20 @@ class DBInterface(object):
             subnet_vnc,
             net_obj,
             ipam_fq_name,
-            oper=READ):
+            oper=READ,
+            use_cache=False):
+        # use_cache only for net_obj read with all its fields, the subnet
+        # tags are not in the cached dict and read on each conversion
+        sn_id = subnet_vnc.subnet_uuid
+        version = None
+        if use_cache and net_obj.get_id_perms() is not None:
+            version = (net_obj.get_id_perms().get_last_modified(),
+                       subnet_vnc.get_last_modified())
+            sn_q_dict = self._object_cache.get('subnet', sn_id, version)
+            if sn_q_dict is not None:
+                sn_q_dict['tags'] = self._tag_get_for_subnet(sn_id)
+                return sn_q_dict
+
         sn_q_dict = {}
         extra_dict = {}
         sn_name = subnet_vnc.get_subnet_name()
@@ -2114,7 +2162,6 @@ class DBInterface(object):
             sn_q_dict['cidr'] = '0.0.0.0/0'
             sn_q_dict['ip_version'] = 4
 
-        sn_id = subnet_vnc.subnet_uuid
         sn_q_dict['id'] = sn_id
 
         sn_q_dict['gateway_ip'] = subnet_vnc.default_gateway
@@ -2183,9 +2230,12 @@ class DBInterface(object):
         else:
             sn_q_dict['shared'] = False
 
-        sn_q_dict['tags'] = self._tag_get_for_subnet(sn_id)
         sn_q_dict['created_at'] = subnet_vnc.get_created()
         sn_q_dict['updated_at'] = subnet_vnc.get_last_modified()
+        if version is not None and version[0] is not None:
+            self._object_cache.set('subnet', sn_id, sn_q_dict,
+                                   version=version, owner=net_obj.uuid)
+        sn_q_dict['tags'] = self._tag_get_for_subnet(sn_id)
 
         return sn_q_dict
     # end _subnet_vnc_to_neutron
@@ -2205,7 +2255,17 @@ class DBInterface(object):
     # end _ipam_neutron_to_vnc
 
     @catch_convert_exception
-    def _ipam_vnc_to_neutron(self, ipam_obj, oper=READ):
+    def _ipam_vnc_to_neutron(self, ipam_obj, oper=READ, use_cache=False):
+        # use_cache only for ipam_obj read with all its fields
+        version = None
+        if ipam_obj.get_id_perms() is not None:
+            version = ipam_obj.get_id_perms().get_last_modified()
+        if use_cache:
+            ipam_q_dict = self._object_cache.get('ipam', ipam_obj.uuid,
+                                                 version)
+            if ipam_q_dict is not None:
+                return ipam_q_dict
+
         ipam_q_dict = self._obj_to_dict(ipam_obj)
 
         # replace field names
@@ -2220,6 +2280,9 @@ class DBInterface(object):
                 net_fq_name = net_back_ref['to']
                 ipam_q_dict['nets_using'].append(net_fq_name)
 
+        if use_cache and version is not None:
+            self._object_cache.set('ipam', ipam_obj.uuid, ipam_q_dict,
+                                   version=version)
         return ipam_q_dict
     # end _ipam_vnc_to_neutron
 
@@ -3142,7 +3205,10 @@ class DBInterface(object):
         try:
             net_obj = port_req_memo['networks'][net_id]
         except KeyError:
-            net_obj = self._virtual_network_read(net_id=net_id)
+            net_obj = self._object_cache.get('network_object', net_id)
+            if net_obj is None:
+                net_obj = self._virtual_network_read(net_id=net_id)
+                self._object_cache.set('network_object', net_id, net_obj)
             port_req_memo['networks'][net_id] = net_obj
 
         if port_obj.parent_type != "project":
@@ -3566,7 +3632,8 @@ class DBInterface(object):
         except NoIdError:
             self._raise_contrail_exception('NetworkNotFound', net_id=net_uuid)
 
-        return self._network_vnc_to_neutron(net_obj, context=context)
+        return self._network_vnc_to_neutron(net_obj, context=context,
+                                            use_cache=True)
     # end network_read
 
     @wait_for_api_server_connection
@@ -3636,7 +3703,7 @@ class DBInterface(object):
                 except NoIdError:
                     continue
                 net_info = self._network_vnc_to_neutron(
-                    net_obj, oper=LIST, context=context)
+                    net_obj, oper=LIST, context=context, use_cache=True)
                 if net_info is None:
                     continue
                 ret_dict[net_id] = net_info
@@ -3711,7 +3778,7 @@ class DBInterface(object):
                 router_external=router_external)
             for net in nets:
                 net_info = self._network_vnc_to_neutron(
-                    net, oper=LIST, context=context)
+                    net, oper=LIST, context=context, use_cache=True)
                 if net_info is None:
                     continue
                 ret_dict[net.uuid] = net_info
@@ -3744,7 +3811,7 @@ class DBInterface(object):
                                             is_shared):
                 continue
             net_info = self._network_vnc_to_neutron(
-                net_obj, oper=LIST, context=context)
+                net_obj, oper=LIST, context=context, use_cache=True)
             if net_info is None:
                 continue
             ret_dict[net_obj.uuid] = net_info
@@ -3926,7 +3993,8 @@ class DBInterface(object):
                 for subnet_vnc in subnet_vncs:
                     if subnet_vnc.subnet_uuid == subnet_id:
                         ret_subnet_q = self._subnet_vnc_to_neutron(
-                            subnet_vnc, net_obj, ipam_ref['to'])
+                            subnet_vnc, net_obj, ipam_ref['to'],
+                            use_cache=True)
                         if ret_subnet_q is not None:
                             return ret_subnet_q
 
@@ -4049,6 +4117,7 @@ class DBInterface(object):
                     except RefsExistError:
                         self._raise_contrail_exception('SubnetInUse',
                                                        subnet_id=subnet_id)
+                    self._object_cache.invalidate([net_id])
 
                     return
     # end subnet_delete
@@ -4106,7 +4175,8 @@ class DBInterface(object):
                         sn_info = self._subnet_vnc_to_neutron(subnet_vnc,
                                                               net_obj,
                                                               ipam_ref['to'],
-                                                              oper=LIST)
+                                                              oper=LIST,
+                                                              use_cache=True)
                         if sn_info is None:
                             continue
                         sn_id = sn_info['id']
@@ -4172,7 +4242,7 @@ class DBInterface(object):
             self._raise_contrail_exception('NetworkNotFound',
                                            net_id=ipam_id)
 
-        return self._ipam_vnc_to_neutron(ipam_obj, oper=oper)
+        return self._ipam_vnc_to_neutron(ipam_obj, oper=oper, use_cache=True)
     # end ipam_read
 
     @wait_for_api_server_connection
@@ -15,6 +15,7 @@ from future import standard_library
 import six
 from six.moves import configparser
 
+from .neutron_object_cache import NeutronObjectCache
 from .neutron_plugin_db import DBInterface
 
 standard_library.install_aliases()
@@ -90,6 +91,25 @@ class NeutronPluginInterface(object):
         except configparser.NoOptionError:
             self._sn_host_route = False
 
+        try:
+            object_cache_entries = int(conf_sections.get(
+                'DEFAULTS', 'neutron_object_cache_entries'))
+        except configparser.NoOptionError:
+            object_cache_entries = 0
+
+        try:
+            object_cache_max_age = int(conf_sections.get(
+                'DEFAULTS', 'neutron_object_cache_max_age'))
+        except configparser.NoOptionError:
+            object_cache_max_age = 300
+
+        self._object_cache = NeutronObjectCache(object_cache_entries,
+                                                object_cache_max_age)
+        self._object_cache.register_introspect_handler()
+        if self._object_cache.enabled and api_server_obj is not None:
+            api_server_obj._db_conn._msgbus.add_notification_listener(
+                self._object_cache.invalidate_from_notification)
+
         self._cfgdb = None
         self._cfgdb_map = CacheContainer(_vnc_connection_cache_size) \
             if _vnc_connection_cache_size > 0 else dict()
@@ -120,7 +140,8 @@ class NeutronPluginInterface(object):
                 contrail_extensions_enabled=exts_enabled,
                 list_optimization_enabled=self._list_optimization_enabled,
                 apply_subnet_host_routes=apply_sn_route,
-                strict_compliance=self._strict_compliance)
+                strict_compliance=self._strict_compliance,
+                object_cache=self._object_cache)
 
     # end _connect_to_db
 
@@ -2,13 +2,19 @@ from __future__ import absolute_import
 
 from builtins import object
 from builtins import str
+import time
 import unittest
 import uuid
 
 import bottle
 from cfgm_common.tests.test_utils import FakeKazooClient
 from flexmock import flexmock
+from vnc_api.vnc_api import (
+    IdPermsType, IpamSubnetType, NetworkIpam, SubnetType, VirtualNetwork,
+    VnSubnetsType)
+from vnc_openstack import neutron_object_cache
 from vnc_openstack import neutron_plugin_db as db
+from vnc_openstack.neutron_object_cache import NeutronObjectCache
 
 
 class MockDbInterface(db.DBInterface):
@@ -22,7 +28,8 @@ class MockDbInterface(db.DBInterface):
         self._connected_to_api_server = MockConnection()
         self._zookeeper_client = FakeKazooClient()
         self.security_group_lock_prefix = '/vnc_cfg_api_locks/security_group'
-        pass
+        self._object_cache = NeutronObjectCache()
+        self._contrail_extensions_enabled = True
 
 
 class TestDbInterface(unittest.TestCase):
@@ -241,3 +248,103 @@ class TestDbInterface(unittest.TestCase):
                 {'tenant': 'tenant', 'is_admin': False},
                 {'id': 1, 'port_id': 11},
                 db.UPDATE)
+
+    def _get_network(self):
+        net_obj = VirtualNetwork(
+            'net', fq_name=['default-domain', 'project', 'net'],
+            parent_type='project')
+        net_obj.uuid = str(uuid.uuid4())
+        net_obj.parent_uuid = str(uuid.uuid4())
+        net_obj.set_id_perms(IdPermsType(enable=True, last_modified='t1'))
+        subnet = IpamSubnetType(subnet=SubnetType('10.0.0.0', 24),
+                                subnet_uuid=str(uuid.uuid4()),
+                                last_modified='t1')
+        net_obj.add_network_ipam(
+            NetworkIpam('ipam', fq_name=['default-domain', 'project', 'ipam'],
+                        parent_type='project'),
+            VnSubnetsType([subnet]))
+        return net_obj, subnet
+
+    def test_network_object_cache(self):
+        dbi = MockDbInterface()
+        dbi._object_cache = NeutronObjectCache(max_entries=10)
+        dbi._tag_get_for_subnet = lambda subnet_id: ['tag']
+        net_obj, subnet = self._get_network()
+
+        net_q = dbi._network_vnc_to_neutron(net_obj, use_cache=True)
+        self.assertEqual('net', net_q['name'])
+        self.assertEqual([subnet.subnet_uuid], net_q['subnets'])
+        net_q['name'] = 'modified by the caller'
+
+        # same version, the dict converted before is returned
+        net_obj.display_name = 'renamed'
+        net_q = dbi._network_vnc_to_neutron(net_obj, use_cache=True)
+        self.assertEqual('net', net_q['name'])
+        self.assertEqual(1, dbi._object_cache.hits['network'])
+        # no cache for the conversions of created or updated objects
+        net_q = dbi._network_vnc_to_neutron(net_obj)
+        self.assertEqual('renamed', net_q['name'])
+
+        net_obj.get_id_perms().set_last_modified('t2')
+        net_q = dbi._network_vnc_to_neutron(net_obj, use_cache=True)
+        self.assertEqual('renamed', net_q['name'])
+
+        net_obj.display_name = 'notified'
+        dbi._object_cache.invalidate_from_notification(
+            {'oper': 'UPDATE', 'type': 'virtual_network',
+             'uuid': net_obj.uuid})
+        net_q = dbi._network_vnc_to_neutron(net_obj, use_cache=True)
+        self.assertEqual('notified', net_q['name'])
+        self.assertEqual(1, dbi._object_cache.hits['network'])
+        self.assertEqual(3, dbi._object_cache.misses['network'])
+
+    def test_subnet_object_cache(self):
+        dbi = MockDbInterface()
+        dbi._object_cache = NeutronObjectCache(max_entries=10)
+        tags = ['tag-1']
+        dbi._tag_get_for_subnet = lambda subnet_id: list(tags)
+        net_obj, subnet = self._get_network()
+        ipam_fq_name = ['default-domain', 'project', 'ipam']
+
+        sn_q = dbi._subnet_vnc_to_neutron(subnet, net_obj, ipam_fq_name,
+                                          use_cache=True)
+        self.assertEqual('10.0.0.0/24', sn_q['cidr'])
+        subnet.set_subnet_name('renamed')
+        tags.append('tag-2')
+        sn_q = dbi._subnet_vnc_to_neutron(subnet, net_obj, ipam_fq_name,
+                                          use_cache=True)
+        self.assertEqual('', sn_q['name'])
+        # the tags are read on each conversion
+        self.assertEqual(['tag-1', 'tag-2'], sn_q['tags'])
+
+        # a notification of the network evicts its subnets
+        dbi._object_cache.invalidate_from_notification(
+            {'oper': 'UPDATE-IMPLICIT', 'type': 'network_ipam',
+             'uuid': net_obj.uuid})
+        sn_q = dbi._subnet_vnc_to_neutron(subnet, net_obj, ipam_fq_name,
+                                          use_cache=True)
+        self.assertEqual('renamed', sn_q['name'])
+
+    def test_object_cache_bounds(self):
+        cache = NeutronObjectCache(max_entries=2)
+        cache.set('ipam', 'ipam-1', {'id': 'ipam-1'}, version='t1')
+        cache.set('ipam', 'ipam-2', {'id': 'ipam-2'}, version='t1')
+        self.assertIsNotNone(cache.get('ipam', 'ipam-1', 't1'))
+        cache.set('ipam', 'ipam-3', {'id': 'ipam-3'}, version='t1')
+        # least recently used evicted
+        self.assertIsNone(cache.get('ipam', 'ipam-2', 't1'))
+        self.assertIsNotNone(cache.get('ipam', 'ipam-1', 't1'))
+        self.assertIsNone(cache.get('ipam', 'ipam-1', 't2'))
+        self.assertEqual(1, cache.evictions)
+
+        cache.set('ipam', 'ipam-1', {'id': 'ipam-1'}, version='t2')
+        cache.invalidate_from_notification(
+            {'oper': 'CREATE', 'type': 'virtual_network', 'uuid': 'net',
+             'obj_dict': {'network_ipam_refs': [{'uuid': 'ipam-1'}]}})
+        self.assertIsNone(cache.get('ipam', 'ipam-1', 't2'))
+
+        cache = NeutronObjectCache(max_entries=2, max_age=10)
+        cache.set('ipam', 'ipam-1', {'id': 'ipam-1'}, version='t1')
+        flexmock(neutron_object_cache.time).should_receive(
+            'time').and_return(time.time() + 11)
+        self.assertIsNone(cache.get('ipam', 'ipam-1', 't1'))
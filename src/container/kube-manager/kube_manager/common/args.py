@@ -99,6 +99,8 @@ def parse_args(args_str=None):
         'global_tags': '1',
         'aps_name': '',
         'kube_timer_interval': '120',
+        'kube_list_page_size': '500',
+        'kube_event_workers': '1',
         'secure_project': 'False',
         'host_ip': socket.gethostbyname(socket.getfqdn())
     }
@@ -109,11 +109,21 @@ class KubeMonitor(object):
                                    self.kubernetes_api_server,
                                    self.kubernetes_api_server_port)
 
+        # One pooled session per monitor so that its requests to the api
+        # server reuse the connections instead of opening one each.
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.verify = self.verify
+
+        # Number of entries per page of the LIST read by init_monitor,
+        # 0 reads the whole collection at once.
+        self.list_page_size = int(self.args.kube_list_page_size or 0)
+
         if (resource_type == 'KubeMonitor'):
             # this is only for base class which instance is used as kube config
             self.base_url = self.url + "/openapi/v2"
             self._is_kube_api_server_alive(wait=True)
-            resp = requests.get(
+            resp = self.session.get(
                 self.base_url,
                 headers=self.headers,
                 verify=self.verify)
@@ -227,43 +237,54 @@ class KubeMonitor(object):
         """Initialize/sync a monitor component.
         This method will initialize a monitor component.
         As a part of this init, this method will read existing entries in api
-        server and populate the local db.
+        server and populate the local db. The entries are processed from the
+        LIST response, read by pages of list_page_size entries.
         """
         url = self.get_component_url()
         self._log("%s - Start init url=%s resource_version=%s"
                   % (self.name, url, self.resource_version))
 
-        resource_version = self.resource_version
-        params = None
-        if resource_version:
-            params = {"resourceVersion": resource_version}
-        resp = requests.get(url, headers=self.headers, verify=self.verify, params=params)
-        try:
-            resp.raise_for_status()
-            jdata = resp.json()
-            initial_entries = jdata['items']
-            resource_version = jdata.get('metadata', {}).get('resourceVersion')
-        except Exception:
-            raise
-        finally:
-            resp.close()
-        for entry in initial_entries:
-            entry_url = self.get_entry_url(entry)
-            resp = requests.get(entry_url, headers=self.headers,
-                                verify=self.verify)
+        params = {}
+        if self.resource_version:
+            params['resourceVersion'] = self.resource_version
+        if self.list_page_size:
+            params['limit'] = self.list_page_size
+        resource_version = None
+        num_entries = 0
+        while True:
+            resp = self.session.get(url, headers=self.headers,
+                                    verify=self.verify, params=params)
             try:
                 resp.raise_for_status()
-                # Construct the event and initiate processing.
-                event = {'object': resp.json(), 'type': 'ADDED'}
-                self.process_event(event)
+                jdata = resp.json()
             except Exception:
                 raise
             finally:
                 resp.close()
+            metadata = jdata.get('metadata') or {}
+            if resource_version is None:
+                # next pages are read from the snapshot of the first one
+                resource_version = metadata.get('resourceVersion')
+            # the items of a LIST have neither kind nor apiVersion
+            kind = self.kind
+            list_kind = jdata.get('kind') or ''
+            if not kind and list_kind.endswith('List'):
+                kind = list_kind[:-len('List')]
+            for entry in jdata.get('items') or []:
+                entry.setdefault('kind', kind)
+                entry.setdefault('apiVersion', jdata.get('apiVersion'))
+                # Construct the event and initiate processing.
+                event = {'object': entry, 'type': 'ADDED'}
+                self.process_event(event)
+                num_entries += 1
+            if not metadata.get('continue'):
+                break
+            params = {'limit': self.list_page_size,
+                      'continue': metadata['continue']}
         self.resource_version = resource_version
         self.resource_version_valid = bool(self.resource_version)
-        self._log("%s - Done init url=%s, resource_version=%s"
-                  % (self.name, url, self.resource_version))
+        self._log("%s - Done init url=%s, resource_version=%s, entries=%s"
+                  % (self.name, url, self.resource_version, num_entries))
 
     def register_monitor(self):
         """Register this component for notifications from api server.
@@ -295,10 +316,10 @@ class KubeMonitor(object):
         self._log(
             "%s - Start Watching request %s (%s)(timeout=%s)"
             % (self.name, url, params, self.timeout))
-        resp = requests.get(url, params=params,
-                            stream=True, headers=self.headers,
-                            verify=self.verify,
-                            timeout=self.timeout)
+        resp = self.session.get(url, params=params,
+                                stream=True, headers=self.headers,
+                                verify=self.verify,
+                                timeout=self.timeout)
         try:
             resp.raise_for_status()
         except Exception:
@@ -325,8 +346,8 @@ class KubeMonitor(object):
                                               k8s_url_resource, resource_name)
 
         try:
-            resp = requests.get(url, stream=True,
-                                headers=self.headers, verify=self.verify)
+            resp = self.session.get(url, stream=True,
+                                    headers=self.headers, verify=self.verify)
             if resp.status_code == 200:
                 json_data = json.loads(resp.raw.read())
             resp.close()
@@ -356,9 +377,9 @@ class KubeMonitor(object):
         headers.update(self.headers)
 
         try:
-            resp = requests.patch(url, headers=headers,
-                                  data=json.dumps(merge_patch),
-                                  verify=self.verify)
+            resp = self.session.patch(url, headers=headers,
+                                      data=json.dumps(merge_patch),
+                                      verify=self.verify)
             if resp.status_code != 200:
                 resp.close()
                 return
@@ -389,9 +410,9 @@ class KubeMonitor(object):
         headers.update(self.headers)
 
         try:
-            resp = requests.post(url, headers=headers,
-                                 data=json.dumps(body_params),
-                                 verify=self.verify)
+            resp = self.session.post(url, headers=headers,
+                                     data=json.dumps(body_params),
+                                     verify=self.verify)
             if resp.status_code not in [200, 201]:
                 resp.close()
                 return None
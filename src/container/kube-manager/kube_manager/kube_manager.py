@@ -177,6 +177,24 @@ class KubeNetworkManager(object):
             connections=introspect.KubeApiConnections(**statuses))
         response.response(request.context())
 
+    @classmethod
+    def sandesh_handle_event_stats_request(cls, request):
+        workers, kinds = 0, []
+        kube_manager = cls.get_instance()
+        if kube_manager is not None and kube_manager.vnc is not None:
+            dispatcher = kube_manager.vnc.dispatcher
+            workers = dispatcher.num_workers
+            for kind, stats in sorted(dispatcher.stats().items()):
+                kinds.append(introspect.KubeEventKindStats(
+                    kind=kind,
+                    queue_depth=stats.queue_depth,
+                    processed=stats.processed,
+                    coalesced=stats.coalesced,
+                    average_latency_msec=stats.average_latency * 1000,
+                    max_latency_msec=stats.latency_max * 1000))
+        response = introspect.KubeEventStatsResp(workers=workers, kinds=kinds)
+        response.response(request.context())
+
     @classmethod
     def sandesh_handle_mastership_status_request(cls, request):
         kube_manager = cls.get_instance()
@@ -204,6 +222,8 @@ def run_kube_manager(km_logger, args, kube_api_skip, event_queue,
         KubeNetworkManager.sandesh_handle_kube_api_connection_status_request
     introspect.MastershipStatus.handle_request =\
         KubeNetworkManager.sandesh_handle_mastership_status_request
+    introspect.KubeEventStats.handle_request =\
+        KubeNetworkManager.sandesh_handle_event_stats_request
 
     kube_nw_mgr.start_tasks()
 
@@ -2,8 +2,15 @@
 # Copyright (c) 2018 Juniper Networks, Inc. All rights reserved.
 #
 
+import json
+import threading
 import mock
 import unittest
+
+from cfgm_common.tests.benchmark import benchmark, report, Timer
+from six.moves import BaseHTTPServer, socketserver
+from six.moves.urllib.parse import parse_qs, urlparse
+
 from kube_manager.kube import kube_monitor
 
 
@@ -195,3 +202,164 @@ class KubeMonitorTest(unittest.TestCase):
 
     # end test_kube_monitor_entry_url_construction
 # end KubeMonitorTest(unittest.TestCase):
+
+
+class FakeKubeApiHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.connections.add(self.client_address)
+        url = urlparse(self.path)
+        server.requests.append(url)
+        params = parse_qs(url.query)
+        base = '/api/v1/'
+        if url.path == base + 'pods':
+            start = int(params.get('continue', ['0'])[0])
+            limit = int(params.get('limit', [len(server.pods)])[0])
+            items = server.pods[start:start + limit]
+            metadata = {'resourceVersion': server.resource_version}
+            if start + limit < len(server.pods):
+                metadata['continue'] = str(start + limit)
+            body = {'kind': 'PodList', 'apiVersion': 'v1',
+                    'metadata': metadata, 'items': items}
+        else:
+            # /api/v1/namespaces/<namespace>/pods/<name>
+            name = url.path.rsplit('/', 1)[-1]
+            body = dict(server.pods_by_name[name], kind='Pod',
+                        apiVersion='v1')
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeKubeApiServer(socketserver.ThreadingMixIn,
+                        BaseHTTPServer.HTTPServer):
+    # threaded as the clients keep their connections alive
+    daemon_threads = True
+
+    def __init__(self, num_pods):
+        BaseHTTPServer.HTTPServer.__init__(
+            self, ('127.0.0.1', 0), FakeKubeApiHandler)
+        self.resource_version = '1000'
+        self.pods = [{
+            'metadata': {'name': 'pod-%d' % i, 'namespace': 'ns-%d' % (i % 10),
+                         'uid': 'uid-%d' % i, 'resourceVersion': str(i)},
+            'spec': {'nodeName': 'node-%d' % (i % 20),
+                     'containers': [{'name': 'c', 'image': 'busybox'}]},
+            'status': {'phase': 'Running', 'podIP': '10.0.%d.%d' % (
+                i // 250 % 250, i % 250)},
+        } for i in range(num_pods)]
+        self.pods_by_name = dict((pod['metadata']['name'], pod)
+                                 for pod in self.pods)
+        self.requests = []
+        self.connections = set()
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class FakeKubeApiTestCase(unittest.TestCase):
+    NUM_PODS = 5
+
+    def setUp(self):
+        self.server = FakeKubeApiServer(self.NUM_PODS)
+        self.addCleanup(self.server.stop)
+        self.args = Map()
+        self.args['orchestrator'] = ""
+        self.args['token'] = ""
+        self.args['kubernetes_api_server'] = "127.0.0.1"
+        self.args['kubernetes_api_port'] = self.server.server_address[1]
+        self.args['kube_object_cache'] = "False"
+        self.args['kube_list_page_size'] = "2"
+        patcher = mock.patch.object(kube_monitor.KubeMonitor,
+                                    '_is_kube_api_server_alive',
+                                    return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_monitor(self):
+        monitor = kube_monitor.KubeMonitor(self.args, logger=mock.Mock(),
+                                           resource_type='pod')
+        monitor.process_event = mock.Mock()
+        self.addCleanup(monitor.session.close)
+        return monitor
+
+
+class KubeMonitorInitTest(FakeKubeApiTestCase):
+    def test_init_monitor_from_list_pages(self):
+        monitor = self.get_monitor()
+        monitor.init_monitor()
+
+        events = [c[0][0] for c in monitor.process_event.call_args_list]
+        self.assertEqual(['pod-%d' % i for i in range(self.NUM_PODS)],
+                         [e['object']['metadata']['name'] for e in events])
+        self.assertEqual(set(['ADDED']), set(e['type'] for e in events))
+        # the items of a LIST have no kind of their own
+        self.assertEqual(set(['Pod']),
+                         set(e['object']['kind'] for e in events))
+        self.assertEqual('1000', monitor.resource_version)
+        self.assertTrue(monitor.resource_version_valid)
+        # no GET per entry, pages read on one connection
+        self.assertEqual(['/api/v1/pods'] * 3,
+                         [url.path for url in self.server.requests])
+        self.assertEqual(
+            [{'limit': ['2']}, {'limit': ['2'], 'continue': ['2']},
+             {'limit': ['2'], 'continue': ['4']}],
+            [parse_qs(url.query) for url in self.server.requests])
+        self.assertEqual(1, len(self.server.connections))
+
+    def test_init_monitor_resource_version(self):
+        self.args['kube_list_page_size'] = None
+        monitor = self.get_monitor()
+        monitor.resource_version = '900'
+        monitor.init_monitor()
+        self.assertEqual([{'resourceVersion': ['900']}],
+                         [parse_qs(url.query) for url in self.server.requests])
+        self.assertEqual(self.NUM_PODS, monitor.process_event.call_count)
+        self.assertEqual('1000', monitor.resource_version)
+
+
+@benchmark
+class KubeMonitorInitBenchmark(FakeKubeApiTestCase):
+    # init of a pod monitor against a local fake api server, reading every
+    # entry again after the LIST as init_monitor used to, or using the
+    # LIST pages only
+    NUM_PODS = 5000
+
+    def init_per_entry_get(self, monitor):
+        url = monitor.get_component_url()
+        resp = kube_monitor.requests.get(url, headers=monitor.headers)
+        entries = resp.json()['items']
+        resp.close()
+        for entry in entries:
+            resp = kube_monitor.requests.get(monitor.get_entry_url(entry),
+                                             headers=monitor.headers)
+            monitor.process_event({'object': resp.json(), 'type': 'ADDED'})
+            resp.close()
+
+    def test_init_time(self):
+        self.args['kube_list_page_size'] = '500'
+        lines = []
+        for name, init in (('per entry GET', self.init_per_entry_get),
+                           ('LIST pages', lambda m: m.init_monitor())):
+            monitor = self.get_monitor()
+            del self.server.requests[:]
+            self.server.connections.clear()
+            with Timer() as timer:
+                init(monitor)
+            self.assertEqual(self.NUM_PODS, monitor.process_event.call_count)
+            lines.append("%-14s %6d requests, %5d connections, %8.1f msec" % (
+                name, len(self.server.requests),
+                len(self.server.connections), timer.msec))
+        report("init of %d pods" % self.NUM_PODS, lines)
@@ -0,0 +1,112 @@
+#
+# Copyright (c) 2017 Juniper Networks, Inc. All rights reserved.
+#
+
+import unittest
+
+import gevent
+import gevent.event
+
+from kube_manager.vnc.event_dispatcher import EventDispatcher
+
+
+def make_event(kind, uid, event_type='ADDED', name=None):
+    return {'type': event_type,
+            'object': {'kind': kind,
+                       'metadata': {'uid': uid, 'name': name or uid}}}
+
+
+class EventDispatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.processed = []
+        self.blocked = {}
+
+    def process(self, event, callback):
+        metadata = event['object']['metadata']
+        blocker = self.blocked.get(metadata['uid'])
+        if blocker is not None:
+            blocker.wait()
+        self.processed.append((event['type'], metadata['name']))
+        if callback is not None:
+            callback(event, None)
+
+    def get_dispatcher(self, num_workers=4):
+        dispatcher = EventDispatcher(self.process, num_workers)
+        self.addCleanup(dispatcher.stop)
+        return dispatcher
+
+    def test_one_worker_processes_inline(self):
+        dispatcher = self.get_dispatcher(1)
+        event = make_event('Pod', 'pod-1')
+        self.assertTrue(dispatcher.is_barrier(event))
+        dispatcher.process_inline(event, None)
+        self.assertEqual([('ADDED', 'pod-1')], self.processed)
+
+    def test_slow_object_does_not_block_others(self):
+        dispatcher = self.get_dispatcher()
+        self.blocked['np-1'] = gevent.event.Event()
+        dispatcher.dispatch(make_event('NetworkPolicy', 'np-1'), None)
+        # pods of the workers not blocked by the network policy
+        pods = [uid for uid in ('pod-%d' % i for i in range(20))
+                if hash(uid) % 4 != hash('np-1') % 4][:3]
+        for uid in pods:
+            dispatcher.dispatch(make_event('Pod', uid), None)
+        gevent.sleep(0.01)
+        self.assertEqual(set(('ADDED', uid) for uid in pods),
+                         set(self.processed))
+        self.assertFalse(dispatcher.wait_idle(0))
+        self.blocked['np-1'].set()
+        self.assertTrue(dispatcher.wait_idle(1))
+        self.assertEqual(('ADDED', 'np-1'), self.processed[-1])
+
+    def test_object_events_in_order(self):
+        dispatcher = self.get_dispatcher()
+        self.blocked['pod-1'] = gevent.event.Event()
+        for event_type in ('ADDED', 'MODIFIED', 'DELETED'):
+            dispatcher.dispatch(make_event('Pod', 'pod-1', event_type), None)
+        gevent.sleep(0.01)
+        self.assertEqual([], self.processed)
+        self.blocked['pod-1'].set()
+        dispatcher.wait_idle(1)
+        self.assertEqual(['ADDED', 'MODIFIED', 'DELETED'],
+                         [event_type for event_type, _ in self.processed])
+
+    def test_superseded_modified_coalesced(self):
+        dispatcher = self.get_dispatcher()
+        self.blocked['pod-1'] = gevent.event.Event()
+        dispatcher.dispatch(make_event('Pod', 'pod-1'), None)
+        gevent.sleep(0.01)
+        callbacks = []
+        for i in range(3):
+            dispatcher.dispatch(
+                make_event('Pod', 'pod-1', 'MODIFIED', 'v%d' % i),
+                lambda event, err: callbacks.append(event))
+        self.blocked['pod-1'].set()
+        dispatcher.wait_idle(1)
+        self.assertEqual([('ADDED', 'pod-1'), ('MODIFIED', 'v2')],
+                         self.processed)
+        self.assertEqual(1, len(callbacks))
+        stats = dispatcher.stats()['Pod']
+        self.assertEqual(2, stats.processed)
+        self.assertEqual(2, stats.coalesced)
+        self.assertEqual(0, stats.queue_depth)
+
+    def test_barrier_waits_dispatched_events(self):
+        dispatcher = self.get_dispatcher()
+        self.blocked['pod-1'] = gevent.event.Event()
+        dispatcher.dispatch(make_event('Pod', 'pod-1'), None)
+        namespace = make_event('Namespace', 'ns-1')
+        sync = {'type': 'TF_VNC_SYNC', 'object': {'kind': 'Pod'}}
+        self.assertTrue(dispatcher.is_barrier(namespace))
+        self.assertTrue(dispatcher.is_barrier(sync))
+        self.assertTrue(dispatcher.is_barrier(make_event('Idle', None)))
+        greenlet = gevent.spawn(dispatcher.process_inline, namespace, None)
+        gevent.sleep(0.01)
+        self.assertEqual([], self.processed)
+        self.assertEqual(0, dispatcher.stats()['Pod'].processed)
+        self.blocked['pod-1'].set()
+        greenlet.join(1)
+        self.assertEqual([('ADDED', 'pod-1'), ('ADDED', 'ns-1')],
+                         self.processed)
+        self.assertEqual(0, dispatcher.stats()['Namespace'].queue_depth)
+        self.assertEqual(1, dispatcher.stats()['Namespace'].processed)
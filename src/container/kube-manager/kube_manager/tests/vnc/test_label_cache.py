@@ -0,0 +1,191 @@
+#
+# Copyright (c) 2017 Juniper Networks, Inc. All rights reserved.
+#
+
+import random
+import unittest
+
+from cfgm_common.tests.benchmark import benchmark, report, Timer
+
+from kube_manager.vnc.label_cache import LabelSelector, LabelSelectorIndex
+
+
+class LabelSelectorTest(unittest.TestCase):
+    def test_match_labels(self):
+        selector = LabelSelector.from_k8s({'app': 'web', 'tier': 'fe'})
+        self.assertTrue(selector.matches({'app': 'web', 'tier': 'fe',
+                                          'env': 'prod'}))
+        self.assertFalse(selector.matches({'app': 'web'}))
+        self.assertEqual(selector, LabelSelector.from_k8s(
+            {'matchLabels': {'tier': 'fe', 'app': 'web'}}))
+
+    def test_match_expressions(self):
+        selector = LabelSelector.from_k8s({
+            'matchLabels': {'app': 'web'},
+            'matchExpressions': [
+                {'key': 'env', 'operator': 'In', 'values': ['prod', 'qa']},
+                {'key': 'tier', 'operator': 'NotIn', 'values': ['db']},
+                {'key': 'owner', 'operator': 'Exists'},
+                {'key': 'legacy', 'operator': 'DoesNotExist'}]})
+        labels = {'app': 'web', 'env': 'qa', 'owner': 'x'}
+        self.assertTrue(selector.matches(labels))
+        for changes in ({'env': 'dev'}, {'tier': 'db'}, {'legacy': 'y'}):
+            self.assertFalse(selector.matches(dict(labels, **changes)))
+        del labels['owner']
+        self.assertFalse(selector.matches(labels))
+        self.assertEqual(set(['app', 'env', 'owner']),
+                         selector.required_keys)
+
+    def test_empty_selector_matches_all(self):
+        self.assertTrue(LabelSelector.from_k8s({}).matches({'a': 'b'}))
+        self.assertTrue(LabelSelector.from_k8s(
+            {'matchExpressions': []}).matches({}))
+
+    def test_unsupported_operator(self):
+        self.assertRaises(ValueError, LabelSelector.from_k8s, {
+            'matchExpressions': [{'key': 'a', 'operator': 'Gt',
+                                  'values': ['1']}]})
+
+    def test_slash_validated(self):
+        selector = LabelSelector.from_k8s({'k8s.io/app': 'a/b'})
+        index = LabelSelectorIndex()
+        index.update('pod-1', {'k8s.io/app': 'a/b'})
+        self.assertEqual(set(['pod-1']), index.find(selector))
+
+
+class LabelSelectorIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = LabelSelectorIndex()
+        self.index.update('web-1', {'app': 'web', 'env': 'prod'})
+        self.index.update('web-2', {'app': 'web', 'env': 'dev'})
+        self.index.update('db-1', {'app': 'db', 'env': 'prod'})
+
+    def test_find(self):
+        self.assertEqual(set(['web-1', 'web-2']),
+                         self.index.find({'app': 'web'}))
+        self.assertEqual(set(['db-1']), self.index.find({
+            'matchExpressions': [
+                {'key': 'app', 'operator': 'NotIn', 'values': ['web']},
+                {'key': 'env', 'operator': 'In', 'values': ['dev', 'prod']}]}))
+        self.assertEqual(set(), self.index.find({'app': 'cache'}))
+        self.assertEqual(3, len(self.index.find({})))
+
+    def test_selector_matched_set_follows_labels(self):
+        matched = self.index.add_selector('np-web', {'app': 'web'})
+        self.assertEqual(set(['web-1', 'web-2']), matched)
+        self.assertEqual((set(), set(['np-web'])),
+                         self.index.update('web-2', {'app': 'db'}))
+        self.assertEqual((set(['np-web']), set()),
+                         self.index.update('db-1', {'app': 'web'}))
+        self.assertEqual(set(['web-1', 'db-1']), self.index.matched('np-web'))
+        self.assertEqual(set(['np-web']), self.index.delete('web-1'))
+        self.assertEqual(set(['db-1']), self.index.matched('np-web'))
+        self.assertEqual(set(), self.index.selectors_of('web-1'))
+
+    def test_only_selectors_on_changed_keys_evaluated(self):
+        self.index.add_selector('np-app', {'app': 'web'})
+        self.index.add_selector('np-env', {'env': 'prod'})
+        evaluated = []
+        selector = self.index.get_selector('np-env')
+        matches = selector.matches
+        selector.matches = lambda labels: evaluated.append(labels) or \
+            matches(labels)
+        self.index.update('web-1', {'app': 'db', 'env': 'prod'})
+        self.index.update('web-2', {'app': 'web', 'env': 'qa'})
+        self.assertEqual([], evaluated)
+        self.assertEqual(set(['np-env']), self.index.selectors_of('web-1'))
+        self.assertEqual(set(['np-app']), self.index.selectors_of('web-2'))
+        self.index.update('web-1', {'app': 'db', 'env': 'dev'})
+        self.assertEqual(1, len(evaluated))
+        self.assertEqual(set(), self.index.selectors_of('web-1'))
+
+    def test_keyless_selectors(self):
+        self.index.add_selector('all', {})
+        self.index.add_selector('no-legacy', {'matchExpressions': [
+            {'key': 'legacy', 'operator': 'DoesNotExist'}]})
+        self.assertEqual(3, len(self.index.matched('no-legacy')))
+        self.assertEqual((set(['all', 'no-legacy']), set()),
+                         self.index.update('new-1', {'team': 'x'}))
+        self.assertEqual((set(), set(['no-legacy'])),
+                         self.index.update('new-1', {'legacy': 'y'}))
+        self.assertEqual(set(['all']), self.index.selectors_of('new-1'))
+
+    def test_remove_selector(self):
+        self.index.add_selector('np-web', {'app': 'web'})
+        self.index.add_selector('np-web', {'app': 'db'})
+        self.assertEqual(set(['db-1']), self.index.matched('np-web'))
+        self.index.remove_selector('np-web')
+        self.assertEqual(set(), self.index.matched('np-web'))
+        self.assertEqual(set(), self.index.selectors_of('db-1'))
+        self.assertEqual((set(), set()),
+                         self.index.update('web-1', {'app': 'db'}))
+
+
+@benchmark
+class LabelSelectorIndexBenchmark(unittest.TestCase):
+    NUM_PODS = 10000
+    NUM_POLICIES = 1000
+    NUM_CHANGES = 1000
+
+    def setUp(self):
+        rand = random.Random(0)
+        self.pods = dict(
+            ('pod-%d' % i, {'app': 'app-%d' % rand.randrange(500),
+                            'tier': rand.choice(['fe', 'be', 'db']),
+                            'namespace': 'ns-%d' % rand.randrange(50)})
+            for i in range(self.NUM_PODS))
+        self.policies = dict(
+            ('np-%d' % i, {'app': 'app-%d' % rand.randrange(500),
+                           'tier': rand.choice(['fe', 'be', 'db'])})
+            for i in range(self.NUM_POLICIES))
+        self.changes = [('pod-%d' % rand.randrange(self.NUM_PODS),
+                         'app-%d' % rand.randrange(500))
+                        for _ in range(self.NUM_CHANGES)]
+
+    def full_evaluation(self):
+        # Per label sets intersected for all the policies on each change,
+        # as done before the selector index.
+        label_cache = {}
+        for pod, labels in self.pods.items():
+            for label in labels.items():
+                label_cache.setdefault(label, set()).add(pod)
+
+        def evaluate():
+            result = {}
+            for np, selector in self.policies.items():
+                pods = None
+                for label in selector.items():
+                    pod_ids = label_cache.get(label, set())
+                    pods = pod_ids.copy() if pods is None else \
+                        pods & pod_ids
+                result[np] = pods
+            return result
+
+        evaluate()
+        with Timer() as timer:
+            for pod, app in self.changes:
+                label_cache[('app', self.pods[pod]['app'])].discard(pod)
+                label_cache.setdefault(('app', app), set()).add(pod)
+                self.pods[pod] = dict(self.pods[pod], app=app)
+                result = evaluate()
+        return timer, result
+
+    def incremental_evaluation(self):
+        index = LabelSelectorIndex()
+        for pod, labels in self.pods.items():
+            index.update(pod, labels)
+        for np, selector in self.policies.items():
+            index.add_selector(np, selector)
+        with Timer() as timer:
+            for pod, app in self.changes:
+                index.update(pod, dict(index.get_labels(pod), app=app))
+        return timer, dict((np, index.matched(np)) for np in self.policies)
+
+    def test_label_changes(self):
+        incremental, incremental_result = self.incremental_evaluation()
+        full, full_result = self.full_evaluation()
+        self.assertEqual(full_result, incremental_result)
+        report('%d pod label changes, %d pods, %d policies' % (
+            self.NUM_CHANGES, self.NUM_PODS, self.NUM_POLICIES), [
+            'full evaluation:  %8.1f msec' % full.msec,
+            'selector index:   %8.1f msec' % incremental.msec])
@@ -47,6 +47,7 @@ class VncKubernetesTest(unittest.TestCase):
         self.args.aps_name = "test-aps"
         self.args.rabbit_port = None
         self.args.collectors = ""
+        self.args.kube_event_workers = "1"
 
         api = VncApiMock(
             self.args.auth_user,
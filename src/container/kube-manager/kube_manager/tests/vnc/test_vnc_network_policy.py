@@ -3,6 +3,7 @@
 #
 
 from builtins import str
+import mock
 import unittest
 import uuid
 
@@ -571,6 +572,47 @@ class VncNetworkPolicyTest(KMTestCase):
                 np_name, np_uuid_dict[i],
                 np_spec, validate_delete=True)
 
+    def test_sync_readds_missing_policies_in_one_aps_update(self):
+        np_spec = {
+            'podSelector': {},
+            'ingress': [{}]
+        }
+        np_uuid_dict = {}
+        for i in range(1, 4):
+            np_name = "-".join([unittest.TestCase.id(self), str(i)])
+            np_uuid_dict[np_name] = self._add_update_network_policy(
+                np_name, np_spec)
+
+        # Detach the firewall policies of the network policies from APS.
+        aps_obj = self._get_default_application_policy_set()
+        for np_name in np_uuid_dict:
+            fw_policy_uuid = VncSecurityPolicy.get_firewall_policy_uuid(
+                np_name, self.ns_name)
+            aps_obj.del_firewall_policy(
+                self._vnc_lib.firewall_policy_read(id=fw_policy_uuid))
+        self._vnc_lib.application_policy_set_update(aps_obj)
+        ApplicationPolicySetKM.locate(
+            VncSecurityPolicy.cluster_aps_uuid).update()
+
+        vnc_lib = VncSecurityPolicy.vnc_lib
+        with mock.patch.object(
+                vnc_lib, 'application_policy_set_update',
+                wraps=vnc_lib.application_policy_set_update) as aps_update:
+            VncSecurityPolicy.sync_cluster_security_policy()
+        self.assertEqual(1, aps_update.call_count)
+
+        aps_obj = self._get_default_application_policy_set()
+        fw_policy_names = [fw_policy['to'][-1] for fw_policy in
+                           aps_obj.get_firewall_policy_refs()]
+        for np_name, np_uuid in list(np_uuid_dict.items()):
+            self.assertIn(
+                VncSecurityPolicy.get_firewall_policy_name(
+                    np_name, self.ns_name, False),
+                fw_policy_names)
+            self._delete_network_policy(np_name, np_uuid, np_spec)
+            self._validate_network_policy_resources(
+                np_name, np_uuid, np_spec, validate_delete=True)
+
     def test_ingress_policy_periodic_validate(self):
         """
         Validate network policy periodic self-healing when
@@ -0,0 +1,149 @@
+#
+# Copyright (c) 2017 Juniper Networks, Inc. All rights reserved.
+#
+
+"""
+Dispatch of the kube events to the VNC managers by object.
+"""
+import collections
+import time
+
+import gevent
+import gevent.event
+import gevent.queue
+
+
+class EventKindStats(object):
+    """Queue depth and processing latency of the events of a kind."""
+
+    def __init__(self):
+        self.queue_depth = 0
+        self.processed = 0
+        self.coalesced = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+
+    @property
+    def average_latency(self):
+        if not self.processed:
+            return 0.0
+        return self.latency_sum / self.processed
+
+
+class EventDispatcher(object):
+    """Process the kube events over num_workers greenlets.
+
+    The events of an object, keyed by its UID, go to the same worker and
+    are processed in order. The events of independent objects are
+    processed concurrently, except the events of BARRIER kinds, the
+    periodic syncs and the events of unknown kinds which are processed
+    alone once all the events dispatched before them are processed. A
+    MODIFIED event still waiting for its worker is superseded by the next
+    MODIFIED event of the same object. With one worker, every event is
+    processed by the caller in order.
+    """
+
+    # the other kinds depend on the projects namespaces are mapped to
+    BARRIER_KINDS = set(['Namespace'])
+    SHARDED_KINDS = set(['Pod', 'Service', 'NetworkPolicy', 'Endpoints',
+                         'Ingress', 'NetworkAttachmentDefinition'])
+
+    def __init__(self, process, num_workers=1):
+        # process(event, callback) processes an event, never raises
+        self._process = process
+        self.num_workers = max(int(num_workers or 1), 1)
+        self._stats = collections.defaultdict(EventKindStats)
+        # pending MODIFIED entries by UID, superseded by a newer MODIFIED
+        self._modified = {}
+        self._in_flight = 0
+        self._idle = gevent.event.Event()
+        self._idle.set()
+        self._shards = []
+        self._greenlets = []
+        if self.num_workers > 1:
+            self._shards = [gevent.queue.Queue()
+                            for _ in range(self.num_workers)]
+            self._greenlets = [gevent.spawn(self._worker, shard)
+                               for shard in self._shards]
+
+    @staticmethod
+    def _kind(event):
+        return event.get('object', {}).get('kind', 'UNKNOWN')
+
+    @staticmethod
+    def _key(event):
+        obj = event.get('object', {})
+        metadata = obj.get('metadata', {})
+        uid = metadata.get('uid')
+        if uid:
+            return uid
+        return (obj.get('kind'), metadata.get('namespace'),
+                metadata.get('name'))
+
+    def is_barrier(self, event):
+        """True if the event must be processed alone, by process_inline."""
+        return (self.num_workers == 1 or
+                event.get('type') == 'TF_VNC_SYNC' or
+                self._kind(event) not in self.SHARDED_KINDS)
+
+    def process_inline(self, event, callback):
+        """Process the event once the events dispatched are processed."""
+        self._idle.wait()
+        kind = self._kind(event)
+        self._stats[kind].queue_depth += 1
+        self._run(kind, event, callback, time.time())
+
+    def dispatch(self, event, callback):
+        """Queue the event to the worker of its object."""
+        kind = self._kind(event)
+        stats = self._stats[kind]
+        key = self._key(event)
+        if event.get('type') == 'MODIFIED':
+            entry = self._modified.get(key)
+            if entry is not None:
+                entry[0], entry[1] = event, callback
+                stats.coalesced += 1
+                return
+        entry = [event, callback, time.time(), key]
+        if event.get('type') == 'MODIFIED':
+            self._modified[key] = entry
+        stats.queue_depth += 1
+        self._in_flight += 1
+        self._idle.clear()
+        self._shards[hash(key) % self.num_workers].put(entry)
+
+    def _worker(self, shard):
+        while True:
+            entry = shard.get()
+            event, callback, start, key = entry
+            if self._modified.get(key) is entry:
+                del self._modified[key]
+            try:
+                self._run(self._kind(event), event, callback, start)
+            finally:
+                self._in_flight -= 1
+                if not self._in_flight:
+                    self._idle.set()
+
+    def _run(self, kind, event, callback, start):
+        stats = self._stats[kind]
+        stats.queue_depth -= 1
+        try:
+            self._process(event, callback)
+        finally:
+            latency = time.time() - start
+            stats.processed += 1
+            stats.latency_sum += latency
+            stats.latency_max = max(stats.latency_max, latency)
+
+    def stats(self):
+        """Stats of the events by kind."""
+        return dict(self._stats)
+
+    def wait_idle(self, timeout=None):
+        """Wait for the events dispatched to be processed."""
+        return self._idle.wait(timeout)
+
+    def stop(self):
+        gevent.killall(self._greenlets)
+        self._greenlets = []
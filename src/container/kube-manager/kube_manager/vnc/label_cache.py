@@ -7,12 +7,311 @@ from enum import Enum
 from kube_manager.vnc.vnc_kubernetes_config import VncKubernetesConfig as vnc_kube_config
 
 
+class LabelSelector(object):
+    """
+    K8s label selector.
+
+    A selector is a set of requirements (key, operator, values) that must
+    all be met by the labels of an object. The matchLabels of a K8s
+    selector are 'In' requirements with a single value, its
+    matchExpressions support the In, NotIn, Exists and DoesNotExist
+    operators. An empty selector matches every object.
+    """
+
+    OPERATORS = ('In', 'NotIn', 'Exists', 'DoesNotExist')
+
+    def __init__(self, match_labels=None, match_expressions=None):
+        requirements = set()
+        for key, value in (match_labels or {}).items():
+            key, value = XLabelCache._validate_key_value(key, value)
+            requirements.add((key, 'In', frozenset([value])))
+        for expression in match_expressions or []:
+            operator = expression.get('operator')
+            if operator not in self.OPERATORS:
+                raise ValueError(
+                    "Unsupported selector operator %s" % operator)
+            key, _ = XLabelCache._validate_key_value(expression['key'], '')
+            values = frozenset(
+                XLabelCache._validate_key_value(key, value)[1]
+                for value in expression.get('values') or [])
+            requirements.add((key, operator, values))
+        self.requirements = frozenset(requirements)
+        self.keys = frozenset(key for key, _, _ in requirements)
+        # Keys an object needs to have to match the selector.
+        self.required_keys = frozenset(
+            key for key, operator, _ in requirements
+            if operator in ('In', 'Exists'))
+
+    @classmethod
+    def from_k8s(cls, selector):
+        """
+        Selector from a K8s label selector or from its matchLabels alone.
+        """
+        if isinstance(selector, cls):
+            return selector
+        selector = selector or {}
+        if isinstance(selector.get('matchLabels'), dict) or \
+           isinstance(selector.get('matchExpressions'), list):
+            return cls(selector.get('matchLabels'),
+                       selector.get('matchExpressions'))
+        return cls(selector)
+
+    def matches(self, labels):
+        """ Check if validated labels meet all the requirements. """
+        for key, operator, values in self.requirements:
+            if operator == 'In':
+                if key not in labels or labels[key] not in values:
+                    return False
+            elif operator == 'NotIn':
+                if key in labels and labels[key] in values:
+                    return False
+            elif operator == 'Exists':
+                if key not in labels:
+                    return False
+            elif key in labels:
+                return False
+        return True
+
+    def __eq__(self, other):
+        return isinstance(other, LabelSelector) and \
+            self.requirements == other.requirements
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.requirements)
+
+
+class LabelSelectorIndex(object):
+    """
+    Incremental matching of label selectors against K8s objects.
+
+    The index keeps the labels of the objects fed to it along with an
+    inverted index of the labels, and the set of objects matched by each
+    registered selector. A selector is evaluated against the inverted
+    index when it is registered. After that, a label change on an object
+    only re-evaluates the selectors having a requirement the change may
+    flip: an 'In' requirement on the old or the new value of the label,
+    or any other requirement on its key.
+    """
+
+    def __init__(self):
+        # Object uuid to its validated labels.
+        self._labels = {}
+        # (key, value) to the uuids of the objects having that label.
+        self._label_index = {}
+        # Label key to the uuids of the objects having that key.
+        self._key_index = {}
+        # Selector id to selector and to the uuids of the objects it matches.
+        self._selectors = {}
+        self._matched = {}
+        # (key, value) to the ids of the selectors with an 'In' requirement
+        # on that value, key to the ids of the selectors with another
+        # requirement on that key.
+        self._value_selectors = {}
+        self._key_selectors = {}
+        # Ids of the selectors with no required key, they may match any
+        # new object.
+        self._keyless_selectors = set()
+        # Object uuid to the ids of the selectors matching it.
+        self._object_selectors = {}
+
+    def __len__(self):
+        return len(self._labels)
+
+    @staticmethod
+    def _validate_labels(labels):
+        return dict(XLabelCache._validate_key_value(key, value)
+                    for key, value in (labels or {}).items())
+
+    @staticmethod
+    def _add_to(index, key, value):
+        if key in index:
+            index[key].add(value)
+        else:
+            index[key] = {value}
+
+    @staticmethod
+    def _remove_from(index, key, value):
+        values = index.get(key)
+        if values is None:
+            return
+        values.discard(value)
+        if not values:
+            del index[key]
+
+    def _index_label(self, obj_uuid, key, value):
+        self._add_to(self._label_index, (key, value), obj_uuid)
+        self._add_to(self._key_index, key, obj_uuid)
+
+    def _unindex_label(self, obj_uuid, key, value):
+        self._remove_from(self._label_index, (key, value), obj_uuid)
+        self._remove_from(self._key_index, key, obj_uuid)
+
+    def _requirement_uuids(self, key, operator, values):
+        if operator in ('Exists', 'DoesNotExist'):
+            return self._key_index.get(key, set())
+        uuids = set()
+        for value in values:
+            uuids.update(self._label_index.get((key, value), ()))
+        return uuids
+
+    def find(self, selector):
+        """
+        Get the uuids of the objects matched by a selector.
+
+        The selector is evaluated against the inverted index, it is not
+        registered.
+        """
+        selector = LabelSelector.from_k8s(selector)
+        positive, negative = [], []
+        for key, operator, values in selector.requirements:
+            uuids = self._requirement_uuids(key, operator, values)
+            if operator in ('In', 'Exists'):
+                positive.append(uuids)
+            else:
+                negative.append(uuids)
+        if positive:
+            positive.sort(key=len)
+            result = set(positive[0])
+            for uuids in positive[1:]:
+                if not result:
+                    break
+                result.intersection_update(uuids)
+        else:
+            result = set(self._labels)
+        for uuids in negative:
+            result.difference_update(uuids)
+        return result
+
+    def add_selector(self, selector_id, selector):
+        """
+        Register a selector, replacing any selector with the same id.
+
+        Returns the uuids of the objects matched by the selector. This set
+        is owned by the index and kept up to date as objects change.
+        """
+        self.remove_selector(selector_id)
+        selector = LabelSelector.from_k8s(selector)
+        matched = self.find(selector)
+        self._selectors[selector_id] = selector
+        self._matched[selector_id] = matched
+        for key, operator, values in selector.requirements:
+            if operator == 'In':
+                for value in values:
+                    self._add_to(self._value_selectors, (key, value),
+                                 selector_id)
+            else:
+                self._add_to(self._key_selectors, key, selector_id)
+        if not selector.required_keys:
+            self._keyless_selectors.add(selector_id)
+        for obj_uuid in matched:
+            self._add_to(self._object_selectors, obj_uuid, selector_id)
+        return matched
+
+    def remove_selector(self, selector_id):
+        """ Unregister a selector. """
+        selector = self._selectors.pop(selector_id, None)
+        if selector is None:
+            return
+        for key, operator, values in selector.requirements:
+            if operator == 'In':
+                for value in values:
+                    self._remove_from(self._value_selectors, (key, value),
+                                      selector_id)
+            else:
+                self._remove_from(self._key_selectors, key, selector_id)
+        self._keyless_selectors.discard(selector_id)
+        for obj_uuid in self._matched.pop(selector_id):
+            self._remove_from(self._object_selectors, obj_uuid, selector_id)
+
+    def get_selector(self, selector_id):
+        return self._selectors.get(selector_id)
+
+    def matched(self, selector_id):
+        """ Get the uuids of the objects matched by a registered selector. """
+        return self._matched.get(selector_id, set())
+
+    def selectors_of(self, obj_uuid):
+        """ Get the ids of the registered selectors matching an object. """
+        return self._object_selectors.get(obj_uuid, set())
+
+    def get_labels(self, obj_uuid):
+        return self._labels.get(obj_uuid, {})
+
+    def update(self, obj_uuid, labels):
+        """
+        Set all the labels of an object.
+
+        Only the selectors with a requirement a changed label may flip are
+        evaluated, plus the selectors with no required key when the object
+        is new. Returns the ids of the selectors that started and
+        stopped matching the object.
+        """
+        labels = self._validate_labels(labels)
+        curr_labels = self._labels.get(obj_uuid)
+        if curr_labels is None:
+            curr_labels = {}
+            candidates = set(self._keyless_selectors)
+        else:
+            candidates = set()
+
+        changed_keys = set()
+        for key, value in curr_labels.items():
+            if labels.get(key) != value:
+                self._unindex_label(obj_uuid, key, value)
+                candidates.update(self._value_selectors.get((key, value), ()))
+                changed_keys.add(key)
+        for key, value in labels.items():
+            if curr_labels.get(key) != value:
+                self._index_label(obj_uuid, key, value)
+                candidates.update(self._value_selectors.get((key, value), ()))
+                changed_keys.add(key)
+        self._labels[obj_uuid] = labels
+
+        for key in changed_keys:
+            candidates.update(self._key_selectors.get(key, ()))
+        added, removed = set(), set()
+        matching = self._object_selectors.get(obj_uuid, set())
+        for selector_id in candidates:
+            is_match = self._selectors[selector_id].matches(labels)
+            if is_match and selector_id not in matching:
+                added.add(selector_id)
+                self._matched[selector_id].add(obj_uuid)
+            elif not is_match and selector_id in matching:
+                removed.add(selector_id)
+                self._matched[selector_id].discard(obj_uuid)
+        for selector_id in added:
+            self._add_to(self._object_selectors, obj_uuid, selector_id)
+        for selector_id in removed:
+            self._remove_from(self._object_selectors, obj_uuid, selector_id)
+        return added, removed
+
+    def delete(self, obj_uuid):
+        """
+        Forget an object. Returns the ids of the selectors it matched.
+        """
+        labels = self._labels.pop(obj_uuid, None)
+        if labels is None:
+            return set()
+        for key, value in labels.items():
+            self._unindex_label(obj_uuid, key, value)
+        removed = self._object_selectors.pop(obj_uuid, set())
+        for selector_id in removed:
+            self._matched[selector_id].discard(obj_uuid)
+        return removed
+
+
 class LabelCache(object):
 
     def __init__(self):
         self.ns_label_cache = {}
         self.pod_label_cache = {}
         self.service_selector_cache = {}
+        # Selectors of the network policies over pod and namespace labels.
+        self.pod_selectors = LabelSelectorIndex()
+        self.ns_selectors = LabelSelectorIndex()
 
     def _get_key(self, label):
         key = label[0] + ':' + label[1]
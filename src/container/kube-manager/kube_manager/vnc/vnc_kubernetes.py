@@ -41,6 +41,7 @@ from kube_manager.vnc.config_db import (
     DBBaseKM, ProjectKM, NetworkIpamKM, VirtualNetworkKM
 )
 from kube_manager.vnc import db
+from kube_manager.vnc.event_dispatcher import EventDispatcher
 from kube_manager.vnc import label_cache
 from kube_manager.vnc import reaction_map
 from kube_manager.vnc import vnc_common
@@ -180,6 +181,11 @@ class VncKubernetes(vnc_common.VncCommon):
         self.network_mgr = importutils.import_object(
             'kube_manager.vnc.vnc_network.VncNetwork')
 
+        # Events of independent objects processed by kube_event_workers
+        # greenlets, see EventDispatcher.
+        self.dispatcher = EventDispatcher(
+            self._process_event, int(self.args.kube_event_workers or 1))
+
         # Create system default security policies.
         VncSecurityPolicy.create_deny_all_security_policy()
         VncSecurityPolicy.create_allow_all_security_policy()
@@ -640,73 +646,82 @@ class VncKubernetes(vnc_common.VncCommon):
         self._call_safe(f)
         self._log(msg + " done", level='debug')
 
+    def _process_event(self, event, callback):
+        err = None
+        try:
+            event_type = event['type']
+            obj = event.get('object', {})
+            kind = obj.get('kind', 'UNKNOWN')
+            metadata = obj.get('metadata', {})
+            namespace = metadata.get('namespace')
+            name = metadata.get('name')
+            msg = "%s - Process event (name=%s event_type=%s kind=%s ns=%s)" % \
+                  (self._name, name, event_type, kind, namespace)
+            self._log(msg, level='debug')
+            uid = metadata.get('uid')
+            if event_type == 'TF_VNC_SYNC':
+                self._vnc_sync(kind)
+            elif kind == 'Pod':
+                self.pod_mgr.process(event)
+            elif kind == 'Service':
+                self.service_mgr.process(event)
+            elif kind == 'Namespace':
+                self.namespace_mgr.process(event)
+            elif kind == 'NetworkPolicy':
+                self.network_policy_mgr.process(event)
+            elif kind == 'Endpoints':
+                self.endpoints_mgr.process(event)
+            elif kind == 'Ingress':
+                self.ingress_mgr.process(event)
+            elif kind == 'NetworkAttachmentDefinition':
+                self.network_mgr.process(event)
+            else:
+                msg = "%s - Event %s %s %s:%s:%s not handled" % \
+                      (self._name, event_type, kind, namespace, name, uid)
+                self._log(msg, level='error')
+                err = UnknownObjectKind(msg)
+        except Exception as e:
+            gevent.sleep(0)
+            string_buf = StringIO()
+            cgitb_hook(file=string_buf, format="text")
+            err_msg = string_buf.getvalue()
+            self._log("%s - %s" % (self._name, err_msg), level='error')
+            err = VncKubernetesEventException(err_msg, origin=e)
+        try:
+            if callback is not None and event is not None:
+                callback(event, err)
+        except Exception:
+            gevent.sleep(0)
+            string_buf = StringIO()
+            cgitb_hook(file=string_buf, format="text")
+            err_msg = string_buf.getvalue()
+            self._log(
+                "%s - Internal error (callback=%s event=%s err=%s) - %s" %
+                (self._name, callback, event, err, err_msg),
+                level='error')
+            # callabck cannot raise exception - if it happens - internal error
+            sys.exit(1)
+
     def vnc_process(self):
         while True:
-            callback = None
-            event = None
-            err = None
             try:
                 t = int(self.args.kube_timer_interval)
                 msg = "%s - wait event (qsize=%s timeout=%s)" % \
                       (self._name, self.q.qsize(), t)
                 self._log(msg, level='debug')
                 timeout = t if t > 0 else None
-                event, callback = self.q.get(timeout=timeout)
-                event_type = event['type']
-                obj = event.get('object', {})
-                kind = obj.get('kind', 'UNKNOWN')
-                metadata = obj.get('metadata', {})
-                namespace = metadata.get('namespace')
-                name = metadata.get('name')
-                msg = "%s - Process event (name=%s event_type=%s kind=%s ns=%s)" % \
-                      (self._name, name, event_type, kind, namespace)
-                self._log(msg, level='debug')
-                uid = metadata.get('uid')
-                if event_type == 'TF_VNC_SYNC':
-                    self._vnc_sync(kind)
-                elif kind == 'Pod':
-                    self.pod_mgr.process(event)
-                elif kind == 'Service':
-                    self.service_mgr.process(event)
-                elif kind == 'Namespace':
-                    self.namespace_mgr.process(event)
-                elif kind == 'NetworkPolicy':
-                    self.network_policy_mgr.process(event)
-                elif kind == 'Endpoints':
-                    self.endpoints_mgr.process(event)
-                elif kind == 'Ingress':
-                    self.ingress_mgr.process(event)
-                elif kind == 'NetworkAttachmentDefinition':
-                    self.network_mgr.process(event)
+                # the event is left in the queue until it is processed or
+                # dispatched to the worker of its object
+                event, callback = self.q.peek(timeout=timeout)
+                if self.dispatcher.is_barrier(event):
+                    self.dispatcher.process_inline(event, callback)
+                    self.q.get()
                 else:
-                    msg = "%s - Event %s %s %s:%s:%s not handled" % \
-                          (self._name, event_type, kind, namespace, name, uid)
-                    self._log(msg, level='error')
-                    err = UnknownObjectKind(msg)
+                    self.q.get()
+                    self.dispatcher.dispatch(event, callback)
             except gevent.queue.Empty:
                 gevent.sleep(0)
                 pass
-            except Exception as e:
-                gevent.sleep(0)
-                string_buf = StringIO()
-                cgitb_hook(file=string_buf, format="text")
-                err_msg = string_buf.getvalue()
-                self._log("%s - %s" % (self._name, err_msg), level='error')
-                err = VncKubernetesEventException(err_msg, origin=e)
-            try:
-                if callback is not None and event is not None:
-                    callback(event, err)
-            except Exception:
-                gevent.sleep(0)
-                string_buf = StringIO()
-                cgitb_hook(file=string_buf, format="text")
-                err_msg = string_buf.getvalue()
-                self._log(
-                    "%s - Internal error (callback=%s event=%s err=%s) - %s" %
-                    (self._name, callback, event, err, err_msg),
-                    level='error')
-                # callabck cannot raise exception - if it happens - internal error
-                sys.exit(1)
 
     @classmethod
     def get_instance(cls):
@@ -718,6 +733,7 @@ class VncKubernetes(vnc_common.VncCommon):
         if inst is None:
             return
         inst.rabbit.close()
+        inst.dispatcher.stop()
         for obj_cls in list(DBBaseKM.get_obj_type_map().values()):
             obj_cls.reset()
         DBBase.clear()
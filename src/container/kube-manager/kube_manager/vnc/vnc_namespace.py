@@ -151,7 +151,10 @@ class VncNamespace(VncCommon):
             return ns.set_isolated_service_network_fq_name(fq_name)
         return None
 
-    def _clear_namespace_label_cache(self, ns_uuid, project):
+    def _clear_namespace_label_cache(self, ns_uuid, project,
+                                     keep_selectors=False):
+        if ns_uuid and not keep_selectors:
+            self._label_cache.ns_selectors.delete(ns_uuid)
         if not ns_uuid or \
            ns_uuid not in project.ns_labels:
             return
@@ -163,11 +166,14 @@ class VncNamespace(VncCommon):
         del project.ns_labels[ns_uuid]
 
     def _update_namespace_label_cache(self, labels, ns_uuid, project):
-        self._clear_namespace_label_cache(ns_uuid, project)
+        # The selectors are updated with the label changes only.
+        self._clear_namespace_label_cache(ns_uuid, project,
+                                          keep_selectors=True)
         for label in list(labels.items()):
             key = self._label_cache._get_key(label)
             self._label_cache._locate_label(
                 key, self._label_cache.ns_label_cache, label, ns_uuid)
+        self._label_cache.ns_selectors.update(ns_uuid, labels)
         if labels:
             project.ns_labels[ns_uuid] = labels
 
@@ -28,7 +28,7 @@ from kube_manager.common.kube_config_db import NetworkPolicyKM
 from kube_manager.vnc.vnc_kubernetes_config import VncKubernetesConfig as vnc_kube_config
 from kube_manager.vnc.vnc_common import VncCommon
 from kube_manager.vnc.vnc_security_policy import VncSecurityPolicy
-from kube_manager.vnc.label_cache import XLabelCache
+from kube_manager.vnc.label_cache import LabelSelector, XLabelCache
 
 
 class VncNetworkPolicy(VncCommon):
@@ -36,9 +36,8 @@ class VncNetworkPolicy(VncCommon):
     def __init__(self):
         super(VncNetworkPolicy, self).__init__('NetworkPolicy')
         self._name = type(self).__name__
-        self._ingress_ns_label_cache = {}
-        self._ingress_pod_label_cache = {}
-        self._np_pod_label_cache = {}
+        # Ids of the ingress namespace selectors of a network policy SG.
+        self._ingress_ns_selectors = {}
         self._labels = XLabelCache('NetworkPolicy')
         self._default_ns_sgs = {}
         self._vnc_lib = vnc_kube_config.vnc_lib()
@@ -72,13 +71,11 @@ class VncNetworkPolicy(VncCommon):
                 sg_dict[sg.name] = sg_uuid
                 self._default_ns_sgs[sg.namespace].update(sg_dict)
             elif sg.np_pod_selector:
-                self._update_sg_cache(self._np_pod_label_cache,
-                                      sg.np_pod_selector, sg.uuid)
+                self._update_sg_selector(sg.np_pod_selector, sg.uuid)
             elif sg.ingress_pod_selector:
-                self._update_sg_cache(self._ingress_pod_label_cache,
-                                      sg.ingress_pod_selector, sg.uuid)
+                self._update_sg_selector(sg.ingress_pod_selector, sg.uuid)
             if sg.np_spec:
-                # _get_ingress_rule_list update _ingress_ns_label_cache
+                # _get_ingress_rule_list registers the ingress ns selectors
                 self._get_ingress_rule_list(
                     sg.np_spec, sg.namespace, sg.name, sg.uuid)
 
@@ -86,75 +83,54 @@ class VncNetworkPolicy(VncCommon):
         label = {'NS-SG': 'ALLOW-ALL'}
         return label
 
-    def _find_namespaces(self, labels, ns_set=None):
-        result = set()
-        for label in list(labels.items()):
-            key = self._label_cache._get_key(label)
-            ns_ids = self._label_cache.ns_label_cache.get(key, set())
-            # no matching label
-            if not ns_ids:
-                return ns_ids
-            if not result:
-                result = ns_ids.copy()
-            else:
-                result.intersection_update(ns_ids)
-
+    def _get_selector(self, selector):
+        """
+        Get the matchLabels of a selector, or the whole selector when it
+        has matchExpressions.
+        """
+        if not selector:
+            return None
+        if selector.get('matchExpressions'):
+            return selector
+        return selector.get('matchLabels')
+
+    def _find_namespaces(self, selector, ns_set=None):
+        if not selector:
+            return set()
+        result = self._label_cache.ns_selectors.find(selector)
         if ns_set:
             result.intersection_update(ns_set)
         return result
 
-    def _find_pods(self, labels, pod_set=None):
-        result = set()
-        for label in list(labels.items()):
-            key = self._label_cache._get_key(label)
-            pod_ids = self._label_cache.pod_label_cache.get(key, set())
-            # no matching label
-            if not pod_ids:
-                return pod_ids
-            if not result:
-                result = pod_ids.copy()
-            else:
-                result.intersection_update(pod_ids)
-
+    def _find_pods(self, selector, pod_set=None):
+        if not selector:
+            return set()
+        result = self._label_cache.pod_selectors.find(selector)
         if pod_set:
             result.intersection_update(pod_set)
         return result
 
-    def _find_sg(self, sg_cache, labels):
-        result = set()
-        for label in list(labels.items()):
-            key = self._label_cache._get_key(label)
-            sg_ids = sg_cache.get(key, set())
-            # no matching label
-            if not sg_ids:
-                continue
-            if not result:
-                result = sg_ids.copy()
-            else:
-                result.update(sg_ids)
-        return result
-
-    def _clear_sg_cache_uuid(self, sg_cache, sg_uuid):
+    def _clear_sg_selectors(self, sg_uuid):
         if not sg_uuid:
             return
-        key_list = [k for k, v in list(sg_cache.items()) if sg_uuid in v]
-        for key in key_list or []:
-            label = tuple(key.split(':'))
-            self._label_cache._remove_label(key, sg_cache, label, sg_uuid)
+        self._label_cache.pod_selectors.remove_selector(sg_uuid)
+        for selector_id in self._ingress_ns_selectors.pop(sg_uuid, set()):
+            self._label_cache.ns_selectors.remove_selector(selector_id)
 
-    def _clear_sg_cache(self, sg_cache, labels, sg_uuid):
-        if not labels or not sg_uuid:
-            return
-        for label in list(labels.items()) or []:
-            key = self._label_cache._get_key(label)
-            self._label_cache._remove_label(key, sg_cache, label, sg_uuid)
+    def _update_sg_selector(self, selector, sg_uuid):
+        """
+        Register the pod selector of a SG, returns the pods it matches.
+        """
+        if not selector or not sg_uuid:
+            return set()
+        return self._label_cache.pod_selectors.add_selector(sg_uuid, selector)
 
-    def _update_sg_cache(self, sg_cache, labels, sg_uuid):
-        if not labels or not sg_uuid:
-            return
-        for label in list(labels.items()) or []:
-            key = self._label_cache._get_key(label)
-            self._label_cache._locate_label(key, sg_cache, label, sg_uuid)
+    def _update_ns_selector(self, selector, np_sg_uuid):
+        selector = LabelSelector.from_k8s(selector)
+        selector_id = (np_sg_uuid, selector)
+        self._label_cache.ns_selectors.add_selector(selector_id, selector)
+        self._ingress_ns_selectors.setdefault(
+            np_sg_uuid, set()).add(selector_id)
 
     def _set_sg_annotations(self, namespace, name, sg_obj, **kwargs):
         SecurityGroupKM.add_annotations(self, sg_obj, namespace, sg_obj.name, **kwargs)
@@ -219,8 +195,11 @@ class VncNetworkPolicy(VncCommon):
         address_list = []
         if not labels:
             ns_uuid_list = list(NamespaceKM.keys())
+            # Allow-all is the empty selector, matching every namespace.
+            self._update_ns_selector({}, np_sg_uuid)
             labels = self._get_ns_allow_all_label()
         else:
+            self._update_ns_selector(labels, np_sg_uuid)
             ns_uuid_set = self._find_namespaces(labels)
             ns_uuid_list = list(ns_uuid_set)
         for ns_uuid in ns_uuid_list or []:
@@ -237,10 +216,6 @@ class VncNetworkPolicy(VncCommon):
             if ns_sg in self._default_ns_sgs[ns.name]:
                 address['ns_sg_uuid'] = self._default_ns_sgs[ns.name][ns_sg]
                 address_list.append(address)
-        for label in list(labels.items()):
-            key = self._label_cache._get_key(label)
-            self._label_cache._locate_label(
-                key, self._ingress_ns_label_cache, label, np_sg_uuid)
         return address_list
 
     def _get_ports(self, port_info=None):
@@ -296,7 +271,7 @@ class VncNetworkPolicy(VncCommon):
                 if 'namespaceSelector' in from_rule:
                     ns_address_list = []
                     ns_selector = from_rule.get('namespaceSelector')
-                    ns_selector_labels = ns_selector.get('matchLabels')
+                    ns_selector_labels = self._get_selector(ns_selector)
                     if not ns_selector_labels:
                         ns_address_list = self._get_ns_address_list(np_sg_uuid)
                     else:
@@ -306,7 +281,7 @@ class VncNetworkPolicy(VncCommon):
                         src_address_list.extend(ns_address_list)
                 if 'podSelector' in from_rule:
                     pod_selector = from_rule.get('podSelector')
-                    pod_selector_labels = pod_selector.get('matchLabels')
+                    pod_selector_labels = self._get_selector(pod_selector)
                     if not pod_selector_labels:
                         # allow-all-pods
                         src_address = self._get_ns_address(namespace)
@@ -351,11 +326,8 @@ class VncNetworkPolicy(VncCommon):
             sg = SecurityGroupKM.get(sg_id)
             if not sg or sg.namespace != namespace:
                 return
-            match_found = False
-            sg_labels = sg.np_pod_selector.copy()
-            sg_labels.update(sg.ingress_pod_selector)
-            if set(sg_labels.items()).issubset(set(vm.pod_labels.items())):
-                match_found = True
+            match_found = \
+                pod_id in self._label_cache.pod_selectors.matched(sg_id)
             if oper == 'ADD' and not match_found:
                 return
             elif oper == 'DELETE' and match_found:
@@ -439,11 +411,9 @@ class VncNetworkPolicy(VncCommon):
                     ingress_pod_sg_dict[src_sg_name] = pod_sg.uuid
                     pod_sg.ingress_pod_selector = pod_selector
                     ingress_pod_sgs.add(pod_sg.uuid)
-                    self._update_sg_cache(
-                        self._ingress_pod_label_cache,
+                    pod_ids = self._update_sg_selector(
                         pod_selector, pod_sg.uuid)
-                    pod_ids = self._find_pods(pod_selector)
-                    for pod_id in pod_ids:
+                    for pod_id in list(pod_ids):
                         self._update_sg_pod_link(
                             namespace, pod_id, pod_sg.uuid, 'ADD', validate_vm=True)
                 src_sg_fq_name.append(src_sg_name)
@@ -462,12 +432,10 @@ class VncNetworkPolicy(VncCommon):
         if not vm or vm.owner != 'k8s':
             return
 
-        namespace_label = self._label_cache._get_namespace_label(pod_namespace)
-        labels.update(namespace_label)
-        np_sg_uuid_set = self._find_sg(self._np_pod_label_cache, labels)
-        ingress_sg_uuid_set = self._find_sg(
-            self._ingress_pod_label_cache, labels)
-        new_sg_uuid_set = np_sg_uuid_set | ingress_sg_uuid_set
+        # The pod labels are indexed by VncPod, the SG selectors matching
+        # the pod are known without evaluating the other selectors.
+        new_sg_uuid_set = set(
+            self._label_cache.pod_selectors.selectors_of(pod_id))
 
         vmi_sg_uuid_set = set()
         for vmi_id in vm.virtual_machine_interfaces:
@@ -506,13 +474,12 @@ class VncNetworkPolicy(VncCommon):
         for np_sg in np_sgs[:] or []:
             self._update_ns_sg(sg_uuid, np_sg, 'DELETE')
 
-        ns_allow_all_label = self._get_ns_allow_all_label()
-        ingress_ns_allow_all_sg_set = self._find_sg(
-            self._ingress_ns_label_cache, ns_allow_all_label)
-        ingress_ns_sg_uuid_set = self._find_sg(
-            self._ingress_ns_label_cache, labels)
-        sg_uuid_set = set(np_sgs) | \
-            ingress_ns_allow_all_sg_set | ingress_ns_sg_uuid_set
+        # The ingress namespace selectors, allow-all included, matching
+        # the namespace labels indexed by VncNamespace.
+        ingress_ns_sg_uuid_set = set(
+            np_sg_uuid for np_sg_uuid, _ in
+            self._label_cache.ns_selectors.selectors_of(ns_id))
+        sg_uuid_set = set(np_sgs) | ingress_ns_sg_uuid_set
 
         for sg_uuid in sg_uuid_set or []:
             np_sg = SecurityGroupKM.get(sg_uuid)
@@ -587,6 +554,7 @@ class VncNetworkPolicy(VncCommon):
             np.set_vnc_fq_name(":".join(fw_policy_obj.get_fq_name()))
 
     def _vnc_delete_sg(self, sg):
+        self._clear_sg_selectors(sg.uuid)
         for vmi_id in list(sg.virtual_machine_interfaces):
             try:
                 self._vnc_lib.ref_update(
@@ -60,9 +60,12 @@ class VncPod(VncCommon):
             pod_label_cache = self._label_cache.pod_label_cache
             self._label_cache._locate_label(key, pod_label_cache, label,
                                             vm.uuid)
+        self._label_cache.pod_selectors.update(vm.uuid, new_labels)
         vm.pod_labels = new_labels
 
-    def _clear_label_to_pod_cache(self, vm):
+    def _clear_label_to_pod_cache(self, vm, keep_selectors=False):
+        if not keep_selectors:
+            self._label_cache.pod_selectors.delete(vm.uuid)
         if not vm.pod_labels:
             return
         for label in list(vm.pod_labels.items()) or []:
@@ -73,7 +76,8 @@ class VncPod(VncCommon):
         vm.pod_labels = None
 
     def _update_label_to_pod_cache(self, new_labels, vm):
-        self._clear_label_to_pod_cache(vm)
+        # The selectors are updated with the label changes only.
+        self._clear_label_to_pod_cache(vm, keep_selectors=True)
         self._set_label_to_pod_cache(new_labels, vm)
 
     def _get_default_network(self, pod_id, pod_name, pod_namespace):
@@ -93,13 +93,18 @@ class FWRule(object):
 
         if not parent_obj:
             pm_obj = PolicyManagement(cls.default_policy_management_name)
-            try:
-                cls.vnc_lib.policy_management_create(pm_obj)
-            except RefsExistError:
-                pass
-            pm_obj = cls.vnc_lib.policy_management_read(
-                fq_name=pm_obj.get_fq_name())
-            PolicyManagementKM.locate(pm_obj.get_uuid())
+            pm_uuid = PolicyManagementKM.get_fq_name_to_uuid(
+                pm_obj.get_fq_name())
+            if pm_uuid:
+                pm_obj.uuid = pm_uuid
+            else:
+                try:
+                    cls.vnc_lib.policy_management_create(pm_obj)
+                except RefsExistError:
+                    pass
+                pm_obj = cls.vnc_lib.policy_management_read(
+                    fq_name=pm_obj.get_fq_name())
+                PolicyManagementKM.locate(pm_obj.get_uuid())
         else:
             pm_obj = parent_obj
 
@@ -111,15 +116,23 @@ class FWRule(object):
 
         addr_grp_obj = AddressGroup(name=name, parent_obj=pm_obj,
                                     address_group_prefix=subnet_list)
+
+        # An address group named after its cidr is up to date if known.
+        addr_grp_uuid = AddressGroupKM.get_fq_name_to_uuid(
+            addr_grp_obj.get_fq_name())
+        if addr_grp_uuid and name == cidr:
+            addr_grp_obj.uuid = addr_grp_uuid
+            return addr_grp_obj
+
         try:
             addr_grp_uuid = cls.vnc_lib.address_group_create(addr_grp_obj)
         except RefsExistError:
             cls.vnc_lib.address_group_update(addr_grp_obj)
             addr_grp_uuid = addr_grp_obj.get_uuid()
 
-        # Update application policy set in our cache.
+        # Update address group in our cache.
         AddressGroupKM.locate(addr_grp_uuid)
-        addr_grp_obj = cls.vnc_lib.address_group_read(id=addr_grp_uuid)
+        addr_grp_obj.uuid = addr_grp_uuid
 
         return addr_grp_obj
 
@@ -128,6 +141,9 @@ class FWRule(object):
         try:
             # Delete the address group.
             cls.vnc_lib.address_group_delete(id=uuid)
+            AddressGroupKM.delete(uuid)
+        except NoIdError:
+            AddressGroupKM.delete(uuid)
         except RefsExistError:
             # It is possible that this address group is shared across
             # multiple firwall rules or even by user rules.
@@ -528,6 +544,49 @@ class VncSecurityPolicy(VncCommon):
         constructed_snum = "%s.%s" % (snum_list[0].zfill(5), snum_list[1])
         return FirewallSequence(sequence=constructed_snum)
 
+    @staticmethod
+    def _cached_obj(obj_class, km_obj):
+        """
+        Build a VNC object with the fq_name and uuid of a cached object.
+
+        Such an object is enough to be the parent of an object or the target
+        of a ref, and saves a read from the API server.
+        """
+        obj = obj_class(name=km_obj.fq_name[-1])
+        obj.fq_name = list(km_obj.fq_name)
+        obj.uuid = km_obj.uuid
+        return obj
+
+    @classmethod
+    def _get_policy_management(cls):
+        """ Get the parent of the cluster application policy set. """
+        if not cls.cluster_aps_uuid:
+            raise Exception("Cluster Application Policy Set not available.")
+
+        aps = ApplicationPolicySetKM.get(cls.cluster_aps_uuid)
+        pm = PolicyManagementKM.get(aps.parent_uuid) if aps else None
+        if pm:
+            return cls._cached_obj(PolicyManagement, pm)
+
+        aps_obj = cls.vnc_lib.application_policy_set_read(
+            id=cls.cluster_aps_uuid)
+        return cls.vnc_lib.policy_management_read(
+            fq_name=aps_obj.get_parent_fq_name())
+
+    @classmethod
+    def _get_firewall_policy_obj(cls, fw_policy_uuid):
+        fw_policy = FirewallPolicyKM.get(fw_policy_uuid)
+        if fw_policy:
+            return cls._cached_obj(FirewallPolicy, fw_policy)
+        return cls.vnc_lib.firewall_policy_read(id=fw_policy_uuid)
+
+    @classmethod
+    def _get_firewall_rule_obj(cls, fw_rule_uuid):
+        fw_rule = FirewallRuleKM.get(fw_rule_uuid)
+        if fw_rule:
+            return cls._cached_obj(FirewallRule, fw_rule)
+        return cls.vnc_lib.firewall_rule_read(id=fw_rule_uuid)
+
     @classmethod
     def create_application_policy_set(cls, name, parent_obj=None):
         if not parent_obj:
@@ -581,18 +640,8 @@ class VncSecurityPolicy(VncCommon):
                                tag_after_tail=False, is_global=False,
                                k8s_uuid=None):
 
-        if not cls.cluster_aps_uuid:
-            raise Exception("Cluster Application Policy Set not available.")
-
         # Get parent object for this firewall policy.
-        aps_obj = cls.vnc_lib.application_policy_set_read(
-            id=cls.cluster_aps_uuid)
-
-        try:
-            pm_obj = cls.vnc_lib.policy_management_read(
-                fq_name=aps_obj.get_parent_fq_name())
-        except NoIdError:
-            raise
+        pm_obj = cls._get_policy_management()
 
         fw_policy_obj = FirewallPolicy(
             cls.get_firewall_policy_name(name, namespace, is_global), pm_obj)
@@ -629,7 +678,7 @@ class VncSecurityPolicy(VncCommon):
                 # Get the current firewall rules on this policy.
                 # All rules are delete candidates as any of them could have
                 # changed.
-                fw_rules_del_candidates = curr_fw_policy.firewall_rules
+                fw_rules_del_candidates = set(curr_fw_policy.firewall_rules)
 
         # Annotate the FW policy object with input spec.
         # This will be used later to identify and validate subsequent modify
@@ -654,7 +703,7 @@ class VncSecurityPolicy(VncCommon):
             fw_rules, deny_all_rule_uuid, egress_deny_all_rule_uuid =\
                 FWRule.parser(name, namespace, pm_obj, spec)
 
-        for rule in fw_rules:
+        for index, rule in enumerate(fw_rules):
             try:
                 rule_uuid = cls.vnc_lib.firewall_rule_create(rule)
             except RefsExistError:
@@ -663,29 +712,30 @@ class VncSecurityPolicy(VncCommon):
 
                 # The rule is in use and needs to stay.
                 # Remove it from delete candidate collection.
-                if fw_rules_del_candidates and\
-                   rule_uuid in fw_rules_del_candidates:
-                    fw_rules_del_candidates.remove(rule_uuid)
+                fw_rules_del_candidates.discard(rule_uuid)
 
-            rule_obj = cls.vnc_lib.firewall_rule_read(id=rule_uuid)
             FirewallRuleKM.locate(rule_uuid)
 
+            # The rule written carries its fq_name and uuid, it is the target
+            # of the ref without being read back.
             fw_policy_obj.add_firewall_rule(
-                rule_obj,
-                cls.construct_sequence_number(fw_rules.index(rule)))
+                rule, cls.construct_sequence_number(index))
 
+        deny_all_rule_uuids = []
         if deny_all_rule_uuid:
-            VncSecurityPolicy.add_firewall_rule(
-                VncSecurityPolicy.deny_all_fw_policy_uuid, deny_all_rule_uuid)
+            deny_all_rule_uuids.append(deny_all_rule_uuid)
             custom_ann_kwargs['deny_all_rule_uuid'] = deny_all_rule_uuid
 
         if egress_deny_all_rule_uuid:
-            VncSecurityPolicy.add_firewall_rule(
-                VncSecurityPolicy.deny_all_fw_policy_uuid,
-                egress_deny_all_rule_uuid)
+            deny_all_rule_uuids.append(egress_deny_all_rule_uuid)
             custom_ann_kwargs['egress_deny_all_rule_uuid'] =\
                 egress_deny_all_rule_uuid
 
+        if deny_all_rule_uuids:
+            VncSecurityPolicy.add_firewall_rules(
+                VncSecurityPolicy.deny_all_fw_policy_uuid,
+                deny_all_rule_uuids)
+
         FirewallPolicyKM.add_annotations(
             VncSecurityPolicy.vnc_security_policy_instance,
             fw_policy_obj, namespace, name, None, **custom_ann_kwargs)
@@ -694,16 +744,13 @@ class VncSecurityPolicy(VncCommon):
             fw_policy_uuid = cls.vnc_lib.firewall_policy_create(fw_policy_obj)
         except RefsExistError:
 
-            # Remove existing firewall rule refs on this fw policy.
-            # Once existing firewall rules are remove, firewall policy will
-            # be updated with rules correspoinding to current input spec.
-            for rule in fw_rules_del_candidates:
-                cls.delete_firewall_rule(fw_policy_uuid, rule)
-
+            # The update replaces the firewall rule refs on this fw policy
+            # with the rules corresponding to current input spec, in one
+            # call. The rules left without refs are deleted after.
             cls.vnc_lib.firewall_policy_update(fw_policy_obj)
             fw_policy_uuid = fw_policy_obj.get_uuid()
+            cls._delete_firewall_rules(fw_rules_del_candidates)
 
-        fw_policy_obj = cls.vnc_lib.firewall_policy_read(id=fw_policy_uuid)
         FirewallPolicyKM.locate(fw_policy_uuid)
 
         return fw_policy_uuid
@@ -711,18 +758,8 @@ class VncSecurityPolicy(VncCommon):
     @classmethod
     def delete_firewall_policy(cls, name, namespace, is_global=False):
 
-        if not cls.cluster_aps_uuid:
-            raise Exception("Cluster Application Policy Set not available.")
-
         # Get parent object for this firewall policy.
-        aps_obj = cls.vnc_lib.application_policy_set_read(
-            id=cls.cluster_aps_uuid)
-
-        try:
-            pm_obj = cls.vnc_lib.policy_management_read(
-                fq_name=aps_obj.get_parent_fq_name())
-        except NoIdError:
-            raise
+        pm_obj = cls._get_policy_management()
         fw_policy_fq_name = pm_obj.get_fq_name() +\
             [cls.get_firewall_policy_name(name, namespace, is_global)]
         fw_policy_uuid = FirewallPolicyKM.get_fq_name_to_uuid(fw_policy_fq_name)
@@ -732,43 +769,31 @@ class VncSecurityPolicy(VncCommon):
             return
 
         fw_policy = FirewallPolicyKM.locate(fw_policy_uuid)
-        fw_policy_rules = fw_policy.firewall_rules
-
-        # Remove deny all firewall rule, if any.
-        if fw_policy.deny_all_rule_uuid:
-            VncSecurityPolicy.delete_firewall_rule(
+        fw_policy_rules = set(fw_policy.firewall_rules)
+
+        # Remove deny all firewall rules, if any.
+        deny_all_rule_uuids = [
+            rule_uuid for rule_uuid in (fw_policy.deny_all_rule_uuid,
+                                        fw_policy.egress_deny_all_rule_uuid)
+            if rule_uuid]
+        if deny_all_rule_uuids:
+            VncSecurityPolicy.delete_firewall_rules(
                 VncSecurityPolicy.deny_all_fw_policy_uuid,
-                fw_policy.deny_all_rule_uuid)
-
-        # Remove egress deny all firewall rule, if any.
-        if fw_policy.egress_deny_all_rule_uuid:
-            VncSecurityPolicy.delete_firewall_rule(
-                VncSecurityPolicy.deny_all_fw_policy_uuid,
-                fw_policy.egress_deny_all_rule_uuid)
-
-        for rule_uuid in fw_policy_rules:
-            VncSecurityPolicy.delete_firewall_rule(fw_policy_uuid, rule_uuid)
+                deny_all_rule_uuids)
 
         cls.remove_firewall_policy(name, namespace)
         cls.vnc_lib.firewall_policy_delete(id=fw_policy_uuid)
         FirewallPolicyKM.delete(fw_policy_uuid)
 
+        # The rules of the deleted policy have no refs left to remove.
+        cls._delete_firewall_rules(fw_policy_rules)
+
     @classmethod
     def create_firewall_rule_allow_all(cls, rule_name, labels_dict,
                                        src_labels_dict=None):
 
-        if not cls.cluster_aps_uuid:
-            raise Exception("Cluster Application Policy Set not available.")
-
         # Get parent object for this firewall policy.
-        aps_obj = cls.vnc_lib.application_policy_set_read(
-            id=cls.cluster_aps_uuid)
-
-        try:
-            pm_obj = cls.vnc_lib.policy_management_read(
-                fq_name=aps_obj.get_parent_fq_name())
-        except NoIdError:
-            raise
+        pm_obj = cls._get_policy_management()
 
         tags = VncSecurityPolicy.get_tags_fn(labels_dict, True)
 
@@ -802,7 +827,6 @@ class VncSecurityPolicy(VncCommon):
         except RefsExistError:
             cls.vnc_lib.firewall_rule_update(rule)
             rule_uuid = rule.get_uuid()
-        cls.vnc_lib.firewall_rule_read(id=rule_uuid)
         FirewallRuleKM.locate(rule_uuid)
 
         return rule_uuid
@@ -810,18 +834,8 @@ class VncSecurityPolicy(VncCommon):
     @classmethod
     def create_firewall_rule_deny_all(cls, rule_name, tags):
 
-        if not cls.cluster_aps_uuid:
-            raise Exception("Cluster Application Policy Set not available.")
-
         # Get parent object for this firewall policy.
-        aps_obj = cls.vnc_lib.application_policy_set_read(
-            id=cls.cluster_aps_uuid)
-
-        try:
-            pm_obj = cls.vnc_lib.policy_management_read(
-                fq_name=aps_obj.get_parent_fq_name())
-        except NoIdError:
-            raise
+        pm_obj = cls._get_policy_management()
 
         protocol = FWDefaultProtoPort.PROTOCOL.value
         port_start = FWDefaultProtoPort.START_PORT.value
@@ -854,18 +868,8 @@ class VncSecurityPolicy(VncCommon):
     @classmethod
     def create_firewall_rule_egress_deny_all(cls, name, namespace, tags):
 
-        if not cls.cluster_aps_uuid:
-            raise Exception("Cluster Application Policy Set not available.")
-
         # Get parent object for this firewall policy.
-        aps_obj = cls.vnc_lib.application_policy_set_read(
-            id=cls.cluster_aps_uuid)
-
-        try:
-            pm_obj = cls.vnc_lib.policy_management_read(
-                fq_name=aps_obj.get_parent_fq_name())
-        except NoIdError:
-            raise
+        pm_obj = cls._get_policy_management()
 
         rule_name = "-".join([FWRule.get_egress_rule_name(name, namespace),
                               "default-deny-all"])
@@ -901,30 +905,55 @@ class VncSecurityPolicy(VncCommon):
 
     @classmethod
     def _move_trailing_firewall_policies(cls, aps_obj, tail_sequence):
-        sequence_num = float(tail_sequence.get_sequence())
-        if cls.deny_all_fw_policy_uuid:
-            sequence = cls.construct_sequence_number(sequence_num)
-            try:
-                fw_policy_obj = cls.vnc_lib.firewall_policy_read(
-                    id=cls.deny_all_fw_policy_uuid)
-            except NoIdError:
-                raise
-            aps_obj.add_firewall_policy(fw_policy_obj, sequence)
-            sequence_num += 1
+        """
+        Move the trailing policies on the APS object from tail_sequence on.
 
-        if cls.allow_all_fw_policy_uuid:
+        The APS object is updated by the caller along with its other
+        changes.
+        """
+        sequence_num = float(tail_sequence.get_sequence())
+        for fw_policy_uuid in (cls.deny_all_fw_policy_uuid,
+                               cls.allow_all_fw_policy_uuid):
+            if not fw_policy_uuid:
+                continue
             sequence = cls.construct_sequence_number(sequence_num)
-            try:
-                fw_policy_obj = cls.vnc_lib.firewall_policy_read(
-                    id=cls.allow_all_fw_policy_uuid)
-            except NoIdError:
-                raise
+            fw_policy_obj = cls._get_firewall_policy_obj(fw_policy_uuid)
             aps_obj.add_firewall_policy(fw_policy_obj, sequence)
             sequence_num += 1
 
-        cls.vnc_lib.application_policy_set_update(aps_obj)
         return cls.construct_sequence_number(sequence_num)
 
+    @classmethod
+    def _get_firewall_policy_markers(cls, fw_policy_uuid):
+        """
+        Get the owner, tail and after tail markers of a firewall policy.
+        """
+        fw_policy = FirewallPolicyKM.get(fw_policy_uuid)
+        if fw_policy:
+            return (fw_policy.owner == 'k8s', fw_policy.is_tail(),
+                    fw_policy.is_after_tail())
+
+        k8s_obj = False
+        tail_obj = False
+        post_tail_obj = False
+        try:
+            fw_policy_obj = cls.vnc_lib.firewall_policy_read(
+                id=fw_policy_uuid)
+        except NoIdError:
+            # TBD Error handling.
+            return k8s_obj, tail_obj, post_tail_obj
+
+        annotations = fw_policy_obj.get_annotations()
+        if annotations:
+            for kvp in annotations.get_key_value_pair() or []:
+                if kvp.key == 'owner' and kvp.value == 'k8s':
+                    k8s_obj = True
+                elif kvp.key == 'tail' and kvp.value == 'True':
+                    tail_obj = True
+                elif kvp.key == 'after_tail' and kvp.value == 'True':
+                    post_tail_obj = True
+        return k8s_obj, tail_obj, post_tail_obj
+
     @classmethod
     def lhs_before_rhs(cls, left, right):
         if float(left) < float(right):
@@ -934,17 +963,40 @@ class VncSecurityPolicy(VncCommon):
     @classmethod
     def add_firewall_policy(cls, fw_policy_uuid, append_after_tail=False,
                             tail=False):
+        cls.add_firewall_policies([fw_policy_uuid],
+                                  append_after_tail=append_after_tail,
+                                  tail=tail)
+
+    @classmethod
+    def add_firewall_policies(cls, fw_policy_uuids, append_after_tail=False,
+                              tail=False):
+        """
+        Add firewall policies to the cluster APS in one APS update.
+        """
         if not cls.cluster_aps_uuid:
             raise Exception("Cluster Application Policy Set not available.")
 
         aps_obj = cls.vnc_lib.application_policy_set_read(
             id=cls.cluster_aps_uuid)
 
-        try:
-            new_fw_policy_obj = cls.vnc_lib.firewall_policy_read(
-                id=fw_policy_uuid)
-        except NoIdError:
-            raise
+        updated = False
+        for fw_policy_uuid in fw_policy_uuids:
+            if cls._place_firewall_policy(aps_obj, fw_policy_uuid,
+                                          append_after_tail, tail):
+                updated = True
+
+        if updated:
+            cls.vnc_lib.application_policy_set_update(aps_obj)
+
+    @classmethod
+    def _place_firewall_policy(cls, aps_obj, fw_policy_uuid,
+                               append_after_tail=False, tail=False):
+        """
+        Add a firewall policy to the APS object at its expected sequence.
+
+        Returns True if the APS object was modified.
+        """
+        new_fw_policy_obj = cls._get_firewall_policy_obj(fw_policy_uuid)
 
         tail_obj = False
         post_tail_obj = False
@@ -954,36 +1006,19 @@ class VncSecurityPolicy(VncCommon):
         validate_curr_seq_num = None
         fw_policy_refs = aps_obj.get_firewall_policy_refs()
         for fw_policy in fw_policy_refs if fw_policy_refs else []:
-            try:
-                fw_policy_obj = cls.vnc_lib.firewall_policy_read(
-                    id=fw_policy['uuid'])
-            except NoIdError:
-                # TBD Error handling.
-                pass
 
             # If firewall policy is already found on this APS, validate that it
             # is in the expected sequence on the APS.
-            if new_fw_policy_obj.get_fq_name() == fw_policy_obj.get_fq_name():
+            if new_fw_policy_obj.get_fq_name() == fw_policy['to']:
                 if not append_after_tail and not tail:
                     # No special sequencing requested. Nothing more to verify.
-                    return
+                    return False
                 else:
                     # Special sequencing is being requested. Proceed to validate.
                     validate_curr_seq_num = fw_policy['attr'].get_sequence()
 
-            k8s_obj = False
-            tail_obj = False
-            post_tail_obj = False
-
-            annotations = fw_policy_obj.get_annotations()
-            if annotations:
-                for kvp in annotations.get_key_value_pair() or []:
-                    if kvp.key == 'owner' and kvp.value == 'k8s':
-                        k8s_obj = True
-                    elif kvp.key == 'tail' and kvp.value == 'True':
-                        tail_obj = True
-                    elif kvp.key == 'after_tail' and kvp.value == 'True':
-                        post_tail_obj = True
+            k8s_obj, tail_obj, post_tail_obj = \
+                cls._get_firewall_policy_markers(fw_policy['uuid'])
 
             # Track the sequence number of "tail" object.
             if k8s_obj and tail_obj:
@@ -1011,13 +1046,13 @@ class VncSecurityPolicy(VncCommon):
                 # If being requested to add after tail, make sure that current
                 # sequence number if after "tail" object.
                 if cls.lhs_before_rhs(tail_k8s_obj_sequence, validate_curr_seq_num):
-                    return
+                    return False
 
             elif tail and post_tail_k8s_obj_sequence:
                 # If being requested to add "tail" object, make sure that current
                 # sequence number if before all post "tail" objects.
                 if cls.lhs_before_rhs(validate_curr_seq_num, post_tail_k8s_obj_sequence):
-                    return
+                    return False
 
             vnc_kube_config.logger().error(
                 "%s - Validation of sequence number for existing Firewall Policy failed."
@@ -1051,21 +1086,14 @@ class VncSecurityPolicy(VncCommon):
                 sequence = last_k8s_fw_policy_sequence
 
         aps_obj.add_firewall_policy(new_fw_policy_obj, sequence)
-        cls.vnc_lib.application_policy_set_update(aps_obj)
+        return True
 
     @classmethod
     def remove_firewall_policy(cls, name, namespace, is_global=False):
         if not cls.cluster_aps_uuid:
             raise Exception("Cluster Application Policy Set not available.")
 
-        aps_obj = cls.vnc_lib.application_policy_set_read(
-            id=cls.cluster_aps_uuid)
-
-        try:
-            pm_obj = cls.vnc_lib.policy_management_read(
-                fq_name=aps_obj.get_parent_fq_name())
-        except NoIdError:
-            raise
+        pm_obj = cls._get_policy_management()
 
         fw_policy_fq_name = pm_obj.get_fq_name() +\
             [cls.get_firewall_policy_name(name, namespace, is_global)]
@@ -1076,52 +1104,69 @@ class VncSecurityPolicy(VncCommon):
             # We are not aware of this firewall policy.
             return
 
-        try:
-            fw_policy_obj = cls.vnc_lib.firewall_policy_read(id=fw_policy_uuid)
-        except NoIdError:
-            raise
-
+        aps_obj = cls.vnc_lib.application_policy_set_read(
+            id=cls.cluster_aps_uuid)
+        fw_policy_obj = cls._get_firewall_policy_obj(fw_policy_uuid)
         aps_obj.del_firewall_policy(fw_policy_obj)
         cls.vnc_lib.application_policy_set_update(aps_obj)
 
     @classmethod
     def add_firewall_rule(cls, fw_policy_uuid, fw_rule_uuid):
+        cls.add_firewall_rules(fw_policy_uuid, [fw_rule_uuid])
 
+    @classmethod
+    def add_firewall_rules(cls, fw_policy_uuid, fw_rule_uuids):
+        """
+        Append firewall rules to a firewall policy in one policy update.
+        """
         try:
             fw_policy_obj = cls.vnc_lib.firewall_policy_read(id=fw_policy_uuid)
         except NoIdError:
             raise
 
-        try:
-            fw_rule_obj = cls.vnc_lib.firewall_rule_read(id=fw_rule_uuid)
-        except NoIdError:
-            raise
-
         last_entry_sequence = None
         rule_refs = fw_policy_obj.get_firewall_rule_refs()
+        fw_rule_uuids = [rule_uuid for rule_uuid in fw_rule_uuids]
         for rule in rule_refs if rule_refs else []:
 
-            if fw_rule_uuid == rule['uuid']:
-                return
+            if rule['uuid'] in fw_rule_uuids:
+                fw_rule_uuids.remove(rule['uuid'])
 
             if not last_entry_sequence or last_entry_sequence < rule['attr'].get_sequence():
                 last_entry_sequence = rule['attr'].get_sequence()
 
+        if not fw_rule_uuids:
+            return
+
         # Start with presumption that this is the first.
-        sequence = cls.construct_sequence_number('1.0')
+        sequence_num = 1.0
         if last_entry_sequence:
-            sequence = cls.construct_sequence_number(
-                float(last_entry_sequence) + float('1.0'))
+            sequence_num = float(last_entry_sequence) + 1.0
+
+        for fw_rule_uuid in fw_rule_uuids:
+            fw_rule_obj = cls._get_firewall_rule_obj(fw_rule_uuid)
+            fw_policy_obj.add_firewall_rule(
+                fw_rule_obj, cls.construct_sequence_number(sequence_num))
+            sequence_num += 1.0
 
-        fw_policy_obj.add_firewall_rule(fw_rule_obj, sequence)
         cls.vnc_lib.firewall_policy_update(fw_policy_obj)
         FirewallPolicyKM.locate(fw_policy_obj.get_uuid())
 
     @classmethod
     def delete_firewall_rule(cls, fw_policy_uuid, fw_rule_uuid):
+        cls.delete_firewall_rules(fw_policy_uuid, [fw_rule_uuid])
+
+    @classmethod
+    def delete_firewall_rules(cls, fw_policy_uuid, fw_rule_uuids):
+        """
+        Remove firewall rules from a policy in one policy update and delete
+        them.
+        """
+        fw_rule_uuids = [rule_uuid for rule_uuid in fw_rule_uuids
+                         if rule_uuid]
 
         # If policy or rule info is not provided, then there is nothing to do.
-        if not fw_policy_uuid or not fw_rule_uuid:
+        if not fw_policy_uuid or not fw_rule_uuids:
             return
 
         try:
@@ -1129,24 +1174,54 @@ class VncSecurityPolicy(VncCommon):
         except NoIdError:
             raise
 
-        try:
-            fw_rule_obj = cls.vnc_lib.firewall_rule_read(id=fw_rule_uuid)
-        except NoIdError:
-            return
+        rule_refs = fw_policy_obj.get_firewall_rule_refs() or []
+        ref_uuids = set(rule['uuid'] for rule in rule_refs)
+        removed = False
+        for fw_rule_uuid in fw_rule_uuids:
+            if fw_rule_uuid not in ref_uuids:
+                continue
+            try:
+                fw_rule_obj = cls._get_firewall_rule_obj(fw_rule_uuid)
+            except NoIdError:
+                continue
+            fw_policy_obj.del_firewall_rule(fw_rule_obj)
+            removed = True
 
-        addr_grp_refs = fw_rule_obj.get_address_group_refs()
+        if removed:
+            cls.vnc_lib.firewall_policy_update(fw_policy_obj)
+            FirewallPolicyKM.locate(fw_policy_obj.get_uuid())
 
-        fw_policy_obj.del_firewall_rule(fw_rule_obj)
+        cls._delete_firewall_rules(fw_rule_uuids)
 
-        cls.vnc_lib.firewall_policy_update(fw_policy_obj)
-        FirewallPolicyKM.locate(fw_policy_obj.get_uuid())
+    @classmethod
+    def _delete_firewall_rules(cls, fw_rule_uuids):
+        """
+        Delete firewall rules no policy refers to, and their address groups.
+        """
+        for fw_rule_uuid in fw_rule_uuids:
+            fw_rule = FirewallRuleKM.get(fw_rule_uuid)
+            if fw_rule:
+                addr_grp_uuids = list(fw_rule.address_groups)
+            else:
+                try:
+                    fw_rule_obj = cls.vnc_lib.firewall_rule_read(
+                        id=fw_rule_uuid)
+                except NoIdError:
+                    continue
+                addr_grp_uuids = [
+                    addr_grp['uuid'] for addr_grp in
+                    fw_rule_obj.get_address_group_refs() or []]
 
-        # Delete the rule.
-        cls.vnc_lib.firewall_rule_delete(id=fw_rule_uuid)
+            # Delete the rule.
+            try:
+                cls.vnc_lib.firewall_rule_delete(id=fw_rule_uuid)
+            except NoIdError:
+                pass
+            FirewallRuleKM.delete(fw_rule_uuid)
 
-        # Try to delete address groups allocated for this FW rule.
-        for addr_grp in addr_grp_refs if addr_grp_refs else []:
-            FWRule.delete_address_group(addr_grp['uuid'])
+            # Try to delete address groups allocated for this FW rule.
+            for addr_grp_uuid in addr_grp_uuids:
+                FWRule.delete_address_group(addr_grp_uuid)
 
     @classmethod
     def create_allow_all_security_policy(cls):
@@ -1327,32 +1402,27 @@ class VncSecurityPolicy(VncCommon):
                 continue
 
             # De-link the firewall policy from APS.
-            try:
-                fw_policy_obj = cls.vnc_lib.firewall_policy_read(id=fw_policy_uuid)
-            except NoIdError:
-                raise
+            fw_policy_obj = cls._get_firewall_policy_obj(fw_policy_uuid)
             aps_obj.del_firewall_policy(fw_policy_obj)
             removed_firewall_policies.append(fw_policy_uuid)
 
-        # If we need to remove some policies, update the object accordingly.
-        if removed_firewall_policies:
-            cls.vnc_lib.application_policy_set_update(aps_obj)
-            aps.update()
-
         # Derive the sequence number we can use to start recreating firewall
         # policies. If there are existing policies that dont belong and are
         # not managed by the cluster, recreate the cluster firewall policies
-        # to the tail.
-        fw_policy_refs = aps.get_firewall_policy_refs_sorted()
+        # to the tail. The removal and the re-creation are sent in one APS
+        # update.
+        fw_policy_refs = aps_obj.get_firewall_policy_refs()
 
         # Lets begin with the assumption that we are the first policy.
         sequence = cls.construct_sequence_number('1.0')
         if fw_policy_refs:
             # Get the sequence number of the last policy on this APS.
-            last_entry_sequence = fw_policy_refs[-1]['attr'].get_sequence()
+            last_entry_sequence = max(
+                float(fw_policy['attr'].get_sequence())
+                for fw_policy in fw_policy_refs)
             # Construct the next sequence number to use.
             sequence = cls.construct_sequence_number(
-                float(last_entry_sequence) + float('1.0'))
+                last_entry_sequence + float('1.0'))
 
         # Filter our infra created firewall policies.
         try:
@@ -1382,10 +1452,7 @@ class VncSecurityPolicy(VncCommon):
             vnc_kube_config.logger().debug(
                 "%s - Recreate  FW policy [%s] on APS [%s] at sequence [%s]"
                 % (cls.name, fw_policy_uuid, aps.name, sequence.get_sequence()))
-            try:
-                fw_policy_obj = cls.vnc_lib.firewall_policy_read(id=fw_policy_uuid)
-            except NoIdError:
-                raise
+            fw_policy_obj = cls._get_firewall_policy_obj(fw_policy_uuid)
             aps_obj.add_firewall_policy(fw_policy_obj, sequence)
             sequence = cls.construct_sequence_number(
                 float(sequence.get_sequence()) + float('1.0'))
@@ -1399,6 +1466,9 @@ class VncSecurityPolicy(VncCommon):
         Synchronize K8s network policies with Contrail Security policy.
         Expects that FW policies on the APS are in proper order.
 
+        The reconcile is a single pass over the cached state, the firewall
+        policies missing from the APS are added back in one APS update.
+
         Returns a list of orphaned or invalid firewall policies.
         """
 
@@ -1440,6 +1510,7 @@ class VncSecurityPolicy(VncCommon):
 
         # Get list of user created network policies.
         configured_network_policies = NetworkPolicyKM.get_configured_policies()
+        missing_firewall_policies = []
         for nw_policy_uuid in configured_network_policies:
 
             np = NetworkPolicyKM.find_by_name_or_uuid(nw_policy_uuid)
@@ -1457,11 +1528,14 @@ class VncSecurityPolicy(VncCommon):
             # created policies as expected. Add it again so it will be inserted
             # in the right place.
             if fw_policy_uuid not in curr_user_firewall_policies:
-                cls.add_firewall_policy(fw_policy_uuid)
+                missing_firewall_policies.append(fw_policy_uuid)
             else:
                 # Filter out processed policies.
                 curr_user_firewall_policies.remove(fw_policy_uuid)
 
+        if missing_firewall_policies:
+            cls.add_firewall_policies(missing_firewall_policies)
+
         # Return orphaned firewall policies that could not be validated against
         # user created network policy.
         headless_fw_policy_uuids = curr_user_firewall_policies